@@ -0,0 +1,99 @@
+"""
+Benchmark of checkpoint storage size with delta checkpoints.
+
+A chat loop appends one `Message` per step and checkpoints every step into a
+SQLite `SQLCheckpointer`. Compares the bytes written to the `state` column and
+the latest-checkpoint load time when every checkpoint is stored in full
+(`snapshot_interval=1`) against delta checkpoints with periodic full snapshots.
+
+Run:
+    python -m benchmarks.checkpoint_delta_storage
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Annotated, TypedDict
+
+from llmfy import Message, Role
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import SQLCheckpointer
+
+
+def add_message(old: list[Message], new: list[Message]):
+    if old is None:
+        return new
+    return old + new
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[Message], add_message]
+    turns: int
+
+
+def build_chat(checkpointer: SQLCheckpointer, steps: int) -> FlowEngine:
+    """A node appending one message per step, looping `steps` times."""
+
+    async def chat(state: ChatState) -> dict:
+        reply = Message(role=Role.ASSISTANT, content=f"reply to turn {state['turns']}")
+        return {"messages": [reply], "turns": state["turns"] + 1}
+
+    async def route(state: ChatState) -> str:
+        return "chat" if state["turns"] < steps else END
+
+    flow = FlowEngine(ChatState, checkpointer=checkpointer)
+    flow.add_node("chat", chat)
+    flow.add_edge(START, "chat")
+    flow.add_conditional_edge("chat", ["chat", END], route)
+    return flow.build()
+
+
+async def measure(
+    steps: int, interval: int, directory: str
+) -> tuple[int, float, float]:
+    """Bytes stored, run time in ms and latest checkpoint load time in ms."""
+    path = os.path.join(directory, f"bench_{steps}_{interval}.db")
+    checkpointer = SQLCheckpointer(f"sqlite:///{path}", snapshot_interval=interval)
+    flow = build_chat(checkpointer, steps)
+
+    start = time.perf_counter()
+    await flow.invoke({"messages": [], "turns": 0}, session_id="bench")
+    run_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    await checkpointer.load("bench")
+    load_ms = (time.perf_counter() - start) * 1e3
+    await checkpointer.close()
+
+    with sqlite3.connect(path) as connection:
+        (size,) = connection.execute(
+            "SELECT SUM(LENGTH(state)) FROM llmfy_checkpoint"
+        ).fetchone()
+    return size, run_ms, load_ms
+
+
+async def main(steps: list[int], interval: int):
+    print(
+        f"{'steps':>7}{'interval':>10}{'stored KiB':>13}{'run ms':>10}{'load ms':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for count in steps:
+            for snapshot_interval in (1, interval):
+                size, run_ms, load_ms = await measure(
+                    count, snapshot_interval, directory
+                )
+                print(
+                    f"{count:>7}{snapshot_interval:>10}{size / 1024:>13.1f}"
+                    f"{run_ms:>10.1f}{load_ms:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--interval", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.interval))
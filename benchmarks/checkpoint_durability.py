@@ -0,0 +1,91 @@
+"""
+Benchmark of end-to-end run latency per checkpoint durability mode.
+
+Runs a 20-step loop against a checkpointer that adds a fixed round-trip time to
+every write call, modelling a remote Redis / SQL store, and reports the `invoke`
+latency for `sync`, `async` (plus the time `flush()` still waits) and `exit-only`.
+
+Run:
+    python -m benchmarks.checkpoint_durability
+"""
+
+import argparse
+import asyncio
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import InMemoryCheckpointer
+
+
+class BenchState(TypedDict):
+    counter: int
+
+
+class RemoteCheckpointer(InMemoryCheckpointer):
+    """In-memory checkpointer paying a round trip per write call."""
+
+    def __init__(self, round_trip: float):
+        super().__init__()
+        self.round_trip = round_trip
+
+    async def save(self, checkpoint):
+        await asyncio.sleep(self.round_trip)
+        await super().save(checkpoint)
+
+    async def save_many(self, checkpoints):
+        # One round trip for the whole batch
+        await asyncio.sleep(self.round_trip)
+        for checkpoint in checkpoints:
+            await super().save(checkpoint)
+
+
+def build_loop(checkpointer, durability: str, steps: int, work: float) -> FlowEngine:
+    """A node doing `work` seconds of async I/O, looping `steps` times."""
+
+    async def step(state: BenchState) -> dict:
+        await asyncio.sleep(work)
+        return {"counter": state["counter"] + 1}
+
+    async def route(state: BenchState) -> str:
+        return "step" if state["counter"] < steps else END
+
+    flow = FlowEngine(BenchState, checkpointer=checkpointer, durability=durability)
+    flow.add_node("step", step)
+    flow.add_edge(START, "step")
+    flow.add_conditional_edge("step", ["step", END], route)
+    return flow.build()
+
+
+async def measure(durability: str, steps: int, round_trip: float, work: float):
+    """Invoke latency and the following flush time, in milliseconds."""
+    flow = build_loop(RemoteCheckpointer(round_trip), durability, steps, work)
+
+    start = time.perf_counter()
+    await flow.invoke({"counter": 0})
+    invoke_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    await flow.flush()
+    flush_ms = (time.perf_counter() - start) * 1e3
+    await flow.close()
+    return invoke_ms, flush_ms
+
+
+async def main(steps: int, round_trip_ms: float, work_ms: float):
+    print(f"{steps} steps, {round_trip_ms} ms per write, {work_ms} ms per node")
+    print(f"{'durability':<12}{'invoke ms':>12}{'flush ms':>12}")
+    for durability in ("sync", "async", "exit-only"):
+        invoke_ms, flush_ms = await measure(
+            durability, steps, round_trip_ms / 1e3, work_ms / 1e3
+        )
+        print(f"{durability:<12}{invoke_ms:>12.1f}{flush_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--round-trip-ms", type=float, default=2.0)
+    parser.add_argument("--work-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.round_trip_ms, args.work_ms))
@@ -0,0 +1,144 @@
+"""
+Benchmark of FileLogCheckpointer write throughput against SQLite.
+
+Concurrent sessions each save their checkpoints one `save()` at a time, as
+sync durability runs do, on the file log with every fsync mode and on
+SQLite through the sync driver and through aiosqlite. Then the latest
+checkpoint of every session is loaded and listed, and the file log is
+compacted after pruning.
+
+Run:
+    python -m benchmarks.checkpoint_file_log
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+from llmfy.flow_engine.checkpointer import (
+    BaseCheckpointer,
+    FileLogCheckpointer,
+    FsyncMode,
+    RetentionPolicy,
+    SQLCheckpointer,
+)
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointMetadata,
+)
+
+
+def make_checkpoints(sessions: int, per_session: int) -> list[Checkpoint]:
+    """Full checkpoints of `sessions` sessions, interleaved as concurrent runs."""
+    start = datetime.now(UTC)
+    checkpoints = []
+    for step in range(per_session):
+        for session in range(sessions):
+            metadata = CheckpointMetadata(
+                checkpoint_id=f"s{session}-{step}",
+                session_id=f"s{session}",
+                timestamp=start + timedelta(milliseconds=step),
+                node_name="agent",
+                step=step,
+                parent_id=f"s{session}-{step - 1}" if step else None,
+            )
+            state = {"query": f"question {session}", "answer": "x" * 200}
+            checkpoints.append(Checkpoint(metadata=metadata, state=state))
+    return checkpoints
+
+
+def make_checkpointer(backend: str, directory: str) -> BaseCheckpointer:
+    path = os.path.join(directory, f"{backend}_{time.time_ns()}")
+    if backend == "sqlite-sync":
+        return SQLCheckpointer(f"sqlite:///{path}.db")
+    if backend == "sqlite-async":
+        return SQLCheckpointer(f"sqlite+aiosqlite:///{path}.db")
+    return FileLogCheckpointer(path, fsync=backend.removeprefix("filelog-"))
+
+
+async def measure(backend: str, checkpoints, sessions: int, directory: str):
+    """Checkpoints saved per second, and microseconds per load and per list."""
+    checkpointer = make_checkpointer(backend, directory)
+    await checkpointer.load("warm-up")
+    by_session: dict[str, list] = {}
+    for checkpoint in checkpoints:
+        by_session.setdefault(checkpoint.metadata.session_id, []).append(checkpoint)
+
+    async def run(session_checkpoints):
+        for checkpoint in session_checkpoints:
+            await checkpointer.save(checkpoint)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(items) for items in by_session.values()))
+    saves_per_sec = len(checkpoints) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for session in range(sessions):
+        assert await checkpointer.load(f"s{session}") is not None
+    load_us = (time.perf_counter() - start) * 1e6 / sessions
+
+    start = time.perf_counter()
+    for session in range(sessions):
+        await checkpointer.list(f"s{session}", limit=10)
+    list_us = (time.perf_counter() - start) * 1e6 / sessions
+
+    close = getattr(checkpointer, "close", None)
+    if close is not None:
+        await close()
+    return saves_per_sec, load_us, list_us
+
+
+async def measure_compaction(checkpoints, keep: int, directory: str):
+    """Log bytes before and after compacting, and the compaction time."""
+    checkpointer = FileLogCheckpointer(
+        os.path.join(directory, f"compact_{time.time_ns()}"),
+        segment_size=4 * 1024 * 1024,
+        fsync=FsyncMode.NONE,
+    )
+    for checkpoint in checkpoints:
+        await checkpointer.save(checkpoint)
+    before = checkpointer.get_stats()["total_bytes"]
+    checkpointer.retention = RetentionPolicy(max_checkpoints=keep)
+    start = time.perf_counter()
+    await checkpointer.compact()
+    elapsed_ms = (time.perf_counter() - start) * 1e3
+    after = checkpointer.get_stats()["total_bytes"]
+    await checkpointer.close()
+    return before, after, elapsed_ms
+
+
+async def main(sessions: int, per_session: int, keep: int, backends: list[str]):
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoints = make_checkpoints(sessions, per_session)
+        print(f"{len(checkpoints)} checkpoints of {sessions} concurrent sessions")
+        print(f"{'backend':<18}{'saves/s':>10}{'us/load':>10}{'us/list':>10}")
+        for backend in backends:
+            saves_per_sec, load_us, list_us = await measure(
+                backend, checkpoints, sessions, directory
+            )
+            print(
+                f"{backend:<18}{saves_per_sec:>10.0f}{load_us:>10.1f}{list_us:>10.1f}"
+            )
+
+        before, after, elapsed_ms = await measure_compaction(
+            checkpoints, keep, directory
+        )
+        print(
+            f"\ncompaction keeping {keep} per session: {before / 1024:.0f} KiB -> "
+            f"{after / 1024:.0f} KiB in {elapsed_ms:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    backends = [f"filelog-{mode}" for mode in FsyncMode]
+    backends += ["sqlite-sync", "sqlite-async"]
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--per-session", type=int, default=200)
+    parser.add_argument("--keep", type=int, default=20, help="Checkpoints kept")
+    parser.add_argument("--backends", nargs="+", choices=backends, default=backends)
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.per_session, args.keep, args.backends))
@@ -0,0 +1,96 @@
+"""
+Benchmark of InMemoryCheckpointer saves on long sessions and its memory budget.
+
+Part one saves many checkpoints into a single session and reports the mean
+save time per block of checkpoints, which stays flat when a save does not
+depend on the length of the session. Part two runs many chat sessions with and
+without `max_bytes` and reports the sessions kept, the approximate bytes held
+and the mean time per session.
+
+Run:
+    python -m benchmarks.checkpoint_memory_budget
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+
+from llmfy import Message, Role
+from llmfy.flow_engine.checkpointer import InMemoryCheckpointer
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointMetadata,
+)
+
+
+def make_checkpoint(session_id: str, step: int, start: datetime) -> Checkpoint:
+    """Full checkpoint of a chat session at `step`."""
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"{session_id}-{step}",
+        session_id=session_id,
+        timestamp=start + timedelta(milliseconds=step),
+        node_name="chat",
+        step=step,
+        parent_id=f"{session_id}-{step - 1}" if step else None,
+    )
+    message = Message(role=Role.ASSISTANT, content=f"reply {step} " + "x" * 200)
+    return Checkpoint(metadata=metadata, state={"messages": [message]})
+
+
+async def measure_long_session(checkpoints: int, block: int) -> list[float]:
+    """Mean microseconds per save for each block of `block` saves."""
+    checkpointer = InMemoryCheckpointer()
+    start = datetime.now(UTC)
+    means = []
+    for first in range(0, checkpoints, block):
+        batch = [
+            make_checkpoint("long", step, start) for step in range(first, first + block)
+        ]
+        began = time.perf_counter()
+        for checkpoint in batch:
+            await checkpointer.save(checkpoint)
+        means.append((time.perf_counter() - began) * 1e6 / block)
+    return means
+
+
+async def measure_budget(sessions: int, steps: int, max_bytes: int | None):
+    """Sessions kept, approximate bytes held and mean ms per session."""
+    checkpointer = InMemoryCheckpointer(max_bytes=max_bytes)
+    start = datetime.now(UTC)
+    began = time.perf_counter()
+    for session in range(sessions):
+        for step in range(steps):
+            await checkpointer.save(make_checkpoint(f"s{session}", step, start))
+    elapsed_ms = (time.perf_counter() - began) * 1e3 / sessions
+    stats = checkpointer.get_stats()
+    return stats["total_sessions"], stats["total_bytes"], elapsed_ms
+
+
+async def main(checkpoints: int, block: int, sessions: int, steps: int, max_bytes: int):
+    print(f"{checkpoints} saves into one session")
+    print(f"{'checkpoints':<16}{'us/save':>10}")
+    means = await measure_long_session(checkpoints, block)
+    for i, mean_us in enumerate(means):
+        label = f"{i * block}-{(i + 1) * block}"
+        print(f"{label:<16}{mean_us:>10.1f}")
+
+    print(f"\n{sessions} sessions of {steps} checkpoints")
+    print(f"{'max_bytes':<12}{'sessions':>10}{'bytes':>14}{'ms/session':>12}")
+    for budget in (None, max_bytes):
+        kept, held, session_ms = await measure_budget(sessions, steps, budget)
+        label = "none" if budget is None else str(budget)
+        print(f"{label:<12}{kept:>10}{held:>14}{session_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--checkpoints", type=int, default=10000)
+    parser.add_argument("--block", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--max-bytes", type=int, default=10_000_000)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.checkpoints, args.block, args.sessions, args.steps, args.max_bytes)
+    )
@@ -0,0 +1,132 @@
+"""
+Benchmark of RedisCheckpointer round trips on a high latency link.
+
+Runs against an in-process fake Redis (needs fakeredis, and lupa for the Lua
+mode) whose connection sleeps for a simulated round trip time on every request
+it sends, like a server in another availability zone. Reports the round trips
+and time of a checkpoint save, of listing a session and of loading the latest
+checkpoint.
+
+Run:
+    python -m benchmarks.checkpoint_redis_round_trips
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+
+from llmfy import Message, Role
+from llmfy.flow_engine.checkpointer import RedisCheckpointer
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointDelta,
+    CheckpointMetadata,
+)
+
+
+class SlowConnection(FakeAsyncRedisConnection):
+    """Fake connection paying a round trip per request sent."""
+
+    rtt = 0.0
+    requests = 0
+
+    async def send_packed_command(self, command, check_health=True):
+        SlowConnection.requests += 1
+        await asyncio.sleep(SlowConnection.rtt)
+        return await super().send_packed_command(command, check_health)
+
+
+def make_checkpoints(count: int) -> list[Checkpoint]:
+    """A session of `count` checkpoints appending a message each."""
+    start = datetime(2025, 1, 1)
+    checkpoints, messages = [], []
+    for i in range(count):
+        message = Message(role=Role.USER, content=f"message {i} " + "x" * 200)
+        messages = [*messages, message]
+        delta = None
+        if i:
+            delta = CheckpointDelta(
+                updates={"turn": i}, appends={"messages": [message]}
+            )
+        metadata = CheckpointMetadata(
+            checkpoint_id=f"checkpoint-{i}",
+            session_id="bench",
+            timestamp=start + timedelta(seconds=i),
+            node_name="chat",
+            step=i,
+            parent_id=f"checkpoint-{i - 1}" if i else None,
+        )
+        state = {"messages": messages, "turn": i}
+        checkpoints.append(Checkpoint(metadata=metadata, state=state, delta=delta))
+    return checkpoints
+
+
+async def timed(operation) -> tuple[int, float]:
+    """Requests sent and milliseconds taken by an awaitable."""
+    requests = SlowConnection.requests
+    start = time.perf_counter()
+    await operation
+    return SlowConnection.requests - requests, (time.perf_counter() - start) * 1e3
+
+
+async def measure(mode: str, count: int, limit: int, ttl: int | None):
+    options = {"use_lua": True} if mode == "lua" else {}
+    checkpointer = RedisCheckpointer(ttl=ttl, **options)
+    checkpointer._client = fakeredis.aioredis.FakeRedis.from_url(
+        "redis://fake", decode_responses=True, connection_class=SlowConnection
+    )
+
+    checkpoints = make_checkpoints(count)
+    # Warm-up, connects and loads the script
+    await checkpointer.save(checkpoints[0])
+    requests, save_ms = 0, 0.0
+    for checkpoint in checkpoints[1:]:
+        sent, elapsed = await timed(checkpointer.save(checkpoint))
+        requests += sent
+        save_ms += elapsed
+
+    list_requests, list_ms = await timed(checkpointer.list("bench", limit=limit))
+    load_requests, load_ms = await timed(checkpointer.load("bench"))
+    await checkpointer.close()
+    saves = count - 1
+    return (
+        requests / saves,
+        save_ms / saves,
+        list_requests,
+        list_ms,
+        load_requests,
+        load_ms,
+    )
+
+
+async def main(modes: list[str], count: int, limit: int, rtt_ms: float, ttl: int):
+    SlowConnection.rtt = rtt_ms / 1e3
+    print(f"{count} checkpoints, list of {limit}, {rtt_ms} ms RTT, TTL {ttl} s")
+    print(
+        f"{'mode':<10}{'save RTs':>10}{'save ms':>10}{'list RTs':>10}{'list ms':>10}"
+        f"{'load RTs':>10}{'load ms':>10}"
+    )
+    for mode in modes:
+        row = await measure(mode, count, limit, ttl or None)
+        save_rts, save_ms, list_rts, list_ms, load_rts, load_ms = row
+        print(
+            f"{mode:<10}{save_rts:>10.1f}{save_ms:>10.2f}{list_rts:>10}{list_ms:>10.2f}"
+            f"{load_rts:>10}{load_ms:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--modes", nargs="+", choices=["pipeline", "lua"], default=["pipeline", "lua"]
+    )
+    parser.add_argument("--checkpoints", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--ttl", type=int, default=3600, help="0 for no expiration")
+    args = parser.parse_args()
+    asyncio.run(main(args.modes, args.checkpoints, args.limit, args.rtt_ms, args.ttl))
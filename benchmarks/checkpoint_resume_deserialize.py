@@ -0,0 +1,88 @@
+"""
+Benchmark of state deserialization on checkpoint resume.
+
+Serializes a state holding a long `Message` history the way the SQL and Redis
+checkpointers do, then times resuming it: the raw JSON decode alone, the decode
+with the checkpointer object hook, and the schema deserialization the engine runs
+afterwards, both on the objects the hook rebuilt and on plain `__type__` dicts.
+
+Run:
+    python -m benchmarks.checkpoint_resume_deserialize
+"""
+
+import argparse
+import json
+import time
+from typing import Annotated, Any, TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+from llmfy.llmfy_core.messages.message import Message
+from llmfy.llmfy_core.messages.role import Role
+
+
+def add_messages(old: list[Message], new: list[Message]) -> list[Message]:
+    return old + new
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[Message], add_messages]
+    summary: str
+    turns: int
+    metadata: dict[str, str]
+
+
+def make_state(messages: int) -> dict[str, Any]:
+    """State with `messages` alternating user and assistant messages."""
+    history = [
+        Message(
+            role=Role.USER if i % 2 == 0 else Role.ASSISTANT,
+            content=f"Message number {i} of the conversation",
+        )
+        for i in range(messages)
+    ]
+    return {
+        "messages": history,
+        "summary": "A long conversation",
+        "turns": messages // 2,
+        "metadata": {"user": "bench", "tags": "a,b"},
+    }
+
+
+def timed(func, repeat: int) -> float:
+    """Mean milliseconds of `func()`."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1e3 / repeat
+
+
+def main(messages: int, repeat: int):
+    flow = FlowEngine(ChatState)
+    flow.add_node("noop", lambda state: {})
+    flow.add_edge(START, "noop")
+    flow.add_edge("noop", END)
+    flow.build()
+
+    serialized = Checkpoint._serialize_state(make_state(messages))
+    decoded = Checkpoint._deserialize_state(serialized)
+    plain = json.loads(serialized)
+
+    print(f"{messages} messages, {len(serialized) / 1024:.0f} KiB of JSON")
+    print(f"{'step':<36}{'mean ms':>10}")
+    rows = [
+        ("json.loads", lambda: json.loads(serialized)),
+        ("checkpoint decode", lambda: Checkpoint._deserialize_state(serialized)),
+        ("schema deserialize (objects)", lambda: flow._deserialize_state(decoded)),
+        ("schema deserialize (plain dicts)", lambda: flow._deserialize_state(plain)),
+    ]
+    for name, func in rows:
+        print(f"{name:<36}{timed(func, repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.messages, args.repeat)
@@ -0,0 +1,109 @@
+"""
+Benchmark of checkpoint retention on a long agent session.
+
+A chat loop appends one `Message` per step for many steps and checkpoints
+every step. Compares the checkpoints left in storage and the mean time per step
+without a retention policy and with `RetentionPolicy(max_checkpoints=...)`, on
+`InMemoryCheckpointer`, SQLite `SQLCheckpointer` and `RedisCheckpointer` on an
+in-process fake Redis (needs fakeredis).
+
+Run:
+    python -m benchmarks.checkpoint_retention
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Annotated, TypedDict
+
+from llmfy import Message, Role
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import (
+    InMemoryCheckpointer,
+    RedisCheckpointer,
+    RetentionPolicy,
+    SQLCheckpointer,
+)
+
+try:
+    import fakeredis
+
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+def add_message(old: list[Message], new: list[Message]):
+    return (old or []) + new
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[Message], add_message]
+    turns: int
+
+
+def build_chat(checkpointer, steps: int) -> FlowEngine:
+    """A node appending one message per step, looping `steps` times."""
+
+    async def chat(state: ChatState) -> dict:
+        reply = Message(role=Role.ASSISTANT, content=f"reply to turn {state['turns']}")
+        return {"messages": [reply], "turns": state["turns"] + 1}
+
+    def route(state: ChatState) -> str:
+        return "chat" if state["turns"] < steps else END
+
+    flow = FlowEngine(ChatState, checkpointer=checkpointer)
+    flow.add_node("chat", chat)
+    flow.add_edge(START, "chat")
+    flow.add_conditional_edge("chat", ["chat", END], route)
+    return flow.build()
+
+
+def make_checkpointer(backend: str, directory: str, max_checkpoints: int | None):
+    options = {}
+    if max_checkpoints is not None:
+        options["retention"] = RetentionPolicy(max_checkpoints=max_checkpoints)
+    if backend == "memory":
+        return InMemoryCheckpointer(**options)
+    if backend == "sqlite":
+        path = os.path.join(directory, f"retention_{time.time_ns()}.db")
+        return SQLCheckpointer(f"sqlite+aiosqlite:///{path}", **options)
+    checkpointer = RedisCheckpointer(**options)
+    checkpointer._client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return checkpointer
+
+
+async def measure(backend: str, steps: int, max_checkpoints: int | None, directory):
+    """Mean ms per step and checkpoints left in the session."""
+    checkpointer = make_checkpointer(backend, directory, max_checkpoints)
+    flow = build_chat(checkpointer, steps)
+    start = time.perf_counter()
+    await flow.invoke({"messages": [], "turns": 0}, session_id="bench")
+    step_ms = (time.perf_counter() - start) * 1e3 / steps
+    kept = len(await checkpointer.list("bench", limit=steps + 10))
+    if backend != "memory":
+        await checkpointer.close()
+    return step_ms, kept
+
+
+async def main(steps: int, max_checkpoints: int, backends: list[str]):
+    print(f"{steps} steps, one checkpoint per step")
+    print(f"{'backend':<10}{'retention':>11}{'ms/step':>10}{'checkpoints':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in backends:
+            for limit in (None, max_checkpoints):
+                step_ms, kept = await measure(backend, steps, limit, directory)
+                label = "none" if limit is None else str(limit)
+                print(f"{backend:<10}{label:>11}{step_ms:>10.3f}{kept:>13}")
+
+
+if __name__ == "__main__":
+    backends = ["memory", "sqlite"] + (["redis"] if FAKEREDIS_AVAILABLE else [])
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--max-checkpoints", type=int, default=50)
+    parser.add_argument("--backends", nargs="+", choices=backends, default=backends)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.max_checkpoints, args.backends))
@@ -0,0 +1,92 @@
+"""
+Benchmark of checkpoint serializers and compression.
+
+Serializes a chat state holding a long `Message` history with every
+serializer, with and without compression, and reports the payload size and the
+mean time to serialize and to load it. `json text` is the format written
+without a serializer. Serializers whose package is missing are skipped.
+
+Run:
+    python -m benchmarks.checkpoint_serializers
+"""
+
+import argparse
+import time
+from typing import Any
+
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+from llmfy.flow_engine.checkpointer.serializer import (
+    MSGPACK_AVAILABLE,
+    ZSTD_AVAILABLE,
+    BaseSerializer,
+    JsonSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
+    loads_payload,
+)
+from llmfy.llmfy_core.messages.message import Message
+from llmfy.llmfy_core.messages.role import Role
+
+
+def make_state(messages: int) -> dict[str, Any]:
+    """State with `messages` alternating user and assistant messages."""
+    history = [
+        Message(
+            role=Role.USER if i % 2 == 0 else Role.ASSISTANT,
+            content=f"Message number {i} of the conversation, with some context",
+        )
+        for i in range(messages)
+    ]
+    return {"messages": history, "summary": "A long conversation", "turns": messages}
+
+
+def make_serializers() -> dict[str, BaseSerializer | None]:
+    serializers: dict[str, BaseSerializer | None] = {
+        "json text": None,
+        "json": JsonSerializer(),
+        "json+zlib": JsonSerializer(compression="zlib"),
+        "pickle": PickleSerializer(),
+        "pickle+zlib": PickleSerializer(compression="zlib"),
+    }
+    if ZSTD_AVAILABLE:
+        serializers["json+zstd"] = JsonSerializer(compression="zstd")
+        serializers["pickle+zstd"] = PickleSerializer(compression="zstd")
+    if MSGPACK_AVAILABLE:
+        serializers["msgpack"] = MsgpackSerializer()
+        if ZSTD_AVAILABLE:
+            serializers["msgpack+zstd"] = MsgpackSerializer(compression="zstd")
+    return serializers
+
+
+def timed(func, repeat: int) -> float:
+    """Mean milliseconds of `func()`."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1e3 / repeat
+
+
+def main(messages: int, repeat: int):
+    state = make_state(messages)
+    print(f"State of {messages} messages, mean of {repeat} runs")
+    print(f"{'serializer':<14}{'bytes':>10}{'dump ms':>10}{'load ms':>10}")
+    for name, serializer in make_serializers().items():
+        if serializer is None:
+            payload = Checkpoint._serialize_state(state)
+            dump_ms = timed(lambda: Checkpoint._serialize_state(state), repeat)
+            size = len(payload.encode())
+        else:
+            payload = serializer.dumps(state)
+            dump_ms = timed(lambda s=serializer: s.dumps(state), repeat)
+            size = len(payload)
+        load_ms = timed(lambda p=payload, s=serializer: loads_payload(p, s), repeat)
+        assert len(loads_payload(payload, serializer)["messages"]) == messages
+        print(f"{name:<14}{size:>10}{dump_ms:>10.2f}{load_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.messages, args.repeat)
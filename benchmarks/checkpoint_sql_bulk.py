@@ -0,0 +1,124 @@
+"""
+Benchmark of SQLCheckpointer batched writes and latest-checkpoint loads.
+
+Part one saves checkpoints of many sessions one `save()` per checkpoint and
+with `save_many()` batches, as the async durability writer does, on SQLite
+through the sync driver and through aiosqlite. Part two loads the latest
+checkpoint of sessions holding many checkpoints, without and with the
+`head_table` pointer table.
+
+Run:
+    python -m benchmarks.checkpoint_sql_bulk
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+from llmfy.flow_engine.checkpointer import SQLCheckpointer
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointMetadata,
+)
+
+
+def make_checkpoints(sessions: int, per_session: int) -> list[Checkpoint]:
+    """Full checkpoints of `sessions` sessions, interleaved as concurrent runs."""
+    start = datetime.now(UTC)
+    checkpoints = []
+    for step in range(per_session):
+        for session in range(sessions):
+            metadata = CheckpointMetadata(
+                checkpoint_id=f"s{session}-{step}",
+                session_id=f"s{session}",
+                timestamp=start + timedelta(milliseconds=step),
+                node_name="agent",
+                step=step,
+                parent_id=f"s{session}-{step - 1}" if step else None,
+            )
+            state = {"query": f"question {session}", "answer": "x" * 200}
+            checkpoints.append(Checkpoint(metadata=metadata, state=state))
+    return checkpoints
+
+
+def make_url(driver: str, directory: str) -> str:
+    path = os.path.join(directory, f"bulk_{time.time_ns()}.db")
+    return f"sqlite+aiosqlite:///{path}" if driver == "async" else f"sqlite:///{path}"
+
+
+async def measure_writes(driver: str, mode: str, batch: int, checkpoints, directory):
+    """Mean microseconds per saved checkpoint."""
+    checkpointer = SQLCheckpointer(make_url(driver, directory), snapshot_interval=1)
+    await checkpointer.load("warm-up")
+    start = time.perf_counter()
+    if mode == "save":
+        for checkpoint in checkpoints:
+            await checkpointer.save(checkpoint)
+    else:
+        for i in range(0, len(checkpoints), batch):
+            await checkpointer.save_many(checkpoints[i : i + batch])
+    elapsed = time.perf_counter() - start
+    await checkpointer.close()
+    return elapsed * 1e6 / len(checkpoints)
+
+
+async def measure_latest(
+    driver: str, head_table: bool, checkpoints, sessions: int, loads: int, directory
+):
+    """Mean microseconds per `load()` of the latest checkpoint of a session."""
+    checkpointer = SQLCheckpointer(
+        make_url(driver, directory), snapshot_interval=1, head_table=head_table
+    )
+    for i in range(0, len(checkpoints), 500):
+        await checkpointer.save_many(checkpoints[i : i + 500])
+    start = time.perf_counter()
+    for i in range(loads):
+        checkpoint = await checkpointer.load(f"s{i % sessions}")
+        assert checkpoint is not None
+    elapsed = time.perf_counter() - start
+    await checkpointer.close()
+    return elapsed * 1e6 / loads
+
+
+async def main(
+    sessions: int, per_session: int, batch: int, loads: int, drivers: list[str]
+):
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoints = make_checkpoints(sessions, per_session)
+        print(f"{len(checkpoints)} checkpoints of {sessions} sessions")
+        print(f"{'driver':<8}{'write':<16}{'us/checkpoint':>14}")
+        for driver in drivers:
+            for mode in ("save", "save_many"):
+                mean_us = await measure_writes(
+                    driver, mode, batch, checkpoints, directory
+                )
+                label = mode if mode == "save" else f"{mode}({batch})"
+                print(f"{driver:<8}{label:<16}{mean_us:>14.1f}")
+
+        print(f"\n{loads} latest loads, {per_session} checkpoints per session")
+        print(f"{'driver':<8}{'head table':<12}{'us/load':>10}")
+        for driver in drivers:
+            for head_table in (False, True):
+                mean_us = await measure_latest(
+                    driver, head_table, checkpoints, sessions, loads, directory
+                )
+                label = "on" if head_table else "off"
+                print(f"{driver:<8}{label:<12}{mean_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--per-session", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--loads", type=int, default=1000)
+    parser.add_argument(
+        "--drivers", nargs="+", choices=["sync", "async"], default=["sync", "async"]
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.sessions, args.per_session, args.batch, args.loads, args.drivers)
+    )
@@ -0,0 +1,130 @@
+"""
+Benchmark of TieredCheckpointer session resumes against its cold tier alone.
+
+Chat sessions take turns one after the other, each turn resumes its session
+with `invoke(session_id=...)` and appends a message. Runs on SQLite alone and
+on an in-process fake Redis alone (needs fakeredis), then with an
+`InMemoryCheckpointer` hot tier in front of them, write-through and
+write-back. With `--hot-sessions` below `--sessions` the round robin over
+the sessions evicts each one before its next turn, every resume misses.
+Reports turns per second, the mean time to load the latest checkpoint of a
+session and the hit rate of the hot tier.
+
+Run:
+    python -m benchmarks.checkpoint_tiered
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Annotated, TypedDict
+
+from llmfy import Message, Role
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import (
+    BaseCheckpointer,
+    InMemoryCheckpointer,
+    RedisCheckpointer,
+    SQLCheckpointer,
+    TieredCheckpointer,
+    WriteMode,
+)
+
+try:
+    import fakeredis
+
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+def add_messages(old: list, new: list) -> list:
+    return (old or []) + new
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[Message], add_messages]
+
+
+def build_chat(checkpointer: BaseCheckpointer) -> FlowEngine:
+    """START -> chat -> END, the node answers the last message."""
+
+    async def chat(state: ChatState) -> dict:
+        content = f"answer to {state['messages'][-1].content[:20]} " + "x" * 200
+        return {"messages": [Message(role=Role.ASSISTANT, content=content)]}
+
+    flow = FlowEngine(ChatState, checkpointer=checkpointer)
+    flow.add_node("chat", chat)
+    flow.add_edge(START, "chat")
+    flow.add_edge("chat", END)
+    return flow.build()
+
+
+def make_cold(kind: str, directory: str) -> BaseCheckpointer:
+    if kind == "sqlite":
+        path = os.path.join(directory, f"tiered_{time.time_ns()}.db")
+        return SQLCheckpointer(f"sqlite:///{path}")
+    checkpointer = RedisCheckpointer(prefix=f"tiered_{time.time_ns()}:")
+    # Replaces the client `_get_client` would connect
+    checkpointer._client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return checkpointer
+
+
+async def measure(
+    cold_kind: str, mode: str, sessions: int, turns: int, hot_sessions: int, directory
+):
+    """Turns per second, microseconds per latest load and the hit rate."""
+    checkpointer = make_cold(cold_kind, directory)
+    if mode != "cold only":
+        hot = InMemoryCheckpointer(max_sessions=hot_sessions)
+        checkpointer = TieredCheckpointer(hot, checkpointer, write_mode=mode)
+    flow = build_chat(checkpointer)
+
+    start = time.perf_counter()
+    for turn in range(turns):
+        for session in range(sessions):
+            message = Message(role=Role.USER, content=f"question {turn} " + "x" * 200)
+            await flow.invoke({"messages": [message]}, session_id=f"s{session}")
+    turns_per_sec = sessions * turns / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for session in range(sessions):
+        assert await checkpointer.load(f"s{session}") is not None
+    load_us = (time.perf_counter() - start) * 1e6 / sessions
+
+    hit_rate = None
+    if isinstance(checkpointer, TieredCheckpointer):
+        hit_rate = checkpointer.get_stats()["hit_rate"]
+    await checkpointer.close()  # type: ignore
+    return turns_per_sec, load_us, hit_rate
+
+
+async def main(sessions: int, turns: int, hot_sessions: int, colds: list[str]):
+    print(f"{sessions} sessions x {turns} turns, hot tier of {hot_sessions} sessions")
+    print(f"{'cold':<8}{'mode':<11}{'turns/s':>9}{'us/load':>10}{'hit rate':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for cold_kind in colds:
+            for mode in ("cold only", *WriteMode):
+                turns_per_sec, load_us, hit_rate = await measure(
+                    cold_kind, mode, sessions, turns, hot_sessions, directory
+                )
+                rate = "-" if hit_rate is None else f"{hit_rate:.0%}"
+                print(
+                    f"{cold_kind:<8}{mode:<11}{turns_per_sec:>9.0f}"
+                    f"{load_us:>10.1f}{rate:>10}"
+                )
+
+
+if __name__ == "__main__":
+    colds = ["sqlite", "redis"] if FAKEREDIS_AVAILABLE else ["sqlite"]
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument(
+        "--hot-sessions", type=int, default=100, help="Sessions kept in the hot tier"
+    )
+    parser.add_argument("--colds", nargs="+", choices=colds, default=colds)
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.turns, args.hot_sessions, args.colds))
@@ -0,0 +1,117 @@
+"""
+Benchmark of checkpoint snapshot cost per step.
+
+A chat loop appends one `Message` per step to a `messages` history of 10 to 1000
+messages while an `InMemoryCheckpointer` saves a checkpoint after every step.
+Reports the cost of building the checkpoint state alone, full `deepcopy` against
+the copy-on-write `SnapshotBuilder`, and the end-to-end engine time per step.
+
+Run:
+    python -m benchmarks.flow_engine_checkpoint_snapshot
+"""
+
+import argparse
+import asyncio
+import time
+from copy import deepcopy
+from typing import Annotated, TypedDict
+
+from llmfy import Message, Role
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import InMemoryCheckpointer
+from llmfy.flow_engine.state import SnapshotBuilder
+
+
+def add_message(old: list[Message], new: list[Message]):
+    if old is None:
+        return new
+    return old + new
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[Message], add_message]
+    turns: int
+
+
+def history(size: int) -> list[Message]:
+    return [
+        Message(role=Role.USER if i % 2 else Role.ASSISTANT, content=f"message {i}")
+        for i in range(size)
+    ]
+
+
+def build_chat(steps: int) -> FlowEngine:
+    """A node appending one message per step, looping `steps` times."""
+
+    async def chat(state: ChatState) -> dict:
+        reply = Message(role=Role.ASSISTANT, content=f"turn {state['turns']}")
+        return {"messages": [reply], "turns": state["turns"] + 1}
+
+    async def route(state: ChatState) -> str:
+        return "chat" if state["turns"] < steps else END
+
+    flow = FlowEngine(ChatState, checkpointer=InMemoryCheckpointer())
+    flow.add_node("chat", chat)
+    flow.add_edge(START, "chat")
+    flow.add_conditional_edge("chat", ["chat", END], route)
+    return flow.build()
+
+
+def measure_copy(size: int, steps: int, rounds: int) -> tuple[float, float]:
+    """Best per-step time in microseconds of deepcopy and of SnapshotBuilder."""
+    best_deepcopy = best_snapshot = float("inf")
+    for _ in range(rounds):
+        state = {"messages": history(size), "turns": 0}
+        builder = SnapshotBuilder()
+        builder.take(state)
+        deepcopy_time = snapshot_time = 0.0
+        for turn in range(steps):
+            reply = Message(role=Role.ASSISTANT, content=f"turn {turn}")
+            state = {"messages": state["messages"] + [reply], "turns": turn + 1}
+
+            start = time.perf_counter()
+            deepcopy(state)
+            deepcopy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            builder.take(state)
+            snapshot_time += time.perf_counter() - start
+        best_deepcopy = min(best_deepcopy, deepcopy_time / steps)
+        best_snapshot = min(best_snapshot, snapshot_time / steps)
+    return best_deepcopy * 1e6, best_snapshot * 1e6
+
+
+async def measure_engine(size: int, steps: int, rounds: int) -> float:
+    """Best end-to-end per-step time in microseconds, checkpointing every step."""
+    flow = build_chat(steps)
+    best = float("inf")
+    for _ in range(rounds):
+        messages = history(size)
+        start = time.perf_counter()
+        await flow.invoke({"messages": messages, "turns": 0}, session_id="bench")
+        best = min(best, (time.perf_counter() - start) / steps)
+        await flow.checkpointer.clear_all()  # type: ignore
+    return best * 1e6
+
+
+async def main(sizes: list[int], steps: int, rounds: int):
+    print(
+        f"{'messages':>10}{'deepcopy us':>14}{'snapshot us':>14}"
+        f"{'speedup':>10}{'engine us/step':>17}"
+    )
+    for size in sizes:
+        deepcopy_us, snapshot_us = measure_copy(size, steps, rounds)
+        engine_us = await measure_engine(size, steps, rounds)
+        print(
+            f"{size:>10}{deepcopy_us:>14.1f}{snapshot_us:>14.1f}"
+            f"{deepcopy_us / snapshot_us:>9.1f}x{engine_us:>17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.steps, args.rounds))
@@ -0,0 +1,153 @@
+"""
+Benchmark of distributed execution with worker processes.
+
+Runs a `parse -> score` flow whose nodes burn CPU in pure Python over many
+sessions, once in the engine process with `FlowEngine.batch` and then with the
+nodes sent through a `MultiprocessingTaskQueue` to 1, 2, 4... worker processes
+sharing a SQLite checkpointer. Reports throughput and the speedup over the local
+run, which only grows with workers up to the number of cores.
+
+Run:
+    python -m benchmarks.flow_engine_distributed
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    MultiprocessingTaskQueue,
+    SQLCheckpointer,
+    run_worker,
+)
+
+
+class DocState(TypedDict):
+    text: str
+    tokens: int
+    score: float
+
+
+# Set from the command line, read by the worker processes through the environment
+WORK_ENV = "LLMFY_BENCH_WORK"
+
+
+def burn(iterations: int) -> float:
+    """Pure Python loop holding the GIL."""
+    total = 0.0
+    for i in range(iterations):
+        total += (i % 7) * 0.5
+    return total
+
+
+def timed_burn(work: int) -> float:
+    """Milliseconds `burn(work)` takes."""
+    start = time.perf_counter()
+    burn(work)
+    return (time.perf_counter() - start) * 1e3
+
+
+def build_flow(checkpointer, queue=None) -> FlowEngine:
+    """Two CPU-bound nodes, each running `WORK_ENV` loop iterations."""
+    work = int(os.environ.get(WORK_ENV, "200000"))
+
+    def parse(state: DocState) -> dict:
+        burn(work)
+        return {"tokens": len(state["text"].split())}
+
+    def score(state: DocState) -> dict:
+        return {"score": burn(work) / (state["tokens"] + 1)}
+
+    flow = FlowEngine(DocState, checkpointer=checkpointer, task_queue=queue)
+    flow.add_node("parse", parse)
+    flow.add_node("score", score)
+    flow.add_edge(START, "parse")
+    flow.add_edge("parse", "score")
+    flow.add_edge("score", END)
+    return flow.build()
+
+
+def worker_flow() -> FlowEngine:
+    return build_flow(SQLCheckpointer(os.environ["LLMFY_BENCH_DB"]))
+
+
+async def run_local(sessions: int) -> float:
+    """Runs per second with every node in the engine process."""
+    checkpointer = SQLCheckpointer(os.environ["LLMFY_BENCH_DB"])
+    flow = build_flow(checkpointer)
+    inputs = [{"text": f"document number {i}"} for i in range(sessions)]
+    start = time.perf_counter()
+    result = await flow.batch(inputs, max_concurrency=sessions)
+    elapsed = time.perf_counter() - start
+    assert not result.errors
+    await flow.close()
+    await checkpointer.close()
+    return sessions / elapsed
+
+
+async def run_distributed(sessions: int, workers: int) -> float:
+    """Runs per second with the nodes run by `workers` processes."""
+    queue = MultiprocessingTaskQueue(context="spawn")
+    processes = [
+        multiprocessing.get_context("spawn").Process(
+            target=run_worker, args=(worker_flow, queue), kwargs={"idle_timeout": 2}
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    checkpointer = SQLCheckpointer(os.environ["LLMFY_BENCH_DB"])
+    flow = build_flow(checkpointer, queue)
+    inputs = [{"text": f"document number {i}"} for i in range(sessions)]
+    # Warm up until every worker imported the flow
+    await flow.batch(inputs[:workers], max_concurrency=workers)
+
+    start = time.perf_counter()
+    result = await flow.batch(inputs, max_concurrency=sessions)
+    elapsed = time.perf_counter() - start
+    assert not result.errors
+
+    for process in processes:
+        process.join()
+    await checkpointer.close()
+    return sessions / elapsed
+
+
+async def main(sessions: int, work: int, workers: list[int]):
+    os.environ[WORK_ENV] = str(work)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LLMFY_BENCH_DB"] = f"sqlite+aiosqlite:///{tmp}/checkpoints.db"
+        checkpointer = SQLCheckpointer(os.environ["LLMFY_BENCH_DB"])
+        await checkpointer._ensure_initialized()
+        await checkpointer.close()
+
+        node_ms = timed_burn(work)
+        print(
+            f"{sessions} sessions x 2 nodes of {node_ms:.1f} ms CPU, "
+            f"{os.cpu_count()} cores"
+        )
+        print(f"{'mode':<16}{'runs/s':>10}{'speedup':>10}")
+        local = await run_local(sessions)
+        print(f"{'local':<16}{local:>10.1f}{1.0:>10.2f}")
+        for count in workers:
+            throughput = await run_distributed(sessions, count)
+            print(
+                f"{f'{count} workers':<16}{throughput:>10.1f}{throughput / local:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--work", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.work, args.workers))
@@ -0,0 +1,88 @@
+"""
+Benchmark of map edges against a node looping over list items.
+
+Summarizes N chunks where each summary awaits a fixed I/O latency, once with a
+single node running a sequential loop over the chunks and once with a map edge
+at several `max_concurrency` values, reporting the invoke latency.
+
+Run:
+    python -m benchmarks.flow_engine_map_edge
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Annotated, TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine
+
+
+def add_items(old: list, new: list) -> list:
+    return (old or []) + new
+
+
+class MapState(TypedDict):
+    chunks: list[str]
+    chunk: str
+    summaries: Annotated[list[str], add_items]
+
+
+def build_loop(work: float) -> FlowEngine:
+    """One node summarizing every chunk in turn."""
+
+    async def summarize_all(state: MapState) -> dict:
+        summaries = []
+        for chunk in state["chunks"]:
+            await asyncio.sleep(work)
+            summaries.append(chunk.upper())
+        return {"summaries": summaries}
+
+    flow = FlowEngine(MapState)
+    flow.add_node("summarize", summarize_all)
+    flow.add_edge(START, "summarize")
+    flow.add_edge("summarize", END)
+    return flow.build()
+
+
+def build_map(work: float, max_concurrency: int | None) -> FlowEngine:
+    """A map edge summarizing each chunk in its own call."""
+
+    async def summarize(state: MapState) -> dict:
+        await asyncio.sleep(work)
+        return {"summaries": [state["chunk"].upper()]}
+
+    flow = FlowEngine(MapState)
+    flow.add_node("summarize", summarize)
+    flow.add_map_edge(
+        START, "summarize", "chunks", "chunk", max_concurrency=max_concurrency
+    )
+    flow.add_edge("summarize", END)
+    return flow.build()
+
+
+async def measure(flow: FlowEngine, chunks: list[str]) -> float:
+    """Invoke latency in milliseconds."""
+    start = time.perf_counter()
+    result = await flow.invoke({"chunks": chunks, "summaries": []})
+    assert len(result["summaries"]) == len(chunks)
+    return (time.perf_counter() - start) * 1e3
+
+
+async def main(items: int, concurrency: list[int], work_ms: float):
+    chunks = [f"chunk {i}" for i in range(items)]
+    work = work_ms / 1e3
+    print(f"{items} chunks, {work_ms} ms per summary")
+    print(f"{'mode':<16}{'invoke ms':>12}")
+    print(f"{'loop node':<16}{await measure(build_loop(work), chunks):>12.1f}")
+    for limit in concurrency:
+        latency = await measure(build_map(work, limit), chunks)
+        print(f"{f'map({limit})':<16}{latency:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.concurrency, args.work_ms))
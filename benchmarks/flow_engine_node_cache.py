@@ -0,0 +1,86 @@
+"""
+Benchmark of node result caching.
+
+Runs a `rewrite -> retrieve -> answer` pipeline where `rewrite` and `retrieve`
+sleep to model an LLM call and a vector search, over a query stream in which a
+share of the queries repeat. Reports the mean invoke latency without a cache and
+with `CachePolicy(keys=["query"])` on the two pure nodes, plus the hit rate.
+
+Run:
+    python -m benchmarks.flow_engine_node_cache
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import END, START, CachePolicy, FlowEngine
+
+
+class RagState(TypedDict):
+    query: str
+    rewritten: str
+    documents: list[str]
+    answer: str
+
+
+def build_pipeline(cached: bool, work: float) -> FlowEngine:
+    """Pipeline whose first two nodes take `work` seconds each."""
+
+    async def rewrite(state: RagState) -> dict:
+        await asyncio.sleep(work)
+        return {"rewritten": state["query"].strip().lower()}
+
+    async def retrieve(state: RagState) -> dict:
+        await asyncio.sleep(work)
+        return {"documents": [f"doc about {state['rewritten']}"]}
+
+    async def answer(state: RagState) -> dict:
+        return {"answer": state["documents"][0]}
+
+    flow = FlowEngine(RagState)
+    flow.add_node(
+        "rewrite", rewrite, cache=CachePolicy(keys=["query"]) if cached else None
+    )
+    flow.add_node(
+        "retrieve", retrieve, cache=CachePolicy(keys=["rewritten"]) if cached else None
+    )
+    flow.add_node("answer", answer)
+    flow.add_edge(START, "rewrite")
+    flow.add_edge("rewrite", "retrieve")
+    flow.add_edge("retrieve", "answer")
+    flow.add_edge("answer", END)
+    return flow.build()
+
+
+async def measure(cached: bool, queries: list[str], work: float) -> tuple[float, float]:
+    """Mean invoke latency in milliseconds and the cache hit rate."""
+    flow = build_pipeline(cached, work)
+    start = time.perf_counter()
+    for query in queries:
+        await flow.invoke({"query": query})
+    mean_ms = (time.perf_counter() - start) * 1e3 / len(queries)
+    hit_rate = flow.node_cache.get_stats()["hit_rate"] if flow.node_cache else 0.0
+    return mean_ms, hit_rate
+
+
+async def main(runs: int, distinct: int, work_ms: float, seed: int):
+    rng = random.Random(seed)
+    queries = [f"Question {rng.randrange(distinct)}" for _ in range(runs)]
+    print(f"{runs} runs over {distinct} distinct queries, {work_ms} ms per slow node")
+    print(f"{'cache':<8}{'mean ms':>10}{'hit rate':>10}")
+    for cached in (False, True):
+        mean_ms, hit_rate = await measure(cached, queries, work_ms / 1e3)
+        print(f"{'on' if cached else 'off':<8}{mean_ms:>10.2f}{hit_rate:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=40)
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.distinct, args.work_ms, args.seed))
@@ -0,0 +1,127 @@
+"""
+Benchmark of process-pool nodes.
+
+Part one runs a CPU-bound pure Python node over many concurrent sessions, with
+the node on the engine thread pool and with `executor="process"`. Part two
+times handing a large numpy array to a process node and back, pickled through
+the pool pipe versus through shared memory (needs numpy).
+
+Throughput of process nodes only grows up to the number of cores.
+
+Run:
+    python -m benchmarks.flow_engine_process_nodes
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.process import pack_state, release_segments, unpack_state
+from llmfy.flow_engine.process.shared_state import run_packed
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class ScoreState(TypedDict):
+    text: str
+    work: int
+    score: float
+
+
+def score(state: ScoreState) -> dict:
+    """Pure Python loop holding the GIL."""
+    total = 0.0
+    for i in range(state["work"]):
+        total += (i % 7) * 0.5
+    return {"score": total / len(state["text"])}
+
+
+def normalize(state: dict[str, Any]) -> dict:
+    """Cheap numpy node returning an array as large as its input."""
+    vectors = state["vectors"]
+    return {"vectors": vectors / (vectors.max() or 1.0)}
+
+
+def build_flow(executor: str, processes: int) -> FlowEngine:
+    flow = FlowEngine(ScoreState, max_processes=processes)
+    flow.add_node("score", score, executor=executor)
+    flow.add_edge(START, "score")
+    flow.add_edge("score", END)
+    return flow.build()
+
+
+async def measure_cpu(executor: str, sessions: int, work: int, processes: int):
+    """Runs per second over `sessions` concurrent runs."""
+    flow = build_flow(executor, processes)
+    inputs = [{"text": f"doc {i}", "work": work} for i in range(sessions)]
+    # Warm up the pool so process start-up isn't measured
+    await flow.batch(inputs[:processes], max_concurrency=processes)
+    start = time.perf_counter()
+    result = await flow.batch(inputs, max_concurrency=sessions)
+    elapsed = time.perf_counter() - start
+    assert not result.errors
+    await flow.close()
+    return sessions / elapsed
+
+
+def measure_transfer(
+    pool: ProcessPoolExecutor, megabytes: int, threshold: int, repeat: int
+):
+    """Mean milliseconds of one process node call on a `megabytes` array."""
+    vectors = np.random.default_rng(0).random(megabytes * (1 << 20) // 8)
+    state = {"vectors": vectors}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        packed, segments = pack_state(state, threshold)
+        packed_updates = pool.submit(run_packed, normalize, packed, threshold).result()
+        release_segments(segments, unlink=True)
+        updates, result_segments = unpack_state(packed_updates, copy=True)
+        release_segments(result_segments, unlink=True)
+        assert updates["vectors"].shape == vectors.shape
+    return (time.perf_counter() - start) * 1e3 / repeat
+
+
+async def main(sessions: int, work: int, processes: int, megabytes: int, repeat: int):
+    print(f"{os.cpu_count()} cores, {processes} processes")
+    print(f"{sessions} sessions of a {work}-iteration CPU node")
+    print(f"{'executor':<12}{'runs/s':>10}")
+    for executor in ("thread", "process"):
+        throughput = await measure_cpu(executor, sessions, work, processes)
+        print(f"{executor:<12}{throughput:>10.1f}")
+
+    if not NUMPY_AVAILABLE:
+        print("numpy is not installed, skipping the transfer benchmark")
+        return
+
+    print(f"\n{megabytes} MiB array in and out of a process node")
+    print(f"{'transfer':<16}{'mean ms':>10}")
+    with ProcessPoolExecutor(
+        1, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        pool.submit(int).result()
+        for name, threshold in (("pickle", 1 << 62), ("shared memory", 1 << 20)):
+            mean_ms = measure_transfer(pool, megabytes, threshold, repeat)
+            print(f"{name:<16}{mean_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--work", type=int, default=1000000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--megabytes", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.sessions, args.work, args.processes, args.megabytes, args.repeat)
+    )
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of FlowEngine per-step overhead.
+
+Builds linear graphs of 10 to 1000 no-op async nodes, plus a loop graph where a
+single node re-enters itself through a conditional edge while the rest of the
+graph sits idle, and reports the engine time spent per executed step.
+
+Run:
+    python -m benchmarks.flow_engine_step_overhead
+"""
+
+import argparse
+import asyncio
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine
+
+
+class BenchState(TypedDict):
+    counter: int
+
+
+async def noop(state: BenchState) -> dict:
+    return {}
+
+
+async def increment(state: BenchState) -> dict:
+    return {"counter": state["counter"] + 1}
+
+
+def build_linear(size: int) -> FlowEngine:
+    """START -> n0 -> n1 -> ... -> n{size-1} -> END"""
+    flow = FlowEngine(BenchState)
+    for i in range(size):
+        flow.add_node(f"n{i}", noop)
+    flow.add_edge(START, "n0")
+    for i in range(size - 1):
+        flow.add_edge(f"n{i}", f"n{i + 1}")
+    flow.add_edge(f"n{size - 1}", END)
+    return flow.build()
+
+
+def build_loop(size: int, iterations: int) -> FlowEngine:
+    """A node looping `iterations` times in a graph of `size` nodes."""
+
+    async def route(state: BenchState) -> str:
+        return "loop" if state["counter"] < iterations else "n0"
+
+    flow = FlowEngine(BenchState)
+    flow.add_node("loop", increment)
+    flow.add_edge(START, "loop")
+    flow.add_conditional_edge("loop", ["loop", "n0"], route)
+    for i in range(size - 1):
+        flow.add_node(f"n{i}", noop)
+        flow.add_edge(f"n{i}", f"n{i + 1}" if i < size - 2 else END)
+    return flow.build()
+
+
+async def measure(flow: FlowEngine, steps: int, rounds: int) -> float:
+    """Best per-step time in microseconds over `rounds` runs."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await flow.invoke({"counter": 0})
+        best = min(best, (time.perf_counter() - start) / steps)
+    return best * 1e6
+
+
+async def main(sizes: list[int], rounds: int, iterations: int):
+    print(f"{'graph':<10}{'nodes':>8}{'steps':>8}{'us/step':>12}")
+    for size in sizes:
+        us = await measure(build_linear(size), size, rounds)
+        print(f"{'linear':<10}{size:>8}{size:>8}{us:>12.2f}")
+    for size in sizes:
+        # Loop steps plus the idle chain walked once at the end
+        steps = iterations + size - 1
+        us = await measure(build_loop(size, iterations), steps, rounds)
+        print(f"{'loop':<10}{size:>8}{steps:>8}{us:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.rounds, args.iterations))
@@ -0,0 +1,89 @@
+"""
+Benchmark of FlowEngine.stream buffering and token coalescing.
+
+A stream node emits N short text tokens with a small delay between them, like
+an LLM, and the reader pays a fixed cost per event, like an SSE write. Reports
+the events delivered and the end-to-end stream time for the default pull-based
+stream, a buffered stream, and buffered streams coalescing by time and bytes.
+
+Run:
+    python -m benchmarks.flow_engine_stream_coalescing
+"""
+
+import argparse
+import asyncio
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    FlowEngineStreamType,
+    NodeStreamResponse,
+    NodeStreamType,
+)
+
+
+class ChatState(TypedDict):
+    answer: str
+
+
+def build_flow(tokens: int, token_delay: float) -> FlowEngine:
+    """A stream node yielding `tokens` tokens, `token_delay` seconds apart."""
+
+    async def generate(state: ChatState):
+        answer = []
+        for i in range(tokens):
+            await asyncio.sleep(token_delay)
+            token = f"tok{i} "
+            answer.append(token)
+            yield NodeStreamResponse(type=NodeStreamType.STREAM, content=token)
+        yield NodeStreamResponse(
+            type=NodeStreamType.RESULT, content=None, state={"answer": "".join(answer)}
+        )
+
+    flow = FlowEngine(ChatState)
+    flow.add_node("generate", generate, stream=True)
+    flow.add_edge(START, "generate")
+    flow.add_edge("generate", END)
+    return flow.build()
+
+
+async def measure(flow: FlowEngine, event_cost: float, **options) -> tuple[int, float]:
+    """Stream events delivered and total stream time in milliseconds."""
+    events = 0
+    start = time.perf_counter()
+    async for response in flow.stream({"answer": ""}, **options):
+        if response.type == FlowEngineStreamType.STREAM:
+            events += 1
+            # Per-event cost of the reader, e.g. writing an SSE frame
+            await asyncio.sleep(event_cost)
+    return events, (time.perf_counter() - start) * 1e3
+
+
+async def main(tokens: int, token_delay_ms: float, event_cost_ms: float):
+    flow = build_flow(tokens, token_delay_ms / 1e3)
+    modes = {
+        "pull (default)": {},
+        "buffered": {"max_buffer": 1024},
+        "coalesce 20ms": {"coalesce_interval": 0.02},
+        "coalesce 256B": {"max_buffer": 1024, "coalesce_bytes": 256},
+    }
+    print(
+        f"{tokens} tokens every {token_delay_ms} ms, "
+        f"reader pays {event_cost_ms} ms per event"
+    )
+    print(f"{'mode':<18}{'events':>8}{'total ms':>11}")
+    for name, options in modes.items():
+        events, total_ms = await measure(flow, event_cost_ms / 1e3, **options)
+        print(f"{name:<18}{events:>8}{total_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--token-delay-ms", type=float, default=1.0)
+    parser.add_argument("--event-cost-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.token_delay_ms, args.event_cost_ms))
@@ -0,0 +1,14 @@
+"""
+FlowEngine benchmark suite over synthetic graphs and checkpointer backends.
+
+Runs linear, branching, looping and tool-loop agent graphs with stub nodes on
+`InMemoryCheckpointer`, `SQLCheckpointer` on SQLite, `FileLogCheckpointer`
+and `RedisCheckpointer` on an in-process fake Redis (needs fakeredis), and
+reports steps per second, p50 / p99 step latency, memory growth per session
+and checkpoint bytes. The results can be written as JSON to track
+regressions between commits.
+
+Run:
+    python -m benchmarks.flow_engine_suite
+    python -m benchmarks.flow_engine_suite --graphs linear tool_agent --output results.json
+"""
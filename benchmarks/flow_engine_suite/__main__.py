@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import tempfile
+
+import llmfy
+
+from . import __doc__ as suite_doc
+from .backends import available_backends
+from .graphs import GRAPHS
+from .runner import SuiteResult, run_case
+
+COLUMNS = (
+    ("graph", "<12", ""),
+    ("backend", "<9", ""),
+    ("steps_per_sec", ">10", ".0f"),
+    ("p50_step_ms", ">9", ".3f"),
+    ("p99_step_ms", ">9", ".3f"),
+    ("memory_per_session_kib", ">12", ".1f"),
+    ("checkpoint_bytes_per_session", ">13", ".0f"),
+    ("checkpoint_bytes_per_step", ">12", ".0f"),
+)
+HEADERS = (
+    "graph",
+    "backend",
+    "steps/s",
+    "p50 ms",
+    "p99 ms",
+    "KiB/session",
+    "ckpt B/sess",
+    "ckpt B/step",
+)
+
+
+def format_row(result: SuiteResult) -> str:
+    values = result.to_dict()
+    return "".join(f"{values[name]:{align}{spec}}" for name, align, spec in COLUMNS)
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Each agent turn takes two steps, model and tool
+    sizes = {
+        "linear": args.size,
+        "branching": args.branches,
+        "looping": args.size,
+        "tool_agent": args.size // 2,
+    }
+    print(
+        f"{args.sessions} sessions per case, size {args.size}, "
+        f"{args.branches} branches, {os.cpu_count()} cores"
+    )
+    print(
+        "".join(
+            f"{h:{align}}" for h, (_, align, _) in zip(HEADERS, COLUMNS, strict=True)
+        )
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for graph in args.graphs:
+            for backend in args.backends:
+                result = await run_case(
+                    graph,
+                    backend,
+                    sizes[graph],
+                    args.sessions,
+                    args.memory_sessions,
+                    directory,
+                )
+                results.append(result)
+                print(format_row(result))
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+                "llmfy": llmfy.__version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": vars(args),
+            },
+            "results": [result.to_dict() for result in results],
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    backends = available_backends()
+    parser = argparse.ArgumentParser(description=suite_doc.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--graphs", nargs="+", choices=list(GRAPHS), default=list(GRAPHS)
+    )
+    parser.add_argument("--backends", nargs="+", choices=backends, default=backends)
+    parser.add_argument(
+        "--size", type=int, default=20, help="Nodes of the linear graph, loop turns"
+    )
+    parser.add_argument("--branches", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--memory-sessions", type=int, default=20)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""Checkpointer backends of the suite and the bytes they store."""
+
+import os
+import sqlite3
+
+from llmfy.flow_engine import BaseCheckpointer, InMemoryCheckpointer
+from llmfy.flow_engine.checkpointer import (
+    FileLogCheckpointer,
+    RedisCheckpointer,
+    SQLCheckpointer,
+)
+
+try:
+    import fakeredis
+
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+class Backend:
+    """A fresh checkpointer of one kind, reporting the bytes it stored."""
+
+    name = ""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.checkpointer: BaseCheckpointer = self.create()
+
+    def create(self) -> BaseCheckpointer:
+        raise NotImplementedError
+
+    async def stored_bytes(self) -> int:
+        """Bytes of the stored checkpoint records."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        close = getattr(self.checkpointer, "close", None)
+        if close is not None:
+            await close()
+
+
+class MemoryBackend(Backend):
+    name = "memory"
+
+    def create(self) -> BaseCheckpointer:
+        return InMemoryCheckpointer()
+
+    async def stored_bytes(self) -> int:
+        # Nothing is serialized in memory, count what the other backends write
+        records = self.checkpointer._index.values()  # type: ignore
+        return sum(len(stored.payload()) for _, stored in records)
+
+
+class SQLiteBackend(Backend):
+    name = "sqlite"
+
+    def create(self) -> BaseCheckpointer:
+        self.path = os.path.join(self.directory, f"suite_{id(self)}.db")
+        return SQLCheckpointer(f"sqlite+aiosqlite:///{self.path}")
+
+    async def stored_bytes(self) -> int:
+        with sqlite3.connect(self.path) as connection:
+            (size,) = connection.execute(
+                "SELECT COALESCE(SUM(LENGTH(state)), 0) FROM llmfy_checkpoint"
+            ).fetchone()
+        return size
+
+
+class FileLogBackend(Backend):
+    name = "filelog"
+
+    def create(self) -> BaseCheckpointer:
+        return FileLogCheckpointer(os.path.join(self.directory, f"suite_{id(self)}"))
+
+    async def stored_bytes(self) -> int:
+        # Whole records, metadata included, as Redis stores them
+        entries = self.checkpointer._entries.values()  # type: ignore
+        return sum(entry.length for entry in entries)
+
+
+class FakeRedisBackend(Backend):
+    name = "redis"
+
+    def create(self) -> BaseCheckpointer:
+        checkpointer = RedisCheckpointer(prefix=f"suite_{id(self)}:")
+        # Replaces the client `_get_client` would connect
+        checkpointer._client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        return checkpointer
+
+    async def stored_bytes(self) -> int:
+        client = self.checkpointer._client  # type: ignore
+        total = 0
+        async for key in client.scan_iter(
+            match=f"{self.checkpointer.prefix}checkpoint:*"
+        ):  # type: ignore
+            total += await client.strlen(key)
+        return total
+
+
+BACKENDS: dict[str, type[Backend]] = {
+    "memory": MemoryBackend,
+    "sqlite": SQLiteBackend,
+    "filelog": FileLogBackend,
+    "redis": FakeRedisBackend,
+}
+
+
+def available_backends() -> list[str]:
+    """Backends whose dependencies are installed."""
+    names = ["memory", "sqlite", "filelog"]
+    if FAKEREDIS_AVAILABLE:
+        names.append("redis")
+    return names
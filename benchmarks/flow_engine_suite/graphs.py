@@ -0,0 +1,146 @@
+"""Synthetic graphs with stub nodes, built on a given checkpointer."""
+
+from collections.abc import Callable
+from typing import Annotated, Any, TypedDict
+
+from llmfy import Message, Role
+from llmfy.flow_engine import END, START, BaseCheckpointer, FlowEngine
+from llmfy.llmfy_core.messages.tool_call import ToolCall
+
+
+def add_items(old: list, new: list) -> list:
+    return (old or []) + new
+
+
+class BenchState(TypedDict):
+    counter: int
+    log: Annotated[list[str], add_items]
+
+
+class AgentState(TypedDict):
+    messages: Annotated[list[Message], add_items]
+    turns: int
+
+
+def build_linear(checkpointer: BaseCheckpointer, size: int) -> FlowEngine:
+    """START -> n0 -> ... -> n{size-1} -> END, each node appends to `log`."""
+
+    async def step(state: BenchState) -> dict:
+        return {"counter": state["counter"] + 1, "log": [f"step {state['counter']}"]}
+
+    flow = FlowEngine(BenchState, checkpointer=checkpointer)
+    previous = START
+    for i in range(size):
+        flow.add_node(f"n{i}", step)
+        flow.add_edge(previous, f"n{i}")
+        previous = f"n{i}"
+    flow.add_edge(previous, END)
+    return flow.build()
+
+
+def build_branching(checkpointer: BaseCheckpointer, size: int) -> FlowEngine:
+    """plan fans out to `size` branches of two nodes, joined by a final node."""
+
+    def make_branch(name: str):
+        async def branch(state: BenchState) -> dict:
+            return {"log": [f"{name} {state['counter']}"]}
+
+        return branch
+
+    async def plan(state: BenchState) -> dict:
+        return {"counter": state["counter"] + 1}
+
+    async def merge(state: BenchState) -> dict:
+        return {"counter": len(state["log"])}
+
+    flow = FlowEngine(BenchState, checkpointer=checkpointer)
+    flow.add_node("plan", plan)
+    flow.add_node("merge", merge)
+    flow.add_edge(START, "plan")
+    ends = []
+    for i in range(size):
+        first, second = f"b{i}_retrieve", f"b{i}_score"
+        flow.add_node(first, make_branch(first))
+        flow.add_node(second, make_branch(second))
+        flow.add_edge("plan", first)
+        flow.add_edge(first, second)
+        ends.append(second)
+    flow.add_edge(ends, "merge")
+    flow.add_edge("merge", END)
+    return flow.build()
+
+
+def build_looping(checkpointer: BaseCheckpointer, size: int) -> FlowEngine:
+    """A node re-entering itself through a conditional edge `size` times."""
+
+    async def work(state: BenchState) -> dict:
+        return {"counter": state["counter"] + 1, "log": [f"turn {state['counter']}"]}
+
+    def route(state: BenchState) -> str:
+        return "work" if state["counter"] < size else END
+
+    flow = FlowEngine(BenchState, checkpointer=checkpointer)
+    flow.add_node("work", work)
+    flow.add_edge(START, "work")
+    flow.add_conditional_edge("work", ["work", END], route)
+    return flow.build()
+
+
+def build_tool_agent(checkpointer: BaseCheckpointer, size: int) -> FlowEngine:
+    """
+    Agent loop of `size` turns: a stub model node asks for a tool call, a stub
+    tool node answers it, then the model replies.
+    """
+
+    async def agent(state: AgentState) -> dict:
+        turn = state["turns"]
+        if turn >= size:
+            return {"messages": [Message(role=Role.ASSISTANT, content="done")]}
+        call = ToolCall(
+            tool_call_id=f"call_{turn}",
+            request_call_id=f"request_{turn}",
+            name="search",
+            arguments={"query": f"question {turn}", "top_k": 5},
+        )
+        message = Message(role=Role.ASSISTANT, tool_calls=[call])
+        return {"messages": [message], "turns": turn + 1}
+
+    async def tools(state: AgentState) -> dict:
+        call = state["messages"][-1].tool_calls[0]  # type: ignore
+        documents = [
+            f"{call.name} result {i} for {call.arguments['query']}" for i in range(5)
+        ]
+        result = Message(
+            role=Role.TOOL,
+            tool_call_id=call.tool_call_id,
+            request_call_id=call.request_call_id,
+            tool_results=documents,
+        )
+        return {"messages": [result]}
+
+    def route(state: AgentState) -> str:
+        return "tools" if state["messages"][-1].tool_calls else END
+
+    flow = FlowEngine(AgentState, checkpointer=checkpointer)
+    flow.add_node("agent", agent)
+    flow.add_node("tools", tools)
+    flow.add_edge(START, "agent")
+    flow.add_conditional_edge("agent", ["tools", END], route)
+    flow.add_edge("tools", "agent")
+    return flow.build()
+
+
+def initial_state(graph: str) -> dict[str, Any]:
+    """Input of one session of a graph."""
+    if graph == "tool_agent":
+        question = Message(role=Role.USER, content="Find the answer")
+        return {"messages": [question], "turns": 0}
+    return {"counter": 0, "log": []}
+
+
+GRAPHS: dict[str, Callable[[BaseCheckpointer, int], FlowEngine]] = {
+    "linear": build_linear,
+    "branching": build_branching,
+    "looping": build_looping,
+    "tool_agent": build_tool_agent,
+}
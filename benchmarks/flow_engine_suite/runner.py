@@ -0,0 +1,136 @@
+"""Runs one graph on one backend and collects its metrics."""
+
+import gc
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from llmfy.flow_engine import FlowEngineCallback, RunContext
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+
+from .backends import BACKENDS
+from .graphs import GRAPHS, initial_state
+
+
+class StepClock(FlowEngineCallback):
+    """Times each step of a run, from the previous checkpoint to the next save."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self._last: dict[str, float] = {}
+
+    def on_run_start(self, ctx: RunContext) -> None:
+        self._last[ctx.session_id] = time.perf_counter()
+
+    def on_checkpoint(
+        self,
+        ctx: RunContext,
+        operation: str,
+        checkpoint: Checkpoint | None,
+        duration: float,
+    ) -> None:
+        now = time.perf_counter()
+        if operation == "save":
+            self.latencies.append(now - self._last[ctx.session_id])
+        self._last[ctx.session_id] = now
+
+    def on_run_end(self, ctx: RunContext, error: BaseException | None) -> None:
+        self._last.pop(ctx.session_id, None)
+
+
+@dataclass
+class SuiteResult:
+    """Metrics of one graph on one backend."""
+
+    graph: str
+    backend: str
+    size: int
+    sessions: int
+    steps: int
+    steps_per_sec: float
+    p50_step_ms: float
+    p99_step_ms: float
+    memory_per_session_kib: float
+    checkpoint_bytes_per_session: float
+    checkpoint_bytes_per_step: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def percentile(values: list[float], q: int) -> float:
+    """The q-th percentile of the values."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def run_case(
+    graph: str,
+    backend_name: str,
+    size: int,
+    sessions: int,
+    memory_sessions: int,
+    directory: str,
+) -> SuiteResult:
+    """
+    Run `sessions` sessions of a graph one after the other on a fresh backend.
+
+    Args:
+        graph: Name in `GRAPHS`
+        backend_name: Name in `BACKENDS`
+        size: Size of the graph, nodes, branches or loop turns
+        sessions: Timed sessions
+        memory_sessions: Sessions run under tracemalloc for the memory growth
+        directory: Directory for SQLite files
+
+    Returns:
+        The metrics of the case
+    """
+    backend = BACKENDS[backend_name](directory)
+    flow = GRAPHS[graph](backend.checkpointer, size)
+    state = initial_state(graph)
+
+    # Warm-up session, also creates tables and connections
+    await flow.invoke(state, session_id="warmup")
+
+    clock = StepClock()
+    flow.callbacks.append(clock)
+    start = time.perf_counter()
+    for i in range(sessions):
+        await flow.invoke(state, session_id=f"session-{i}")
+    elapsed = time.perf_counter() - start
+    flow.callbacks.remove(clock)
+    stored = await backend.stored_bytes()
+
+    # Memory kept per finished session, including what the backend keeps in
+    # this process (memory and fake Redis storage, SQLAlchemy caches)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(memory_sessions):
+        await flow.invoke(state, session_id=f"memory-{i}")
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    await flow.close()
+    await backend.close()
+
+    steps = len(clock.latencies)
+    # Warm-up session included, the stored bytes cover it
+    stored_sessions = sessions + 1
+    return SuiteResult(
+        graph=graph,
+        backend=backend_name,
+        size=size,
+        sessions=sessions,
+        steps=steps,
+        steps_per_sec=steps / elapsed,
+        p50_step_ms=percentile(clock.latencies, 50) * 1e3,
+        p99_step_ms=percentile(clock.latencies, 99) * 1e3,
+        memory_per_session_kib=growth / max(memory_sessions, 1) / 1024,
+        checkpoint_bytes_per_session=stored / stored_sessions,
+        checkpoint_bytes_per_step=stored / (steps * stored_sessions / sessions),
+    )
@@ -0,0 +1,79 @@
+"""
+Benchmark of the per-step cost of FlowEngine callbacks.
+
+Runs a loop graph of no-op async nodes re-entering through a conditional edge
+with an in-memory checkpointer, and reports the engine time per step without
+callbacks, with a callback whose hooks do nothing, and with a `TraceRecorder`
+(with and without checkpoint byte measurement).
+
+Run:
+    python -m benchmarks.flow_engine_tracing
+"""
+
+import argparse
+import asyncio
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    FlowEngineCallback,
+    InMemoryCheckpointer,
+    TraceRecorder,
+)
+
+
+class BenchState(TypedDict):
+    counter: int
+
+
+def build_loop(steps: int, callbacks) -> FlowEngine:
+    """A node incrementing a counter, looping `steps` times."""
+
+    async def step(state: BenchState) -> dict:
+        return {"counter": state["counter"] + 1}
+
+    async def route(state: BenchState) -> str:
+        return "step" if state["counter"] < steps else END
+
+    flow = FlowEngine(
+        BenchState, checkpointer=InMemoryCheckpointer(), callbacks=callbacks
+    )
+    flow.add_node("step", step)
+    flow.add_edge(START, "step")
+    flow.add_conditional_edge("step", ["step", END], route)
+    return flow.build()
+
+
+async def measure(steps: int, repeat: int, make_callbacks) -> float:
+    """Best engine time per step in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        flow = build_loop(steps, make_callbacks())
+        start = time.perf_counter()
+        await flow.invoke({"counter": 0}, session_id="bench")
+        best = min(best, (time.perf_counter() - start) / steps)
+    return best * 1e6
+
+
+async def main(steps: int, repeat: int):
+    setups = {
+        "none": lambda: None,
+        "no-op callback": lambda: [FlowEngineCallback()],
+        "recorder": lambda: [TraceRecorder()],
+        "recorder+bytes": lambda: [TraceRecorder(measure_checkpoint_bytes=True)],
+    }
+    print(f"{steps} steps, best of {repeat}")
+    print(f"{'callbacks':<18}{'us/step':>10}")
+    for name, make_callbacks in setups.items():
+        print(f"{name:<18}{await measure(steps, repeat, make_callbacks):>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.repeat))
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Annotated
+
+from typing_extensions import TypedDict
+
+from llmfy import (
+    END,
+    START,
+    FlowEngine,
+)
+
+
+def add_results(old: list[str], new: list[str]):
+    """Reducer - branches append their results"""
+    if old is None:
+        return new
+    return old + new
+
+
+class RagState(TypedDict):
+    query: str
+    results: Annotated[list[str], add_results]
+    answer: str
+
+
+async def retrieve(state: RagState) -> dict:
+    await asyncio.sleep(1)
+    return {"results": [f"documents for '{state['query']}'"]}
+
+
+async def rerank(state: RagState) -> dict:
+    await asyncio.sleep(0.5)
+    return {"results": ["documents reranked"]}
+
+
+async def pii_scan(state: RagState) -> dict:
+    await asyncio.sleep(1)
+    return {"results": ["no pii found"]}
+
+
+async def classify(state: RagState) -> dict:
+    await asyncio.sleep(1)
+    return {"results": ["intent: question"]}
+
+
+async def answer(state: RagState) -> dict:
+    return {"answer": " | ".join(state["results"])}
+
+
+async def main():
+    flow = FlowEngine(RagState)
+
+    flow.add_node("retrieve", retrieve)
+    flow.add_node("rerank", rerank)
+    flow.add_node("pii_scan", pii_scan)
+    flow.add_node("classify", classify)
+    flow.add_node("answer", answer)
+
+    # Fan out: the three branches run concurrently
+    flow.add_edge(START, "retrieve")
+    flow.add_edge(START, "pii_scan")
+    flow.add_edge(START, "classify")
+    flow.add_edge("retrieve", "rerank")
+
+    # Fan in: answer waits for every branch
+    flow.add_edge(["rerank", "pii_scan", "classify"], "answer")
+    flow.add_edge("answer", END)
+
+    flow.build()
+    print(flow.details())
+
+    start = time.perf_counter()
+    result = await flow.invoke({"query": "What is llmfy?", "results": []})
+    print(f"\nAnswer: {result['answer']}")
+    print(f"Took {time.perf_counter() - start:.2f}s (sequential would take 3.5s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,37 @@
+from .batch import BatchItem, BatchResult
+from .cache import (
+    BaseNodeCache,
+    CachePolicy,
+    InMemoryNodeCache,
+    RedisNodeCache,
+)
+from .callbacks import FlowEngineCallback, TraceRecorder
 from .checkpointer import (
     BaseCheckpointer,
+    BaseSerializer,
+    CheckpointCompactor,
+    CheckpointPolicy,
+    Durability,
+    FileLogCheckpointer,
+    FsyncMode,
     InMemoryCheckpointer,
+    JsonSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
     RedisCheckpointer,
+    RetentionPolicy,
     SQLCheckpointer,
+    TieredCheckpointer,
+    WriteMode,
+)
+from .context import RunContext
+from .distributed import (
+    BaseTaskQueue,
+    FlowWorker,
+    InMemoryTaskQueue,
+    MultiprocessingTaskQueue,
+    RedisTaskQueue,
+    run_worker,
 )
 from .edge import Edge
 from .flow_engine import FlowEngine
@@ -13,7 +42,7 @@ from .helper import (
     tools_stream_node,
     trim_messages,
 )
-from .node import END, START, Node, NodeType
+from .node import END, START, Node, NodeExecutor, NodeType
 from .state import MemoryManager, WorkflowState
 from .stream import (
     FlowEngineStreamResponse,
@@ -27,18 +56,46 @@ from .visualizer import WorkflowVisualizer
 
 __all__ = [
     "FlowEngine",
+    "RunContext",
+    "BatchItem",
+    "BatchResult",
     "Edge",
     "Node",
     "NodeType",
+    "NodeExecutor",
     "START",
     "END",
     "WorkflowState",
     "MemoryManager",
     "WorkflowVisualizer",
     "BaseCheckpointer",
+    "CheckpointPolicy",
+    "CheckpointCompactor",
+    "Durability",
+    "FileLogCheckpointer",
+    "FsyncMode",
     "InMemoryCheckpointer",
     "RedisCheckpointer",
+    "RetentionPolicy",
     "SQLCheckpointer",
+    "TieredCheckpointer",
+    "WriteMode",
+    "BaseSerializer",
+    "JsonSerializer",
+    "MsgpackSerializer",
+    "PickleSerializer",
+    "BaseNodeCache",
+    "CachePolicy",
+    "InMemoryNodeCache",
+    "RedisNodeCache",
+    "FlowEngineCallback",
+    "TraceRecorder",
+    "BaseTaskQueue",
+    "FlowWorker",
+    "InMemoryTaskQueue",
+    "MultiprocessingTaskQueue",
+    "RedisTaskQueue",
+    "run_worker",
     "tools_node",
     "tools_stream_node",
     "trim_messages",
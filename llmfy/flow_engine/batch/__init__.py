@@ -0,0 +1,3 @@
+from .batch_result import BatchItem, BatchResult
+
+__all__ = ["BatchItem", "BatchResult"]
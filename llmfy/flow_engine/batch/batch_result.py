@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class BatchItem:
+    """
+    Outcome of one input of a batch run.
+
+    Attributes:
+        index: Position of the input in the batch
+        session_id: Session ID the input ran with, None for a fresh session
+        state: Final state of the run, None when it failed
+        error: Exception raised by the run, None when it succeeded
+        latency: Seconds the run took
+    """
+
+    index: int
+    session_id: str | None
+    state: dict[str, Any] | None = None
+    error: BaseException | None = None
+    latency: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the run succeeded."""
+        return self.error is None
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[rank]
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of a batch run, items are in input order.
+
+    Attributes:
+        items: One item per input
+        elapsed: Wall-clock seconds of the whole batch
+    """
+
+    items: list[BatchItem] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def outputs(self) -> list[dict[str, Any] | BaseException]:
+        """Final state of every input, or the exception its run raised."""
+        return [item.state if item.ok else item.error for item in self.items]  # type: ignore
+
+    @property
+    def errors(self) -> list[BatchItem]:
+        """Items whose run failed."""
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def throughput(self) -> float:
+        """Runs finished per second."""
+        return len(self.items) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get batch statistics.
+
+        Returns:
+            Dictionary with run counts, throughput and per-item latency in seconds
+        """
+        latencies = sorted(item.latency for item in self.items)
+        return {
+            "total": len(self.items),
+            "succeeded": len(self.items) - len(self.errors),
+            "failed": len(self.errors),
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "latency_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50": _percentile(latencies, 50),
+            "latency_p95": _percentile(latencies, 95),
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
@@ -0,0 +1,11 @@
+from .base_node_cache import BaseNodeCache
+from .cache_policy import CachePolicy
+from .in_memory_node_cache import InMemoryNodeCache
+from .redis_node_cache import RedisNodeCache
+
+__all__ = [
+    "BaseNodeCache",
+    "CachePolicy",
+    "InMemoryNodeCache",
+    "RedisNodeCache",
+]
@@ -0,0 +1,90 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any
+
+
+class BaseNodeCache(ABC):
+    """
+    Abstract base class for node result caches.
+
+    Stores the state updates returned by nodes that have a `CachePolicy`, under
+    the key built by the policy. Hits and misses are counted per node.
+    """
+
+    def __init__(self):
+        # Counters: node_name -> count
+        self._hits: dict[str, int] = defaultdict(int)
+        self._misses: dict[str, int] = defaultdict(int)
+
+    @abstractmethod
+    async def get(self, key: str) -> tuple[bool, dict[str, Any] | None]:
+        """
+        Get a cached result.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            Whether the key was found, and the cached state updates
+        """
+        pass
+
+    @abstractmethod
+    async def set(
+        self, key: str, updates: dict[str, Any], ttl: float | None = None
+    ) -> None:
+        """
+        Cache the result of a node.
+
+        Args:
+            key: The cache key
+            updates: State updates returned by the node
+            ttl: Seconds the result is valid, None uses the cache default
+        """
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove all cached results."""
+        pass
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources held by the cache, nothing by default."""
+
+    def record(self, node_name: str, hit: bool) -> None:
+        """
+        Count a cache lookup.
+
+        Args:
+            node_name: Node that was looked up
+            hit: Whether the lookup was a hit
+        """
+        if hit:
+            self._hits[node_name] += 1
+        else:
+            self._misses[node_name] += 1
+
+    def reset_stats(self) -> None:
+        """Reset the hit and miss counters."""
+        self._hits.clear()
+        self._misses.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit and miss counts, in total and per node
+        """
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        nodes = sorted(set(self._hits) | set(self._misses))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "nodes": {
+                node: {"hits": self._hits[node], "misses": self._misses[node]}
+                for node in nodes
+            },
+        }
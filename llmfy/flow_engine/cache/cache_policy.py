@@ -0,0 +1,118 @@
+import hashlib
+import json
+import types
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import PurePath
+from typing import Any
+from uuid import UUID
+
+from llmfy.exception.llmfy_exception import LLMfyException
+
+# Types whose repr depends only on their value
+_VALUE_REPR_TYPES = (
+    bytes,
+    bytearray,
+    complex,
+    Decimal,
+    UUID,
+    PurePath,
+    date,
+    time,
+    timedelta,
+)
+
+# Types with a __dict__ that doesn't hold their value
+_UNKEYABLE_TYPES = (type, types.FunctionType, types.MethodType, types.ModuleType)
+
+
+def _key_default(obj: Any) -> Any:
+    """
+    JSON fallback for values that are not JSON types.
+
+    Raises:
+        LLMfyException: If the value has no stable representation, e.g. a plain
+            `repr()` holding its memory address
+    """
+    if isinstance(obj, (set, frozenset)):
+        # Set order depends on hashing, sort for a stable key
+        return sorted(
+            json.dumps(item, sort_keys=True, default=_key_default) for item in obj
+        )
+    if isinstance(obj, Enum):
+        return {"__type__": obj.__class__.__qualname__, "value": obj.value}
+    if isinstance(obj, _VALUE_REPR_TYPES):
+        return repr(obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, _UNKEYABLE_TYPES):
+        return {"__type__": obj.__class__.__qualname__, "data": obj.__dict__}
+    raise LLMfyException(
+        f"Can't build a stable cache key from a {type(obj).__name__} value, "
+        "pass a key_func to the CachePolicy"
+    )
+
+
+@dataclass
+class CachePolicy:
+    """
+    Memoizes the state updates a node returns.
+
+    The cache key is a hash of the node name and the values of the declared input
+    keys of the state, a node with the same inputs returns its cached updates
+    without running. Only cache nodes whose updates depend on nothing but those
+    keys. Examples:
+
+        CachePolicy(keys=["query"])                 # no expiry
+        CachePolicy(keys=["query", "filters"], ttl=300)
+        CachePolicy(key_func=lambda state: state["query"].lower())
+
+    Key values must be JSON types, sets, enums, dates, UUIDs, decimals, paths,
+    bytes or objects keyed by their `__dict__`. Other values raise an
+    `LLMfyException`, use `key_func` to turn them into such values.
+
+    Args:
+        keys: State keys the node reads. None uses the whole state.
+        ttl: Seconds a cached result is valid, None uses the cache default
+        key_func: Build the key input from the state instead of `keys`, the
+            returned value must be JSON serializable
+    """
+
+    keys: Iterable[str] | None = None
+    ttl: float | None = None
+    key_func: Callable[[dict[str, Any]], Any] | None = None
+
+    def __post_init__(self):
+        if self.keys is not None and self.key_func is not None:
+            raise LLMfyException("Use either keys or key_func, not both")
+        if self.ttl is not None and self.ttl <= 0:
+            raise LLMfyException("ttl must be greater than 0")
+        if self.keys is not None:
+            self.keys = tuple(self.keys)
+
+    def make_key(self, node_name: str, state: dict[str, Any]) -> str:
+        """
+        Build the cache key of a node run.
+
+        Args:
+            node_name: Name of the node
+            state: State the node runs with
+
+        Returns:
+            The cache key
+
+        Raises:
+            LLMfyException: If the key input has a value without a stable
+                representation
+        """
+        if self.key_func is not None:
+            inputs = self.key_func(state)
+        elif self.keys is not None:
+            inputs = {key: state.get(key) for key in self.keys}  # type: ignore
+        else:
+            inputs = state
+
+        payload = json.dumps(inputs, sort_keys=True, default=_key_default)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{node_name}:{digest}"
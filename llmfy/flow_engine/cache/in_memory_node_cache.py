@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.cache.base_node_cache import BaseNodeCache
+
+
+class InMemoryNodeCache(BaseNodeCache):
+    """
+    In-memory node result cache with LRU eviction.
+
+    Holds at most `max_size` results, the least recently used one is evicted
+    first. Expired results are dropped when they are looked up or evicted.
+    Results are copied when stored and when returned, like the other caches
+    serialize them, so a run changing its updates in place can't change them.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float | None = None):
+        """
+        Initialize the memory cache.
+
+        Args:
+            max_size: Maximum number of cached results
+            ttl: Default seconds a result is valid (None = no expiration)
+        """
+        if max_size < 1:
+            raise LLMfyException("max_size must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise LLMfyException("ttl must be greater than 0")
+
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        # Storage: key -> (expires_at, updates), least recently used first
+        self._entries: OrderedDict[str, tuple[float | None, dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    async def get(self, key: str) -> tuple[bool, dict[str, Any] | None]:
+        """
+        Get a cached result.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            Whether the key was found, and the cached state updates
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, updates = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, deepcopy(updates)
+
+    async def set(
+        self, key: str, updates: dict[str, Any], ttl: float | None = None
+    ) -> None:
+        """
+        Cache the result of a node.
+
+        Args:
+            key: The cache key
+            updates: State updates returned by the node
+            ttl: Seconds the result is valid, None uses the cache default
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._entries[key] = (expires_at, deepcopy(updates))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        """Remove all cached results."""
+        self._entries.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit and miss counts and the number of cached results
+        """
+        stats = super().get_stats()
+        stats["size"] = len(self._entries)
+        stats["max_size"] = self.max_size
+        return stats
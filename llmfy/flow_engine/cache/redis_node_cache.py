@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.cache.base_node_cache import BaseNodeCache
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+
+try:
+    import redis.asyncio as redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class RedisNodeCache(BaseNodeCache):
+    """
+    Redis node result cache, shared by every engine using the same server.
+
+    Results expire with the Redis key TTL. Redis evicts least recently used keys
+    itself when it runs with an LRU `maxmemory-policy` such as `allkeys-lru`.
+    State updates are stored as JSON, custom objects are rebuilt like checkpoint
+    states.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        prefix: str = "llmfy_node_cache:",
+        ttl: float | None = None,
+    ):
+        """
+        Initialize the Redis cache.
+
+        Args:
+            redis_url: Redis connection URL
+            prefix: Key prefix for cached results
+            ttl: Default seconds a result is valid (None = no expiration)
+        """
+        if not REDIS_AVAILABLE:
+            raise LLMfyException(
+                "redis package is not installed. redis package is required for RedisNodeCache. "
+                'Install it using `pip install "llmfy[redis]"`'
+            )
+        if ttl is not None and ttl <= 0:
+            raise LLMfyException("ttl must be greater than 0")
+
+        super().__init__()
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.ttl = ttl
+        self._client: redis.Redis | None = None
+
+    async def _get_client(self) -> redis.Redis:
+        """Get or create Redis client."""
+        if self._client is None:
+            self._client = await redis.from_url(
+                self.redis_url, encoding="utf-8", decode_responses=True
+            )
+        return self._client
+
+    async def get(self, key: str) -> tuple[bool, dict[str, Any] | None]:
+        """
+        Get a cached result.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            Whether the key was found, and the cached state updates
+        """
+        client = await self._get_client()
+        data = await client.get(f"{self.prefix}{key}")
+        if data is None:
+            return False, None
+        return True, Checkpoint._deserialize_state(data)
+
+    async def set(
+        self, key: str, updates: dict[str, Any], ttl: float | None = None
+    ) -> None:
+        """
+        Cache the result of a node.
+
+        Args:
+            key: The cache key
+            updates: State updates returned by the node
+            ttl: Seconds the result is valid, None uses the cache default
+        """
+        client = await self._get_client()
+        ttl = ttl if ttl is not None else self.ttl
+        await client.set(
+            f"{self.prefix}{key}",
+            Checkpoint._serialize_state(updates),
+            px=int(ttl * 1000) if ttl is not None else None,
+        )
+
+    async def clear(self) -> None:
+        """Remove all cached results under the key prefix."""
+        client = await self._get_client()
+        keys = [key async for key in client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await client.delete(*keys)
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        if self._client:
+            # aclose() replaces close() from redis-py 5.0.1
+            aclose = getattr(self._client, "aclose", None) or self._client.close
+            await aclose()
+            self._client = None
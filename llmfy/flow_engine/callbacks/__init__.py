@@ -0,0 +1,9 @@
+from .base_callback import FlowEngineCallback
+from .trace_recorder import LatencyHistogram, Span, TraceRecorder
+
+__all__ = [
+    "FlowEngineCallback",
+    "LatencyHistogram",
+    "Span",
+    "TraceRecorder",
+]
@@ -0,0 +1,121 @@
+import warnings
+from typing import Any
+
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+from llmfy.flow_engine.context.run_context import RunContext
+
+
+class FlowEngineCallback:
+    """
+    Hooks called by `FlowEngine` while a workflow runs.
+
+    Override the hooks you need, the others do nothing. Hooks are called on the
+    event loop and must return quickly. A hook that raises is reported with a
+    warning and does not stop the run. Durations are in seconds.
+
+    Hooks of parallel nodes interleave, use `ctx.session_id` / `ctx.step` and the
+    node name to tell them apart.
+    """
+
+    def on_run_start(self, ctx: RunContext) -> None:
+        """
+        Called when an `invoke` / `stream` call starts, before its checkpoint is loaded.
+
+        Args:
+            ctx: Run context
+        """
+
+    def on_run_end(self, ctx: RunContext, error: BaseException | None) -> None:
+        """
+        Called when a run ends.
+
+        Args:
+            ctx: Run context, `ctx.step` is the number of the last step
+            error: Exception that ended the run, None when it finished
+        """
+
+    def on_node_start(self, ctx: RunContext, node_name: str) -> None:
+        """
+        Called before a node runs.
+
+        Args:
+            ctx: Run context
+            node_name: Name of the node
+        """
+
+    def on_node_end(self, ctx: RunContext, node_name: str, duration: float) -> None:
+        """
+        Called after a node returned its updates.
+
+        Args:
+            ctx: Run context
+            node_name: Name of the node
+            duration: Time the node took, including a node cache lookup
+        """
+
+    def on_error(
+        self, ctx: RunContext, node_name: str, error: BaseException, duration: float
+    ) -> None:
+        """
+        Called when a node raised.
+
+        Args:
+            ctx: Run context
+            node_name: Name of the node
+            error: The exception raised by the node
+            duration: Time until the node raised
+        """
+
+    def on_condition(
+        self, ctx: RunContext, source: str, targets: list[str], duration: float
+    ) -> None:
+        """
+        Called after the condition of a conditional edge was evaluated.
+
+        Args:
+            ctx: Run context
+            source: Source node of the conditional edge
+            targets: Nodes selected by the condition
+            duration: Time the condition took
+        """
+
+    def on_checkpoint(
+        self,
+        ctx: RunContext,
+        operation: str,
+        checkpoint: Checkpoint | None,
+        duration: float,
+    ) -> None:
+        """
+        Called after a checkpoint was saved or loaded.
+
+        For `save`, the duration is the time the run spent handing the checkpoint
+        over: the write in `sync` durability, queueing it in `async` and
+        `exit-only`.
+
+        Args:
+            ctx: Run context
+            operation: `save` or `load`
+            checkpoint: The checkpoint, None when a load found none
+            duration: Time the operation took
+        """
+
+
+def emit(callbacks: list[FlowEngineCallback], hook: str, *args: Any) -> None:
+    """
+    Call a hook on every callback, warning about hooks that raise.
+
+    Args:
+        callbacks: Callbacks to call
+        hook: Name of the hook method
+        *args: Hook arguments
+    """
+    for callback in callbacks:
+        try:
+            getattr(callback, hook)(*args)
+        except Exception as e:
+            warnings.warn(
+                f"Callback {type(callback).__name__}.{hook} failed: {e}",
+                RuntimeWarning,
+                stacklevel=3,
+            )
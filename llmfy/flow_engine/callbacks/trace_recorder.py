@@ -0,0 +1,460 @@
+import random
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.callbacks.base_callback import FlowEngineCallback
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+from llmfy.flow_engine.context.run_context import RunContext
+
+try:
+    from opentelemetry import trace as otel_trace
+
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# Bucket upper bounds in seconds, the OpenTelemetry default histogram bounds
+DEFAULT_BOUNDARIES = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0,
+)  # fmt: skip
+
+
+class LatencyHistogram:
+    """Explicit-bucket histogram of durations in seconds."""
+
+    __slots__ = ("boundaries", "bucket_counts", "count", "total", "min", "max")
+
+    def __init__(self, boundaries: tuple[float, ...] = DEFAULT_BOUNDARIES):
+        """
+        Args:
+            boundaries: Increasing bucket upper bounds, a last bucket holds the rest
+        """
+        self.boundaries = boundaries
+        self.bucket_counts = [0] * (len(boundaries) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add a duration.
+
+        Args:
+            value: Duration in seconds
+        """
+        index = 0
+        for bound in self.boundaries:
+            if value <= bound:
+                break
+            index += 1
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        """Mean duration, 0 when empty."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a percentile as the upper bound of the bucket holding it.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            The estimate in seconds, capped at the largest observed duration
+        """
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index < len(self.boundaries):
+                    return min(self.boundaries[index], self.max)
+                break
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the histogram to a dictionary."""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "boundaries": list(self.boundaries),
+            "bucket_counts": list(self.bucket_counts),
+        }
+
+
+@dataclass
+class Span:
+    """A finished span recorded by `TraceRecorder`, timestamps in Unix nanoseconds."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_time: int
+    end_time: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+    # Error message, None when the operation succeeded
+    error: str | None = None
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Convert to a span of the OpenTelemetry OTLP/JSON format."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            # STATUS_CODE_OK / STATUS_CODE_ERROR
+            "status": {"code": 2, "message": self.error}
+            if self.error is not None
+            else {"code": 1},
+        }
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    """Wrap an attribute value in an OTLP `AnyValue`."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+@dataclass
+class _RunTrace:
+    """Trace of a run in progress."""
+
+    trace_id: str
+    span_id: str
+    start_time: int
+    last_step: int | None = None
+    steps: int = 0
+
+
+class TraceRecorder(FlowEngineCallback):
+    """
+    Callback recording latency histograms and spans of workflow runs.
+
+    Records per node latency histograms and error counts, condition and
+    checkpoint save / load latency, step counts, and checkpoint bytes with
+    `measure_checkpoint_bytes`. With `record_spans`, every run is a trace whose
+    root span has one child span per node run, condition and checkpoint
+    operation. Spans export as OpenTelemetry OTLP/JSON or replay into an
+    OpenTelemetry tracer.
+
+        recorder = TraceRecorder()
+        flow = FlowEngine(AppState, callbacks=[recorder])
+        ...
+        recorder.get_stats()
+        recorder.export_spans()
+    """
+
+    def __init__(
+        self,
+        record_spans: bool = True,
+        max_spans: int = 10000,
+        measure_checkpoint_bytes: bool = False,
+        boundaries: tuple[float, ...] = DEFAULT_BOUNDARIES,
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            record_spans: Keep a span per run, node, condition and checkpoint operation
+            max_spans: Maximum number of spans kept, the oldest are dropped first
+            measure_checkpoint_bytes: Also record checkpoint sizes. Off by default,
+                it serializes every saved / loaded checkpoint once more
+            boundaries: Bucket upper bounds of the latency histograms, in seconds
+        """
+        if max_spans < 1:
+            raise LLMfyException("max_spans must be at least 1")
+
+        self.record_spans = record_spans
+        self.measure_checkpoint_bytes = measure_checkpoint_bytes
+        self.boundaries = boundaries
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+        # Runs in progress, keyed by run context identity
+        self._runs: dict[int, _RunTrace] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the recorded metrics and spans."""
+        histogram = self._histogram
+        self.node_latency: dict[str, LatencyHistogram] = defaultdict(histogram)
+        self.node_errors: dict[str, int] = defaultdict(int)
+        self.condition_latency: dict[str, LatencyHistogram] = defaultdict(histogram)
+        # Keyed by operation, `save` or `load`
+        self.checkpoint_latency: dict[str, LatencyHistogram] = defaultdict(histogram)
+        self.checkpoint_bytes: dict[str, int] = defaultdict(int)
+        self.run_latency = histogram()
+        self.runs = 0
+        self.failed_runs = 0
+        self.steps = 0
+        self.spans.clear()
+
+    def _histogram(self) -> LatencyHistogram:
+        return LatencyHistogram(self.boundaries)
+
+    def on_run_start(self, ctx: RunContext) -> None:
+        self._runs[id(ctx)] = _RunTrace(
+            trace_id=f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            start_time=time.time_ns(),
+        )
+
+    def on_run_end(self, ctx: RunContext, error: BaseException | None) -> None:
+        run = self._runs.pop(id(ctx), None)
+        if run is None:
+            return
+
+        end_time = time.time_ns()
+        self.runs += 1
+        self.failed_runs += error is not None
+        self.steps += run.steps
+        self.run_latency.observe((end_time - run.start_time) / 1e9)
+        if self.record_spans:
+            self.spans.append(
+                Span(
+                    name="flow_engine.run",
+                    trace_id=run.trace_id,
+                    span_id=run.span_id,
+                    parent_span_id=None,
+                    start_time=run.start_time,
+                    end_time=end_time,
+                    attributes={
+                        "llmfy.session_id": ctx.session_id,
+                        "llmfy.steps": run.steps,
+                        "llmfy.last_step": ctx.step,
+                    },
+                    error=repr(error) if error is not None else None,
+                )
+            )
+
+    def on_node_start(self, ctx: RunContext, node_name: str) -> None:
+        run = self._runs.get(id(ctx))
+        if run is not None and run.last_step != ctx.step:
+            run.last_step = ctx.step
+            run.steps += 1
+
+    def on_node_end(self, ctx: RunContext, node_name: str, duration: float) -> None:
+        self.node_latency[node_name].observe(duration)
+        self._add_span(ctx, f"node {node_name}", duration, {"llmfy.node": node_name})
+
+    def on_error(
+        self, ctx: RunContext, node_name: str, error: BaseException, duration: float
+    ) -> None:
+        self.node_errors[node_name] += 1
+        self.node_latency[node_name].observe(duration)
+        self._add_span(
+            ctx, f"node {node_name}", duration, {"llmfy.node": node_name}, error
+        )
+
+    def on_condition(
+        self, ctx: RunContext, source: str, targets: list[str], duration: float
+    ) -> None:
+        self.condition_latency[source].observe(duration)
+        self._add_span(
+            ctx,
+            f"condition {source}",
+            duration,
+            {"llmfy.node": source, "llmfy.targets": ", ".join(targets)},
+        )
+
+    def on_checkpoint(
+        self,
+        ctx: RunContext,
+        operation: str,
+        checkpoint: Checkpoint | None,
+        duration: float,
+    ) -> None:
+        self.checkpoint_latency[operation].observe(duration)
+        attributes: dict[str, Any] = {"llmfy.operation": operation}
+        if checkpoint is not None and self.measure_checkpoint_bytes:
+            # Serialized size of the delta when there is one, as stored by the
+            # delta-aware checkpointers, else of the full state
+            data = checkpoint.delta.to_dict() if checkpoint.delta else checkpoint.state
+            size = len(Checkpoint._serialize_state(data).encode("utf-8"))
+            self.checkpoint_bytes[operation] += size
+            attributes["llmfy.checkpoint_bytes"] = size
+        self._add_span(ctx, f"checkpoint {operation}", duration, attributes)
+
+    def _add_span(
+        self,
+        ctx: RunContext,
+        name: str,
+        duration: float,
+        attributes: dict[str, Any],
+        error: BaseException | None = None,
+    ) -> None:
+        """Record a span ending now as a child of the run span."""
+        if not self.record_spans:
+            return
+        run = self._runs.get(id(ctx))
+        if run is None:
+            return
+
+        end_time = time.time_ns()
+        attributes["llmfy.session_id"] = ctx.session_id
+        attributes["llmfy.step"] = ctx.step
+        self.spans.append(
+            Span(
+                name=name,
+                trace_id=run.trace_id,
+                span_id=f"{random.getrandbits(64):016x}",
+                parent_span_id=run.span_id,
+                start_time=end_time - int(duration * 1e9),
+                end_time=end_time,
+                attributes=attributes,
+                error=repr(error) if error is not None else None,
+            )
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get the recorded metrics.
+
+        Returns:
+            Dictionary with run and step counts, and latency histograms (seconds)
+            per node, condition and checkpoint operation
+        """
+        return {
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "steps": self.steps,
+            "run_latency": self.run_latency.to_dict(),
+            "nodes": {
+                node: {
+                    **histogram.to_dict(),
+                    "errors": self.node_errors.get(node, 0),
+                }
+                for node, histogram in self.node_latency.items()
+            },
+            "conditions": {
+                source: histogram.to_dict()
+                for source, histogram in self.condition_latency.items()
+            },
+            "checkpoints": {
+                operation: {
+                    **histogram.to_dict(),
+                    "bytes": self.checkpoint_bytes.get(operation, 0),
+                }
+                for operation, histogram in self.checkpoint_latency.items()
+            },
+        }
+
+    def export_spans(self, service_name: str = "llmfy") -> dict[str, Any]:
+        """
+        Export the recorded spans as an OpenTelemetry OTLP/JSON trace request.
+
+        The result can be posted to the `/v1/traces` endpoint of an OTLP/HTTP
+        collector as JSON.
+
+        Args:
+            service_name: Value of the `service.name` resource attribute
+
+        Returns:
+            An `ExportTraceServiceRequest` dictionary
+        """
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "llmfy.flow_engine"},
+                            "spans": [span.to_otlp() for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export_to_opentelemetry(self, tracer: Any = None) -> int:
+        """
+        Replay the recorded spans into an OpenTelemetry tracer.
+
+        Span timestamps, attributes, status and the run / child hierarchy are kept,
+        span ids are assigned by the tracer. Replayed spans are removed from the
+        recorder.
+
+        Args:
+            tracer: OpenTelemetry tracer, defaults to the global tracer provider's
+
+        Returns:
+            Number of spans replayed
+        """
+        if not OTEL_AVAILABLE:
+            raise LLMfyException(
+                "opentelemetry-api package is not installed. It is required for "
+                'export_to_opentelemetry. Install it using `pip install "llmfy[opentelemetry]"`'
+            )
+        tracer = tracer or otel_trace.get_tracer("llmfy.flow_engine")
+
+        spans = list(self.spans)
+        self.spans.clear()
+        roots = {span.span_id: span for span in spans if span.parent_span_id is None}
+        children: dict[str | None, list[Span]] = defaultdict(list)
+        for span in spans:
+            if span.parent_span_id is not None:
+                # A child whose run span was dropped is replayed as a root
+                parent = span.parent_span_id if span.parent_span_id in roots else None
+                children[parent].append(span)
+
+        def replay(span: Span, context: Any = None) -> Any:
+            otel_span = tracer.start_span(
+                span.name,
+                context=context,
+                start_time=span.start_time,
+                attributes=span.attributes,
+            )
+            if span.error is not None:
+                otel_span.set_status(
+                    otel_trace.Status(otel_trace.StatusCode.ERROR, span.error)
+                )
+            return otel_span
+
+        for root in roots.values():
+            otel_root = replay(root)
+            context = otel_trace.set_span_in_context(otel_root)
+            for child in children.get(root.span_id, []):
+                replay(child, context).end(end_time=child.end_time)
+            otel_root.end(end_time=root.end_time)
+        for orphan in children.get(None, []):
+            replay(orphan).end(end_time=orphan.end_time)
+
+        return len(spans)
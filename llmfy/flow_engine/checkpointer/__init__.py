@@ -1,11 +1,36 @@
-from .base_checkpointer import BaseCheckpointer
+from .base_checkpointer import BaseCheckpointer, CheckpointDelta
+from .checkpoint_policy import CheckpointPolicy
+from .checkpoint_writer import CheckpointWriter, Durability
+from .file_log_checkpointer import FileLogCheckpointer, FsyncMode
 from .in_memory_checkpointer import InMemoryCheckpointer
 from .redis_checkpointer import RedisCheckpointer
+from .retention import CheckpointCompactor, RetentionPolicy
+from .serializer import (
+    BaseSerializer,
+    JsonSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
+)
 from .sql_checkpointer import SQLCheckpointer
+from .tiered_checkpointer import TieredCheckpointer, WriteMode
 
 __all__ = [
     "BaseCheckpointer",
+    "BaseSerializer",
+    "CheckpointCompactor",
+    "CheckpointDelta",
+    "CheckpointPolicy",
+    "CheckpointWriter",
+    "Durability",
+    "FileLogCheckpointer",
+    "FsyncMode",
     "InMemoryCheckpointer",
+    "JsonSerializer",
+    "MsgpackSerializer",
+    "PickleSerializer",
     "RedisCheckpointer",
+    "RetentionPolicy",
     "SQLCheckpointer",
+    "TieredCheckpointer",
+    "WriteMode",
 ]
@@ -1,8 +1,11 @@
 import json
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from llmfy.flow_engine.checkpointer.serializer import BaseSerializer
 
 
 @dataclass
@@ -13,7 +16,31 @@ class CheckpointMetadata:
     timestamp: datetime
     node_name: str
     step: int
+    # Nodes scheduled to run after this checkpoint, None for checkpoints saved
+    # before parallel branches were supported (resume re-routes from node_name)
+    next_nodes: list[str] | None = None
+    # Join node -> sources already completed while waiting for the rest
+    pending_joins: dict[str, list[str]] = field(default_factory=dict)
+    # Previous checkpoint saved by the same run, None for the first one
+    parent_id: str | None = None
+
+
+@dataclass
+class CheckpointDelta:
+    """State changes of a checkpoint since its parent checkpoint."""
+    # Keys whose value was replaced
+    updates: dict[str, Any] = field(default_factory=dict)
+    # List keys that only got new items appended
+    appends: dict[str, list[Any]] = field(default_factory=dict)
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert delta to dictionary for storage."""
+        return {"updates": self.updates, "appends": self.appends}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CheckpointDelta":
+        """Create delta from dictionary."""
+        return cls(updates=data.get("updates") or {}, appends=data.get("appends") or {})
 
 
 @dataclass
@@ -21,6 +48,9 @@ class Checkpoint:
     """Represents a saved state checkpoint."""
     metadata: CheckpointMetadata
     state: dict[str, Any]
+    # Changes since `metadata.parent_id`, lets checkpointers store a delta
+    # instead of the full state
+    delta: CheckpointDelta | None = None
     
     def to_dict(self) -> dict[str, Any]:
         """Convert checkpoint to dictionary for storage."""
@@ -30,6 +60,9 @@ class Checkpoint:
             "timestamp": self.metadata.timestamp.isoformat(),
             "node_name": self.metadata.node_name,
             "step": self.metadata.step,
+            "next_nodes": self.metadata.next_nodes,
+            "pending_joins": self.metadata.pending_joins,
+            "parent_id": self.metadata.parent_id,
             "state": self._serialize_state(self.state)
         }
     
@@ -50,41 +83,43 @@ class Checkpoint:
     @staticmethod
     def _deserialize_state(state_str: str) -> dict[str, Any]:
         """Deserialize state from JSON string, reconstructing custom objects."""
+        return json.loads(state_str, object_hook=Checkpoint._object_hook)
+
+    @staticmethod
+    def _object_hook(dct: dict[str, Any]) -> Any:
+        """JSON object hook reconstructing the custom objects of `_serialize_state`."""
         import importlib
-        
-        def object_hook(dct):
-            if '__type__' in dct and '__module__' in dct and 'data' in dct:
-                # Reconstruct the custom object
-                try:
-                    module = importlib.import_module(dct['__module__'])
-                    cls = getattr(module, dct['__type__'])
+
+        if '__type__' in dct and '__module__' in dct and 'data' in dct:
+            # Reconstruct the custom object
+            try:
+                module = importlib.import_module(dct['__module__'])
+                cls = getattr(module, dct['__type__'])
+                
+                # Handle different object construction patterns
+                if hasattr(cls, '__init__'):
+                    # Try to create instance from data dict
+                    obj_data = dct['data']
                     
-                    # Handle different object construction patterns
-                    if hasattr(cls, '__init__'):
-                        # Try to create instance from data dict
-                        obj_data = dct['data']
-                        
-                        # Check if class accepts **kwargs
+                    # Check if class accepts **kwargs
+                    try:
+                        obj = cls(**obj_data)
+                        return obj
+                    except TypeError:
+                        # If direct kwargs don't work, try creating empty instance
+                        # and setting attributes
                         try:
-                            obj = cls(**obj_data)
+                            obj = cls.__new__(cls)
+                            for key, value in obj_data.items():
+                                setattr(obj, key, value)
                             return obj
-                        except TypeError:
-                            # If direct kwargs don't work, try creating empty instance
-                            # and setting attributes
-                            try:
-                                obj = cls.__new__(cls)
-                                for key, value in obj_data.items():
-                                    setattr(obj, key, value)
-                                return obj
-                            except Exception as _:
-                                # If all else fails, return the dict
-                                return dct
-                except (ImportError, AttributeError) as _:
-                    # If we can't import the class, return the dict representation
-                    return dct
-            return dct
-        
-        return json.loads(state_str, object_hook=object_hook)
+                        except Exception as _:
+                            # If all else fails, return the dict
+                            return dct
+            except (ImportError, AttributeError) as _:
+                # If we can't import the class, return the dict representation
+                return dct
+        return dct
     
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "Checkpoint":
@@ -94,7 +129,10 @@ class Checkpoint:
             session_id=data["session_id"],
             timestamp=datetime.fromisoformat(data["timestamp"]),
             node_name=data["node_name"],
-            step=data["step"]
+            step=data["step"],
+            next_nodes=data.get("next_nodes"),
+            pending_joins=data.get("pending_joins") or {},
+            parent_id=data.get("parent_id"),
         )
         state = cls._deserialize_state(data["state"])
         return cls(metadata=metadata, state=state)
@@ -103,6 +141,10 @@ class Checkpoint:
 
 class BaseCheckpointer(ABC):
     """Base class for checkpoint storage backends."""
+
+    # Serializer of the stored payloads, None stores them as JSON text. Only
+    # used by backends that serialize checkpoints.
+    serializer: "BaseSerializer | None" = None
     
     @abstractmethod
     async def save(self, checkpoint: Checkpoint) -> None:
@@ -114,6 +156,19 @@ class BaseCheckpointer(ABC):
         """
         pass
     
+    async def save_many(self, checkpoints: list[Checkpoint]) -> None:
+        """
+        Save checkpoints in order.
+
+        Used by batched writers (see `CheckpointWriter`). Backends that can write
+        a batch in one round trip override it, the default saves one by one.
+        
+        Args:
+            checkpoints: The checkpoints to save, oldest first
+        """
+        for checkpoint in checkpoints:
+            await self.save(checkpoint)
+    
     @abstractmethod
     async def load(self, session_id: str, checkpoint_id: str | None = None) -> Checkpoint | None:
         """
@@ -156,4 +211,16 @@ class BaseCheckpointer(ABC):
     @abstractmethod
     async def clear_all(self) -> None:
         """Clear all checkpoints from storage."""
-        pass
\ No newline at end of file
+        pass
+
+    async def compact(self) -> int:
+        """
+        Apply the retention policy of the checkpointer to every session.
+
+        Backends supporting a `RetentionPolicy` override it, see
+        `CheckpointCompactor`. The default keeps everything.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        return 0
\ No newline at end of file
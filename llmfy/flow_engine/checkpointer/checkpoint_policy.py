@@ -0,0 +1,68 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from llmfy.exception.llmfy_exception import LLMfyException
+
+
+@dataclass
+class CheckpointPolicy:
+    """
+    Decides after which steps of a run a checkpoint is saved.
+
+    A checkpoint is saved after a step when any of the configured triggers fires.
+    The checkpoint of the last step (the run reached END) is always saved, so a
+    finished session is never resumed half way. Skipped steps are re-run when a
+    session resumes from an older checkpoint after a crash.
+
+    The default policy saves every step, START included. Examples:
+
+        CheckpointPolicy(every_n_steps=10)               # every 10th step
+        CheckpointPolicy(every_n_steps=None, after_nodes=["agent"])
+        CheckpointPolicy(every_n_steps=None, interval=5.0)
+        CheckpointPolicy(every_n_steps=None)             # only on END or error
+
+    Args:
+        every_n_steps: Save when the step number is a multiple of N, START being
+            step 0. None disables the trigger.
+        after_nodes: Save after steps running any of these nodes
+        interval: Save when at least this many seconds passed since the last
+            saved checkpoint of the run
+        on_error: When a node fails, save a checkpoint that resumes at the failed
+            step, unless the last saved checkpoint already does
+    """
+
+    every_n_steps: int | None = 1
+    after_nodes: Iterable[str] | None = None
+    interval: float | None = None
+    on_error: bool = True
+
+    def __post_init__(self):
+        if self.every_n_steps is not None and self.every_n_steps < 1:
+            raise LLMfyException("every_n_steps must be at least 1")
+        if self.interval is not None and self.interval < 0:
+            raise LLMfyException("interval can't be negative")
+        if self.after_nodes is not None:
+            self.after_nodes = frozenset(self.after_nodes)
+
+    def should_save(
+        self,
+        step: int,
+        nodes: list[str],
+        seconds_since_save: float,
+    ) -> bool:
+        """
+        Check whether the checkpoint of a step is saved.
+
+        Args:
+            step: Step number, 0 for START
+            nodes: Nodes that ran in the step
+            seconds_since_save: Time since the last saved checkpoint of the run
+
+        Returns:
+            True to save the checkpoint
+        """
+        if self.every_n_steps is not None and step % self.every_n_steps == 0:
+            return True
+        if self.after_nodes and any(node in self.after_nodes for node in nodes):  # type: ignore
+            return True
+        return self.interval is not None and seconds_since_save >= self.interval
@@ -0,0 +1,187 @@
+import asyncio
+from enum import StrEnum
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    BaseCheckpointer,
+    Checkpoint,
+)
+
+
+class Durability(StrEnum):
+    """When checkpoints of a run are written to the checkpointer."""
+
+    SYNC = "sync"
+    """Each checkpoint is written before the next step starts."""
+    ASYNC = "async"
+    """Checkpoints are queued and written in batches by a background task.
+    Flush before the event loop stops, a batch being written then is lost."""
+    EXIT_ONLY = "exit-only"
+    """Checkpoints are kept by the run and written in one batch when it ends."""
+
+
+class CheckpointWriter:
+    """
+    Write-behind queue in front of a checkpointer.
+
+    Checkpoints are put in a bounded queue, a background task takes them out in
+    batches of up to `batch_size` and writes each batch with `save_many`. A full
+    queue makes `put` wait, so a slow checkpointer slows runs down instead of
+    growing memory. Checkpoints are written in the order they were put.
+    `flush(session_id)` only waits for the checkpoints of one session.
+
+    The writer belongs to the event loop it was first used on.
+    """
+
+    def __init__(
+        self,
+        checkpointer: BaseCheckpointer,
+        max_queue_size: int = 1000,
+        batch_size: int = 100,
+    ):
+        """
+        Args:
+            checkpointer: Checkpointer the checkpoints are written to
+            max_queue_size: Maximum number of checkpoints waiting to be written
+            batch_size: Maximum number of checkpoints written in one batch
+        """
+        if max_queue_size < 1:
+            raise LLMfyException("max_queue_size must be at least 1")
+        if batch_size < 1:
+            raise LLMfyException("batch_size must be at least 1")
+
+        self.checkpointer = checkpointer
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue[Checkpoint] = asyncio.Queue(max_queue_size)
+        # Session -> checkpoints put and not written yet, and the condition
+        # notified when a batch is written
+        self._pending: dict[str, int] = {}
+        self._written = asyncio.Condition()
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # First write failure, raised by the next `put` / `flush`
+        self._error: BaseException | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        """Event loop the writer runs on, None before first use."""
+        return self._loop
+
+    @property
+    def queued(self) -> int:
+        """Number of checkpoints waiting to be written."""
+        return self._queue.qsize()
+
+    def adopt(self, other: "CheckpointWriter") -> None:
+        """
+        Take over the checkpoints another writer did not write yet.
+
+        Used when the other writer's event loop is gone, they are written by this
+        writer on its next `put` / `flush`.
+
+        Args:
+            other: The writer to take the checkpoints from
+        """
+        while not other._queue.empty():
+            checkpoint = other._queue.get_nowait()
+            self._queue.put_nowait(checkpoint)
+            self._add_pending(checkpoint.metadata.session_id, 1)
+            other._queue.task_done()
+        other._pending.clear()
+
+    async def put(self, checkpoint: Checkpoint) -> None:
+        """
+        Queue a checkpoint to be written.
+
+        Args:
+            checkpoint: The checkpoint to write
+
+        Raises:
+            LLMfyException: If writing an earlier checkpoint failed
+        """
+        self._raise_error()
+        self._ensure_worker()
+        # Counted before a full queue makes it wait, a flush of the session
+        # waits for it too
+        self._add_pending(checkpoint.metadata.session_id, 1)
+        try:
+            await self._queue.put(checkpoint)
+        except BaseException:
+            self._add_pending(checkpoint.metadata.session_id, -1)
+            raise
+
+    async def flush(self, session_id: str | None = None) -> None:
+        """
+        Wait until the queued checkpoints are written.
+
+        Args:
+            session_id: Only wait for the checkpoints of this session, None to wait
+                for every checkpoint
+
+        Raises:
+            LLMfyException: If writing a checkpoint failed
+        """
+        if session_id is not None:
+            if self._pending.get(session_id):
+                self._ensure_worker()
+                async with self._written:
+                    await self._written.wait_for(
+                        lambda: not self._pending.get(session_id)
+                    )
+        elif not self._queue.empty() or self._worker is not None:
+            self._ensure_worker()
+            await self._queue.join()
+        self._raise_error()
+
+    async def close(self) -> None:
+        """Flush the queue and stop the background task."""
+        try:
+            await self.flush()
+        finally:
+            if self._worker is not None:
+                self._worker.cancel()
+                try:
+                    await self._worker
+                except asyncio.CancelledError:
+                    pass
+                self._worker = None
+
+    def _ensure_worker(self):
+        """Start the background task if it is not running."""
+        if self._worker is None or self._worker.done():
+            self._loop = asyncio.get_running_loop()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Background task writing queued checkpoints in batches."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self.checkpointer.save_many(batch)
+            except Exception as e:
+                # Kept for the caller, the worker goes on with the next batch
+                if self._error is None:
+                    self._error = e
+            finally:
+                for checkpoint in batch:
+                    self._add_pending(checkpoint.metadata.session_id, -1)
+                    self._queue.task_done()
+                async with self._written:
+                    self._written.notify_all()
+
+    def _add_pending(self, session_id: str, count: int):
+        """Count checkpoints of a session put in, or written from, the queue."""
+        pending = self._pending.get(session_id, 0) + count
+        if pending > 0:
+            self._pending[session_id] = pending
+        else:
+            self._pending.pop(session_id, None)
+
+    def _raise_error(self):
+        """Raise the pending write failure, if any."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise LLMfyException(f"Writing checkpoints failed: {error}") from error
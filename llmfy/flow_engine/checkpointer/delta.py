@@ -0,0 +1,431 @@
+import json
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointDelta,
+    CheckpointMetadata,
+)
+from llmfy.flow_engine.checkpointer.serializer import (
+    BaseSerializer,
+    is_framed,
+    loads_payload,
+)
+
+FULL = "full"
+DELTA = "delta"
+
+
+@dataclass
+class StoredCheckpoint:
+    """
+    A checkpoint as kept by a storage backend.
+
+    Either a full snapshot (`state`) or a delta (`delta`) on top of the
+    checkpoints listed in `chain`: the full snapshot it is based on, followed by
+    the deltas between that snapshot and this checkpoint, oldest first.
+    """
+    metadata: CheckpointMetadata
+    state: dict[str, Any] | None = None
+    delta: CheckpointDelta | None = None
+    chain: list[str] = field(default_factory=list)
+
+    @property
+    def kind(self) -> str:
+        """`full` or `delta`"""
+        return DELTA if self.delta is not None else FULL
+
+    @classmethod
+    def from_checkpoint(
+        cls, checkpoint: Checkpoint, chain: list[str] | None
+    ) -> "StoredCheckpoint":
+        """
+        Create the stored form of a checkpoint.
+
+        Args:
+            checkpoint: The checkpoint to store
+            chain: Chain from `DeltaChains.next_chain`, None to store a full snapshot
+
+        Returns:
+            The stored checkpoint
+        """
+        if chain is None:
+            return cls(metadata=checkpoint.metadata, state=checkpoint.state)
+        return cls(metadata=checkpoint.metadata, delta=checkpoint.delta, chain=chain)
+
+    def payload(self, serializer: BaseSerializer | None = None) -> str | bytes:
+        """
+        Serialize the state, or the delta.
+
+        Args:
+            serializer: Serializer of the payload, None for a JSON string
+
+        Returns:
+            JSON string, or bytes of the serializer
+        """
+        data = self._payload_data()
+        if serializer is not None:
+            return serializer.dumps(data)
+        return Checkpoint._serialize_state(data)
+
+    def _payload_data(self) -> dict[str, Any]:
+        """The state, or the delta as a dict."""
+        return self.delta.to_dict() if self.delta is not None else self.state or {}
+
+    @classmethod
+    def from_payload(
+        cls,
+        metadata: CheckpointMetadata,
+        kind: str | None,
+        payload: str | bytes,
+        chain: list[str] | None,
+        serializer: BaseSerializer | None = None,
+    ) -> "StoredCheckpoint":
+        """
+        Create a stored checkpoint from its serialized payload.
+
+        Args:
+            metadata: Checkpoint metadata
+            kind: `full` or `delta`, None for records written before deltas existed
+            payload: Serialized state or delta, JSON text or of `serializer`
+            chain: Checkpoints the delta is based on
+            serializer: Serializer of the checkpointer, None for JSON
+
+        Returns:
+            The stored checkpoint
+        """
+        return cls.from_data(
+            metadata, kind, loads_payload(payload, serializer), chain
+        )
+
+    @classmethod
+    def from_data(
+        cls,
+        metadata: CheckpointMetadata,
+        kind: str | None,
+        data: dict[str, Any],
+        chain: list[str] | None,
+    ) -> "StoredCheckpoint":
+        """
+        Create a stored checkpoint from its deserialized payload.
+
+        Args:
+            metadata: Checkpoint metadata
+            kind: `full` or `delta`, None for records written before deltas existed
+            data: Deserialized state or delta
+            chain: Checkpoints the delta is based on
+
+        Returns:
+            The stored checkpoint
+        """
+        if kind == DELTA:
+            return cls(
+                metadata=metadata,
+                delta=CheckpointDelta.from_dict(data),
+                chain=list(chain or []),
+            )
+        return cls(metadata=metadata, state=data)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert stored checkpoint to dictionary for storage."""
+        return {**self._metadata_dict(), "state": self.payload()}
+
+    def to_record(self, serializer: BaseSerializer | None = None) -> str | bytes:
+        """
+        Serialize the stored checkpoint to a single document.
+
+        Unlike `json.dumps(to_dict())`, the payload is embedded as JSON under
+        `data` instead of as a JSON string under `state`, so it isn't escaped
+        when written and `from_record` parses the document once.
+
+        Args:
+            serializer: Serializer of the whole record, None for JSON text
+        """
+        if serializer is not None:
+            return serializer.dumps(
+                {**self._metadata_dict(), "data": self._payload_data()}
+            )
+        metadata = json.dumps(self._metadata_dict())
+        return f'{metadata[:-1]}, "data": {self.payload()}}}'
+
+    @classmethod
+    def from_record(
+        cls, record: str | bytes, serializer: BaseSerializer | None = None
+    ) -> "StoredCheckpoint":
+        """
+        Create stored checkpoint from `to_record`, also reads `json.dumps(to_dict())`.
+
+        Args:
+            record: JSON text, or a record of `serializer`
+            serializer: Serializer of the checkpointer, None for JSON
+        """
+        if is_framed(record):
+            data = loads_payload(record, serializer)
+        else:
+            data = json.loads(record, object_hook=Checkpoint._object_hook)
+        if "data" not in data:
+            return cls.from_dict(data, serializer)
+        return cls.from_data(
+            _metadata_from_dict(data), data.get("kind"), data["data"], data.get("chain")
+        )
+
+    def _metadata_dict(self) -> dict[str, Any]:
+        """Metadata, kind and chain of the stored checkpoint."""
+        return {
+            "checkpoint_id": self.metadata.checkpoint_id,
+            "session_id": self.metadata.session_id,
+            "timestamp": self.metadata.timestamp.isoformat(),
+            "node_name": self.metadata.node_name,
+            "step": self.metadata.step,
+            "next_nodes": self.metadata.next_nodes,
+            "pending_joins": self.metadata.pending_joins,
+            "parent_id": self.metadata.parent_id,
+            "kind": self.kind,
+            "chain": self.chain,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], serializer: BaseSerializer | None = None
+    ) -> "StoredCheckpoint":
+        """Create stored checkpoint from dictionary, also reads `Checkpoint.to_dict`."""
+        return cls.from_payload(
+            _metadata_from_dict(data),
+            data.get("kind"),
+            data["state"],
+            data.get("chain"),
+            serializer,
+        )
+
+
+def _metadata_from_dict(data: dict[str, Any]) -> CheckpointMetadata:
+    """Read the checkpoint metadata of a stored record."""
+    return CheckpointMetadata(
+        checkpoint_id=data["checkpoint_id"],
+        session_id=data["session_id"],
+        timestamp=datetime.fromisoformat(data["timestamp"]),
+        node_name=data["node_name"],
+        step=data["step"],
+        next_nodes=data.get("next_nodes"),
+        pending_joins=data.get("pending_joins") or {},
+        parent_id=data.get("parent_id"),
+    )
+
+
+class DeltaChains:
+    """
+    Decides whether a checkpoint is stored as a full snapshot or as a delta.
+
+    Tracks the last checkpoint stored for each session. A checkpoint carrying a
+    delta against that checkpoint is stored as a delta until the chain reaches
+    `snapshot_interval` checkpoints, then a full snapshot starts a new chain.
+    Anything else (first checkpoint of a run, another writer in between, a
+    restarted process) gets a full snapshot, so a chain never has gaps.
+    """
+
+    def __init__(self, snapshot_interval: int):
+        """
+        Args:
+            snapshot_interval: Store a full snapshot every N checkpoints of a
+                session, 1 stores every checkpoint in full
+        """
+        if snapshot_interval < 1:
+            raise LLMfyException("snapshot_interval must be at least 1")
+        self.snapshot_interval = snapshot_interval
+        # Session -> (last checkpoint id, chain of that checkpoint)
+        self._heads: dict[str, tuple[str, list[str]]] = {}
+
+    def next_chain(self, checkpoint: Checkpoint) -> list[str] | None:
+        """
+        Get the chain to store a checkpoint as a delta.
+
+        Args:
+            checkpoint: The checkpoint about to be stored
+
+        Returns:
+            The chain of the delta, or None to store a full snapshot
+        """
+        metadata = checkpoint.metadata
+        head = self._heads.get(metadata.session_id)
+
+        chain = None
+        if (
+            checkpoint.delta is not None
+            and head is not None
+            and head[0] == metadata.parent_id
+        ):
+            head_id, head_chain = head
+            if len(head_chain) + 1 < self.snapshot_interval:
+                chain = [*head_chain, head_id]
+
+        self._heads[metadata.session_id] = (metadata.checkpoint_id, chain or [])
+        return chain
+
+    def forget(self, session_id: str | None = None) -> None:
+        """
+        Start the next checkpoint of a session, or of every session, in full.
+
+        Args:
+            session_id: The session ID, or None for all sessions
+        """
+        if session_id is None:
+            self._heads.clear()
+        else:
+            self._heads.pop(session_id, None)
+
+
+def replay(state: dict[str, Any], deltas: Iterable[CheckpointDelta]) -> dict[str, Any]:
+    """
+    Apply deltas on top of a state.
+
+    Args:
+        state: State of the full snapshot, left unchanged
+        deltas: Deltas to apply, oldest first
+
+    Returns:
+        The resulting state
+    """
+    state = dict(state)
+    # Lists created here, safe to extend in place
+    owned: set[str] = set()
+    for delta in deltas:
+        for key, value in delta.updates.items():
+            state[key] = value
+            owned.discard(key)
+        for key, items in delta.appends.items():
+            if key not in owned:
+                state[key] = list(state.get(key) or [])
+                owned.add(key)
+            state[key].extend(items)
+    return state
+
+
+def missing_chain_ids(
+    stored: Iterable[StoredCheckpoint], known: Iterable[str]
+) -> list[str]:
+    """
+    Get the chain checkpoints needed to materialize `stored` that are not loaded yet.
+
+    Args:
+        stored: Checkpoints to materialize
+        known: IDs of the checkpoints already loaded
+
+    Returns:
+        IDs to load
+    """
+    known = set(known)
+    missing = []
+    for item in stored:
+        for checkpoint_id in item.chain:
+            if checkpoint_id not in known:
+                known.add(checkpoint_id)
+                missing.append(checkpoint_id)
+    return missing
+
+
+def materialize(
+    stored: list[StoredCheckpoint],
+    lookup: Mapping[str, StoredCheckpoint],
+) -> list[Checkpoint]:
+    """
+    Rebuild full checkpoints, replaying deltas from their full snapshot.
+
+    Args:
+        stored: Checkpoints to rebuild
+        lookup: Stored checkpoints by ID, must contain every chain checkpoint
+
+    Returns:
+        The checkpoints, in the order of `stored`
+    """
+    # Checkpoint id -> rebuilt state, shared between chains
+    states: dict[str, dict[str, Any]] = {}
+
+    def rebuild(item: StoredCheckpoint) -> dict[str, Any]:
+        checkpoint_id = item.metadata.checkpoint_id
+        if checkpoint_id in states:
+            return states[checkpoint_id]
+
+        if item.delta is None:
+            state = item.state or {}
+        else:
+            if not item.chain:
+                raise LLMfyException(f"Delta checkpoint '{checkpoint_id}' has no chain")
+            # Start from the newest chain checkpoint already rebuilt
+            start = 0
+            for i in range(len(item.chain) - 1, -1, -1):
+                if item.chain[i] in states:
+                    start = i
+                    break
+            deltas = []
+            for chain_id in item.chain[start + 1 :]:
+                deltas.append(_lookup(lookup, chain_id, checkpoint_id).delta)
+            deltas.append(item.delta)
+            base = states.get(item.chain[start])
+            if base is None:
+                base_item = _lookup(lookup, item.chain[start], checkpoint_id)
+                if base_item.delta is not None:
+                    raise LLMfyException(
+                        f"Checkpoint '{checkpoint_id}' is not based on a full snapshot"
+                    )
+                base = base_item.state or {}
+            state = replay(base, deltas)  # type: ignore
+
+        states[checkpoint_id] = state
+        return state
+
+    return [
+        Checkpoint(metadata=replace(item.metadata), state=dict(rebuild(item)))
+        for item in stored
+    ]
+
+
+def rebase_dependents(
+    deleted_id: str,
+    stored: Iterable[StoredCheckpoint],
+    lookup: Mapping[str, StoredCheckpoint],
+) -> list[StoredCheckpoint]:
+    """
+    Rewrite the checkpoints depending on a checkpoint that is about to be deleted.
+
+    The delta saved right after the deleted checkpoint becomes a full snapshot,
+    later deltas of the chain are based on it instead.
+
+    Args:
+        deleted_id: ID of the checkpoint to delete
+        stored: Checkpoints of the session
+        lookup: Stored checkpoints by ID, must contain every chain checkpoint
+
+    Returns:
+        The rewritten checkpoints, to be saved by the backend
+    """
+    dependents = [item for item in stored if deleted_id in item.chain]
+    if not dependents:
+        return []
+
+    # The child's chain ends with the deleted checkpoint
+    dependents.sort(key=lambda item: len(item.chain))
+    child = dependents[0]
+    child_id = child.metadata.checkpoint_id
+    (rebuilt,) = materialize([child], lookup)
+
+    rewritten = [StoredCheckpoint(metadata=child.metadata, state=rebuilt.state)]
+    for item in dependents[1:]:
+        chain = item.chain[item.chain.index(child_id) :]
+        rewritten.append(replace(item, chain=chain))
+    return rewritten
+
+
+def _lookup(
+    lookup: Mapping[str, StoredCheckpoint], checkpoint_id: str, dependent_id: str
+) -> StoredCheckpoint:
+    """Get a chain checkpoint, failing loudly when the chain is broken."""
+    item = lookup.get(checkpoint_id)
+    if item is None:
+        raise LLMfyException(
+            f"Checkpoint '{dependent_id}' depends on missing checkpoint '{checkpoint_id}'"
+        )
+    return item
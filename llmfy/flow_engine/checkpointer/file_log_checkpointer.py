@@ -0,0 +1,917 @@
+import asyncio
+import builtins
+import contextlib
+import json
+import mmap
+import os
+import struct
+import warnings
+import zlib
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    BaseCheckpointer,
+    Checkpoint,
+)
+from llmfy.flow_engine.checkpointer.delta import (
+    DeltaChains,
+    StoredCheckpoint,
+    materialize,
+    rebase_dependents,
+)
+from llmfy.flow_engine.checkpointer.retention import RetentionPolicy, to_epoch
+from llmfy.flow_engine.checkpointer.serializer import BaseSerializer
+
+
+class FsyncMode(StrEnum):
+    """When `FileLogCheckpointer` flushes appended records to disk."""
+
+    # A save returns once its record is on disk, concurrent saves share one fsync
+    COMMIT = "commit"
+    # Records are flushed every `sync_interval` seconds in the background, a
+    # machine crash loses at most that much
+    INTERVAL = "interval"
+    # Flushing is left to the operating system
+    NONE = "none"
+
+
+# Record frame: kind, metadata length, record length, CRC32 of metadata and record
+_HEADER = struct.Struct("<cIII")
+_PUT = b"P"
+_DELETE = b"D"
+_INDEX_VERSION = 1
+
+
+@dataclass(slots=True)
+class _Entry:
+    """Location of a checkpoint record in the log."""
+
+    session_id: str
+    timestamp: float
+    segment: int
+    # Offset and length of the record, after the frame header and metadata
+    offset: int
+    length: int
+    # Bytes of the whole frame
+    size: int
+    # Full snapshot the delta is based on, None for full snapshots
+    base: str | None
+
+    @property
+    def frame_offset(self) -> int:
+        return self.offset + self.length - self.size
+
+
+class FileLogCheckpointer(BaseCheckpointer):
+    """
+    Append-only file checkpoint storage for single-node deployments.
+
+    Checkpoints are appended to segment files in `directory`, a new segment is
+    started once the active one reaches `segment_size` bytes. Deletes append
+    tombstones. An index from session to record offsets is kept in memory and
+    written to `index.json` on `close()`, so a restart only scans the records
+    appended since. Records are read through memory maps of the segments.
+
+    `compact()` applies the `retention` policy and, once at least
+    `compact_threshold` of the log is garbage, rewrites the segments with only
+    the live records, in a worker thread. Run it in the background with a
+    `CheckpointCompactor`.
+
+    Every `snapshot_interval` checkpoints of a session one is stored in full, the
+    ones in between only store their delta against the previous checkpoint.
+
+    The directory must be used by a single process at a time.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 64 * 1024 * 1024,
+        fsync: FsyncMode | str = FsyncMode.COMMIT,
+        sync_interval: float = 0.05,
+        snapshot_interval: int = 10,
+        retention: RetentionPolicy | None = None,
+        serializer: BaseSerializer | None = None,
+        compact_threshold: float = 0.5,
+    ):
+        """
+        Initialize the file log checkpointer.
+
+        Args:
+            directory: Directory of the segment files, created if missing
+            segment_size: Bytes after which a new segment file is started
+            fsync: When appended records are flushed to disk, see `FsyncMode`
+            sync_interval: Seconds between two flushes with `FsyncMode.INTERVAL`
+            snapshot_interval: Store a full snapshot every N checkpoints of a session
+                and deltas in between, 1 stores every checkpoint in full
+            retention: Bounds the checkpoints kept per session
+            serializer: Serializer of the checkpoint records, None for JSON text
+            compact_threshold: Fraction of garbage in the log from which
+                `compact()` rewrites the segments
+        """
+        if segment_size < 1:
+            raise LLMfyException("segment_size must be at least 1")
+        if sync_interval <= 0:
+            raise LLMfyException("sync_interval must be positive")
+        if not 0 < compact_threshold <= 1:
+            raise LLMfyException("compact_threshold must be in (0, 1]")
+
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = FsyncMode(fsync)
+        self.sync_interval = sync_interval
+        self.retention = retention
+        self.serializer = serializer
+        self.compact_threshold = compact_threshold
+        self._chains = DeltaChains(snapshot_interval)
+
+        # Index: checkpoint_id -> entry, session_id -> checkpoint ids oldest first
+        self._entries: dict[str, _Entry] = {}
+        self._sessions: dict[str, list[str]] = {}
+        # Segment -> bytes of valid records, and bytes of live checkpoint records
+        self._segment_sizes: dict[int, int] = {}
+        self._live_bytes: dict[int, int] = {}
+        # Read-only maps of the segments
+        self._maps: dict[int, mmap.mmap] = {}
+
+        self._active = 0
+        self._fd: int | None = None
+        # Bytes appended and bytes known to be on disk, since opening
+        self._written = 0
+        self._synced = 0
+        self._sync_task: asyncio.Future | None = None
+        self._interval_task: asyncio.Task | None = None
+        # Descriptors of rolled segments, closed once the running fsync is done
+        self._retired_fds: list[int] = []
+        self._compacting = False
+        self._open_lock = asyncio.Lock()
+        self._opened = False
+
+    # -- Opening and recovery ------------------------------------------------
+
+    async def _ensure_open(self) -> None:
+        """Open the log, rebuilding the index, on first use."""
+        if self._opened:
+            return
+        async with self._open_lock:
+            if not self._opened:
+                await asyncio.to_thread(self._open)
+                self._opened = True
+
+    def _open(self) -> None:
+        """Load the index, scan the records appended since and open the active segment."""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self._segment_numbers()
+
+        scanned = self._load_index(segments)
+        if scanned is None:
+            self._reset_index()
+            scanned = {}
+        for segment in segments:
+            end = self._scan(segment, scanned.get(segment, 0))
+            if segment != segments[-1]:
+                continue
+            # Drop a record torn by a crash, the next one is appended after it
+            if end < os.path.getsize(self._segment_path(segment)):
+                with open(self._segment_path(segment), "r+b") as file:
+                    file.truncate(end)
+
+        self._active = segments[-1] if segments else 1
+        self._fd = self._open_segment(self._active)
+        self._segment_sizes.setdefault(self._active, 0)
+        self._live_bytes.setdefault(self._active, 0)
+
+    def _load_index(self, segments: builtins.list[int]) -> dict[int, int] | None:
+        """
+        Load the on-disk index if it matches the segments.
+
+        Returns:
+            Segment -> offset the index covers, None when it can't be used
+        """
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != _INDEX_VERSION:
+            return None
+
+        covered = {}
+        for name, (size, inode) in data["segments"].items():
+            segment = int(name)
+            try:
+                stat = os.stat(self._segment_path(segment))
+            except OSError:
+                return None
+            # A rewritten segment has a new inode
+            if stat.st_ino != inode or stat.st_size < size:
+                return None
+            covered[segment] = size
+        # Segments the index doesn't know must come after the ones it covers
+        if covered and any(
+            segment not in covered and segment < max(covered) for segment in segments
+        ):
+            return None
+
+        self._reset_index()
+        for segment, size in covered.items():
+            self._segment_sizes[segment] = size
+            self._live_bytes[segment] = 0
+        for checkpoint_id, session_id, timestamp, *location, base in data["entries"]:
+            self._index_put(checkpoint_id, session_id, timestamp, *location, base)
+        return covered
+
+    def _write_index(self) -> None:
+        """Write the in-memory index next to the segments, atomically."""
+        segments = {}
+        for segment, size in self._segment_sizes.items():
+            try:
+                inode = os.stat(self._segment_path(segment)).st_ino
+            except OSError:
+                continue
+            segments[str(segment)] = [size, inode]
+        entries = [
+            [
+                checkpoint_id,
+                entry.session_id,
+                entry.timestamp,
+                entry.segment,
+                entry.offset,
+                entry.length,
+                entry.size,
+                entry.base,
+            ]
+            for session_ids in self._sessions.values()
+            for checkpoint_id in session_ids
+            for entry in (self._entries[checkpoint_id],)
+        ]
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": _INDEX_VERSION, "segments": segments, "entries": entries},
+                file,
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    def _scan(self, segment: int, start: int) -> int:
+        """
+        Apply the records of a segment from `start` to the index.
+
+        Returns:
+            Offset after the last valid record
+        """
+        path = self._segment_path(segment)
+        size = os.path.getsize(path)
+        self._segment_sizes[segment] = start
+        self._live_bytes.setdefault(segment, 0)
+        if size <= start:
+            return start
+
+        offset = start
+        with open(path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view:
+                    while offset + _HEADER.size <= size:
+                        kind, meta_length, length, crc = _HEADER.unpack_from(
+                            view, offset
+                        )
+                        meta_start = offset + _HEADER.size
+                        end = meta_start + meta_length + length
+                        if (
+                            kind not in (_PUT, _DELETE)
+                            or end > size
+                            or zlib.crc32(view[meta_start:end]) != crc
+                        ):
+                            break
+                        meta = json.loads(
+                            bytes(view[meta_start : meta_start + meta_length])
+                        )
+                        self._segment_sizes[segment] = end
+                        self._apply(
+                            kind,
+                            meta,
+                            segment,
+                            meta_start + meta_length,
+                            length,
+                            end - offset,
+                        )
+                        offset = end
+
+        if offset < size:
+            warnings.warn(
+                f"Checkpoint log segment {path} has an invalid record at offset "
+                f"{offset}, the rest of the segment is ignored",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        return offset
+
+    # -- Index ---------------------------------------------------------------
+
+    def _reset_index(self) -> None:
+        self._entries.clear()
+        self._sessions.clear()
+        self._segment_sizes.clear()
+        self._live_bytes.clear()
+
+    def _apply(
+        self,
+        kind: bytes,
+        meta: dict[str, Any],
+        segment: int,
+        offset: int,
+        length: int,
+        size: int,
+    ) -> None:
+        """Apply an appended or scanned record to the index."""
+        if kind == _PUT:
+            self._index_put(
+                meta["checkpoint_id"],
+                meta["session_id"],
+                meta["timestamp"],
+                segment,
+                offset,
+                length,
+                size,
+                meta.get("base"),
+            )
+        else:
+            self._index_delete(meta["session_id"], meta.get("checkpoint_ids"))
+
+    def _index_put(
+        self,
+        checkpoint_id: str,
+        session_id: str,
+        timestamp: float,
+        segment: int,
+        offset: int,
+        length: int,
+        size: int,
+        base: str | None,
+    ) -> None:
+        previous = self._entries.get(checkpoint_id)
+        if previous is not None:
+            # A rewritten record, the session order doesn't change
+            self._live_bytes[previous.segment] -= previous.size
+        else:
+            session_ids = self._sessions.setdefault(session_id, [])
+            position = len(session_ids)
+            # Timestamps of a session only grow, out of order ones are inserted
+            while (
+                position
+                and self._entries[session_ids[position - 1]].timestamp > timestamp
+            ):
+                position -= 1
+            session_ids.insert(position, checkpoint_id)
+        self._entries[checkpoint_id] = _Entry(
+            session_id, timestamp, segment, offset, length, size, base
+        )
+        self._live_bytes[segment] = self._live_bytes.get(segment, 0) + size
+
+    def _index_delete(
+        self, session_id: str, checkpoint_ids: builtins.list[str] | None
+    ) -> None:
+        session_ids = self._sessions.get(session_id)
+        if not session_ids:
+            return
+        removed = set(session_ids if checkpoint_ids is None else checkpoint_ids)
+        for checkpoint_id in removed:
+            entry = self._entries.get(checkpoint_id)
+            if entry is not None and entry.session_id == session_id:
+                del self._entries[checkpoint_id]
+                self._live_bytes[entry.segment] -= entry.size
+        remaining = [cid for cid in session_ids if cid not in removed]
+        if remaining:
+            self._sessions[session_id] = remaining
+        else:
+            del self._sessions[session_id]
+
+    # -- Appending -----------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:08d}.log")
+
+    def _segment_numbers(self) -> builtins.list[int]:
+        """Numbers of the segment files in the directory, in order."""
+        return sorted(
+            int(name[len("segment-") : -len(".log")])
+            for name in os.listdir(self.directory)
+            if name.startswith("segment-") and name.endswith(".log")
+        )
+
+    def _open_segment(self, segment: int) -> int:
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        return os.open(self._segment_path(segment), flags, 0o644)
+
+    @staticmethod
+    def _frame(kind: bytes, meta: dict[str, Any], record: bytes) -> tuple:
+        """Frame a record, returns (frame, kind, meta, metadata length, record length)."""
+        meta_bytes = json.dumps(meta).encode()
+        crc = zlib.crc32(record, zlib.crc32(meta_bytes))
+        header = _HEADER.pack(kind, len(meta_bytes), len(record), crc)
+        return header + meta_bytes + record, kind, meta, len(meta_bytes), len(record)
+
+    def _put_frame(self, stored: StoredCheckpoint) -> tuple:
+        record = stored.to_record(self.serializer)
+        if isinstance(record, str):
+            record = record.encode()
+        metadata = stored.metadata
+        meta = {
+            "checkpoint_id": metadata.checkpoint_id,
+            "session_id": metadata.session_id,
+            "timestamp": to_epoch(metadata.timestamp),
+            "base": stored.chain[0] if stored.chain else None,
+        }
+        return self._frame(_PUT, meta, record)
+
+    def _delete_frame(
+        self, session_id: str, checkpoint_ids: builtins.list[str] | None
+    ) -> tuple:
+        meta = {"session_id": session_id, "checkpoint_ids": checkpoint_ids}
+        return self._frame(_DELETE, meta, b"")
+
+    def _append(self, frames: builtins.list[tuple]) -> None:
+        """Append framed records to the active segment and index them."""
+        batch: builtins.list[tuple] = []
+        batch_size = 0
+        for item in frames:
+            size = len(item[0])
+            active_size = self._segment_sizes[self._active] + batch_size
+            if active_size > 0 and active_size + size > self.segment_size:
+                self._write_batch(batch)
+                batch, batch_size = [], 0
+                self._roll()
+            batch.append(item)
+            batch_size += size
+        self._write_batch(batch)
+
+    def _write_batch(self, batch: builtins.list[tuple]) -> None:
+        if not batch:
+            return
+        data = memoryview(b"".join(item[0] for item in batch))
+        while data:
+            written = os.write(self._fd, data)  # type: ignore
+            data = data[written:]
+
+        offset = self._segment_sizes[self._active]
+        for frame, kind, meta, meta_length, length in batch:
+            record_offset = offset + _HEADER.size + meta_length
+            self._apply(kind, meta, self._active, record_offset, length, len(frame))
+            offset += len(frame)
+            self._written += len(frame)
+        self._segment_sizes[self._active] = offset
+
+    def _roll(self, sync_directory: bool = True) -> None:
+        """
+        Seal the active segment and start a new one.
+
+        Args:
+            sync_directory: Fsync the directory for the new segment, False when
+                the caller does it off the event loop
+        """
+        fd = self._fd
+        if self.fsync != FsyncMode.NONE and self._synced < self._written:
+            os.fsync(fd)  # type: ignore
+            self._synced = self._written
+        if self._sync_task is not None:
+            # The running fsync may still use it
+            self._retired_fds.append(fd)  # type: ignore
+        else:
+            os.close(fd)  # type: ignore
+        self._active += 1
+        self._fd = self._open_segment(self._active)
+        self._segment_sizes[self._active] = 0
+        self._live_bytes[self._active] = 0
+        if sync_directory:
+            _fsync_directory(self.directory)
+
+    # -- Flushing ------------------------------------------------------------
+
+    async def _sync(self) -> None:
+        """Flush the appended records as `fsync` asks."""
+        if self.fsync == FsyncMode.COMMIT:
+            await self._sync_written()
+        elif self.fsync == FsyncMode.INTERVAL:
+            if self._interval_task is None or self._interval_task.done():
+                self._interval_task = asyncio.create_task(self._flush_periodically())
+
+    async def _sync_written(self) -> None:
+        """Fsync the records appended so far in a worker thread."""
+        target = self._written
+        while self._synced < target:
+            if self._sync_task is None:
+                self._sync_task = asyncio.ensure_future(self._flush())
+            await asyncio.shield(self._sync_task)
+
+    async def _flush(self) -> None:
+        """Fsync the active segment, saves made meanwhile wait for the next one."""
+        try:
+            target = self._written
+            await asyncio.to_thread(os.fsync, self._fd)  # type: ignore
+            self._synced = max(self._synced, target)
+        finally:
+            self._sync_task = None
+            for fd in self._retired_fds:
+                os.close(fd)
+            self._retired_fds.clear()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            if self._synced < self._written and self._sync_task is None:
+                self._sync_task = asyncio.ensure_future(self._flush())
+                await asyncio.shield(self._sync_task)
+
+    # -- Reading -------------------------------------------------------------
+
+    def _read(self, checkpoint_id: str) -> StoredCheckpoint:
+        """Read a stored checkpoint through the memory map of its segment."""
+        entry = self._entries[checkpoint_id]
+        end = entry.offset + entry.length
+        data = self._maps.get(entry.segment)
+        if data is None or len(data) < end:
+            # Not mapped yet, or appended to since
+            if data is not None:
+                data.close()
+            with open(self._segment_path(entry.segment), "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[entry.segment] = data
+        return StoredCheckpoint.from_record(data[entry.offset : end], self.serializer)
+
+    def _materialize(
+        self, checkpoint_ids: builtins.list[str]
+    ) -> builtins.list[Checkpoint]:
+        """Read checkpoints and the chains they depend on, and rebuild them."""
+        stored = [self._read(checkpoint_id) for checkpoint_id in checkpoint_ids]
+        lookup = {item.metadata.checkpoint_id: item for item in stored}
+        for item in stored:
+            for chain_id in item.chain:
+                if chain_id not in lookup and chain_id in self._entries:
+                    lookup[chain_id] = self._read(chain_id)
+        return materialize(stored, lookup)
+
+    # -- BaseCheckpointer ----------------------------------------------------
+
+    async def save(self, checkpoint: Checkpoint) -> None:
+        """
+        Append a checkpoint to the log.
+
+        Args:
+            checkpoint: The checkpoint to save
+        """
+        await self.save_many([checkpoint])
+
+    async def save_many(self, checkpoints: builtins.list[Checkpoint]) -> None:
+        """
+        Append checkpoints to the log with one write and at most one fsync.
+
+        Args:
+            checkpoints: The checkpoints to save, oldest first
+        """
+        if not checkpoints:
+            return
+        await self._ensure_open()
+
+        frames = []
+        # Sessions that got a new full snapshot, older chains may no longer be needed
+        snapshot_sessions = []
+        for checkpoint in checkpoints:
+            # A delta when the checkpoint extends the last chain of the session
+            chain = self._chains.next_chain(checkpoint)
+            frames.append(
+                self._put_frame(StoredCheckpoint.from_checkpoint(checkpoint, chain))
+            )
+            session_id = checkpoint.metadata.session_id
+            if chain is None and session_id not in snapshot_sessions:
+                snapshot_sessions.append(session_id)
+
+        self._append(frames)
+        await self._sync()
+
+        if self.retention is not None:
+            for session_id in snapshot_sessions:
+                await self._prune(session_id, keep_latest=True)
+
+    async def load(
+        self, session_id: str, checkpoint_id: str | None = None
+    ) -> Checkpoint | None:
+        """
+        Load a checkpoint from the log.
+
+        Args:
+            session_id: The session ID
+            checkpoint_id: Specific checkpoint ID, or None for latest
+
+        Returns:
+            The checkpoint if found, None otherwise
+        """
+        await self._ensure_open()
+        if checkpoint_id is None:
+            session_ids = self._sessions.get(session_id)
+            if not session_ids:
+                return None
+            checkpoint_id = session_ids[-1]
+
+        entry = self._entries.get(checkpoint_id)
+        if entry is None or entry.session_id != session_id:
+            return None
+        return self._materialize([checkpoint_id])[0]
+
+    async def list(self, session_id: str, limit: int = 10) -> builtins.list[Checkpoint]:
+        """
+        List checkpoints for a session.
+
+        Args:
+            session_id: The session ID
+            limit: Maximum number of checkpoints to return
+
+        Returns:
+            List of checkpoints, newest first
+        """
+        await self._ensure_open()
+        session_ids = self._sessions.get(session_id)
+        if not session_ids or limit <= 0:
+            return []
+        return self._materialize(session_ids[::-1][:limit])
+
+    async def delete(self, session_id: str, checkpoint_id: str | None = None) -> None:
+        """
+        Delete checkpoint(s) by appending a tombstone.
+
+        Args:
+            session_id: The session ID
+            checkpoint_id: Specific checkpoint ID, or None to delete all for session
+        """
+        await self._ensure_open()
+        if checkpoint_id is None:
+            if session_id in self._sessions:
+                self._append([self._delete_frame(session_id, None)])
+                await self._sync()
+        else:
+            entry = self._entries.get(checkpoint_id)
+            if entry is None or entry.session_id != session_id:
+                return
+            # Deltas based on this checkpoint are rewritten first
+            stored = [self._read(cid) for cid in self._sessions[session_id]]
+            lookup = {item.metadata.checkpoint_id: item for item in stored}
+            rewritten = rebase_dependents(checkpoint_id, stored, lookup)
+            frames = [self._put_frame(item) for item in rewritten]
+            frames.append(self._delete_frame(session_id, [checkpoint_id]))
+            self._append(frames)
+            await self._sync()
+
+        # The next delta of the session could point at a deleted or rewritten chain
+        self._chains.forget(session_id)
+
+    async def clear_all(self) -> None:
+        """Delete every segment and the index."""
+        await self._ensure_open()
+        await self._close_files()
+        for segment in self._segment_numbers():
+            os.remove(self._segment_path(segment))
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        self._reset_index()
+        self._chains.forget()
+        self._opened = False
+
+    async def compact(self) -> int:
+        """
+        Apply the retention policy to every session, then rewrite the segments
+        without garbage once it reaches `compact_threshold` of the log.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        await self._ensure_open()
+        deleted = 0
+        if self.retention is not None:
+            for session_id in builtins.list(self._sessions):
+                deleted += await self._prune(session_id, keep_latest=False)
+        await self._compact_segments()
+        return deleted
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get storage statistics.
+
+        Returns:
+            Dictionary with the sessions, checkpoints and bytes of the log
+        """
+        total_bytes = sum(self._segment_sizes.values())
+        live_bytes = sum(self._live_bytes.values())
+        return {
+            "total_sessions": len(self._sessions),
+            "total_checkpoints": len(self._entries),
+            "segments": len(self._segment_sizes),
+            "total_bytes": total_bytes,
+            "live_bytes": live_bytes,
+            "garbage_ratio": 1 - live_bytes / total_bytes if total_bytes else 0.0,
+        }
+
+    async def close(self) -> None:
+        """Flush the log, write the index and close the files."""
+        if not self._opened:
+            return
+        await self._close_files()
+        await asyncio.to_thread(self._write_index)
+        self._opened = False
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self._ensure_open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
+
+    # -- Retention and compaction --------------------------------------------
+
+    async def _prune(self, session_id: str, keep_latest: bool) -> int:
+        """Delete the checkpoints of a session the retention policy drops."""
+        session_ids = self._sessions.get(session_id)
+        if not session_ids:
+            return 0
+        entries = [self._entries[checkpoint_id] for checkpoint_id in session_ids]
+        prunable = self.retention.prunable(  # type: ignore
+            session_ids,
+            [entry.timestamp for entry in entries],
+            {cid: entry.base for cid, entry in zip(session_ids, entries, strict=True)},
+            keep_latest=keep_latest,
+        )
+        if not prunable:
+            return 0
+        self._append([self._delete_frame(session_id, prunable)])
+        await self._sync()
+        if session_id not in self._sessions:
+            self._chains.forget(session_id)
+        return len(prunable)
+
+    async def _compact_segments(self) -> None:
+        """Rewrite the segments with their live records only."""
+        total_bytes = sum(self._segment_sizes.values())
+        live_bytes = sum(self._live_bytes.values())
+        if self._compacting or not total_bytes:
+            return
+        if 1 - live_bytes / total_bytes < self.compact_threshold:
+            return
+
+        self._compacting = True
+        try:
+            # Seal the active segment so its garbage goes too. Its records are
+            # synced in a worker thread first, _roll() then has at most the
+            # saves made meanwhile left to sync.
+            if self.fsync != FsyncMode.NONE:
+                await self._sync_written()
+            if self._segment_sizes[self._active]:
+                self._roll(sync_directory=False)
+                await asyncio.to_thread(_fsync_directory, self.directory)
+            sealed = sorted(s for s in self._segment_sizes if s < self._active)
+            # Live records in log order
+            live = sorted(
+                (
+                    (entry.segment, entry.frame_offset, checkpoint_id, entry)
+                    for checkpoint_id, entry in self._entries.items()
+                    if entry.segment < self._active
+                ),
+                key=lambda item: (item[0], item[1]),
+            )
+            outputs = await asyncio.to_thread(self._rewrite, sealed, live)
+            if outputs is not None:
+                self._swap(sealed, live, outputs)
+                await asyncio.to_thread(_fsync_directory, self.directory)
+                await asyncio.to_thread(self._write_index)
+        finally:
+            self._compacting = False
+
+    def _rewrite(
+        self, sealed: builtins.list[int], live: builtins.list[tuple]
+    ) -> builtins.list[tuple] | None:
+        """
+        Copy the live records of the sealed segments to new files, in a worker
+        thread. Frames are copied as is, tombstones are dropped: every record
+        they deleted is in the sealed segments too.
+
+        Returns:
+            (temporary path, size, new frame offsets) per output, None when
+            the records need more segments than they were in
+        """
+        outputs = []
+        # Every output file opened, removed unless all of them are returned
+        paths: builtins.list[str] = []
+        path, output, size, offsets = None, None, 0, []
+        sources: dict[int, Any] = {}
+        completed = False
+        try:
+            for segment, frame_offset, _, entry in live:
+                if output is None or (size and size + entry.size > self.segment_size):
+                    if output is not None:
+                        output.flush()
+                        os.fsync(output.fileno())
+                        output.close()
+                        outputs.append((path, size, offsets))
+                    if len(outputs) == len(sealed):
+                        return None
+                    path = f"{self._segment_path(sealed[len(outputs)])}.compact"
+                    paths.append(path)
+                    output, size, offsets = open(path, "wb"), 0, []
+                source = sources.get(segment)
+                if source is None:
+                    source = sources[segment] = open(self._segment_path(segment), "rb")
+                source.seek(frame_offset)
+                output.write(source.read(entry.size))
+                offsets.append(size)
+                size += entry.size
+            if output is not None:
+                output.flush()
+                os.fsync(output.fileno())
+                output.close()
+                outputs.append((path, size, offsets))
+            completed = True
+            return outputs
+        finally:
+            for source in sources.values():
+                source.close()
+            if output is not None and not output.closed:
+                output.close()
+            if not completed:
+                for output_path in paths:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(output_path)
+
+    def _swap(
+        self,
+        sealed: builtins.list[int],
+        live: builtins.list[tuple],
+        outputs: builtins.list[tuple],
+    ) -> None:
+        """
+        Replace the sealed segments by the rewritten ones and move the index.
+        The caller fsyncs the directory, off the event loop.
+        """
+        for segment in sealed:
+            data = self._maps.pop(segment, None)
+            if data is not None:
+                data.close()
+            self._segment_sizes.pop(segment, None)
+            self._live_bytes.pop(segment, None)
+
+        records = iter(live)
+        for position, (path, size, offsets) in enumerate(outputs):
+            segment = sealed[position]
+            os.replace(path, self._segment_path(segment))
+            self._segment_sizes[segment] = size
+            self._live_bytes[segment] = 0
+            for new_offset in offsets:
+                old_segment, old_frame_offset, checkpoint_id, entry = next(records)
+                current = self._entries.get(checkpoint_id)
+                # Deleted or rewritten while compacting, the copy is garbage
+                if current is not entry or current.segment != old_segment:
+                    continue
+                current.offset += new_offset - old_frame_offset
+                current.segment = segment
+                self._live_bytes[segment] += current.size
+        for segment in sealed[len(outputs) :]:
+            os.remove(self._segment_path(segment))
+
+    async def _close_files(self) -> None:
+        """Stop flushing, sync and close the active segment and the maps."""
+        if self._interval_task is not None:
+            self._interval_task.cancel()
+            try:
+                await self._interval_task
+            except asyncio.CancelledError:
+                pass
+            self._interval_task = None
+        if self._sync_task is not None:
+            await asyncio.shield(self._sync_task)
+        if self._fd is not None:
+            if self.fsync != FsyncMode.NONE:
+                await asyncio.to_thread(os.fsync, self._fd)
+            os.close(self._fd)
+            self._fd = None
+        for data in self._maps.values():
+            data.close()
+        self._maps.clear()
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist created, renamed and removed files of a directory, where supported."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -1,93 +1,174 @@
-from collections import defaultdict
-from copy import deepcopy
+import builtins
+import sys
+from collections import OrderedDict, deque
+from itertools import islice
 from typing import Any
 
+from llmfy.exception.llmfy_exception import LLMfyException
 from llmfy.flow_engine.checkpointer.base_checkpointer import (
     BaseCheckpointer,
     Checkpoint,
 )
+from llmfy.flow_engine.checkpointer.delta import (
+    DeltaChains,
+    StoredCheckpoint,
+    materialize,
+    rebase_dependents,
+)
+from llmfy.flow_engine.checkpointer.retention import RetentionPolicy, to_epoch
 
 
 class InMemoryCheckpointer(BaseCheckpointer):
-    """In-memory checkpoint storage backend."""
-    
-    def __init__(self):
-        """Initialize the memory checkpointer."""
-        # Storage: session_id -> list of checkpoints
-        self._storage: dict[str, list[Checkpoint]] = defaultdict(list)
+    """
+    In-memory checkpoint storage backend.
+
+    Checkpoints are stored without copying. `FlowEngine` saves copy-on-write
+    snapshots that are never mutated afterwards, so checkpoints of a session share
+    the state values that did not change between steps. Loaded checkpoints get
+    their own metadata and state dict, the state values are shared and must be
+    treated as read-only.
+
+    Every `snapshot_interval` checkpoints of a session one is kept in full, the
+    ones in between only keep their delta against the previous checkpoint.
+
+    Without a `retention` policy checkpoints are kept until deleted. With
+    `max_sessions` or `max_bytes` the least recently used sessions are evicted
+    whole when the budget is exceeded, the session being saved is never
+    evicted. Sizes are approximate: the `sys.getsizeof` of the stored state or
+    delta and everything it contains, values shared between the full
+    snapshots of a session are counted once per snapshot.
+    """
+
+    def __init__(
+        self,
+        snapshot_interval: int = 10,
+        retention: RetentionPolicy | None = None,
+        max_sessions: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        """
+        Initialize the memory checkpointer.
+
+        Args:
+            snapshot_interval: Keep a full snapshot every N checkpoints of a session
+                and deltas in between, 1 keeps every checkpoint in full
+            retention: Bounds the checkpoints kept per session
+            max_sessions: Maximum number of sessions kept (None = no limit)
+            max_bytes: Approximate memory budget of all sessions in bytes
+                (None = no limit)
+        """
+        if max_sessions is not None and max_sessions < 1:
+            raise LLMfyException("max_sessions must be at least 1")
+        if max_bytes is not None and max_bytes < 1:
+            raise LLMfyException("max_bytes must be at least 1")
+
+        self.retention = retention
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        # Storage: session_id -> checkpoints oldest first, least recently used
+        # session first
+        self._storage: OrderedDict[str, deque[StoredCheckpoint]] = OrderedDict()
         # Index: checkpoint_id -> (session_id, checkpoint)
-        self._index: dict[str, tuple[str, Checkpoint]] = {}
-    
+        self._index: dict[str, tuple[str, StoredCheckpoint]] = {}
+        # Approximate bytes per checkpoint and per session
+        self._sizes: dict[str, int] = {}
+        self._session_bytes: dict[str, int] = {}
+        self._total_bytes = 0
+        self._evicted_sessions = 0
+        self._chains = DeltaChains(snapshot_interval)
+
     async def save(self, checkpoint: Checkpoint) -> None:
         """
         Save a checkpoint to memory.
-        
+
         Args:
             checkpoint: The checkpoint to save
         """
-        # Deep copy to prevent external modifications
-        checkpoint_copy = deepcopy(checkpoint)
-        
+        # Stored as is, the engine hands over snapshots it never mutates
+        chain = self._chains.next_chain(checkpoint)
+        stored = StoredCheckpoint.from_checkpoint(checkpoint, chain)
+
         session_id = checkpoint.metadata.session_id
         checkpoint_id = checkpoint.metadata.checkpoint_id
-        
-        # Add to storage
-        self._storage[session_id].append(checkpoint_copy)
-        
-        # Sort by timestamp (newest first)
-        self._storage[session_id].sort(
-            key=lambda c: c.metadata.timestamp,
-            reverse=True
-        )
-        
+
+        checkpoints = self._storage.get(session_id)
+        if checkpoints is None:
+            checkpoints = self._storage[session_id] = deque()
+        else:
+            self._storage.move_to_end(session_id)
+
+        # Checkpoints loaded from storage dropping the timezone have naive ones
+        timestamp = to_epoch(checkpoint.metadata.timestamp)
+        if not checkpoints or to_epoch(checkpoints[-1].metadata.timestamp) <= timestamp:
+            # Timestamps of a session only grow, appending keeps the order
+            checkpoints.append(stored)
+        else:
+            # Out of order (another writer with a skewed clock), insert in place
+            position = len(checkpoints)
+            while (
+                position
+                and to_epoch(checkpoints[position - 1].metadata.timestamp) > timestamp
+            ):
+                position -= 1
+            checkpoints.insert(position, stored)
+
         # Add to index
-        self._index[checkpoint_id] = (session_id, checkpoint_copy)
-    
+        self._index[checkpoint_id] = (session_id, stored)
+        self._track(session_id, checkpoint_id, _stored_size(stored))
+
+        # A new full snapshot, older chains may no longer be needed
+        if chain is None and self.retention is not None:
+            self._prune(session_id, keep_latest=True)
+        self._evict(session_id)
+
     async def load(self, session_id: str, checkpoint_id: str | None = None) -> Checkpoint | None:
         """
         Load a checkpoint from memory.
-        
+
         Args:
             session_id: The session ID
             checkpoint_id: Specific checkpoint ID, or None for latest
-            
+
         Returns:
             The checkpoint if found, None otherwise
         """
         if checkpoint_id:
             # Load specific checkpoint
             if checkpoint_id in self._index:
-                stored_session_id, checkpoint = self._index[checkpoint_id]
+                stored_session_id, stored = self._index[checkpoint_id]
                 if stored_session_id == session_id:
-                    return deepcopy(checkpoint)
+                    self._storage.move_to_end(session_id)
+                    return self._materialize([stored])[0]
             return None
         else:
             # Load latest checkpoint for thread
-            if session_id in self._storage and self._storage[session_id]:
-                return deepcopy(self._storage[session_id][0])
+            if session_id in self._storage:
+                self._storage.move_to_end(session_id)
+                return self._materialize([self._storage[session_id][-1]])[0]
             return None
-    
+
     async def list(self, session_id: str, limit: int = 10) -> list[Checkpoint]:
         """
         List checkpoints for a thread.
-        
+
         Args:
             session_id: The session ID
             limit: Maximum number of checkpoints to return
-            
+
         Returns:
             List of checkpoints, newest first
         """
         if session_id not in self._storage:
             return []
-        
-        checkpoints = self._storage[session_id][:limit]
-        return [deepcopy(c) for c in checkpoints]
-    
+
+        self._storage.move_to_end(session_id)
+        newest_first = islice(reversed(self._storage[session_id]), limit)
+        return self._materialize(builtins.list(newest_first))
+
     async def delete(self, session_id: str, checkpoint_id: str | None = None) -> None:
         """
         Delete checkpoint(s) from memory.
-        
+
         Args:
             session_id: The session ID
             checkpoint_id: Specific checkpoint ID, or None to delete all for session
@@ -97,46 +178,190 @@ class InMemoryCheckpointer(BaseCheckpointer):
             if checkpoint_id in self._index:
                 stored_session_id, checkpoint = self._index[checkpoint_id]
                 if stored_session_id == session_id:
+                    # Deltas based on this checkpoint are rewritten first
+                    self._rebase(session_id, checkpoint_id)
+
                     # Remove from storage
-                    self._storage[session_id] = [
+                    self._storage[session_id] = deque(
                         c for c in self._storage[session_id]
                         if c.metadata.checkpoint_id != checkpoint_id
-                    ]
+                    )
                     # Remove from index
                     del self._index[checkpoint_id]
-                    
+                    self._untrack(session_id, checkpoint_id)
+
                     # Clean up empty thread storage
                     if not self._storage[session_id]:
-                        del self._storage[session_id]
+                        self._remove_session(session_id)
         else:
             # Delete all checkpoints for thread
-            if session_id in self._storage:
-                # Remove from index
-                for checkpoint in self._storage[session_id]:
-                    checkpoint_id = checkpoint.metadata.checkpoint_id
-                    if checkpoint_id in self._index:
-                        del self._index[checkpoint_id]
-                
-                # Remove from storage
-                del self._storage[session_id]
-    
+            self._remove_session(session_id)
+
     async def clear_all(self) -> None:
         """Clear all checkpoints from memory."""
         self._storage.clear()
         self._index.clear()
-    
+        self._sizes.clear()
+        self._session_bytes.clear()
+        self._total_bytes = 0
+        self._chains.forget()
+
+    async def compact(self) -> int:
+        """
+        Apply the retention policy to every session, removing idle sessions
+        whose checkpoints all expired.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        if self.retention is None:
+            return 0
+        return sum(
+            self._prune(session_id, keep_latest=False)
+            for session_id in builtins.list(self._storage)
+        )
+
     def get_stats(self) -> dict[str, Any]:
         """
         Get storage statistics.
-        
+
         Returns:
-            Dictionary with statistics
+            Dictionary with statistics, sizes in approximate bytes
         """
+        delta_checkpoints = sum(
+            1 for _, stored in self._index.values() if stored.delta is not None
+        )
         return {
             "total_sessions": len(self._storage),
             "total_checkpoints": len(self._index),
+            "full_snapshots": len(self._index) - delta_checkpoints,
+            "delta_checkpoints": delta_checkpoints,
+            "total_bytes": self._total_bytes,
+            "evicted_sessions": self._evicted_sessions,
             "checkpoints_per_session": {
                 session_id: len(checkpoints)
                 for session_id, checkpoints in self._storage.items()
-            }
-        }
\ No newline at end of file
+            },
+            "bytes_per_session": dict(self._session_bytes),
+        }
+
+    def _prune(self, session_id: str, keep_latest: bool) -> int:
+        """Delete the checkpoints of a session the retention policy drops."""
+        checkpoints = self._storage.get(session_id)
+        if not checkpoints:
+            return 0
+
+        prunable = self.retention.prunable(  # type: ignore
+            [c.metadata.checkpoint_id for c in checkpoints],
+            [to_epoch(c.metadata.timestamp) for c in checkpoints],
+            {c.metadata.checkpoint_id: c.chain[0] for c in checkpoints if c.chain},
+            keep_latest=keep_latest,
+        )
+        if len(prunable) == len(checkpoints):
+            self._remove_session(session_id)
+            return len(prunable)
+        for checkpoint_id in prunable:
+            # Oldest first, the pruned checkpoints are at the start
+            checkpoints.popleft()
+            del self._index[checkpoint_id]
+            self._untrack(session_id, checkpoint_id)
+        return len(prunable)
+
+    def _track(self, session_id: str, checkpoint_id: str, size: int) -> None:
+        """Account for the size of a stored checkpoint."""
+        self._untrack(session_id, checkpoint_id)
+        self._sizes[checkpoint_id] = size
+        self._session_bytes[session_id] = self._session_bytes.get(session_id, 0) + size
+        self._total_bytes += size
+
+    def _untrack(self, session_id: str, checkpoint_id: str) -> None:
+        """Stop accounting for the size of a removed checkpoint."""
+        size = self._sizes.pop(checkpoint_id, 0)
+        if session_id in self._session_bytes:
+            self._session_bytes[session_id] -= size
+        self._total_bytes -= size
+
+    def _remove_session(self, session_id: str) -> None:
+        """Remove every checkpoint of a session."""
+        for checkpoint in self._storage.pop(session_id, ()):
+            checkpoint_id = checkpoint.metadata.checkpoint_id
+            self._index.pop(checkpoint_id, None)
+            self._total_bytes -= self._sizes.pop(checkpoint_id, 0)
+        self._session_bytes.pop(session_id, None)
+        self._chains.forget(session_id)
+
+    def _evict(self, active_session_id: str) -> None:
+        """Evict least recently used sessions until the budget is met."""
+        while len(self._storage) > 1 and (
+            (self.max_sessions is not None and len(self._storage) > self.max_sessions)
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            session_id = next(iter(self._storage))
+            if session_id == active_session_id:
+                # Only the session being saved is left to evict
+                break
+            self._remove_session(session_id)
+            self._evicted_sessions += 1
+
+    def _materialize(
+        self, stored: builtins.list[StoredCheckpoint]
+    ) -> builtins.list[Checkpoint]:
+        """Rebuild full checkpoints from stored ones."""
+        lookup = {
+            chain_id: self._index[chain_id][1]
+            for item in stored
+            for chain_id in item.chain
+            if chain_id in self._index
+        }
+        return materialize(stored, lookup)
+
+    def _rebase(self, session_id: str, checkpoint_id: str) -> None:
+        """Rewrite the deltas of a session that depend on a checkpoint."""
+        checkpoints = self._storage[session_id]
+        lookup = {c.metadata.checkpoint_id: c for c in checkpoints}
+        rewritten = rebase_dependents(checkpoint_id, checkpoints, lookup)
+        if not rewritten:
+            return
+
+        by_id = {item.metadata.checkpoint_id: item for item in rewritten}
+        self._storage[session_id] = deque(
+            by_id.get(c.metadata.checkpoint_id, c) for c in self._storage[session_id]
+        )
+        for item in rewritten:
+            self._index[item.metadata.checkpoint_id] = (session_id, item)
+            self._track(session_id, item.metadata.checkpoint_id, _stored_size(item))
+        # The next delta of the session would point at a rewritten chain
+        self._chains.forget(session_id)
+
+
+def _stored_size(stored: StoredCheckpoint) -> int:
+    """Approximate bytes held by the state or delta of a stored checkpoint."""
+    if stored.delta is not None:
+        return _approximate_size(stored.delta.updates) + _approximate_size(
+            stored.delta.appends
+        )
+    return _approximate_size(stored.state or {})
+
+
+def _approximate_size(value: Any) -> int:
+    """`sys.getsizeof` of a value and of the containers and objects it holds."""
+    seen: set[int] = set()
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item, 0)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool)) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not callable(item):
+            # Model instances, not classes, functions or bound methods
+            stack.append(vars(item))
+    return size
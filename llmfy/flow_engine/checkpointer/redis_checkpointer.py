@@ -1,29 +1,85 @@
 from __future__ import annotations
 
-import json
-
 from llmfy.exception.llmfy_exception import LLMfyException
 from llmfy.flow_engine.checkpointer.base_checkpointer import (
     BaseCheckpointer,
     Checkpoint,
 )
+from llmfy.flow_engine.checkpointer.delta import (
+    DeltaChains,
+    StoredCheckpoint,
+    materialize,
+    missing_chain_ids,
+    rebase_dependents,
+)
+from llmfy.flow_engine.checkpointer.retention import RetentionPolicy
+from llmfy.flow_engine.checkpointer.serializer import BaseSerializer
 
 try:
     import redis.asyncio as redis
+    from redis.client import NEVER_DECODE
 
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
+# Writes a checkpoint record and indexes it in its session in one call.
+# KEYS: checkpoint key, session key, bases key of the session, then the keys of
+# the checkpoints in the chain of the record.
+# ARGV: record, checkpoint id, timestamp, TTL in seconds (0 = no expiration),
+# chain base of the checkpoint ("" = full snapshot), "1" to index that base in
+# the bases key.
+_SAVE_SCRIPT = """
+local ttl = tonumber(ARGV[4])
+if ttl > 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ttl)
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+if ARGV[6] == '1' then
+    redis.call('HSET', KEYS[3], ARGV[2], ARGV[5])
+end
+-- The chain must outlive the record that depends on it
+for i = 2, #KEYS do
+    if ttl > 0 then
+        redis.call('EXPIRE', KEYS[i], ttl)
+    end
+end
+return 1
+"""
+
 
 class RedisCheckpointer(BaseCheckpointer):
-    """Redis checkpoint storage backend."""
+    """
+    Redis checkpoint storage backend.
+
+    Every `snapshot_interval` checkpoints of a session one is stored in full, the
+    ones in between only store their delta against the previous checkpoint.
+
+    A save is a single round trip: a MULTI/EXEC pipeline, or a Lua script with
+    `use_lua=True`. Listing reads the checkpoint ids and then every record with
+    one MGET.
+
+    With a `retention` policy, a hash per session maps each checkpoint to the
+    full snapshot its delta is based on, so old checkpoints are pruned without
+    reading them. Pruning a session takes two round trips and runs when a new
+    full snapshot of it is saved.
+
+    Records are JSON text, or the binary payloads of a `serializer`. JSON and
+    msgpack records are read whatever the current serializer is, pickled
+    records only with a `PickleSerializer`.
+    """
 
     def __init__(
         self,
         redis_url: str = "redis://localhost:6379/0",
         prefix: str = "llmfy_checkpoint:",
         ttl: int | None = None,
+        snapshot_interval: int = 10,
+        use_lua: bool = False,
+        retention: RetentionPolicy | None = None,
+        serializer: BaseSerializer | None = None,
     ):
         """
         Initialize the Redis checkpointer.
@@ -31,7 +87,14 @@ class RedisCheckpointer(BaseCheckpointer):
         Args:
             redis_url: Redis connection URL
             prefix: Key prefix for checkpoints
-            ttl: Time-to-live in seconds for checkpoints (None = no expiration)
+            ttl: Time-to-live in seconds for checkpoints (None = no expiration),
+                a saved delta renews it for the checkpoints it is based on
+            snapshot_interval: Store a full snapshot every N checkpoints of a session
+                and deltas in between, 1 stores every checkpoint in full
+            use_lua: Save with a server-side Lua script instead of a MULTI/EXEC
+                pipeline. Both are atomic, the script sends less per save.
+            retention: Bounds the checkpoints kept per session
+            serializer: Serializer of the checkpoint records, None for JSON text
         """
         if not REDIS_AVAILABLE:
             raise LLMfyException(
@@ -42,7 +105,12 @@ class RedisCheckpointer(BaseCheckpointer):
         self.redis_url = redis_url
         self.prefix = prefix
         self.ttl = ttl
+        self.use_lua = use_lua
+        self.retention = retention
+        self.serializer = serializer
         self._client: redis.Redis | None = None
+        self._save_script = None
+        self._chains = DeltaChains(snapshot_interval)
 
     async def _get_client(self) -> redis.Redis:
         """Get or create Redis client."""
@@ -60,6 +128,10 @@ class RedisCheckpointer(BaseCheckpointer):
         """Get Redis key for specific checkpoint."""
         return f"{self.prefix}checkpoint:{checkpoint_id}"
 
+    def _bases_key(self, session_id: str) -> str:
+        """Get Redis key for the chain bases of a session's checkpoints."""
+        return f"{self.prefix}bases:{session_id}"
+
     async def save(self, checkpoint: Checkpoint) -> None:
         """
         Save a checkpoint to Redis.
@@ -69,25 +141,37 @@ class RedisCheckpointer(BaseCheckpointer):
         """
         client = await self._get_client()
 
+        # Save checkpoint data, a delta when the checkpoint extends the last chain
+        chain = self._chains.next_chain(checkpoint)
+        stored = StoredCheckpoint.from_checkpoint(checkpoint, chain)
         session_id = checkpoint.metadata.session_id
-        checkpoint_id = checkpoint.metadata.checkpoint_id
-        timestamp = checkpoint.metadata.timestamp.timestamp()
 
-        # Save checkpoint data
-        checkpoint_key = self._checkpoint_key(checkpoint_id)
-        checkpoint_data = json.dumps(checkpoint.to_dict())
-
-        await client.set(checkpoint_key, checkpoint_data)
-
-        if self.ttl:
-            await client.expire(checkpoint_key, self.ttl)
-
-        # Add to thread's sorted set (sorted by timestamp)
-        session_key = self._session_key(session_id)
-        await client.zadd(session_key, {checkpoint_id: timestamp})
+        if self.use_lua:
+            if self._save_script is None:
+                self._save_script = client.register_script(_SAVE_SCRIPT)
+            metadata = stored.metadata
+            keys = [
+                self._checkpoint_key(metadata.checkpoint_id),
+                self._session_key(session_id),
+                self._bases_key(session_id),
+                *[self._checkpoint_key(cid) for cid in stored.chain],
+            ]
+            args = [
+                stored.to_record(self.serializer),
+                metadata.checkpoint_id,
+                metadata.timestamp.timestamp(),
+                self.ttl or 0,
+                stored.chain[0] if stored.chain else "",
+                "1" if self.retention is not None else "0",
+            ]
+            await self._save_script(keys=keys, args=args)
+        else:
+            # Record, session index and TTLs in one round trip
+            await self._write(client, [stored], index=True)
 
-        if self.ttl:
-            await client.expire(session_key, self.ttl)
+        # A new full snapshot, older chains may no longer be needed
+        if chain is None and self.retention is not None:
+            await self._prune(client, session_id, keep_latest=True)
 
     async def load(
         self,
@@ -117,14 +201,13 @@ class RedisCheckpointer(BaseCheckpointer):
             checkpoint_id = results[0]
 
         # Load checkpoint data
-        checkpoint_key = self._checkpoint_key(checkpoint_id)  # type: ignore
-        data = await client.get(checkpoint_key)
+        stored = await self._read(client, [checkpoint_id])  # type: ignore
 
-        if data is None:
+        if not stored:
             return None
 
-        checkpoint_dict = json.loads(data)
-        return Checkpoint.from_dict(checkpoint_dict)
+        checkpoints = await self._materialize(client, stored)
+        return checkpoints[0]
 
     async def list(self, session_id: str, limit: int = 10) -> list[Checkpoint]:
         """
@@ -146,14 +229,9 @@ class RedisCheckpointer(BaseCheckpointer):
         if not checkpoint_ids:
             return []
 
-        # Load all checkpoints
-        checkpoints = []
-        for checkpoint_id in checkpoint_ids:
-            checkpoint = await self.load(session_id, checkpoint_id)
-            if checkpoint:
-                checkpoints.append(checkpoint)
-
-        return checkpoints
+        # Load all checkpoints in one round trip, then the chains they need
+        stored = await self._read(client, checkpoint_ids)
+        return await self._materialize(client, stored)
 
     async def delete(self, session_id: str, checkpoint_id: str | None = None) -> None:
         """
@@ -167,21 +245,25 @@ class RedisCheckpointer(BaseCheckpointer):
         session_key = self._session_key(session_id)
 
         if checkpoint_id:
+            # Deltas based on this checkpoint are rewritten first
+            await self._rebase(client, session_id, checkpoint_id)
+
             # Delete specific checkpoint
-            checkpoint_key = self._checkpoint_key(checkpoint_id)
-            await client.delete(checkpoint_key)
-            await client.zrem(session_key, checkpoint_id)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(self._checkpoint_key(checkpoint_id))
+                pipe.zrem(session_key, checkpoint_id)
+                pipe.hdel(self._bases_key(session_id), checkpoint_id)
+                await pipe.execute()
         else:
             # Delete all checkpoints for thread
             checkpoint_ids = await client.zrange(session_key, 0, -1)
 
-            if checkpoint_ids:
-                # Delete all checkpoint data
-                checkpoint_keys = [self._checkpoint_key(cid) for cid in checkpoint_ids]
-                await client.delete(*checkpoint_keys)
-
-            # Delete session sorted set
-            await client.delete(session_key)
+            # Delete all checkpoint data and the session sorted set
+            checkpoint_keys = [self._checkpoint_key(cid) for cid in checkpoint_ids]
+            await client.delete(
+                *checkpoint_keys, session_key, self._bases_key(session_id)
+            )
+            self._chains.forget(session_id)
 
     async def clear_all(self) -> None:
         """Clear all checkpoints from Redis."""
@@ -200,11 +282,154 @@ class RedisCheckpointer(BaseCheckpointer):
             if cursor == 0:
                 break
 
+        self._chains.forget()
+
+    async def compact(self) -> int:
+        """
+        Apply the retention policy to every session, removing idle sessions
+        whose checkpoints all expired.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        if self.retention is None:
+            return 0
+        client = await self._get_client()
+
+        session_prefix = self._session_key("")
+        deleted = 0
+        async for key in client.scan_iter(match=f"{session_prefix}*", count=100):
+            session_id = key[len(session_prefix) :]
+            deleted += await self._prune(client, session_id, keep_latest=False)
+        return deleted
+
+    async def _prune(
+        self, client: redis.Redis, session_id: str, keep_latest: bool
+    ) -> int:
+        """Delete the checkpoints of a session the retention policy drops."""
+        session_key = self._session_key(session_id)
+        bases_key = self._bases_key(session_id)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zrange(session_key, 0, -1, withscores=True)
+            pipe.hgetall(bases_key)
+            entries, bases = await pipe.execute()
+        if not entries:
+            return 0
+
+        checkpoint_ids = [checkpoint_id for checkpoint_id, _ in entries]
+        # Checkpoints saved before the policy was set aren't in the hash
+        unknown = [cid for cid in checkpoint_ids if cid not in bases]
+        if unknown:
+            bases.update(dict.fromkeys(unknown, ""))
+            for item in await self._read(client, unknown):
+                if item.chain:
+                    bases[item.metadata.checkpoint_id] = item.chain[0]
+
+        prunable = self.retention.prunable(  # type: ignore
+            checkpoint_ids,
+            [timestamp for _, timestamp in entries],
+            {cid: base or None for cid, base in bases.items()},
+            keep_latest=keep_latest,
+        )
+        if not prunable:
+            return 0
+
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.delete(*[self._checkpoint_key(cid) for cid in prunable])
+            # By member, ranks shift when checkpoints are saved or deleted meanwhile
+            pipe.zrem(session_key, *prunable)
+            pipe.hdel(bases_key, *prunable)
+            await pipe.execute()
+        if len(prunable) == len(checkpoint_ids):
+            self._chains.forget(session_id)
+        return len(prunable)
+
+    async def _write(
+        self, client: redis.Redis, stored: list[StoredCheckpoint], index: bool
+    ) -> None:
+        """
+        Write stored checkpoint records in one MULTI/EXEC round trip.
+
+        Args:
+            client: Redis client
+            stored: Records to write
+            index: Also add the records to the sorted sets of their sessions
+        """
+        async with client.pipeline(transaction=True) as pipe:
+            for item in stored:
+                metadata = item.metadata
+                pipe.set(
+                    self._checkpoint_key(metadata.checkpoint_id),
+                    item.to_record(self.serializer),
+                    ex=self.ttl,
+                )
+                if self.ttl:
+                    # The chain the record is based on must not expire before it
+                    for checkpoint_id in item.chain:
+                        pipe.expire(self._checkpoint_key(checkpoint_id), self.ttl)
+                if index:
+                    # Sessions' sorted sets are ordered by timestamp
+                    session_key = self._session_key(metadata.session_id)
+                    pipe.zadd(
+                        session_key,
+                        {metadata.checkpoint_id: metadata.timestamp.timestamp()},
+                    )
+                    if self.ttl:
+                        pipe.expire(session_key, self.ttl)
+                if self.retention is not None:
+                    bases_key = self._bases_key(metadata.session_id)
+                    base = item.chain[0] if item.chain else ""
+                    pipe.hset(bases_key, metadata.checkpoint_id, base)
+                    if self.ttl:
+                        pipe.expire(bases_key, self.ttl)
+            await pipe.execute()
+
+    async def _read(
+        self, client: redis.Redis, checkpoint_ids: list[str]
+    ) -> list[StoredCheckpoint]:
+        """Read stored checkpoint records, skipping missing ones."""
+        if not checkpoint_ids:
+            return []
+        keys = [self._checkpoint_key(cid) for cid in checkpoint_ids]
+        # Serialized records are binary, read them without the client decoding
+        records = await client.execute_command("MGET", *keys, **{NEVER_DECODE: True})
+        return [
+            StoredCheckpoint.from_record(data, self.serializer)
+            for data in records
+            if data is not None
+        ]
+
+    async def _materialize(
+        self, client: redis.Redis, stored: list[StoredCheckpoint]
+    ) -> list[Checkpoint]:
+        """Rebuild full checkpoints, reading the chains they depend on."""
+        lookup = {item.metadata.checkpoint_id: item for item in stored}
+        for item in await self._read(client, missing_chain_ids(stored, lookup)):
+            lookup[item.metadata.checkpoint_id] = item
+        return materialize(stored, lookup)
+
+    async def _rebase(
+        self, client: redis.Redis, session_id: str, checkpoint_id: str
+    ) -> None:
+        """Rewrite the deltas of a session that depend on a checkpoint."""
+        checkpoint_ids = await client.zrange(self._session_key(session_id), 0, -1)
+        stored = await self._read(client, checkpoint_ids)
+        lookup = {item.metadata.checkpoint_id: item for item in stored}
+
+        rewritten = rebase_dependents(checkpoint_id, stored, lookup)
+        if rewritten:
+            await self._write(client, rewritten, index=False)
+            # The next delta of the session would point at a rewritten chain
+            self._chains.forget(session_id)
+
     async def close(self) -> None:
         """Close the Redis connection."""
         if self._client:
-            await self._client.close()
+            # aclose() replaces close() from redis-py 5.0.1
+            aclose = getattr(self._client, "aclose", None) or self._client.close
+            await aclose()
             self._client = None
+            self._save_script = None
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -0,0 +1,180 @@
+import asyncio
+import time
+import warnings
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import BaseCheckpointer
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Bounds the checkpoints a checkpointer keeps per session.
+
+    Checkpoints beyond the newest `max_checkpoints` of a session, or older than
+    `max_age` seconds, are deleted. Checkpoints still needed to rebuild a kept
+    delta checkpoint (its full snapshot and the deltas before it) are kept
+    until that delta goes too, so pruning removes whole delta chains and a
+    session holds up to about `max_checkpoints + 2 * snapshot_interval`
+    checkpoints.
+
+    Checkpointers prune a session when they store a new full snapshot of it,
+    on the write path. The latest checkpoint of a session is never pruned
+    there, sessions idle for longer than `max_age` are removed by `compact()`,
+    see `CheckpointCompactor`. Examples:
+
+        RetentionPolicy(max_checkpoints=50)
+        RetentionPolicy(max_age=7 * 24 * 3600)
+        RetentionPolicy(max_checkpoints=50, max_age=24 * 3600)
+
+    Args:
+        max_checkpoints: Checkpoints kept per session, None for no limit
+        max_age: Seconds a checkpoint is kept, None for no limit
+    """
+
+    max_checkpoints: int | None = None
+    max_age: float | None = None
+
+    def __post_init__(self):
+        if self.max_checkpoints is not None and self.max_checkpoints < 1:
+            raise LLMfyException("max_checkpoints must be at least 1")
+        if self.max_age is not None and self.max_age <= 0:
+            raise LLMfyException("max_age must be positive")
+
+    def expired_before(self, now: float | None = None) -> float | None:
+        """
+        Get the timestamp before which checkpoints are expired.
+
+        Args:
+            now: Current time in seconds since the epoch, defaults to now
+
+        Returns:
+            Seconds since the epoch, None when checkpoints never expire
+        """
+        if self.max_age is None:
+            return None
+        return (time.time() if now is None else now) - self.max_age
+
+    def prunable(
+        self,
+        checkpoint_ids: Sequence[str],
+        timestamps: Sequence[float],
+        bases: Mapping[str, str | None],
+        keep_latest: bool = True,
+        now: float | None = None,
+    ) -> list[str]:
+        """
+        Get the checkpoints of a session to delete.
+
+        Only a prefix of the session is deleted, up to the oldest full snapshot
+        a kept checkpoint is based on.
+
+        Args:
+            checkpoint_ids: Checkpoints of the session, oldest first
+            timestamps: Their timestamps in seconds since the epoch
+            bases: Checkpoint ID -> ID of the full snapshot of its delta chain,
+                None (or missing) for full snapshots
+            keep_latest: Never delete the latest checkpoint, even when expired
+            now: Current time in seconds since the epoch, defaults to now
+
+        Returns:
+            IDs to delete, oldest first
+        """
+        # Index of the first checkpoint to keep
+        first = 0
+        if self.max_checkpoints is not None:
+            first = max(first, len(checkpoint_ids) - self.max_checkpoints)
+        expired_before = self.expired_before(now)
+        if expired_before is not None:
+            first = max(first, bisect_left(timestamps, expired_before))
+        if keep_latest:
+            first = min(first, len(checkpoint_ids) - 1)
+        if first <= 0:
+            return []
+
+        position = {checkpoint_id: i for i, checkpoint_id in enumerate(checkpoint_ids)}
+        cutoff = first
+        for checkpoint_id in checkpoint_ids[first:]:
+            base = bases.get(checkpoint_id)
+            if base is not None and base in position:
+                cutoff = min(cutoff, position[base])
+        return list(checkpoint_ids[:cutoff])
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Seconds since the epoch of a checkpoint timestamp, naive ones are UTC."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return timestamp.timestamp()
+
+
+class CheckpointCompactor:
+    """
+    Background task applying the retention policy of a checkpointer.
+
+    Calls `checkpointer.compact()` every `interval` seconds, which prunes every
+    session, including idle ones the write path never sees again. A failing
+    compaction only raises a `RuntimeWarning`, the next one runs on schedule.
+
+    The compactor belongs to the event loop it was started on.
+    """
+
+    def __init__(self, checkpointer: BaseCheckpointer, interval: float = 300.0):
+        """
+        Args:
+            checkpointer: Checkpointer with a retention policy
+            interval: Seconds between two compactions
+        """
+        if interval <= 0:
+            raise LLMfyException("interval must be positive")
+        self.checkpointer = checkpointer
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        # Checkpoints deleted by the compactions so far
+        self.deleted = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the background task is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background task, on the running event loop."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task, cancelling a running compaction."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        """
+        Compact the checkpointer now.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        deleted = await self.checkpointer.compact()
+        self.deleted += deleted
+        return deleted
+
+    async def _run(self):
+        """Background task compacting every `interval` seconds."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                warnings.warn(
+                    f"Checkpoint compaction failed: {e}", RuntimeWarning, stacklevel=2
+                )
@@ -0,0 +1,309 @@
+import json
+import pickle
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, ClassVar, Literal
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    from compression import zstd  # type: ignore
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore
+
+        ZSTD_AVAILABLE = True
+    except ImportError:
+        ZSTD_AVAILABLE = False
+
+# Version of the payload header, the first byte of every serialized payload.
+# Payloads without a header are JSON text, they start with "{".
+PAYLOAD_VERSION = 1
+
+Compression = Literal["zlib", "zstd"]
+
+# Compression -> id stored in the header
+_COMPRESSION_IDS = {None: 0, "zlib": 1, "zstd": 2}
+
+
+class BaseSerializer(ABC):
+    """
+    Serializes checkpoint payloads (a state, or a delta) to bytes.
+
+    Every payload starts with a 3-byte header: the payload version, the id of
+    the serializer format and the id of the compression. A serializer reads
+    JSON and msgpack payloads whatever its own format, and JSON text written
+    before serializers existed, so switching between them needs no migration.
+    Pickles are only loaded by a `PickleSerializer`, a stored record can't have
+    itself unpickled by a checkpointer configured for JSON or msgpack.
+
+    Payloads of `compression_threshold` bytes and more are compressed.
+    """
+
+    # Format id stored in the header, unique per subclass
+    format_id: ClassVar[int]
+
+    def __init__(
+        self,
+        compression: Compression | None = None,
+        compression_threshold: int = 1024,
+        compression_level: int | None = None,
+    ):
+        """
+        Args:
+            compression: `"zlib"`, `"zstd"` (needs Python 3.14 or zstandard) or
+                None to never compress
+            compression_threshold: Smallest payload in bytes that is compressed
+            compression_level: Level of the compressor, None for its default
+        """
+        if compression not in _COMPRESSION_IDS:
+            raise LLMfyException(f"Unknown compression '{compression}'")
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            raise LLMfyException(
+                "zstd compression needs Python 3.14 or the zstandard package. "
+                'Install it using `pip install "llmfy[zstandard]"`'
+            )
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+    @abstractmethod
+    def encode(self, data: Any) -> bytes:
+        """Serialize data to bytes, without header."""
+
+    @staticmethod
+    @abstractmethod
+    def decode(body: bytes) -> Any:
+        """Deserialize bytes written by `encode`, independent of the settings."""
+
+    def dumps(self, data: Any) -> bytes:
+        """
+        Serialize a payload.
+
+        Args:
+            data: State or delta dict
+
+        Returns:
+            Header and the serialized, possibly compressed, data
+        """
+        body = self.encode(data)
+        compression = None
+        if self.compression is not None and len(body) >= self.compression_threshold:
+            compression = self.compression
+            body = _compress(body, compression, self.compression_level)
+        header = bytes((PAYLOAD_VERSION, self.format_id, _COMPRESSION_IDS[compression]))
+        return header + body
+
+    def loads(self, payload: str | bytes) -> Any:
+        """
+        Deserialize a payload this serializer reads.
+
+        Args:
+            payload: Payload from `dumps`, or JSON text
+
+        Returns:
+            The state or delta dict
+        """
+        return loads_payload(payload, self)
+
+
+class JsonSerializer(BaseSerializer):
+    """
+    JSON payloads, the format of checkpoints written without a serializer.
+
+    Custom objects are stored with their class and `__dict__`, and rebuilt
+    from them when loaded.
+    """
+
+    format_id = 1
+
+    def encode(self, data: Any) -> bytes:
+        return Checkpoint._serialize_state(data).encode()
+
+    @staticmethod
+    def decode(body: bytes) -> Any:
+        return json.loads(body, object_hook=Checkpoint._object_hook)
+
+
+class PickleSerializer(BaseSerializer):
+    """
+    Pickle payloads, any picklable state round-trips exactly.
+
+    Loading a pickle can run arbitrary code, only use it for storage that no
+    one else can write to.
+    """
+
+    format_id = 2
+
+    def __init__(
+        self,
+        compression: Compression | None = None,
+        compression_threshold: int = 1024,
+        compression_level: int | None = None,
+        protocol: int = 5,
+    ):
+        """
+        Args:
+            compression: `"zlib"`, `"zstd"` or None to never compress
+            compression_threshold: Smallest payload in bytes that is compressed
+            compression_level: Level of the compressor, None for its default
+            protocol: Pickle protocol
+        """
+        super().__init__(compression, compression_threshold, compression_level)
+        self.protocol = protocol
+
+    def encode(self, data: Any) -> bytes:
+        return pickle.dumps(data, protocol=self.protocol)
+
+    @staticmethod
+    def decode(body: bytes) -> Any:
+        return pickle.loads(body)
+
+
+class MsgpackSerializer(BaseSerializer):
+    """
+    MessagePack payloads, smaller and faster than JSON.
+
+    Custom objects are stored like `JsonSerializer` stores them. Timezone-aware
+    datetimes are stored natively and loaded in UTC.
+    """
+
+    format_id = 3
+
+    def __init__(
+        self,
+        compression: Compression | None = None,
+        compression_threshold: int = 1024,
+        compression_level: int | None = None,
+    ):
+        """
+        Args:
+            compression: `"zlib"`, `"zstd"` or None to never compress
+            compression_threshold: Smallest payload in bytes that is compressed
+            compression_level: Level of the compressor, None for its default
+        """
+        if not MSGPACK_AVAILABLE:
+            raise LLMfyException(
+                "msgpack package is not installed. msgpack package is required for "
+                'MsgpackSerializer. Install it using `pip install "llmfy[msgpack]"`'
+            )
+        super().__init__(compression, compression_threshold, compression_level)
+
+    def encode(self, data: Any) -> bytes:
+        return msgpack.packb(
+            data, default=_encode_object, use_bin_type=True, datetime=True
+        )
+
+    @staticmethod
+    def decode(body: bytes) -> Any:
+        if not MSGPACK_AVAILABLE:
+            raise LLMfyException(
+                "Checkpoint is stored with msgpack, install msgpack to load it"
+            )
+        return msgpack.unpackb(
+            body,
+            raw=False,
+            object_hook=Checkpoint._object_hook,
+            timestamp=3,
+            strict_map_key=False,
+        )
+
+
+# Format id -> serializer class writing it
+_FORMATS: dict[int, type[BaseSerializer]] = {
+    JsonSerializer.format_id: JsonSerializer,
+    PickleSerializer.format_id: PickleSerializer,
+    MsgpackSerializer.format_id: MsgpackSerializer,
+}
+
+
+def is_framed(payload: str | bytes) -> bool:
+    """Whether a payload starts with a serializer header, not JSON text."""
+    return isinstance(payload, bytes | bytearray | memoryview) and (
+        len(payload) > 0 and payload[0] != ord("{")
+    )
+
+
+def loads_payload(
+    payload: str | bytes, serializer: BaseSerializer | None = None
+) -> Any:
+    """
+    Deserialize a payload of a serializer, or JSON text.
+
+    JSON and msgpack payloads are read whatever `serializer` is. Pickles are
+    only loaded when `serializer` is a `PickleSerializer`, the header of a
+    payload can't choose to unpickle it.
+
+    Args:
+        payload: Serialized payload
+        serializer: Serializer of the checkpointer reading the payload, None
+            when it stores JSON text
+
+    Returns:
+        The deserialized data
+
+    Raises:
+        LLMfyException: If the payload is a pickle and `serializer` is not a
+            `PickleSerializer`, or of an unknown format
+    """
+    if not is_framed(payload):
+        if not isinstance(payload, str):
+            payload = bytes(payload).decode()
+        return Checkpoint._deserialize_state(payload)
+
+    payload = bytes(payload)
+    version, format_id, compression_id = payload[:3]
+    if version != PAYLOAD_VERSION:
+        raise LLMfyException(f"Unsupported checkpoint payload version {version}")
+    if serializer is not None and format_id == serializer.format_id:
+        serializer_class = type(serializer)
+    else:
+        serializer_class = _FORMATS.get(format_id)
+        if serializer_class is None:
+            raise LLMfyException(f"Unknown checkpoint payload format {format_id}")
+        if serializer_class is PickleSerializer:
+            raise LLMfyException(
+                "Checkpoint payload is stored with PickleSerializer, only a "
+                "checkpointer configured with PickleSerializer loads pickles"
+            )
+
+    body = payload[3:]
+    if compression_id == _COMPRESSION_IDS["zlib"]:
+        body = zlib.decompress(body)
+    elif compression_id == _COMPRESSION_IDS["zstd"]:
+        if not ZSTD_AVAILABLE:
+            raise LLMfyException(
+                "Checkpoint is zstd compressed, install zstandard to load it"
+            )
+        body = zstd.decompress(body)
+    elif compression_id != 0:
+        raise LLMfyException(f"Unknown checkpoint compression {compression_id}")
+    return serializer_class.decode(body)
+
+
+def _encode_object(obj: Any) -> Any:
+    """Store custom objects as their class and `__dict__`, like JSON payloads."""
+    if hasattr(obj, "__dict__"):
+        return {
+            "__type__": obj.__class__.__name__,
+            "__module__": obj.__class__.__module__,
+            "data": obj.__dict__,
+        }
+    raise TypeError(f"Object of type {type(obj)} is not serializable")
+
+
+def _compress(body: bytes, compression: str, level: int | None) -> bytes:
+    """Compress a payload body, `level` None for the compressor default."""
+    if compression == "zlib":
+        return zlib.compress(body, -1 if level is None else level)
+    return zstd.compress(body, 3 if level is None else level)
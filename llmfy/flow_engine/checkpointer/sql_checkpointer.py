@@ -2,6 +2,10 @@ from __future__ import annotations
 
 import asyncio
 import builtins
+import json
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
 
 from llmfy.exception.llmfy_exception import LLMfyException
 from llmfy.flow_engine.checkpointer.base_checkpointer import (
@@ -9,6 +13,15 @@ from llmfy.flow_engine.checkpointer.base_checkpointer import (
     Checkpoint,
     CheckpointMetadata,
 )
+from llmfy.flow_engine.checkpointer.delta import (
+    DeltaChains,
+    StoredCheckpoint,
+    materialize,
+    missing_chain_ids,
+    rebase_dependents,
+)
+from llmfy.flow_engine.checkpointer.retention import RetentionPolicy, to_epoch
+from llmfy.flow_engine.checkpointer.serializer import BaseSerializer
 
 try:
     from sqlalchemy import (
@@ -16,14 +29,22 @@ try:
         DateTime,
         Index,
         Integer,
+        LargeBinary,
         String,
         Text,
         TypeDecorator,
+        case,
         create_engine,
         delete,
+        func,
+        insert,
+        inspect,
+        or_,
         select,
+        text,
+        update,
     )
-    from sqlalchemy.dialects import mysql, postgresql
+    from sqlalchemy.dialects import mysql, postgresql, sqlite
     from sqlalchemy.ext.asyncio import (
         AsyncSession,
         async_sessionmaker,
@@ -57,6 +78,18 @@ try:
             else:
                 return dialect.type_descriptor(Text())
 
+    class LongBinary(TypeDecorator):
+        impl = LargeBinary
+        cache_ok = True
+
+        def load_dialect_impl(self, dialect):
+            if dialect.name == "postgresql":
+                return dialect.type_descriptor(postgresql.BYTEA())
+            elif dialect.name == "mysql":
+                return dialect.type_descriptor(mysql.LONGBLOB())
+            else:
+                return dialect.type_descriptor(LargeBinary())
+
     Base = declarative_base()
 
     class CheckpointModel(Base):
@@ -70,9 +103,49 @@ try:
         node_name = Column(String(255), nullable=False)
         step = Column(Integer, nullable=False)
         state = Column(LongText, nullable=False)
+        # Columns added after the first release must stay nullable, they are
+        # appended to existing tables by `_add_missing_columns`
+        next_nodes = Column(Text, nullable=True)
+        pending_joins = Column(Text, nullable=True)
+        parent_id = Column(String(255), nullable=True)
+        # "delta" when `state` holds a delta on top of the `chain` checkpoints,
+        # NULL or "full" for a full snapshot
+        kind = Column(String(16), nullable=True)
+        chain = Column(Text, nullable=True)
+        # Payload of a `serializer`, `state` is then left empty
+        payload = Column(LongBinary, nullable=True)
 
         __table_args__ = (Index("idx_thread_timestamp", "session_id", "timestamp"),)
 
+    class CheckpointHeadModel(Base):
+        """Latest checkpoint of each session, kept with `head_table=True`."""
+
+        __tablename__ = "llmfy_checkpoint_head"
+
+        session_id = Column(String(255), primary_key=True)
+        checkpoint_id = Column(String(255), nullable=False)
+        timestamp = Column(TimestampMilliseconds, nullable=False)
+
+    def _add_missing_columns(connection):
+        """Add model columns that are missing from an existing checkpoint table."""
+        table = CheckpointModel.__table__
+        existing = {c["name"] for c in inspect(connection).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            )
+
+    def _create_schema(connection, head_table: bool = False):
+        """Create the checkpoint tables and bring older tables up to date."""
+        tables = [CheckpointModel.__table__]
+        if head_table:
+            tables.append(CheckpointHeadModel.__table__)
+        Base.metadata.create_all(connection, tables=tables)
+        _add_missing_columns(connection)
+
 except ImportError:
     SQLALCHEMY_AVAILABLE = False
 
@@ -85,15 +158,60 @@ class SQLCheckpointer(BaseCheckpointer):
     - PostgreSQL (async: asyncpg, sync: psycopg2)
     - MySQL (async: aiomysql, sync: pymysql)
     - SQLite (async: aiosqlite, sync: built-in)
+
+    Every `snapshot_interval` checkpoints of a session one is stored in full, the
+    ones in between only store their delta against the previous checkpoint.
+
+    With a `retention` policy, old checkpoints of a session are deleted in
+    batched DELETE statements when a new full snapshot of it is saved.
+
+    With `head_table=True` the latest checkpoint of each session is upserted
+    into `llmfy_checkpoint_head` on save, so loading the latest checkpoint is
+    a primary key lookup instead of a sort of the session's checkpoints.
+
+    With a `serializer`, states and deltas are stored in the binary `payload`
+    column instead of as JSON text in `state`. JSON and msgpack rows are read
+    whatever the current serializer is, pickled rows only with a
+    `PickleSerializer`.
     """
 
-    def __init__(self, connection_string: str, echo: bool = False):
+    # Checkpoint IDs per DELETE statement when pruning
+    DELETE_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        connection_string: str,
+        echo: bool = False,
+        snapshot_interval: int = 10,
+        retention: RetentionPolicy | None = None,
+        pool_size: int | None = None,
+        max_overflow: int | None = None,
+        pool_recycle: int | None = None,
+        head_table: bool = False,
+        max_workers: int | None = None,
+        serializer: BaseSerializer | None = None,
+    ):
         """
         Initialize the SQL database checkpointer.
 
         Args:
             connection_string: SQLAlchemy connection string (sync or async)
             echo: Whether to echo SQL statements (for debugging)
+            snapshot_interval: Store a full snapshot every N checkpoints of a session
+                and deltas in between, 1 stores every checkpoint in full
+            retention: Bounds the checkpoints kept per session
+            pool_size: Connections kept open by the pool, None for the
+                SQLAlchemy default (5)
+            max_overflow: Connections opened beyond `pool_size` under load,
+                None for the SQLAlchemy default (10)
+            pool_recycle: Seconds after which a connection is replaced, set it
+                below the server idle timeout (MySQL `wait_timeout`)
+            head_table: Keep the latest checkpoint of each session in the
+                `llmfy_checkpoint_head` table (PostgreSQL, MySQL and SQLite)
+            max_workers: Threads running the calls of a sync driver, defaults
+                to `pool_size + max_overflow` so every connection can be busy
+            serializer: Serializer of the stored states and deltas, None for
+                JSON text
 
         Example connection strings:
 
@@ -141,60 +259,218 @@ class SQLCheckpointer(BaseCheckpointer):
             for driver in ["asyncpg", "aiomysql", "aiosqlite", "+async"]
         )
 
+        # Pool settings, SQLAlchemy defaults for the ones not given
+        pool_options = {
+            name: value
+            for name, value in (
+                ("pool_size", pool_size),
+                ("max_overflow", max_overflow),
+                ("pool_recycle", pool_recycle),
+            )
+            if value is not None
+        }
+
         if self.is_async:
             # Async mode
-            self.engine = create_async_engine(connection_string, echo=echo)
+            self.engine = create_async_engine(
+                connection_string, echo=echo, **pool_options
+            )
             self.session_maker = async_sessionmaker(
                 self.engine, class_=AsyncSession, expire_on_commit=False
             )
         else:
             # Sync mode
-            self.engine = create_engine(connection_string, echo=echo)
+            self.engine = create_engine(connection_string, echo=echo, **pool_options)
             self.session_maker = sessionmaker(bind=self.engine)
 
+        if head_table and self.engine.dialect.name not in (
+            "postgresql",
+            "mysql",
+            "sqlite",
+        ):
+            raise LLMfyException(
+                f"head_table is not supported on {self.engine.dialect.name}"
+            )
+        self.head_table = head_table
+        self.serializer = serializer
+
+        # Sync driver calls run on a dedicated pool, created on first use
+        self.max_workers = max_workers or (
+            (5 if pool_size is None else pool_size)
+            + (10 if max_overflow is None else max_overflow)
+        )
+        self._executor: ThreadPoolExecutor | None = None
+
         self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self.retention = retention
+        self._chains = DeltaChains(snapshot_interval)
 
     async def _ensure_initialized(self):
         """Ensure database tables are created."""
-        if not self._initialized:
+        if self._initialized:
+            return
+        # Concurrent first calls would all run CREATE TABLE
+        async with self._init_lock:
+            if self._initialized:
+                return
             if self.is_async:
                 async with self.engine.begin() as conn:  # type: ignore
-                    await conn.run_sync(Base.metadata.create_all)
+                    await conn.run_sync(_create_schema, self.head_table)
             else:
                 # Sync initialization - run in executor to keep it async
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, Base.metadata.create_all, self.engine)
+                await self._run_sync(self._create_schema_sync)
 
             self._initialized = True
 
+    async def _run_sync(self, func: Callable, *args):
+        """Run a blocking call of the sync driver on the checkpointer's thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="llmfy-sql-checkpointer"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _create_schema_sync(self):
+        """Helper for sync schema creation."""
+        with self.engine.begin() as conn:  # type: ignore
+            _create_schema(conn, self.head_table)
+
     async def save(self, checkpoint: Checkpoint) -> None:
         """Save a checkpoint to SQL database."""
-        await self._ensure_initialized()
+        await self.save_many([checkpoint])
 
-        model = CheckpointModel(
-            checkpoint_id=checkpoint.metadata.checkpoint_id,
-            session_id=checkpoint.metadata.session_id,
-            timestamp=checkpoint.metadata.timestamp,
-            node_name=checkpoint.metadata.node_name,
-            step=checkpoint.metadata.step,
-            state=Checkpoint._serialize_state(checkpoint.state),
-        )
+    async def save_many(self, checkpoints: builtins.list[Checkpoint]) -> None:
+        """
+        Save checkpoints in one transaction, with one bulk INSERT.
+
+        SQLAlchemy sends the rows as multi-row INSERT statements, or through
+        the driver's `executemany` where it is faster (SQLite, asyncpg).
 
+        Args:
+            checkpoints: Checkpoints to save, in the order they were taken
+        """
+        if not checkpoints:
+            return
+        await self._ensure_initialized()
+
+        rows = []
+        # Sessions that got a new full snapshot, older chains may no longer be needed
+        snapshot_sessions = []
+        for checkpoint in checkpoints:
+            # A delta when the checkpoint extends the last chain of the session
+            chain = self._chains.next_chain(checkpoint)
+            stored = StoredCheckpoint.from_checkpoint(checkpoint, chain)
+            rows.append(self._checkpoint_row(stored))
+            session_id = checkpoint.metadata.session_id
+            if chain is None and session_id not in snapshot_sessions:
+                snapshot_sessions.append(session_id)
+
+        stmts = self._save_stmts(rows)
         if self.is_async:
             async with self.session_maker() as session:  # type: ignore
-                session.add(model)
+                for stmt, params in stmts:
+                    await session.execute(stmt, params)
                 await session.commit()
         else:
             # Sync operation - run in executor
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._save_sync, model)
+            await self._run_sync(self._save_sync, stmts)
 
-    def _save_sync(self, model: CheckpointModel):
+        if self.retention is not None:
+            for session_id in snapshot_sessions:
+                await self._prune(session_id, keep_latest=True)
+
+    def _save_sync(self, stmts: builtins.list):
         """Helper for sync save."""
         with self.session_maker() as session:  # type: ignore
-            session.add(model)
+            for stmt, params in stmts:
+                session.execute(stmt, params)
             session.commit()
 
+    def _checkpoint_row(self, stored: StoredCheckpoint) -> dict:
+        """Column values of the row storing a checkpoint."""
+        metadata = stored.metadata
+        return {
+            "checkpoint_id": metadata.checkpoint_id,
+            "session_id": metadata.session_id,
+            "timestamp": metadata.timestamp,
+            "node_name": metadata.node_name,
+            "step": metadata.step,
+            "next_nodes": (
+                json.dumps(metadata.next_nodes)
+                if metadata.next_nodes is not None
+                else None
+            ),
+            "pending_joins": json.dumps(metadata.pending_joins),
+            "parent_id": metadata.parent_id,
+            **self._payload_columns(stored),
+        }
+
+    def _payload_columns(self, stored: StoredCheckpoint) -> dict:
+        """Column values of the state or delta of a checkpoint, with its kind and chain."""
+        if self.serializer is not None:
+            state, payload = "", stored.payload(self.serializer)
+        else:
+            state, payload = stored.payload(), None
+        return {
+            "state": state,
+            "payload": payload,
+            "kind": stored.kind,
+            "chain": json.dumps(stored.chain) if stored.chain else None,
+        }
+
+    def _save_stmts(self, rows: builtins.list[dict]) -> builtins.list[tuple]:
+        """(statement, parameters) saving checkpoint rows, plus the head upsert."""
+        stmts: builtins.list[tuple] = [(insert(CheckpointModel), rows)]
+        if self.head_table:
+            # Newest row per session, an upsert can't touch a row twice
+            heads = {}
+            for row in rows:
+                head = heads.get(row["session_id"])
+                if head is None or row["timestamp"] >= head["timestamp"]:
+                    heads[row["session_id"]] = {
+                        "session_id": row["session_id"],
+                        "checkpoint_id": row["checkpoint_id"],
+                        "timestamp": row["timestamp"],
+                    }
+            stmts.append((self._head_upsert_stmt(builtins.list(heads.values())), None))
+        return stmts
+
+    def _head_upsert_stmt(self, heads: builtins.list[dict]):
+        """Upsert head rows, an older checkpoint never replaces a newer head."""
+        table = CheckpointHeadModel.__table__
+        if self.engine.dialect.name == "mysql":
+            stmt = mysql.insert(table).values(heads)
+            newer = stmt.inserted.timestamp >= table.c.timestamp
+            # MySQL assigns in order, `timestamp` must be compared before it changes
+            return stmt.on_duplicate_key_update(
+                [
+                    (
+                        "checkpoint_id",
+                        case(
+                            (newer, stmt.inserted.checkpoint_id),
+                            else_=table.c.checkpoint_id,
+                        ),
+                    ),
+                    (
+                        "timestamp",
+                        case((newer, stmt.inserted.timestamp), else_=table.c.timestamp),
+                    ),
+                ]
+            )
+
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(table).values(heads)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.session_id],
+            set_={
+                "checkpoint_id": stmt.excluded.checkpoint_id,
+                "timestamp": stmt.excluded.timestamp,
+            },
+            where=stmt.excluded.timestamp >= table.c.timestamp,
+        )
+
     async def load(
         self,
         session_id: str,
@@ -207,33 +483,29 @@ class SQLCheckpointer(BaseCheckpointer):
             return await self._load_async(session_id, checkpoint_id)
         else:
             # Sync operation - run in executor
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None, self._load_sync, session_id, checkpoint_id
-            )
+            return await self._run_sync(self._load_sync, session_id, checkpoint_id)
 
     async def _load_async(
         self, session_id: str, checkpoint_id: str | None
     ) -> Checkpoint | None:
         """Helper for async load."""
         async with self.session_maker() as session:  # type: ignore
-            if checkpoint_id:
-                stmt = select(CheckpointModel).where(
-                    CheckpointModel.checkpoint_id == checkpoint_id,
-                    CheckpointModel.session_id == session_id,
-                )
-            else:
-                stmt = (
-                    select(CheckpointModel)
-                    .where(CheckpointModel.session_id == session_id)
-                    .order_by(CheckpointModel.timestamp.desc())
-                    .limit(1)
-                )
-
-            result = await session.execute(stmt)
-            model = result.scalar_one_or_none()
-
-            return self._model_to_checkpoint(model) if model else None
+            model = None
+            for stmt in self._load_stmts(session_id, checkpoint_id):
+                result = await session.execute(stmt)
+                model = result.scalar_one_or_none()
+                if model is not None:
+                    break
+            if model is None:
+                return None
+
+            stored = [self._model_to_stored(model)]
+            chain_ids = missing_chain_ids(stored, [model.checkpoint_id])  # type: ignore
+            chain = []
+            if chain_ids:
+                result = await session.execute(self._chain_stmt(chain_ids))
+                chain = result.scalars().all()
+            return self._materialize(stored, chain)[0]
 
     def _load_sync(
         self,
@@ -242,23 +514,52 @@ class SQLCheckpointer(BaseCheckpointer):
     ) -> Checkpoint | None:
         """Helper for sync load."""
         with self.session_maker() as session:  # type: ignore
-            if checkpoint_id:
-                stmt = select(CheckpointModel).where(
+            model = None
+            for stmt in self._load_stmts(session_id, checkpoint_id):
+                result = session.execute(stmt)
+                model = result.scalar_one_or_none()
+                if model is not None:
+                    break
+            if model is None:
+                return None
+
+            stored = [self._model_to_stored(model)]
+            chain_ids = missing_chain_ids(stored, [model.checkpoint_id])  # type: ignore
+            chain = []
+            if chain_ids:
+                result = session.execute(self._chain_stmt(chain_ids))
+                chain = result.scalars().all()
+            return self._materialize(stored, chain)[0]
+
+    def _load_stmts(self, session_id: str, checkpoint_id: str | None) -> builtins.list:
+        """Statements selecting the checkpoint to load, tried in order."""
+        if checkpoint_id:
+            return [
+                select(CheckpointModel).where(
                     CheckpointModel.checkpoint_id == checkpoint_id,
                     CheckpointModel.session_id == session_id,
                 )
-            else:
-                stmt = (
-                    select(CheckpointModel)
-                    .where(CheckpointModel.session_id == session_id)
-                    .order_by(CheckpointModel.timestamp.desc())
-                    .limit(1)
-                )
-
-            result = session.execute(stmt)
-            model = result.scalar_one_or_none()
+            ]
 
-            return self._model_to_checkpoint(model) if model else None
+        latest = (
+            select(CheckpointModel)
+            .where(CheckpointModel.session_id == session_id)
+            .order_by(CheckpointModel.timestamp.desc())
+            .limit(1)
+        )
+        if not self.head_table:
+            return [latest]
+        # Primary key lookups through the head row, sessions saved before the
+        # head table existed or whose head was deleted fall back to the sort
+        head = (
+            select(CheckpointModel)
+            .join(
+                CheckpointHeadModel,
+                CheckpointHeadModel.checkpoint_id == CheckpointModel.checkpoint_id,
+            )
+            .where(CheckpointHeadModel.session_id == session_id)
+        )
+        return [head, latest]
 
     async def list(self, session_id: str, limit: int = 10) -> builtins.list[Checkpoint]:
         """List checkpoints for a session."""
@@ -267,8 +568,7 @@ class SQLCheckpointer(BaseCheckpointer):
         if self.is_async:
             return await self._list_async(session_id, limit)
         else:
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, self._list_sync, session_id, limit)
+            return await self._run_sync(self._list_sync, session_id, limit)
 
     async def _list_async(self, session_id: str, limit: int) -> builtins.list[Checkpoint]:
         """Helper for async list."""
@@ -282,7 +582,13 @@ class SQLCheckpointer(BaseCheckpointer):
             result = await session.execute(stmt)
             models = result.scalars().all()
 
-            return [self._model_to_checkpoint(model) for model in models]
+            stored = [self._model_to_stored(model) for model in models]
+            chain_ids = missing_chain_ids(stored, [m.checkpoint_id for m in models])  # type: ignore
+            chain = []
+            if chain_ids:
+                result = await session.execute(self._chain_stmt(chain_ids))
+                chain = result.scalars().all()
+            return self._materialize(stored, [*models, *chain])
 
     def _list_sync(self, session_id: str, limit: int) -> builtins.list[Checkpoint]:
         """Helper for sync list."""
@@ -296,7 +602,13 @@ class SQLCheckpointer(BaseCheckpointer):
             result = session.execute(stmt)
             models = result.scalars().all()
 
-            return [self._model_to_checkpoint(model) for model in models]
+            stored = [self._model_to_stored(model) for model in models]
+            chain_ids = missing_chain_ids(stored, [m.checkpoint_id for m in models])  # type: ignore
+            chain = []
+            if chain_ids:
+                result = session.execute(self._chain_stmt(chain_ids))
+                chain = result.scalars().all()
+            return self._materialize(stored, [*models, *chain])
 
     async def delete(self, session_id: str, checkpoint_id: str | None = None) -> None:
         """Delete checkpoint(s) from SQL database."""
@@ -305,15 +617,22 @@ class SQLCheckpointer(BaseCheckpointer):
         if self.is_async:
             await self._delete_async(session_id, checkpoint_id)
         else:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, self._delete_sync, session_id, checkpoint_id
-            )
+            await self._run_sync(self._delete_sync, session_id, checkpoint_id)
+
+        # The next delta of the session could point at a deleted or rewritten chain
+        self._chains.forget(session_id)
 
     async def _delete_async(self, session_id: str, checkpoint_id: str | None):
         """Helper for async delete."""
         async with self.session_maker() as session:  # type: ignore
             if checkpoint_id:
+                # Deltas based on this checkpoint are rewritten first
+                result = await session.execute(self._session_stmt(session_id))
+                for stmt in self._rebase_stmts(
+                    session_id, checkpoint_id, result.scalars().all()
+                ):
+                    await session.execute(stmt)
+
                 stmt = delete(CheckpointModel).where(
                     CheckpointModel.checkpoint_id == checkpoint_id,
                     CheckpointModel.session_id == session_id,
@@ -324,12 +643,21 @@ class SQLCheckpointer(BaseCheckpointer):
                 )
 
             await session.execute(stmt)
+            for stmt in self._head_delete_stmts(session_id, checkpoint_id):
+                await session.execute(stmt)
             await session.commit()
 
     def _delete_sync(self, session_id: str, checkpoint_id: str | None):
         """Helper for sync delete."""
         with self.session_maker() as session:  # type: ignore
             if checkpoint_id:
+                # Deltas based on this checkpoint are rewritten first
+                result = session.execute(self._session_stmt(session_id))
+                for stmt in self._rebase_stmts(
+                    session_id, checkpoint_id, result.scalars().all()
+                ):
+                    session.execute(stmt)
+
                 stmt = delete(CheckpointModel).where(
                     CheckpointModel.checkpoint_id == checkpoint_id,
                     CheckpointModel.session_id == session_id,
@@ -340,6 +668,8 @@ class SQLCheckpointer(BaseCheckpointer):
                 )
 
             session.execute(stmt)
+            for stmt in self._head_delete_stmts(session_id, checkpoint_id):
+                session.execute(stmt)
             session.commit()
 
     async def clear_all(self) -> None:
@@ -349,14 +679,17 @@ class SQLCheckpointer(BaseCheckpointer):
         if self.is_async:
             await self._clear_all_async()
         else:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._clear_all_sync)
+            await self._run_sync(self._clear_all_sync)
+
+        self._chains.forget()
 
     async def _clear_all_async(self):
         """Helper for async clear_all."""
         async with self.session_maker() as session:  # type: ignore
             stmt = delete(CheckpointModel)
             await session.execute(stmt)
+            for stmt in self._head_delete_stmts():
+                await session.execute(stmt)
             await session.commit()
 
     def _clear_all_sync(self):
@@ -364,28 +697,215 @@ class SQLCheckpointer(BaseCheckpointer):
         with self.session_maker() as session:  # type: ignore
             stmt = delete(CheckpointModel)
             session.execute(stmt)
+            for stmt in self._head_delete_stmts():
+                session.execute(stmt)
             session.commit()
 
+    async def compact(self) -> int:
+        """
+        Apply the retention policy to every session, removing idle sessions
+        whose checkpoints all expired.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        if self.retention is None:
+            return 0
+        await self._ensure_initialized()
+
+        if self.is_async:
+            async with self.session_maker() as session:  # type: ignore
+                result = await session.execute(self._compact_stmt())
+                session_ids = result.scalars().all()
+        else:
+            session_ids = await self._run_sync(self._compact_sessions_sync)
+
+        deleted = 0
+        for session_id in session_ids:
+            deleted += await self._prune(session_id, keep_latest=False)
+        return deleted
+
+    def _compact_sessions_sync(self) -> builtins.list[str]:
+        """Helper for sync compact."""
+        with self.session_maker() as session:  # type: ignore
+            return builtins.list(session.execute(self._compact_stmt()).scalars().all())
+
+    def _compact_stmt(self):
+        """Select the sessions with checkpoints the retention policy may drop."""
+        retention: RetentionPolicy = self.retention  # type: ignore
+        conditions = []
+        if retention.max_checkpoints is not None:
+            conditions.append(func.count() > retention.max_checkpoints)
+        expired_before = retention.expired_before()
+        if expired_before is not None:
+            conditions.append(
+                func.min(CheckpointModel.timestamp)
+                < datetime.fromtimestamp(expired_before, UTC)
+            )
+        stmt = select(CheckpointModel.session_id).group_by(CheckpointModel.session_id)
+        if conditions:
+            stmt = stmt.having(or_(*conditions))
+        return stmt
+
+    async def _prune(self, session_id: str, keep_latest: bool) -> int:
+        """Delete the checkpoints of a session the retention policy drops."""
+        if self.is_async:
+            async with self.session_maker() as session:  # type: ignore
+                result = await session.execute(self._retention_stmt(session_id))
+                prunable = self._prunable(result.all(), keep_latest)
+                for stmt in self._prune_stmts(session_id, prunable):
+                    await session.execute(stmt)
+                await session.commit()
+        else:
+            prunable = await self._run_sync(self._prune_sync, session_id, keep_latest)
+
+        if prunable and not keep_latest:
+            # The last checkpoint of the session may be gone
+            self._chains.forget(session_id)
+        return len(prunable)
+
+    def _prune_sync(self, session_id: str, keep_latest: bool) -> builtins.list[str]:
+        """Helper for sync prune."""
+        with self.session_maker() as session:  # type: ignore
+            result = session.execute(self._retention_stmt(session_id))
+            prunable = self._prunable(result.all(), keep_latest)
+            for stmt in self._prune_stmts(session_id, prunable):
+                session.execute(stmt)
+            session.commit()
+        return prunable
+
     @staticmethod
-    def _model_to_checkpoint(model: CheckpointModel) -> Checkpoint:
-        """Convert SQLAlchemy model to Checkpoint object."""
+    def _retention_stmt(session_id: str):
+        """Select what the retention policy needs of a session's checkpoints, oldest first."""
+        return (
+            select(
+                CheckpointModel.checkpoint_id,
+                CheckpointModel.timestamp,
+                CheckpointModel.chain,
+            )
+            .where(CheckpointModel.session_id == session_id)
+            .order_by(CheckpointModel.timestamp)
+        )
+
+    def _prunable(self, rows: Sequence, keep_latest: bool) -> builtins.list[str]:
+        """Checkpoint IDs the retention policy drops, from `_retention_stmt` rows."""
+        bases = {}
+        for checkpoint_id, _, chain in rows:
+            if chain:
+                bases[checkpoint_id] = json.loads(chain)[0]
+        return self.retention.prunable(  # type: ignore
+            [checkpoint_id for checkpoint_id, _, _ in rows],
+            [to_epoch(timestamp) for _, timestamp, _ in rows],
+            bases,
+            keep_latest=keep_latest,
+        )
+
+    def _prune_stmts(
+        self, session_id: str, checkpoint_ids: builtins.list[str]
+    ) -> builtins.list:
+        """DELETE statements for checkpoints, in batches of `DELETE_BATCH_SIZE`."""
+        size = self.DELETE_BATCH_SIZE
+        stmts = []
+        for i in range(0, len(checkpoint_ids), size):
+            batch = checkpoint_ids[i : i + size]
+            stmts.append(
+                delete(CheckpointModel).where(CheckpointModel.checkpoint_id.in_(batch))
+            )
+            stmts.extend(self._head_delete_stmts(session_id, batch))
+        return stmts
+
+    def _head_delete_stmts(
+        self,
+        session_id: str | None = None,
+        checkpoint_ids: str | builtins.list[str] | None = None,
+    ) -> builtins.list:
+        """
+        Statements deleting head rows that point at deleted checkpoints.
+
+        Args:
+            session_id: Session of the checkpoints, None for every session
+            checkpoint_ids: Deleted checkpoint or checkpoints, None for all
+                checkpoints of the session
+        """
+        if not self.head_table:
+            return []
+        stmt = delete(CheckpointHeadModel)
+        if session_id is not None:
+            stmt = stmt.where(CheckpointHeadModel.session_id == session_id)
+        if isinstance(checkpoint_ids, str):
+            stmt = stmt.where(CheckpointHeadModel.checkpoint_id == checkpoint_ids)
+        elif checkpoint_ids is not None:
+            stmt = stmt.where(CheckpointHeadModel.checkpoint_id.in_(checkpoint_ids))
+        return [stmt]
+
+    def _model_to_stored(self, model: CheckpointModel) -> StoredCheckpoint:
+        """Convert SQLAlchemy model to a full or delta StoredCheckpoint."""
         metadata = CheckpointMetadata(
             checkpoint_id=model.checkpoint_id,  # type: ignore
             session_id=model.session_id,  # type: ignore
             timestamp=model.timestamp,  # type: ignore
             node_name=model.node_name,  # type: ignore
             step=model.step,  # type: ignore
+            next_nodes=json.loads(model.next_nodes) if model.next_nodes else None,  # type: ignore
+            pending_joins=json.loads(model.pending_joins) if model.pending_joins else {},  # type: ignore
+            parent_id=model.parent_id,  # type: ignore
+        )
+        chain = json.loads(model.chain) if model.chain else None  # type: ignore
+        payload = model.payload if model.payload is not None else model.state
+        return StoredCheckpoint.from_payload(metadata, model.kind, payload, chain, self.serializer)  # type: ignore
+
+    def _materialize(
+        self,
+        stored: builtins.list[StoredCheckpoint],
+        models: Sequence[CheckpointModel],
+    ) -> builtins.list[Checkpoint]:
+        """Rebuild full checkpoints from stored ones and the rows of their chains."""
+        lookup = {item.metadata.checkpoint_id: item for item in stored}
+        for model in models:
+            if model.checkpoint_id not in lookup:
+                lookup[model.checkpoint_id] = self._model_to_stored(model)  # type: ignore
+        return materialize(stored, lookup)
+
+    @staticmethod
+    def _chain_stmt(checkpoint_ids: builtins.list[str]):
+        """Select the chain checkpoints a delta is rebuilt from."""
+        return select(CheckpointModel).where(
+            CheckpointModel.checkpoint_id.in_(checkpoint_ids)
         )
-        state = Checkpoint._deserialize_state(model.state)  # type: ignore
-        return Checkpoint(metadata=metadata, state=state)
+
+    @staticmethod
+    def _session_stmt(session_id: str):
+        """Select every checkpoint of a session."""
+        return select(CheckpointModel).where(CheckpointModel.session_id == session_id)
+
+    def _rebase_stmts(
+        self,
+        session_id: str,
+        checkpoint_id: str,
+        models: Sequence[CheckpointModel],
+    ) -> builtins.list:
+        """Updates rewriting the deltas that depend on a checkpoint about to be deleted."""
+        stored = [self._model_to_stored(model) for model in models]
+        lookup = {item.metadata.checkpoint_id: item for item in stored}
+        return [
+            update(CheckpointModel)
+            .where(
+                CheckpointModel.checkpoint_id == item.metadata.checkpoint_id,
+                CheckpointModel.session_id == session_id,
+            )
+            .values(**self._payload_columns(item))
+            for item in rebase_dependents(checkpoint_id, stored, lookup)
+        ]
 
     async def close(self) -> None:
         """Close the database connection."""
         if self.is_async:
             await self.engine.dispose()  # type: ignore
         else:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.engine.dispose)
+            await self._run_sync(self.engine.dispose)
+            # Threads are started again by the next call
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=False)  # type: ignore
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -0,0 +1,284 @@
+import asyncio
+import builtins
+import warnings
+from copy import deepcopy
+from dataclasses import replace
+from enum import StrEnum
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    BaseCheckpointer,
+    Checkpoint,
+)
+from llmfy.flow_engine.checkpointer.checkpoint_writer import CheckpointWriter
+
+
+class WriteMode(StrEnum):
+    """When `TieredCheckpointer` writes checkpoints to the cold tier."""
+
+    THROUGH = "through"
+    """A save returns once the checkpoint is in both tiers."""
+    BACK = "back"
+    """A save returns once the checkpoint is in the hot tier, it is written to
+    the cold tier in batches by a background task."""
+
+
+class TieredCheckpointer(BaseCheckpointer):
+    """
+    A hot checkpointer caching the checkpoints of a cold one.
+
+    Checkpoints are saved to both tiers. Loads are served by the hot tier,
+    typically an `InMemoryCheckpointer` bounded with `max_sessions` or
+    `max_bytes`, and fall back to the cold tier, Redis or SQL, on a miss. The
+    latest checkpoint loaded on a miss is put in the hot tier, so resuming a
+    session costs one round trip to the cold tier, and none when this process
+    saved it. `list()` always reads the cold tier, which holds every
+    checkpoint.
+
+    With `WriteMode.BACK` checkpoints are written to the cold tier behind the
+    saves, through a `CheckpointWriter`. The checkpoints of a session are
+    flushed before the cold tier reads or deletes it, all of them by `flush()`
+    and `close()`. Checkpoints still queued when the
+    process dies are lost.
+
+    The hot tier is only right about the latest checkpoint of a session if
+    every checkpoint of it goes through this checkpointer. Route each session
+    to one process, or drop it from the hot tier with `hot.delete(session_id)`
+    when it moves to another one.
+    """
+
+    def __init__(
+        self,
+        hot: BaseCheckpointer,
+        cold: BaseCheckpointer,
+        write_mode: WriteMode | str = WriteMode.THROUGH,
+        max_queue_size: int = 1000,
+        batch_size: int = 100,
+    ):
+        """
+        Initialize the tiered checkpointer.
+
+        Args:
+            hot: Fast checkpointer serving loads, e.g. a bounded `InMemoryCheckpointer`
+            cold: Checkpointer holding every checkpoint, e.g. Redis or SQL
+            write_mode: When checkpoints are written to the cold tier, see `WriteMode`
+            max_queue_size: Checkpoints waiting for the cold tier with `WriteMode.BACK`
+            batch_size: Checkpoints written to the cold tier in one batch with
+                `WriteMode.BACK`
+        """
+        if hot is cold:
+            raise LLMfyException("hot and cold must be different checkpointers")
+
+        self.hot = hot
+        self.cold = cold
+        self.write_mode = WriteMode(write_mode)
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self._writer: CheckpointWriter | None = None  # Created on first use
+        self._hits = 0
+        self._misses = 0
+
+    async def save(self, checkpoint: Checkpoint) -> None:
+        """
+        Save a checkpoint to both tiers.
+
+        Args:
+            checkpoint: The checkpoint to save
+        """
+        await self.save_many([checkpoint])
+
+    async def save_many(self, checkpoints: builtins.list[Checkpoint]) -> None:
+        """
+        Save checkpoints to both tiers, in one batch per tier.
+
+        Args:
+            checkpoints: The checkpoints to save, oldest first
+
+        Raises:
+            LLMfyException: With `WriteMode.BACK`, if writing an earlier batch to
+                the cold tier failed
+        """
+        if not checkpoints:
+            return
+        if self.write_mode == WriteMode.THROUGH:
+            # The cold tier is the source of truth, the hot one only a cache
+            await self.cold.save_many(checkpoints)
+            await self._save_hot(checkpoints)
+        else:
+            await self._save_hot(checkpoints)
+            writer = self._get_writer()
+            for checkpoint in checkpoints:
+                await writer.put(checkpoint)
+
+    async def load(
+        self, session_id: str, checkpoint_id: str | None = None
+    ) -> Checkpoint | None:
+        """
+        Load a checkpoint from the hot tier, or from the cold one on a miss.
+
+        Args:
+            session_id: The session ID
+            checkpoint_id: Specific checkpoint ID, or None for latest
+
+        Returns:
+            The checkpoint if found, None otherwise
+        """
+        checkpoint = await self.hot.load(session_id, checkpoint_id)
+        if checkpoint is not None:
+            self._hits += 1
+            return checkpoint
+
+        self._misses += 1
+        await self.flush(session_id)
+        checkpoint = await self.cold.load(session_id, checkpoint_id)
+        if checkpoint is not None and checkpoint_id is None:
+            # The next resume of the session is served by the hot tier, from a
+            # copy the caller can't change
+            cached = replace(checkpoint, state=deepcopy(checkpoint.state))
+            await self._save_hot([cached])
+        return checkpoint
+
+    async def list(self, session_id: str, limit: int = 10) -> builtins.list[Checkpoint]:
+        """
+        List checkpoints for a session, from the cold tier.
+
+        Args:
+            session_id: The session ID
+            limit: Maximum number of checkpoints to return
+
+        Returns:
+            List of checkpoints, newest first
+        """
+        await self.flush(session_id)
+        return await self.cold.list(session_id, limit)
+
+    async def delete(self, session_id: str, checkpoint_id: str | None = None) -> None:
+        """
+        Delete checkpoint(s) from both tiers.
+
+        Args:
+            session_id: The session ID
+            checkpoint_id: Specific checkpoint ID, or None to delete all for session
+        """
+        # A queued checkpoint must not be written after the delete
+        await self.flush(session_id)
+        await self.cold.delete(session_id, checkpoint_id)
+        await self.hot.delete(session_id, checkpoint_id)
+
+    async def clear_all(self) -> None:
+        """Clear all checkpoints from both tiers."""
+        await self.flush()
+        await self.cold.clear_all()
+        await self.hot.clear_all()
+
+    async def compact(self) -> int:
+        """
+        Compact both tiers.
+
+        The hot tier is cleared when the cold tier deleted checkpoints, it can't
+        tell which of its sessions they belonged to and would keep serving them.
+
+        Returns:
+            Number of checkpoints deleted from the cold tier
+        """
+        await self.flush()
+        await self.hot.compact()
+        deleted = await self.cold.compact()
+        if deleted:
+            await self.hot.clear_all()
+        return deleted
+
+    async def flush(self, session_id: str | None = None) -> None:
+        """
+        Wait until the checkpoints queued for the cold tier are written.
+
+        Args:
+            session_id: Only wait for the checkpoints of this session, None to wait
+                for the checkpoints of every session
+
+        Raises:
+            LLMfyException: If writing a checkpoint to the cold tier failed
+        """
+        if self._writer is not None:
+            await self._writer.flush(session_id)
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get cache statistics, and the statistics of the tiers that have them.
+
+        Returns:
+            Dictionary with the hits, misses and hit rate of the hot tier
+        """
+        loads = self._hits + self._misses
+        stats: dict[str, Any] = {
+            "write_mode": str(self.write_mode),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / loads if loads else 0.0,
+            "pending_writes": self._writer.queued if self._writer is not None else 0,
+        }
+        for name, tier in (("hot", self.hot), ("cold", self.cold)):
+            get_stats = getattr(tier, "get_stats", None)
+            if get_stats is not None:
+                stats[name] = get_stats()
+        return stats
+
+    async def close(self) -> None:
+        """Write the queued checkpoints and close both tiers."""
+        if self._writer is not None:
+            writer, self._writer = self._get_writer(), None
+            await writer.close()
+        for tier in (self.hot, self.cold):
+            close = getattr(tier, "close", None)
+            if close is not None:
+                await close()
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
+
+    async def _save_hot(self, checkpoints: builtins.list[Checkpoint]) -> None:
+        """
+        Save to the hot tier, dropping the sessions it failed to save.
+
+        The cold tier gets the checkpoints either way, so this only warns.
+        """
+        try:
+            await self.hot.save_many(checkpoints)
+        except Exception as e:
+            # Its latest checkpoint of these sessions would be stale
+            session_ids = {checkpoint.metadata.session_id for checkpoint in checkpoints}
+            for session_id in session_ids:
+                await self.hot.delete(session_id)
+            warnings.warn(
+                f"Caching checkpoints in the hot tier failed: {e}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+
+    def _get_writer(self) -> CheckpointWriter:
+        """
+        Get the writer to the cold tier of the running event loop.
+
+        A writer left behind by another event loop is replaced, the checkpoints it
+        did not write yet move to the new one.
+
+        Returns:
+            The checkpoint writer
+        """
+        loop = asyncio.get_running_loop()
+        writer = self._writer
+        if writer is None or (writer.loop is not None and writer.loop is not loop):
+            self._writer = CheckpointWriter(
+                self.cold,
+                max_queue_size=self.max_queue_size,
+                batch_size=self.batch_size,
+            )
+            if writer is not None:
+                self._writer.adopt(writer)
+        return self._writer
@@ -0,0 +1,3 @@
+from .run_context import RunContext
+
+__all__ = ["RunContext"]
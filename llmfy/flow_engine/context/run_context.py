@@ -0,0 +1,35 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+from llmfy.flow_engine.node.node import START
+from llmfy.flow_engine.state.snapshot import SnapshotBuilder
+
+
+@dataclass
+class RunContext:
+    """
+    Mutable data of a single `invoke` / `stream` call.
+
+    A built `FlowEngine` only holds the graph definition; everything that changes
+    while a workflow runs lives here, so one engine can serve many concurrent
+    sessions.
+    """
+    session_id: str
+    state: dict[str, Any] = field(default_factory=dict)
+    step: int = 0
+    # Join node -> sources completed so far, see `FlowEngine.add_edge`
+    joins: dict[str, set[str]] = field(default_factory=dict)
+    # Copy-on-write checkpoint snapshots of `state`
+    snapshots: SnapshotBuilder = field(default_factory=SnapshotBuilder)
+    # Keys updated since the last snapshot, None until the first one
+    written: set[str] | None = None
+    # Last checkpoint saved by this run, parent of the next checkpoint delta
+    checkpoint_id: str | None = None
+    # Step and monotonic time of that checkpoint, see `CheckpointPolicy`
+    saved_step: int | None = None
+    saved_at: float | None = None
+    # Node(s) that ran in the last completed step
+    last_nodes: str = START
+    # Checkpoints kept until the run ends, see `Durability.EXIT_ONLY`
+    checkpoints: list[Checkpoint] = field(default_factory=list)
@@ -0,0 +1,19 @@
+from .base_task_queue import BaseTaskQueue
+from .flow_worker import FlowWorker, run_worker
+from .in_memory_task_queue import InMemoryTaskQueue
+from .multiprocessing_task_queue import MultiprocessingTaskQueue
+from .node_task import NodeTask, TaskResult
+from .redis_task_queue import RedisTaskQueue
+from .task_dispatcher import TaskDispatcher
+
+__all__ = [
+    "BaseTaskQueue",
+    "FlowWorker",
+    "InMemoryTaskQueue",
+    "MultiprocessingTaskQueue",
+    "NodeTask",
+    "RedisTaskQueue",
+    "TaskDispatcher",
+    "TaskResult",
+    "run_worker",
+]
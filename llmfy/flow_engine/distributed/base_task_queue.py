@@ -0,0 +1,67 @@
+from abc import ABC, abstractmethod
+
+from llmfy.flow_engine.distributed.node_task import NodeTask, TaskResult
+
+
+class BaseTaskQueue(ABC):
+    """
+    Abstract queue carrying node tasks from engines to workers, and their results
+    back.
+
+    Tasks are shared by all workers, each task is taken by one of them. Results
+    go to the channel named by the `reply_to` of their task, so several engines
+    can share a queue.
+    """
+
+    @abstractmethod
+    async def put_task(self, task: NodeTask) -> None:
+        """
+        Enqueue a task for the workers.
+
+        Args:
+            task: The task to run
+        """
+        pass
+
+    @abstractmethod
+    async def get_task(self, timeout: float | None = None) -> NodeTask | None:
+        """
+        Take the next task.
+
+        Args:
+            timeout: Seconds to wait for a task, None waits until there is one
+
+        Returns:
+            The task, or None when none arrived in time
+        """
+        pass
+
+    @abstractmethod
+    async def put_result(self, result: TaskResult) -> None:
+        """
+        Send the result of a task to its `reply_to` channel.
+
+        Args:
+            result: The task result
+        """
+        pass
+
+    @abstractmethod
+    async def get_result(
+        self, reply_to: str, timeout: float | None = None
+    ) -> TaskResult | None:
+        """
+        Take the next result of a channel.
+
+        Args:
+            reply_to: Result channel of the engine
+            timeout: Seconds to wait for a result, None waits until there is one
+
+        Returns:
+            The result, or None when none arrived in time
+        """
+        pass
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources of the queue."""
+        pass
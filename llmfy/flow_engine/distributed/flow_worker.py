@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.distributed.base_task_queue import BaseTaskQueue
+from llmfy.flow_engine.distributed.node_task import NodeTask, TaskResult
+
+if TYPE_CHECKING:
+    from llmfy.flow_engine.flow_engine import FlowEngine
+
+
+class FlowWorker:
+    """
+    Runs the node tasks an engine enqueued with `FlowEngine(task_queue=...)`.
+
+    The worker needs the same workflow as the engine, built from the same code,
+    and a checkpointer reading the engine's checkpoints. It loads the state of a
+    task from the checkpoint the task references, runs the node function and
+    sends its state updates back. Node errors are sent back too, the engine
+    raises them.
+    """
+
+    def __init__(
+        self,
+        flow: FlowEngine,
+        queue: BaseTaskQueue,
+        concurrency: int = 1,
+        worker_id: str | None = None,
+        state_cache_size: int = 32,
+        poll_interval: float = 0.5,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            flow: Built workflow, its checkpointer must share the engine's storage
+            queue: Task queue shared with the engine
+            concurrency: Number of tasks run at the same time, raise it for nodes
+                waiting on I/O
+            worker_id: ID reported in task results, unique by default
+            state_cache_size: Number of loaded checkpoint states kept, the items
+                of a map edge all run on the same checkpoint
+            poll_interval: Seconds a wait for a task lasts before checking whether
+                the worker should stop
+        """
+        if not flow.is_built:
+            raise LLMfyException("Build first. Use `your_flow.build()`")
+        if flow.checkpointer is None:
+            raise LLMfyException("FlowWorker needs a workflow with a checkpointer")
+        if concurrency < 1:
+            raise LLMfyException("concurrency must be at least 1")
+
+        self.flow = flow
+        self.queue = queue
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"worker-{uuid.uuid4()}"
+        self.state_cache_size = state_cache_size
+        self.poll_interval = poll_interval
+        self.tasks_run = 0
+        self._stopping = False
+        # checkpoint_id -> deserialized state, least recently used first
+        self._states: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def stop(self):
+        """Let `run` return once the tasks being run are done."""
+        self._stopping = True
+
+    async def run(
+        self, max_tasks: int | None = None, idle_timeout: float | None = None
+    ) -> int:
+        """
+        Take and run tasks until stopped.
+
+        Args:
+            max_tasks: Return after running this many tasks, None for no limit
+            idle_timeout: Return after this many seconds without a task, None to
+                keep waiting
+
+        Returns:
+            Number of tasks run
+        """
+        self._stopping = False
+        started = self.tasks_run
+        last_task_at = time.monotonic()
+
+        async def loop():
+            nonlocal last_task_at
+            while not self._stopping:
+                if max_tasks is not None and self.tasks_run - started >= max_tasks:
+                    return
+                if (
+                    idle_timeout is not None
+                    and time.monotonic() - last_task_at >= idle_timeout
+                ):
+                    return
+
+                task = await self.queue.get_task(self.poll_interval)
+                if task is None:
+                    continue
+                last_task_at = time.monotonic()
+                result = await self.run_task(task)
+                await self.queue.put_result(result)
+                self.tasks_run += 1
+                last_task_at = time.monotonic()
+
+        await asyncio.gather(*(loop() for _ in range(self.concurrency)))
+        return self.tasks_run - started
+
+    async def run_task(self, task: NodeTask) -> TaskResult:
+        """
+        Run a single task.
+
+        Args:
+            task: The task to run
+
+        Returns:
+            The task result, with the node error instead of updates when it failed
+        """
+        start = time.perf_counter()
+        result = TaskResult(
+            task_id=task.task_id, reply_to=task.reply_to, worker_id=self.worker_id
+        )
+        try:
+            compiled = self.flow._plan.nodes.get(task.node_name)  # type: ignore
+            if compiled is None:
+                raise LLMfyException(f"Node '{task.node_name}' not found")
+
+            state = await self._load_state(task)
+            if task.overrides:
+                state = {**state, **self.flow._deserialize_state(task.overrides)}
+            if compiled.node.reads is not None:
+                state = self.flow._node_state(compiled.node, state)
+            updates = await self.flow._call_node_func(compiled, state)
+            result.updates = updates or {}
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.duration = time.perf_counter() - start
+        return result
+
+    async def _load_state(self, task: NodeTask) -> dict[str, Any]:
+        """
+        Load the state of the checkpoint a task references.
+
+        Every task gets its own copy of a cached state, a node changing its state
+        in place must not change the state of the next items of a map edge.
+
+        Args:
+            task: The task
+
+        Returns:
+            The deserialized checkpoint state
+        """
+        state = self._states.get(task.checkpoint_id)
+        if state is not None:
+            self._states.move_to_end(task.checkpoint_id)
+            return deepcopy(state)
+
+        checkpoint = await self.flow.checkpointer.load(  # type: ignore
+            task.session_id, task.checkpoint_id
+        )
+        if checkpoint is None:
+            raise LLMfyException(
+                f"Checkpoint '{task.checkpoint_id}' of session '{task.session_id}' not found"
+            )
+        state = self.flow._deserialize_state(checkpoint.state)
+
+        if self.state_cache_size > 0:
+            self._states[task.checkpoint_id] = state
+            while len(self._states) > self.state_cache_size:
+                self._states.popitem(last=False)
+            return deepcopy(state)
+        return state
+
+
+def run_worker(
+    flow_factory: Callable[[], FlowEngine],
+    queue: BaseTaskQueue,
+    concurrency: int = 1,
+    max_tasks: int | None = None,
+    idle_timeout: float | None = None,
+) -> int:
+    """
+    Run a `FlowWorker` in its own event loop, e.g. as `multiprocessing.Process`
+    target.
+
+    Args:
+        flow_factory: Picklable function returning the workflow, built or not
+        queue: Task queue shared with the engine
+        concurrency: Number of tasks run at the same time
+        max_tasks: Return after running this many tasks, None for no limit
+        idle_timeout: Return after this many seconds without a task, None to
+            keep waiting
+
+    Returns:
+        Number of tasks run
+    """
+
+    async def main() -> int:
+        flow = flow_factory()
+        if not flow.is_built:
+            flow.build()
+        worker = FlowWorker(flow, queue, concurrency=concurrency)
+        try:
+            return await worker.run(max_tasks=max_tasks, idle_timeout=idle_timeout)
+        finally:
+            await flow.close()
+            await queue.close()
+
+    return asyncio.run(main())
@@ -0,0 +1,60 @@
+import asyncio
+
+from llmfy.flow_engine.distributed.base_task_queue import BaseTaskQueue
+from llmfy.flow_engine.distributed.node_task import NodeTask, TaskResult
+
+
+class InMemoryTaskQueue(BaseTaskQueue):
+    """
+    Task queue for workers running as tasks of the engine's event loop.
+
+    Tasks and results are passed without copying. Meant for tests and local
+    development, use `MultiprocessingTaskQueue` or `RedisTaskQueue` to run nodes
+    on other cores.
+    """
+
+    def __init__(self, max_size: int = 0):
+        """
+        Initialize the memory queue.
+
+        Args:
+            max_size: Maximum number of waiting tasks, 0 for no limit
+        """
+        self._tasks: asyncio.Queue[NodeTask] = asyncio.Queue(max_size)
+        # reply_to -> results waiting for the engine
+        self._results: dict[str, asyncio.Queue[TaskResult]] = {}
+
+    def _channel(self, reply_to: str) -> asyncio.Queue[TaskResult]:
+        """Get the result queue of an engine, created on first use."""
+        channel = self._results.get(reply_to)
+        if channel is None:
+            channel = self._results[reply_to] = asyncio.Queue()
+        return channel
+
+    @staticmethod
+    async def _get(queue: asyncio.Queue, timeout: float | None):
+        """Take the next item of a queue, None when none arrived in time."""
+        if timeout is None:
+            return await queue.get()
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    async def put_task(self, task: NodeTask) -> None:
+        """Enqueue a task for the workers."""
+        await self._tasks.put(task)
+
+    async def get_task(self, timeout: float | None = None) -> NodeTask | None:
+        """Take the next task, None when none arrived in time."""
+        return await self._get(self._tasks, timeout)
+
+    async def put_result(self, result: TaskResult) -> None:
+        """Send the result of a task to its `reply_to` channel."""
+        await self._channel(result.reply_to).put(result)
+
+    async def get_result(
+        self, reply_to: str, timeout: float | None = None
+    ) -> TaskResult | None:
+        """Take the next result of a channel, None when none arrived in time."""
+        return await self._get(self._channel(reply_to), timeout)
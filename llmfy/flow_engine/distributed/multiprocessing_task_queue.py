@@ -0,0 +1,89 @@
+import asyncio
+import multiprocessing
+import queue as queue_module
+
+from llmfy.flow_engine.distributed.base_task_queue import BaseTaskQueue
+from llmfy.flow_engine.distributed.node_task import NodeTask, TaskResult
+
+# Seconds a blocking get waits before the event loop gets control back, so no
+# thread stays blocked on an empty queue when the loop shuts down
+_POLL_INTERVAL = 0.1
+
+
+class MultiprocessingTaskQueue(BaseTaskQueue):
+    """
+    Task queue for workers running in local processes.
+
+    Tasks and results are pickled through `multiprocessing` queues, so node
+    updates and map items must be picklable. Pass the queue to the worker
+    processes as an argument, e.g. of `run_worker`. All engines using the queue
+    must run in one process, results come back on a single queue.
+    """
+
+    def __init__(self, max_size: int = 0, context: str | None = None):
+        """
+        Initialize the multiprocessing queue.
+
+        Args:
+            max_size: Maximum number of waiting tasks, 0 for no limit
+            context: Multiprocessing start method (`fork`, `spawn` or
+                `forkserver`), None for the platform default
+        """
+        mp_context = multiprocessing.get_context(context)
+        self._tasks = mp_context.Queue(max_size)
+        self._results = mp_context.Queue()
+        # reply_to -> results taken for another engine of this process
+        self._pending: dict[str, list[TaskResult]] = {}
+
+    def __getstate__(self):
+        # Results taken by the engine process stay there
+        return {"_tasks": self._tasks, "_results": self._results, "_pending": {}}
+
+    @staticmethod
+    async def _get(mp_queue, timeout: float | None):
+        """Take the next item of a queue, None when none arrived in time."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            wait = _POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - loop.time()))
+            try:
+                return await loop.run_in_executor(None, mp_queue.get, True, wait)
+            except queue_module.Empty:
+                if deadline is not None and loop.time() >= deadline:
+                    return None
+
+    async def put_task(self, task: NodeTask) -> None:
+        """Enqueue a task for the workers."""
+        await asyncio.get_running_loop().run_in_executor(None, self._tasks.put, task)
+
+    async def get_task(self, timeout: float | None = None) -> NodeTask | None:
+        """Take the next task, None when none arrived in time."""
+        return await self._get(self._tasks, timeout)
+
+    async def put_result(self, result: TaskResult) -> None:
+        """Send the result of a task back to the engine process."""
+        self._results.put(result)
+
+    async def get_result(
+        self, reply_to: str, timeout: float | None = None
+    ) -> TaskResult | None:
+        """Take the next result of a channel, None when none arrived in time."""
+        pending = self._pending.get(reply_to)
+        if pending:
+            return pending.pop(0)
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            result = await self._get(self._results, remaining)
+            if result is None or result.reply_to == reply_to:
+                return result
+            self._pending.setdefault(result.reply_to, []).append(result)
+
+    async def close(self) -> None:
+        """Close the queues of this process."""
+        self._tasks.close()
+        self._results.close()
@@ -0,0 +1,89 @@
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class NodeTask:
+    """
+    A node run handed to a worker.
+
+    The state is not part of the task, the worker loads it from the checkpointer
+    the engine and the workers share.
+
+    Attributes:
+        session_id: Session the run belongs to
+        node_name: Name of the node to run
+        checkpoint_id: Checkpoint holding the state the node runs on
+        overrides: State keys set on top of the checkpoint state, e.g. the item
+            of a map edge
+        reply_to: Result channel of the engine waiting for the task
+        task_id: Unique task ID, the result carries it back
+    """
+
+    session_id: str
+    node_name: str
+    checkpoint_id: str
+    overrides: dict[str, Any] = field(default_factory=dict)
+    reply_to: str = ""
+    task_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary, `overrides` is left as is."""
+        return {
+            "task_id": self.task_id,
+            "session_id": self.session_id,
+            "node_name": self.node_name,
+            "checkpoint_id": self.checkpoint_id,
+            "overrides": self.overrides,
+            "reply_to": self.reply_to,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "NodeTask":
+        """Create from dictionary."""
+        return cls(**data)
+
+
+@dataclass
+class TaskResult:
+    """
+    Outcome of a node task.
+
+    Attributes:
+        task_id: ID of the task
+        reply_to: Result channel of the engine waiting for the task
+        updates: State updates returned by the node, empty when it failed
+        error: Type and message of the exception the node raised, None when it
+            succeeded
+        worker_id: ID of the worker that ran the task
+        duration: Seconds the worker spent on the task, loading the state included
+    """
+
+    task_id: str
+    reply_to: str = ""
+    updates: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    worker_id: str = ""
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the node succeeded."""
+        return self.error is None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary, `updates` is left as is."""
+        return {
+            "task_id": self.task_id,
+            "reply_to": self.reply_to,
+            "updates": self.updates,
+            "error": self.error,
+            "worker_id": self.worker_id,
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TaskResult":
+        """Create from dictionary."""
+        return cls(**data)
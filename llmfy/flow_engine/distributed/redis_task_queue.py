@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import Checkpoint
+from llmfy.flow_engine.distributed.base_task_queue import BaseTaskQueue
+from llmfy.flow_engine.distributed.node_task import NodeTask, TaskResult
+
+try:
+    import redis.asyncio as redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class RedisTaskQueue(BaseTaskQueue):
+    """
+    Redis task queue, for workers on any host that reaches the server.
+
+    Tasks wait in one Redis list, results in one list per engine. Tasks and
+    results are stored as JSON, custom objects in node updates and map items are
+    rebuilt like checkpoint states.
+
+    A task is removed from the list when a worker takes it, so a worker that
+    stops while running it loses it. Set a `task_timeout` on the engine to fail
+    the run instead of waiting for the result.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        prefix: str = "llmfy_tasks:",
+        result_ttl: int | None = 3600,
+    ):
+        """
+        Initialize the Redis queue.
+
+        Args:
+            redis_url: Redis connection URL
+            prefix: Key prefix for the task and result lists
+            result_ttl: Seconds a result list is kept after its last result, so
+                results of an engine that stopped waiting don't pile up
+                (None = kept until taken)
+        """
+        if not REDIS_AVAILABLE:
+            raise LLMfyException(
+                "redis package is not installed. redis package is required for RedisTaskQueue. "
+                'Install it using `pip install "llmfy[redis]"`'
+            )
+
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+        self._client: redis.Redis | None = None
+
+    async def _get_client(self) -> redis.Redis:
+        """Get or create Redis client."""
+        if self._client is None:
+            self._client = await redis.from_url(
+                self.redis_url, encoding="utf-8", decode_responses=True
+            )
+        return self._client
+
+    def _task_key(self) -> str:
+        """Get Redis key for the task list."""
+        return f"{self.prefix}tasks"
+
+    def _result_key(self, reply_to: str) -> str:
+        """Get Redis key for an engine's result list."""
+        return f"{self.prefix}results:{reply_to}"
+
+    @staticmethod
+    def _encode(data: dict, state_key: str) -> str:
+        """Serialize a task or result, its state dict like a checkpoint state."""
+        payload = dict(data)
+        payload[state_key] = Checkpoint._serialize_state(payload[state_key])
+        return json.dumps(payload)
+
+    @staticmethod
+    def _decode(raw: str, state_key: str) -> dict:
+        """Deserialize a task or result encoded by `_encode`."""
+        payload = json.loads(raw)
+        payload[state_key] = Checkpoint._deserialize_state(payload[state_key])
+        return payload
+
+    @staticmethod
+    def _blocking_timeout(timeout: float | None) -> float:
+        """BLPOP timeout of a get, BLPOP waits forever with 0."""
+        if timeout is None:
+            return 0
+        return max(timeout, 0.01)
+
+    async def put_task(self, task: NodeTask) -> None:
+        """Enqueue a task for the workers."""
+        client = await self._get_client()
+        await client.rpush(self._task_key(), self._encode(task.to_dict(), "overrides"))
+
+    async def get_task(self, timeout: float | None = None) -> NodeTask | None:
+        """Take the next task, None when none arrived in time."""
+        client = await self._get_client()
+        item = await client.blpop(
+            [self._task_key()], timeout=self._blocking_timeout(timeout)
+        )
+        if item is None:
+            return None
+        return NodeTask.from_dict(self._decode(item[1], "overrides"))
+
+    async def put_result(self, result: TaskResult) -> None:
+        """Send the result of a task to its `reply_to` channel."""
+        client = await self._get_client()
+        key = self._result_key(result.reply_to)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, self._encode(result.to_dict(), "updates"))
+            if self.result_ttl:
+                pipe.expire(key, self.result_ttl)
+            await pipe.execute()
+
+    async def get_result(
+        self, reply_to: str, timeout: float | None = None
+    ) -> TaskResult | None:
+        """Take the next result of a channel, None when none arrived in time."""
+        client = await self._get_client()
+        item = await client.blpop(
+            [self._result_key(reply_to)], timeout=self._blocking_timeout(timeout)
+        )
+        if item is None:
+            return None
+        return TaskResult.from_dict(self._decode(item[1], "updates"))
+
+    async def clear(self) -> None:
+        """Remove all waiting tasks and results."""
+        client = await self._get_client()
+        keys = [key async for key in client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await client.delete(*keys)
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        if self._client:
+            # aclose() replaces close() from redis-py 5.0.1
+            aclose = getattr(self._client, "aclose", None) or self._client.close
+            await aclose()
+            self._client = None
@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.distributed.base_task_queue import BaseTaskQueue
+from llmfy.flow_engine.distributed.node_task import NodeTask, TaskResult
+
+
+class TaskDispatcher:
+    """
+    Sends the node tasks of an engine to a task queue and hands their results back.
+
+    While tasks are pending, a listener task takes the results of the engine's
+    `reply_to` channel and resolves the waiting `submit` calls. The listener
+    stops once nothing is pending and starts again with the next task.
+
+    Tasks are delivered at most once: a worker that stops while running a task
+    loses it, and its `submit` waits for a result that never comes. Set a
+    `task_timeout` to fail those runs instead.
+    """
+
+    def __init__(
+        self,
+        queue: BaseTaskQueue,
+        reply_to: str | None = None,
+        poll_interval: float = 0.5,
+        task_timeout: float | None = None,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            queue: Task queue shared with the workers
+            reply_to: Result channel of the engine, unique by default
+            poll_interval: Seconds the listener waits for a result before checking
+                whether tasks are still pending
+            task_timeout: Seconds a task may take from enqueueing to its result,
+                None waits forever
+        """
+        self.queue = queue
+        self.reply_to = reply_to or f"engine-{uuid.uuid4()}"
+        self.poll_interval = poll_interval
+        self.task_timeout = task_timeout
+        # task_id -> future of the waiting submit
+        self._pending: dict[str, asyncio.Future[TaskResult]] = {}
+        self._listener: asyncio.Task | None = None
+
+    async def submit(self, task: NodeTask) -> TaskResult:
+        """
+        Enqueue a task and wait for its result.
+
+        Args:
+            task: The task to run, its `reply_to` is set to the engine channel
+
+        Returns:
+            The task result
+
+        Raises:
+            LLMfyException: If no result arrived within `task_timeout`
+        """
+        task.reply_to = self.reply_to
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[TaskResult] = loop.create_future()
+        self._pending[task.task_id] = future
+        try:
+            await self.queue.put_task(task)
+            if self._listener is None or self._listener.done():
+                self._listener = loop.create_task(self._listen())
+            return await asyncio.wait_for(future, self.task_timeout)
+        except TimeoutError:
+            raise LLMfyException(
+                f"Node '{task.node_name}' got no result from a worker within "
+                f"{self.task_timeout}s, the worker running it may have stopped"
+            ) from None
+        finally:
+            # A result arriving after a cancelled submit is dropped
+            self._pending.pop(task.task_id, None)
+
+    async def _listen(self):
+        """Resolve pending submits with the results of the engine channel."""
+        while self._pending:
+            try:
+                result = await self.queue.get_result(self.reply_to, self.poll_interval)
+            except Exception as e:
+                error = LLMfyException(f"Taking task results failed: {e}")
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(error)
+                return
+
+            if result is None:
+                continue
+            future = self._pending.get(result.task_id)
+            if future is not None and not future.done():
+                future.set_result(result)
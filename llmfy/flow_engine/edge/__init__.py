@@ -1,3 +1,3 @@
-from .edge import Edge
+from .edge import Edge, MapSpec
 
-__all__ = ["Edge"]
\ No newline at end of file
+__all__ = ["Edge", "MapSpec"]
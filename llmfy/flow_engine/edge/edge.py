@@ -2,12 +2,27 @@ from collections.abc import Callable
 from dataclasses import dataclass
 
 
+@dataclass(frozen=True)
+class MapSpec:
+    """How a map edge runs its target once per item of a state list"""
+    # State key holding the list of items
+    items_key: str
+    # State key the item is passed under to the target
+    item_key: str
+    # Maximum number of items running at once (None = all items)
+    max_concurrency: int | None = None
+
+
 @dataclass
 class Edge:
     """Represents an edge in the workflow graph"""
     source: str
     targets: str | list[str]
     condition: Callable | None = None
+    # All sources a join edge waits for before its target runs (None = no join)
+    join_sources: list[str] | None = None
+    # Runs the target once per item of a state list (None = run it once)
+    map: MapSpec | None = None
     
     def __post_init__(self):
         """Normalize targets to always be a list"""
@@ -1,6 +1,15 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
 import inspect
+import multiprocessing
+import pickle
+import time
 import uuid
-from collections.abc import Callable
+import warnings
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import deepcopy
 from datetime import UTC, datetime
 
@@ -14,13 +23,43 @@ from typing import (
 )
 
 from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.batch.batch_result import BatchItem, BatchResult
+from llmfy.flow_engine.cache.base_node_cache import BaseNodeCache
+from llmfy.flow_engine.cache.cache_policy import CachePolicy
+from llmfy.flow_engine.cache.in_memory_node_cache import InMemoryNodeCache
+from llmfy.flow_engine.callbacks.base_callback import FlowEngineCallback, emit
 from llmfy.flow_engine.checkpointer.base_checkpointer import (
     BaseCheckpointer,
     Checkpoint,
+    CheckpointDelta,
     CheckpointMetadata,
 )
-from llmfy.flow_engine.edge.edge import Edge
-from llmfy.flow_engine.node.node import END, START, Node, NodeType
+from llmfy.flow_engine.checkpointer.checkpoint_policy import CheckpointPolicy
+from llmfy.flow_engine.checkpointer.checkpoint_writer import (
+    CheckpointWriter,
+    Durability,
+)
+from llmfy.flow_engine.context.run_context import RunContext
+from llmfy.flow_engine.distributed.base_task_queue import BaseTaskQueue
+from llmfy.flow_engine.distributed.node_task import NodeTask
+from llmfy.flow_engine.distributed.task_dispatcher import TaskDispatcher
+from llmfy.flow_engine.edge.edge import Edge, MapSpec
+from llmfy.flow_engine.node.node import END, START, Node, NodeExecutor, NodeType
+from llmfy.flow_engine.plan.execution_plan import (
+    CompiledEdge,
+    CompiledNode,
+    DispatchKind,
+    ExecutionPlan,
+)
+from llmfy.flow_engine.process.shared_state import (
+    discard_result,
+    pack_state,
+    release_segments,
+    run_packed,
+    unpack_state,
+)
+from llmfy.flow_engine.state.node_state import project_state
+from llmfy.flow_engine.state.state_deserializer import StateDeserializer
 from llmfy.flow_engine.stream.flow_engine_stream_response import (
     FlowEngineStreamResponse,
     FlowEngineStreamType,
@@ -36,19 +75,42 @@ class FlowEngine:
     """
     A workflow engine that manages state transitions through nodes and edges.
 
+    The engine only holds the workflow definition. The state, session id and step
+    counter of a run live in a `RunContext` created per `invoke` / `stream` call,
+    so a single built engine can run many sessions concurrently.
+
     Attributes:
         state_schema: TypedDict class defining the state structure
         nodes: Dictionary of node name to node function
         edges: Dictionary of node name to list of target nodes
         conditional_edges: Dictionary of node name to conditional routing info
-        state: Current state of the workflow
         checkpointer: Optional checkpointer for state persistence
+        durability: When checkpoints are written to the checkpointer
+        checkpoint_policy: Which steps get a checkpoint
+        node_cache: Cache of the results of nodes added with a `CachePolicy`
+        callbacks: Hooks called on node, condition, checkpoint and run events
+        task_queue: Queue handing node runs to `FlowWorker`s instead of running
+            them in this process
+        max_workers: Size of the thread pool running sync nodes and conditions
+        max_processes: Size of the process pool running `executor="process"` nodes
+        strict_io: Whether nodes raise on state keys they didn't declare
+        task_timeout: Seconds a node run on a worker may take
     """
 
     def __init__(
         self,
         state_schema: type,
         checkpointer: BaseCheckpointer | None = None,
+        max_workers: int | None = None,
+        durability: Durability | str = Durability.SYNC,
+        checkpoint_queue_size: int = 1000,
+        checkpoint_policy: CheckpointPolicy | None = None,
+        node_cache: BaseNodeCache | None = None,
+        callbacks: list[FlowEngineCallback] | None = None,
+        task_queue: BaseTaskQueue | None = None,
+        max_processes: int | None = None,
+        strict_io: bool = False,
+        task_timeout: float | None = None,
     ):
         """
         Initialize the FlowEngine with a state schema.
@@ -56,20 +118,83 @@ class FlowEngine:
         Args:
             state_schema: A TypedDict class defining the state structure
             checkpointer: Optional checkpointer for state persistence
+            max_workers: Size of the thread pool running sync node and condition
+                functions, so they don't block the event loop. Defaults to the
+                `ThreadPoolExecutor` default.
+            durability: When checkpoints are written. `sync` writes each one before
+                the next step, `async` queues them for a background writer (call
+                `flush()` to wait for them), `exit-only` writes them all when the run
+                ends.
+            checkpoint_queue_size: Maximum number of checkpoints waiting for the
+                background writer in `async` mode
+            checkpoint_policy: Which steps get a checkpoint, every step by default
+            node_cache: Cache for nodes added with a `CachePolicy`. Defaults to an
+                `InMemoryNodeCache` when such a node exists.
+            callbacks: Hooks called on node, condition, checkpoint and run events,
+                e.g. a `TraceRecorder`. Nothing is timed when there are none.
+            task_queue: Queue to enqueue node runs on for `FlowWorker`s, which load
+                the state from the checkpointer. Needs a checkpointer shared with
+                the workers and `sync` durability. Stream nodes and conditions
+                still run in this process.
+            max_processes: Size of the process pool shared by the nodes added with
+                `executor="process"`. Defaults to the number of CPUs.
+            strict_io: Debug mode for `reads=` / `writes=` declarations. A node
+                reading a key missing from its `reads` or updating a key missing
+                from its `writes` raises an `LLMfyException`.
+            task_timeout: Seconds a node run through the `task_queue` may take
+                before the run fails with an `LLMfyException`, None waits
+                forever. Tasks are delivered at most once, a task lost with a
+                stopped worker otherwise never returns.
         """
         self.is_built = False
         self.state_schema = state_schema
         self.nodes: dict[str, Node] = {}
         self.edges: list[Edge] = []
-        self.state: dict[str, Any] = {}
+        self._plan: ExecutionPlan | None = None  # Compiled by build()
         self._reducers = {}
         self._type_hints = {}  # Store type hints for deserialization
+        self._deserializer: StateDeserializer | None = None  # Compiled by build()
 
         # Checkpointer configuration
         self.checkpointer = checkpointer
-        self._session_id: str | None = None
-        self._step_counter: int = 0
         self._checkpoint_enabled: bool = checkpointer is not None
+        try:
+            self.durability = Durability(durability)
+        except ValueError as e:
+            raise LLMfyException(
+                f"Unknown durability '{durability}', "
+                f"use one of: {', '.join(d.value for d in Durability)}"
+            ) from e
+        self.checkpoint_queue_size = checkpoint_queue_size
+        self.checkpoint_policy = checkpoint_policy or CheckpointPolicy()
+        self._writer: CheckpointWriter | None = None  # Created on first use
+
+        # Node result cache, defaulted by build() when a node has a cache policy
+        self.node_cache = node_cache
+
+        # Instrumentation hooks, checked before any timing is done
+        self.callbacks: list[FlowEngineCallback] = list(callbacks or [])
+
+        # Distributed execution, node runs go through the queue to the workers
+        self.task_queue = task_queue
+        self.task_timeout = task_timeout
+        self._dispatcher = (
+            TaskDispatcher(task_queue, task_timeout=task_timeout)
+            if task_queue
+            else None
+        )
+
+        # Thread pools for sync functions, created on first use
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._node_executors: dict[str, ThreadPoolExecutor] = {}
+
+        # Enforce node read/write declarations
+        self.strict_io = strict_io
+
+        # Process pool for CPU-bound sync nodes, created on first use
+        self.max_processes = max_processes
+        self._process_pool: ProcessPoolExecutor | None = None
 
         # Add special START and END nodes
         self.nodes[START] = Node(name=START, node_type=NodeType.START)
@@ -142,219 +267,167 @@ class FlowEngine:
         Returns:
             Dictionary with objects reconstructed to their proper types
         """
-        deserialized = {}
-
-        for field_name, value in state_dict.items():
-            # Get the expected type for this field
-            expected_type = self._type_hints.get(field_name)
-
-            if expected_type is None:
-                # No type hint available, keep as is
-                deserialized[field_name] = value
-                continue
-
-            # Reconstruct the value based on expected type
-            deserialized[field_name] = self._reconstruct_value(value, expected_type)
-
-        return deserialized
-
-    def _reconstruct_value(self, value: Any, expected_type: Any) -> Any:
-        """
-        Reconstruct a value to match the expected type.
-
-        Args:
-            value: The value to reconstruct (may be dict, list, or primitive)
-            expected_type: The expected type from TypedDict
-
-        Returns:
-            Reconstructed value
-        """
-        if value is None:
-            return None
-
-        # Handle Annotated types - extract the actual type
-        origin = get_origin(expected_type)
-        if origin is Annotated:
-            args = get_args(expected_type)
-            if args:
-                # First arg is the actual type
-                expected_type = args[0]
-                origin = get_origin(expected_type)
-
-        # Handle List types
-        if origin in (list, list):
-            if not isinstance(value, list):
-                return value
-
-            # Get the element type
-            args = get_args(expected_type)
-            if args:
-                element_type = args[0]
-                # Reconstruct each element
-                return [self._reconstruct_value(item, element_type) for item in value]
-            return value
-
-        # Handle Dict types
-        if origin in (dict, dict):
-            if not isinstance(value, dict):
-                return value
-
-            args = get_args(expected_type)
-            if len(args) >= 2:
-                key_type, value_type = args[0], args[1]
-                return {
-                    self._reconstruct_value(k, key_type): self._reconstruct_value(
-                        v, value_type
-                    )
-                    for k, v in value.items()
-                }
-            return value
-
-        # Handle custom class objects
-        if isinstance(value, dict) and hasattr(expected_type, "__mro__"):
-            # Check if this looks like a serialized object
-            if "__dict__" in value or self._is_serialized_object(value):
-                return self._reconstruct_object(value, expected_type)
-
-        # Handle primitive types and already correct types
-        if isinstance(value, expected_type):
-            return value
-
-        # Try to cast to expected type if it's a simple type
-        try:
-            if expected_type in (int, float, str, bool):
-                return expected_type(value)  # type: ignore
-        except (LLMfyException, TypeError):
-            pass
-
-        return value
-
-    def _is_serialized_object(self, value: dict) -> bool:
-        """Check if a dict looks like a serialized object."""
-        # Common patterns for serialized objects
-        return (
-            "__type__" in value
-            or "__class__" in value
-            or "__module__" in value
-            or (
-                isinstance(value, dict)
-                and not any(k.startswith("_") for k in value.keys())
-                and len(value) > 0
-            )
-        )
-
-    def _reconstruct_object(self, data: dict, cls: type) -> Any:
-        """
-        Reconstruct an object from a dictionary.
-
-        Args:
-            data: Dictionary containing object data
-            cls: The class to instantiate
-
-        Returns:
-            Reconstructed object instance
-        """
-        try:
-            # Handle checkpointer serialization format with __type__, __module__, data
-            if "__type__" in data and "__module__" in data and "data" in data:
-                obj_data = data["data"]
-            # Handle format with __dict__
-            elif "__dict__" in data:
-                obj_data = data["__dict__"]
-            else:
-                obj_data = data
-
-            # Try to instantiate the class
-            if hasattr(cls, "__init__"):
-                # Get __init__ signature
-                sig = inspect.signature(cls.__init__)
-                params = list(sig.parameters.keys())[1:]  # Skip 'self'
-
-                if len(params) == 0:
-                    # No-arg constructor, set attributes after
-                    obj = cls()
-                    for key, value in obj_data.items():
-                        if not key.startswith("_"):
-                            setattr(obj, key, value)
-                    return obj
-                else:
-                    # Try to match constructor parameters
-                    init_args = {}
-                    for param in params:
-                        if param in obj_data:
-                            init_args[param] = obj_data[param]
-
-                    obj = cls(**init_args)
-
-                    # Set remaining attributes
-                    for key, value in obj_data.items():
-                        if key not in init_args and not key.startswith("_"):
-                            setattr(obj, key, value)
-
-                    return obj
-            else:
-                # Fallback: create instance and set attributes
-                obj = cls()
-                for key, value in obj_data.items():
-                    if not key.startswith("_"):
-                        setattr(obj, key, value)
-                return obj
-
-        except Exception as _:
-            # If reconstruction fails, return the dict
-            # This allows the workflow to continue even if object reconstruction fails
-            return data
+        # Compiled by build(), compile here for states loaded before building
+        if self._deserializer is None:
+            self._deserializer = StateDeserializer(self._type_hints)
+        return self._deserializer.deserialize(state_dict)
 
     def add_node(
         self,
         name: str,
         func: Callable,
         stream: bool = False,
+        max_workers: int | None = None,
+        cache: CachePolicy | None = None,
+        executor: NodeExecutor | str = NodeExecutor.THREAD,
+        reads: list[str] | None = None,
+        writes: list[str] | None = None,
     ):
         """
         Add a node to the workflow.
 
+        Sync functions (and sync generators for stream nodes) run in a thread pool so
+        blocking calls don't stall other sessions running on the event loop. CPU-bound
+        sync functions can run in a process pool instead, so they don't hold the GIL
+        for every session of the process.
+
         Args:
             name (str): Name of the node
             func (Callable): Function to execute (can be sync or async)
             stream (bool): Node is use stream or not, if node use streaming set to True. Defaults to False.
+            max_workers (int | None): Give a sync node its own thread pool of this size
+                instead of the engine pool. Defaults to None.
+            cache (CachePolicy | None): Memoize the state updates of the node, keyed
+                by the state keys it reads. Not supported for stream nodes.
+                Defaults to None.
+            executor (NodeExecutor | str): `thread` or `process`. A process node
+                must be a module-level sync function. Its state and updates are
+                pickled, large numpy arrays go through shared memory. Defaults to
+                `thread`.
+            reads (list[str] | None): State keys the node reads. It then receives
+                only these keys, which also narrows its cache key and what a
+                process node or a worker gets pickled. Defaults to None (whole state).
+            writes (list[str] | None): State keys the node updates. `build()`
+                rejects nodes that may run in the same step and write the same key
+                without a reducer. Defaults to None (any key).
         """
         if name in [START, END]:
             raise LLMfyException(f"Cannot add node with reserved name: {name}")
 
+        if cache is not None and stream:
+            raise LLMfyException(f"Stream node '{name}' can't be cached")
+
+        if max_workers is not None and max_workers < 1:
+            raise LLMfyException("max_workers must be greater than 0")
+
+        try:
+            executor = NodeExecutor(executor)
+        except ValueError as e:
+            raise LLMfyException(
+                f"Unknown executor '{executor}', "
+                f"use one of: {', '.join(x.value for x in NodeExecutor)}"
+            ) from e
+        if executor is NodeExecutor.PROCESS:
+            self._validate_process_node(name, func, stream, max_workers)
+
         # Determine if this is a conditional node (will be set when conditional edge is added)
-        node = Node(name=name, node_type=NodeType.FUNCTION, func=func, stream=stream)
+        node = Node(
+            name=name,
+            node_type=NodeType.FUNCTION,
+            func=func,
+            stream=stream,
+            max_workers=max_workers,
+            cache=cache,
+            executor=executor,
+            reads=frozenset(reads) if reads is not None else None,
+            writes=frozenset(writes) if writes is not None else None,
+        )
         self.nodes[name] = node
 
-    def add_edge(self, source: str, target: str):
+        # Graph changed, the execution plan must be compiled again
+        self.is_built = False
+
+    @staticmethod
+    def _validate_process_node(
+        name: str, func: Callable, stream: bool, max_workers: int | None
+    ):
+        """
+        Validate that a node can run in the process pool.
+
+        Raises:
+            LLMfyException: If the node streams, has its own thread pool or its
+                function is not a module-level sync function
+        """
+        if stream:
+            raise LLMfyException(f"Stream node '{name}' can't run in a process")
+        if max_workers is not None:
+            raise LLMfyException(
+                f"Process node '{name}' runs in the process pool, drop max_workers"
+            )
+        if (
+            inspect.iscoroutinefunction(func)
+            or inspect.isasyncgenfunction(func)
+            or inspect.isgeneratorfunction(func)
+        ):
+            raise LLMfyException(f"Process node '{name}' must be a sync function")
+        try:
+            # Functions are pickled by reference to their module
+            pickle.dumps(func)
+        except Exception as e:
+            raise LLMfyException(
+                f"Process node '{name}' must be a module-level function: {e}"
+            ) from e
+
+    def add_edge(self, source: str | list[str], target: str):
         """
         Add an edge connecting two nodes.
 
+        A node with several outgoing edges fans out: all of its targets run
+        concurrently in the next step and their updates are merged with the state
+        reducers. Pass a list of sources to add a join edge, the target then runs
+        once every source has completed.
+
         Args:
-            source: Source node name (can be START)
+            source: Source node name (can be START), or a list of source nodes to join
             target: Target node name (can be END)
         """
         # Validation: START cannot be a target
         if target == START:
             raise LLMfyException("START cannot be a target node")
 
-        # Validation: END cannot be a source
-        if source == END:
-            raise LLMfyException("END cannot be a source node")
-
-        # Validation: edge cannot target itself
-        if source == target:
-            raise LLMfyException("Source same as target, edge cannot target itself")
-
-        # Create edge
-        edge = Edge(source=source, targets=target)
-        self.edges.append(edge)
-
-        # Update node connections
-        if source in self.nodes:
-            self.nodes[source].targets.append(target)
-        if target in self.nodes:
-            self.nodes[target].sources.append(source)
+        if isinstance(source, list):
+            if not source:
+                raise LLMfyException("Join edge requires at least one source node")
+            if START in source:
+                raise LLMfyException("START cannot be a source of a join edge")
+            sources = source
+            join_sources = list(source)
+        else:
+            sources = [source]
+            join_sources = None
+
+        for src in sources:
+            # Validation: END cannot be a source
+            if src == END:
+                raise LLMfyException("END cannot be a source node")
+
+            # Validation: edge cannot target itself
+            if src == target:
+                raise LLMfyException("Source same as target, edge cannot target itself")
+
+        for src in sources:
+            # Create edge
+            edge = Edge(source=src, targets=target, join_sources=join_sources)
+            self.edges.append(edge)
+
+            # Update node connections
+            if src in self.nodes:
+                self.nodes[src].targets.append(target)
+            if target in self.nodes:
+                self.nodes[target].sources.append(src)
+
+        # Graph changed, the execution plan must be compiled again
+        self.is_built = False
 
     def add_conditional_edge(
         self,
@@ -393,24 +466,136 @@ class FlowEngine:
             if to_node in self.nodes:
                 self.nodes[to_node].sources.append(source)
 
-    def _update_state(self, updates: dict[str, Any]):
+        # Graph changed, the execution plan must be compiled again
+        self.is_built = False
+
+    def add_map_edge(
+        self,
+        source: str,
+        target: str,
+        items_key: str,
+        item_key: str,
+        max_concurrency: int | None = None,
+    ):
+        """
+        Add an edge that runs its target once per item of a state list.
+
+        When `source` completes, `target` runs concurrently for every item of
+        `state[items_key]`, each call getting the state with the item under
+        `item_key`. The updates of all calls are merged in item order with the
+        state reducers, so keys written by the target need a reducer (for example
+        one appending to a list). An empty list runs the target zero times and the
+        workflow continues from it.
+
+        Args:
+            source: Source node name (can be START)
+            target: Node to run per item, it can't be a stream node and every edge
+                into it must be a map edge with the same settings
+            items_key: State key holding the list of items
+            item_key: State key the item is passed under
+            max_concurrency: Maximum number of items running at once. Defaults to
+                None, all items at once.
+        """
+        if target in [START, END]:
+            raise LLMfyException("START and END cannot be the target of a map edge")
+        if source == END:
+            raise LLMfyException("END cannot be a source node")
+        if source == target:
+            raise LLMfyException("Source same as target, edge cannot target itself")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise LLMfyException("max_concurrency must be greater than 0")
+
+        edge = Edge(
+            source=source,
+            targets=target,
+            map=MapSpec(
+                items_key=items_key,
+                item_key=item_key,
+                max_concurrency=max_concurrency,
+            ),
+        )
+        self.edges.append(edge)
+
+        # Update node connections
+        if source in self.nodes:
+            self.nodes[source].targets.append(target)
+        if target in self.nodes:
+            self.nodes[target].sources.append(source)
+
+        # Graph changed, the execution plan must be compiled again
+        self.is_built = False
+
+    def _merge_updates(
+        self,
+        ctx: RunContext,
+        results: list[tuple[str, dict[str, Any], Any]],
+    ):
+        """
+        Merge the updates of all nodes completed in one step into the run state.
+
+        Args:
+            ctx: Run context holding the state to update
+            results: (node name, updates, content) of every node of the step
+
+        Raises:
+            LLMfyException: If parallel nodes update the same key without a reducer,
+                or with `strict_io` if a node updates a key it didn't declare
+        """
+        if self.strict_io:
+            for node_name, updates, _ in results:
+                writes = self.nodes[node_name].writes
+                if writes is not None and not writes.issuperset(updates):
+                    undeclared = ", ".join(sorted(set(updates) - writes))
+                    raise LLMfyException(
+                        f"Node '{node_name}' updates {undeclared} which is not in its writes="
+                    )
+
+        if len(results) > 1:
+            writers: dict[str, str] = {}
+            for node_name, updates, _ in results:
+                for key in updates:
+                    if self._reducers.get(key) is not None:
+                        continue
+                    if writers.get(key) == node_name:
+                        raise LLMfyException(
+                            f"Mapped node '{node_name}' updates '{key}' once per item. "
+                            f"Annotate '{key}' with a reducer to merge their values."
+                        )
+                    if key in writers:
+                        raise LLMfyException(
+                            f"Parallel nodes '{writers[key]}' and '{node_name}' both update "
+                            f"'{key}' in the same step. Annotate '{key}' with a reducer "
+                            f"to merge their values."
+                        )
+                    writers[key] = node_name
+
+        for _, updates, _ in results:
+            if updates:
+                self._update_state(ctx, updates)
+
+    def _update_state(self, ctx: RunContext, updates: dict[str, Any]):
         """
-        Update the workflow state with new values.
+        Update the workflow state of a run with new values.
 
         Uses reducer functions if available, otherwise replaces values.
 
         Args:
+            ctx: Run context holding the state to update
             updates: Dictionary of state updates
         """
+        state = ctx.state
+        reducers = self._reducers
+        if ctx.written is not None:
+            ctx.written.update(updates)
         for key, new_value in updates.items():
-            if key in self._reducers and self._reducers[key] is not None:
+            reducer = reducers.get(key)
+            if reducer is not None:
                 # Use the reducer function
-                reducer = self._reducers[key]
-                old_value = self.state.get(key)
-                self.state[key] = reducer(old_value, new_value)
+                old_value = state.get(key)
+                state[key] = reducer(old_value, new_value)
             else:
                 # Replace the value
-                self.state[key] = new_value
+                state[key] = new_value
 
     def _validate_workflow(self):
         """
@@ -420,7 +605,13 @@ class FlowEngine:
         2: At least one path must lead to END
         3: All referenced nodes must be defined
         4: Conditional edges - validate that condition function returns valid targets
-        5: Detect nodes with multiple non-conditional edges
+        5: A conditional edge must be the only outgoing edge of its source
+        6: A node can be the target of only one join edge
+        7: The checkpoint policy must only name defined nodes
+        8: A map edge target only has map edges with the same settings into it
+        9: Node `reads` / `writes` declarations must name state keys
+        10: Fan-out targets must not declare writes to the same key without a
+            reducer
 
         Raises:
             LLMfyException: If the workflow has structural issues
@@ -478,40 +669,131 @@ class FlowEngine:
                         )
 
                 # Can't validate the return value until runtime, but we document it
-                # The runtime validation happens in _get_next_node
+                # The runtime validation happens in _evaluate_condition
+
+        # Validation 5: A conditional edge must be the only outgoing edge of its source.
+        # Several direct edges are fine, they fan out to parallel branches.
+        outgoing_edges: dict[str, list[Edge]] = {}
+        for edge in self.edges:
+            outgoing_edges.setdefault(edge.source, []).append(edge)
+
+        for source, edges in outgoing_edges.items():
+            if len(edges) > 1 and any(e.condition is not None for e in edges):
+                raise LLMfyException(
+                    f"Node '{source}' has a conditional edge and other outgoing edges. "
+                    f"Put all of its targets in a single add_conditional_edge() call."
+                )
+
+        # Validation 6: A node can be the target of only one join edge
+        join_edges: dict[str, list[str]] = {}
+        for edge in self.edges:
+            if edge.join_sources is None:
+                continue
+            target = edge.targets[0]
+            if join_edges.setdefault(target, edge.join_sources) != edge.join_sources:
+                raise LLMfyException(
+                    f"Node '{target}' is the target of more than one join edge. "
+                    f"Combine the sources in a single add_edge([...], '{target}') call."
+                )
 
-        # Validation 5: Detect nodes with multiple non-conditional edges
-        edge_counts = {}
+        # Validation 7: Checkpoint policy must only name defined nodes
+        policy_nodes = self.checkpoint_policy.after_nodes or ()
+        unknown_nodes = set(policy_nodes) - defined_nodes
+        if unknown_nodes:
+            raise LLMfyException(
+                f"Checkpoint policy names undefined nodes: {', '.join(sorted(unknown_nodes))}"
+            )
+
+        # Validation 8: A mapped node runs per item wherever it is reached from
+        map_specs: dict[str, MapSpec] = {
+            edge.targets[0]: edge.map for edge in self.edges if edge.map is not None
+        }
         for edge in self.edges:
-            if edge.condition is None:  # Only check non-conditional edges
-                if edge.source not in edge_counts:
-                    edge_counts[edge.source] = []
-                edge_counts[edge.source].extend(edge.targets)
+            for target in edge.targets:
+                spec = map_specs.get(target)
+                if spec is not None and edge.map != spec:
+                    raise LLMfyException(
+                        f"Node '{target}' is the target of a map edge, every edge into "
+                        f"it must be a map edge with the same settings"
+                    )
+        for target in map_specs:
+            if self.nodes[target].stream:
+                raise LLMfyException(
+                    f"Stream node '{target}' can't be a map edge target"
+                )
 
-        for source, targets in edge_counts.items():
-            if len(targets) > 1:
+        # Validation 9: Read/write declarations must name state keys. A mapped
+        # node also reads its item, and cache keys are read from its state.
+        for node in self.nodes.values():
+            for declared in (node.reads, node.writes):
+                unknown = (declared or set()) - self._type_hints.keys()
+                if unknown:
+                    raise LLMfyException(
+                        f"Node '{node.name}' declares keys not in the state schema: "
+                        f"{', '.join(sorted(unknown))}"
+                    )
+            if node.reads is None:
+                continue
+            required = set()
+            if node.name in map_specs:
+                required.add(map_specs[node.name].item_key)
+            if node.cache is not None and node.cache.keys is not None:
+                required.update(node.cache.keys)
+            missing = required - node.reads
+            if missing:
                 raise LLMfyException(
-                    f"Node '{source}' has multiple outgoing edges ({len(targets)}) but no conditional logic. "
-                    f"Use add_conditional_edge() instead of multiple add_edge() calls."
+                    f"Node '{node.name}' must declare {', '.join(sorted(missing))} "
+                    f"in its reads"
                 )
 
+        # Validation 10: Direct edges from the same source fan out, their targets
+        # run in the same step and a key both declare writing needs a reducer.
+        # Conditional targets usually exclude each other, they are checked when
+        # their updates are merged.
+        for source, edges in outgoing_edges.items():
+            siblings = sorted(
+                {
+                    t
+                    for e in edges
+                    if e.condition is None and e.map is None and e.join_sources is None
+                    for t in e.targets
+                    if t != END
+                }
+            )
+            for i, first in enumerate(siblings):
+                for second in siblings[i + 1 :]:
+                    shared = (self.nodes[first].writes or set()) & (
+                        self.nodes[second].writes or set()
+                    )
+                    conflicts = {k for k in shared if self._reducers.get(k) is None}
+                    if conflicts:
+                        raise LLMfyException(
+                            f"Nodes '{first}' and '{second}' both follow '{source}' and "
+                            f"write {', '.join(sorted(conflicts))} without a reducer"
+                        )
+
         # Warning: Detect unreachable nodes
         unreachable_nodes = defined_nodes - all_referenced_nodes
         if unreachable_nodes:
-            import warnings
-
             warnings.warn(
                 f"Some nodes are defined but not reachable: {', '.join(sorted(unreachable_nodes))}",
                 UserWarning,
                 stacklevel=2,
             )
 
-    async def _save_checkpoint(self, node_name: str):
+    async def _save_checkpoint(
+        self,
+        ctx: RunContext,
+        node_name: str,
+        next_nodes: list[str],
+    ):
         """
-        Save current state as a checkpoint.
+        Save the current state of a run as a checkpoint.
 
         Args:
-            node_name: Name of the node that just executed
+            ctx: Run context to checkpoint
+            node_name: Name of the node(s) that just executed
+            next_nodes: Nodes scheduled for the next step, used to resume the run
         """
         if not self._checkpoint_enabled or self.checkpointer is None:
             return
@@ -519,277 +801,1001 @@ class FlowEngine:
         checkpoint_id = str(uuid.uuid4())
         metadata = CheckpointMetadata(
             checkpoint_id=checkpoint_id,
-            session_id=self._session_id,  # type: ignore
+            session_id=ctx.session_id,
             timestamp=datetime.now(UTC),
             node_name=node_name,
-            step=self._step_counter,
+            step=ctx.step,
+            next_nodes=list(next_nodes),
+            pending_joins={
+                target: sorted(sources) for target, sources in ctx.joins.items()
+            },
+            parent_id=ctx.checkpoint_id,
         )
 
-        checkpoint = Checkpoint(metadata=metadata, state=deepcopy(self.state))
-
-        await self.checkpointer.save(checkpoint)
+        # Only the keys changed since the previous checkpoint are copied
+        state = ctx.snapshots.take(ctx.state, ctx.written)
+        ctx.written = set()
+        delta = None
+        if ctx.checkpoint_id is not None:
+            # Changes since the parent, checkpointers may store only these
+            delta = CheckpointDelta(
+                updates=ctx.snapshots.updates,
+                appends=ctx.snapshots.appends,
+            )
+        checkpoint = Checkpoint(metadata=metadata, state=state, delta=delta)
+        ctx.checkpoint_id = checkpoint_id
+        ctx.saved_step = ctx.step
+        ctx.saved_at = time.monotonic()
+
+        start = time.perf_counter() if self.callbacks else 0.0
+        if self.durability is Durability.SYNC:
+            await self.checkpointer.save(checkpoint)
+        elif self.durability is Durability.ASYNC:
+            await self._get_writer().put(checkpoint)
+        else:
+            # Written by `_finish_run`
+            ctx.checkpoints.append(checkpoint)
+
+        if self.callbacks:
+            emit(
+                self.callbacks,
+                "on_checkpoint",
+                ctx,
+                "save",
+                checkpoint,
+                time.perf_counter() - start,
+            )
 
-    async def _execute_node(self, node_name: str) -> dict[str, Any]:
+    async def _checkpoint_step(
+        self,
+        ctx: RunContext,
+        completed: list[str],
+        next_nodes: list[str],
+    ):
         """
-        Execute a node function with the current state.
+        Save the checkpoint of a step if the checkpoint policy asks for it.
+
+        The last step of a run is always saved.
 
         Args:
-            node_name: Name of the node to execute
+            ctx: Run context
+            completed: Nodes that ran in the step
+            next_nodes: Nodes scheduled for the next step
+        """
+        node_name = ", ".join(completed)
+        ctx.last_nodes = node_name
+        if not self._checkpoint_enabled:
+            return
 
-        Returns:
-            Dictionary of state updates from the node
+        if ctx.saved_at is None:
+            seconds_since_save = float("inf")
+        else:
+            seconds_since_save = time.monotonic() - ctx.saved_at
+        if not next_nodes or self.checkpoint_policy.should_save(
+            ctx.step, completed, seconds_since_save
+        ):
+            await self._save_checkpoint(ctx, node_name, next_nodes)
+
+    async def _checkpoint_error(self, ctx: RunContext, step_nodes: list[str]):
         """
-        if node_name not in self.nodes:
-            raise LLMfyException(f"Node '{node_name}' not found")
+        Save a checkpoint resuming at a step whose nodes failed.
 
-        node = self.nodes[node_name]
-        func = node.func
+        The state is still the one left by the previous step. Nothing is saved when
+        the last saved checkpoint already resumes at this step. A failure to save
+        is only warned about, the node error is the one raised to the caller.
 
-        if func is None:
-            raise LLMfyException(f"Node '{node_name}' has no function defined")
+        Args:
+            ctx: Run context
+            step_nodes: Nodes of the failed step
+        """
+        if not self._checkpoint_enabled or not self.checkpoint_policy.on_error:
+            return
+        if ctx.saved_step == ctx.step - 1:
+            return
 
-        # Check if the function is async or sync
-        if inspect.iscoroutinefunction(func):
-            result = await func(self.state)
-        else:
-            result = func(self.state)
+        ctx.step -= 1
+        try:
+            await self._save_checkpoint(ctx, ctx.last_nodes, step_nodes)
+        except Exception as e:
+            warnings.warn(
+                f"Saving the checkpoint of failed step {ctx.step + 1} failed: {e}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
 
-        # Return empty dict if node doesn't return anything
-        if result is None:
-            return {}
+    def _get_writer(self) -> CheckpointWriter:
+        """
+        Get the background checkpoint writer of the running event loop.
 
-        return result
+        A writer left behind by another event loop is replaced, the checkpoints it
+        did not write yet move to the new one.
 
-    async def _execute_stream_node(self, node_name: str, func: Callable | None):
+        Returns:
+            The checkpoint writer
         """
-        Execute a stream node function with the current state.
+        loop = asyncio.get_running_loop()
+        writer = self._writer
+        if writer is None or (writer.loop is not None and writer.loop is not loop):
+            self._writer = CheckpointWriter(
+                self.checkpointer,  # type: ignore
+                max_queue_size=self.checkpoint_queue_size,
+            )
+            if writer is not None:
+                self._writer.adopt(writer)
+        return self._writer
 
-        Args:
-            node_name: Name of the node to execute
+    async def _finish_run(self, ctx: RunContext, error: BaseException | None = None):
         """
-        if func is None:
-            raise LLMfyException(f"Node '{node_name}' has no function defined")
+        Write the checkpoints a run kept until its end (`durability="exit-only"`) and
+        report the end of the run to the callbacks.
 
-        # Check if the function is async generator or generator
-        if inspect.isasyncgenfunction(func):
-            async for chunk in func(self.state):
-                if isinstance(chunk, NodeStreamResponse):
-                    yield chunk
-                else:
-                    raise LLMfyException(
-                        f"Stream response in node: '{node_name}' must use `NodeStreamResponse`"
-                    )
+        Args:
+            ctx: Run context that ended
+            error: Exception that ended the run, None when it finished
+        """
+        try:
+            if ctx.checkpoints:
+                checkpoints, ctx.checkpoints = ctx.checkpoints, []
+                await self.checkpointer.save_many(checkpoints)  # type: ignore
+        finally:
+            if self.callbacks:
+                emit(self.callbacks, "on_run_end", ctx, error)
+
+    async def flush(self, session_id: str | None = None):
+        """
+        Wait until the checkpoints queued in `async` durability mode are written.
 
-        elif inspect.isgeneratorfunction(func):
-            for chunk in func(self.state):
-                if isinstance(chunk, NodeStreamResponse):
-                    yield chunk
-                else:
-                    raise LLMfyException(
-                        f"Stream response in node: '{node_name}' must use `NodeStreamResponse`"
-                    )
+        Args:
+            session_id: Only wait for the checkpoints of this session, None to wait
+                for the checkpoints of every session
 
-        else:
-            raise LLMfyException(
-                f"Function in node: '{node_name}' is not stream. Please yield `NodeStreamResponse`."
-            )
+        Raises:
+            LLMfyException: If writing a checkpoint failed
+        """
+        if self._writer is not None:
+            await self._writer.flush(session_id)
 
-    async def _get_next_node(self, current_node: str) -> str | None:
+    def _get_executor(self, node: Node | None = None) -> ThreadPoolExecutor:
         """
-        Determine the next node to execute.
+        Get the thread pool running sync functions, created on first use.
 
         Args:
-            current_node: Current node name
+            node: Node owning a dedicated pool (`max_workers`), or None for the engine pool
 
         Returns:
-            Next node name or None if END
+            The thread pool
         """
-        # Find edges from current node
-        outgoing_edges = [e for e in self.edges if e.source == current_node]
-
-        if not outgoing_edges:
-            return None
-
-        # Should only be one edge per node (validated in _validate_workflow)
-        edge = outgoing_edges[0]
+        if node is not None and node.max_workers is not None:
+            executor = self._node_executors.get(node.name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=node.max_workers,
+                    thread_name_prefix=f"llmfy-flow-{node.name}",
+                )
+                self._node_executors[node.name] = executor
+            return executor
 
-        # Check if this is a conditional edge
-        if edge.condition is not None:
-            condition_func = edge.condition
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="llmfy-flow",
+            )
+        return self._executor
 
-            # Execute condition function (can be sync or async)
-            if inspect.iscoroutinefunction(condition_func):
-                next_node = await condition_func(self.state)
-            else:
-                next_node = condition_func(self.state)
+    @staticmethod
+    async def _run_sync(executor: ThreadPoolExecutor, func: Callable, *args) -> Any:
+        """
+        Run a sync function in a thread pool without blocking the event loop.
 
-            # Validate that the returned node is in the targets
-            if next_node not in edge.targets:
-                raise LLMfyException(
-                    f"Condition function returned '{next_node}' which is not in targets: {edge.targets}"
-                )
+        Context variables of the caller are visible inside the function.
 
-            return next_node if next_node != END else None
+        Args:
+            executor: Thread pool to run the function in
+            func: Sync function
+            *args: Function arguments
 
-        # Regular edge - single target
-        next_node = edge.targets[0]
-        return next_node if next_node != END else None
+        Returns:
+            The function result
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        return await loop.run_in_executor(executor, call)
 
-    def build(self):
+    async def _execute_node(
+        self,
+        ctx: RunContext,
+        compiled: CompiledNode,
+        state: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
         """
-        Build FlowEngine workflow.
+        Execute a node function with the current state of a run, reporting it to
+        the callbacks.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+            state: State passed to the node instead of the run state
 
         Returns:
-            FlowEngine: Workflow built.
+            Dictionary of state updates from the node
         """
-        # Validate workflow structure before execution
-        self._validate_workflow()
-
-        # Set is built true
-        self.is_built = True
+        if not self.callbacks:
+            return await self._call_node(ctx, compiled, state)
 
-        return self
+        node_name = compiled.node.name
+        emit(self.callbacks, "on_node_start", ctx, node_name)
+        start = time.perf_counter()
+        try:
+            updates = await self._call_node(ctx, compiled, state)
+        except Exception as e:
+            emit(
+                self.callbacks,
+                "on_error",
+                ctx,
+                node_name,
+                e,
+                time.perf_counter() - start,
+            )
+            raise
+        emit(self.callbacks, "on_node_end", ctx, node_name, time.perf_counter() - start)
+        return updates
 
-    async def invoke(
+    async def _call_node(
         self,
-        apply_state: dict[str, Any] | None = None,
-        session_id: str | None = None,
+        ctx: RunContext,
+        compiled: CompiledNode,
+        state: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
         """
-        Execute the workflow starting from START node or continue from last checkpoint.
+        Call a node function with the current state of a run, in this process or
+        on a worker when the engine has a task queue.
 
         Args:
-            apply_state: Optional state updates to apply. If continuing from checkpoint,
-                these are merged with the checkpoint state using reducers.
-            session_id: Session ID for checkpoint management. If provided and a checkpoint
-                exists, continues from last checkpoint. If None, always starts fresh.
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+            state: State passed to the node instead of the run state
 
         Returns:
-            Final state after workflow execution
+            Dictionary of state updates from the node
         """
-        # Check build
-        if not self.is_built:
-            raise LLMfyException("Build first. Use `your_flow.build()`")
+        node = compiled.node
+        if state is None:
+            state = ctx.state
+        if node.reads is not None:
+            state = self._node_state(node, state)
+
+        key = None
+        if node.cache is not None:
+            key = node.cache.make_key(node.name, state)
+            hit, cached = await self._cache_get(node.name, key)
+            if hit:
+                return cached  # type: ignore
+
+        if self._dispatcher is not None:
+            result = await self._dispatch_node(ctx, compiled, state)
+        else:
+            result = await self._call_node_func(compiled, state)
 
-        # Set thread ID
-        self._session_id = session_id or str(uuid.uuid4())
-        self._step_counter = 0
+        # Return empty dict if node doesn't return anything
+        if result is None:
+            result = {}
 
-        # Initialize state
-        if apply_state is None:
-            apply_state = {}
+        if key is not None:
+            await self._cache_set(key, result, node.cache.ttl)  # type: ignore
 
-        # Try to load from last checkpoint if session_id is provided
-        loaded_checkpoint = None
-        if session_id and self.checkpointer:
-            loaded_checkpoint = await self.checkpointer.load(session_id)
+        return result
 
-        if loaded_checkpoint:
-            # Continue from checkpoint - deserialize objects
-            raw_state = loaded_checkpoint.state
-            self.state = self._deserialize_state(raw_state)
-            self._step_counter = loaded_checkpoint.metadata.step
+    def _node_state(self, node: Node, state: dict[str, Any]) -> dict[str, Any]:
+        """
+        Project the state to the keys a node declared in `reads`.
 
-            # Apply initial_state as updates to checkpoint state
-            if apply_state:
-                self._update_state(apply_state)
+        Args:
+            node: Node with `reads` declared
+            state: State the node would receive
+
+        Returns:
+            The projected state
+        """
+        return project_state(state, node.name, node.reads, self.strict_io)  # type: ignore
+
+    async def _call_node_func(
+        self, compiled: CompiledNode, state: dict[str, Any]
+    ) -> dict[str, Any] | None:
+        """
+        Call the function of a node in this process.
+
+        Args:
+            compiled: Dispatch record of the node to execute
+            state: State passed to the node
+
+        Returns:
+            What the node function returned
+        """
+        node = compiled.node
+        kind = compiled.kind
+
+        # Check if the function is async or sync
+        if kind is DispatchKind.ASYNC:
+            return await node.func(state)  # type: ignore
+        elif kind is DispatchKind.PROCESS:
+            return await self._run_in_process(node.func, state)  # type: ignore
+        elif kind is DispatchKind.NONE:
+            raise LLMfyException(f"Node '{node.name}' has no function defined")
+        else:
+            return await self._run_sync(self._get_executor(node), node.func, state)  # type: ignore
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """
+        Get the process pool running process nodes, created on first use.
+
+        Workers are spawned rather than forked, the engine process runs threads.
 
-            # Find where to resume (next node after last completed node)
-            current_node = await self._get_next_node(
-                loaded_checkpoint.metadata.node_name
+        Returns:
+            The process pool
+        """
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_processes,
+                mp_context=multiprocessing.get_context("spawn"),
             )
+        return self._process_pool
+
+    async def _run_in_process(self, func: Callable, state: dict[str, Any]) -> Any:
+        """
+        Run a sync node function in the process pool without blocking the event loop.
+
+        Args:
+            func: Module-level sync function
+            state: State passed to the function
+
+        Returns:
+            The function result
+        """
+        packed, segments = pack_state(state)
+        try:
+            future = self._get_process_pool().submit(run_packed, func, packed)
+            try:
+                packed_updates = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # The process may still finish, its result segments are unlinked then
+                future.add_done_callback(discard_result)
+                raise
+            updates, result_segments = unpack_state(packed_updates, copy=True)
+            release_segments(result_segments, unlink=True)
+            return updates
+        finally:
+            release_segments(segments, unlink=True)
+
+    async def _dispatch_node(
+        self,
+        ctx: RunContext,
+        compiled: CompiledNode,
+        state: dict[str, Any],
+    ) -> dict[str, Any]:
+        """
+        Run a node on a worker and wait for its updates.
+
+        The worker loads the state from the last checkpoint of the run, which
+        `_execute` saved before the step. Keys of `state` that differ from the run
+        state, like the item of a map edge, travel with the task.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+            state: State passed to the node
+
+        Returns:
+            Dictionary of state updates from the node
+
+        Raises:
+            LLMfyException: If the node failed on the worker
+        """
+        overrides = {}
+        if state is not ctx.state:
+            overrides = {
+                k: v
+                for k, v in state.items()
+                if k not in ctx.state or ctx.state[k] is not v
+            }
+
+        task = NodeTask(
+            session_id=ctx.session_id,
+            node_name=compiled.node.name,
+            checkpoint_id=ctx.checkpoint_id,  # type: ignore
+            overrides=overrides,
+        )
+        result = await self._dispatcher.submit(task)  # type: ignore
+        if not result.ok:
+            raise LLMfyException(
+                f"Node '{compiled.node.name}' failed on {result.worker_id}: {result.error}"
+            )
+        # Updates may come back as plain JSON values
+        return self._deserialize_state(result.updates)
+
+    async def _cache_get(self, node_name: str, key: str) -> tuple[bool, Any]:
+        """
+        Look a node result up in the node cache.
+
+        A failing cache is reported and counted as a miss, the node then runs.
+
+        Args:
+            node_name: Name of the node
+            key: Cache key of the node run
+
+        Returns:
+            Whether the result was cached, and the cached state updates
+        """
+        cache: BaseNodeCache = self.node_cache  # type: ignore
+        try:
+            hit, cached = await cache.get(key)
+        except Exception as e:
+            warnings.warn(
+                f"Node cache lookup of '{node_name}' failed: {e}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            hit, cached = False, None
+        cache.record(node_name, hit)
+        return hit, cached
+
+    async def _cache_set(
+        self, key: str, updates: dict[str, Any], ttl: float | None
+    ) -> None:
+        """
+        Store a node result in the node cache, a failing cache is reported.
+
+        Args:
+            key: Cache key of the node run
+            updates: State updates returned by the node
+            ttl: Seconds the result is valid, None uses the cache default
+        """
+        try:
+            await self.node_cache.set(key, updates, ttl)  # type: ignore
+        except Exception as e:
+            warnings.warn(f"Node cache write failed: {e}", RuntimeWarning, stacklevel=2)
+
+    async def _execute_stream_node(self, ctx: RunContext, compiled: CompiledNode):
+        """
+        Execute a stream node function with the current state of a run, reporting
+        it to the callbacks.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+        """
+        if not self.callbacks:
+            async for chunk in self._call_stream_node(ctx, compiled):
+                yield chunk
+            return
+
+        node_name = compiled.node.name
+        emit(self.callbacks, "on_node_start", ctx, node_name)
+        start = time.perf_counter()
+        try:
+            async for chunk in self._call_stream_node(ctx, compiled):
+                yield chunk
+        except Exception as e:
+            emit(
+                self.callbacks,
+                "on_error",
+                ctx,
+                node_name,
+                e,
+                time.perf_counter() - start,
+            )
+            raise
+        emit(self.callbacks, "on_node_end", ctx, node_name, time.perf_counter() - start)
+
+    async def _call_stream_node(self, ctx: RunContext, compiled: CompiledNode):
+        """
+        Call a stream node function with the current state of a run.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+        """
+        node = compiled.node
+        node_name = node.name
+        kind = compiled.kind
+        state = ctx.state
+        if node.reads is not None:
+            state = self._node_state(node, state)
+
+        if kind is DispatchKind.NONE:
+            raise LLMfyException(f"Node '{node_name}' has no function defined")
+
+        # Check if the function is async generator or generator
+        if kind is DispatchKind.ASYNC_GENERATOR:
+            async for chunk in node.func(state):  # type: ignore
+                if isinstance(chunk, NodeStreamResponse):
+                    yield chunk
+                else:
+                    raise LLMfyException(
+                        f"Stream response in node: '{node_name}' must use `NodeStreamResponse`"
+                    )
+
+        elif kind is DispatchKind.SYNC_GENERATOR:
+            # Advance the generator in the thread pool, one chunk at a time
+            executor = self._get_executor(node)
+            generator = node.func(state)  # type: ignore
+            exhausted = object()
+            while True:
+                chunk = await self._run_sync(executor, next, generator, exhausted)
+                if chunk is exhausted:
+                    break
+                if isinstance(chunk, NodeStreamResponse):
+                    yield chunk
+                else:
+                    raise LLMfyException(
+                        f"Stream response in node: '{node_name}' must use `NodeStreamResponse`"
+                    )
 
-            # If no next node (workflow was completed), start from beginning
-            if current_node is None:
-                start_edges = [e for e in self.edges if e.source == START]
-                current_node = start_edges[0].targets[0]
         else:
-            # Start fresh - no checkpoint found or no session_id provided
-            self.state = deepcopy(apply_state)
+            raise LLMfyException(
+                f"Function in node: '{node_name}' is not stream. Please yield `NodeStreamResponse`."
+            )
 
-            # Find the starting node from START edges
-            start_edges = [e for e in self.edges if e.source == START]
-            current_node = start_edges[0].targets[0]
+    async def _evaluate_condition(
+        self, ctx: RunContext, edge: CompiledEdge, source: str
+    ) -> list[str]:
+        """
+        Evaluate the condition function of a conditional edge.
 
-        # Save initial checkpoint
-        if self._checkpoint_enabled:
-            await self._save_checkpoint(START)
+        The condition may return a single target or a list of targets to fan out.
 
-        # Execute workflow
-        while current_node is not None:
-            # Increment step counter
-            self._step_counter += 1
+        Args:
+            ctx: Run context, its state is passed to the condition function
+            edge: Compiled conditional edge
+            source: Source node of the edge
 
-            if current_node not in self.nodes:
-                raise LLMfyException(f"Node '{current_node}' not found")
+        Returns:
+            Selected target node names
+        """
+        condition_func = edge.condition
+        start = time.perf_counter() if self.callbacks else 0.0
 
-            node = self.nodes[current_node]
+        # Execute condition function (can be sync or async)
+        if edge.condition_is_async:
+            result = await condition_func(ctx.state)  # type: ignore
+        else:
+            result = await self._run_sync(
+                self._get_executor(),
+                condition_func,
+                ctx.state,  # type: ignore
+            )
 
-            if node.stream:
-                # Handle stream node
-                async for chunk in self._execute_stream_node(
-                    current_node,
-                    func=node.func,
-                ):
-                    # NodeStreamType.RESULT is always send at last stream
-                    if chunk.type == NodeStreamType.RESULT:
-                        # In invoke update state is in last stream result.
-                        # Update state with results
-                        if chunk.state:
-                            self._update_state(chunk.state)
+        targets = list(result) if isinstance(result, list | tuple) else [result]
 
-                        # Save checkpoint
-                        if self._checkpoint_enabled:
-                            await self._save_checkpoint(current_node)
+        # Validate that the returned nodes are in the targets
+        for next_node in targets:
+            if next_node not in edge.targets:
+                raise LLMfyException(
+                    f"Condition function returned '{next_node}' which is not in targets: {edge.targets}"
+                )
 
-                # Determine next node (now async)
-                current_node = await self._get_next_node(current_node)
+        if self.callbacks:
+            emit(
+                self.callbacks,
+                "on_condition",
+                ctx,
+                source,
+                targets,
+                time.perf_counter() - start,
+            )
+        return targets
 
-            else:
-                # Handle non-streaming node
-                # Execute current node
-                updates = await self._execute_node(current_node)
+    async def _get_next_nodes(self, ctx: RunContext, completed: list[str]) -> list[str]:
+        """
+        Determine the nodes to execute in the next step.
 
-                # Update state with results
-                if updates:
-                    self._update_state(updates)
+        Args:
+            ctx: Run context, its state is passed to condition functions
+            completed: Nodes completed in the current step
 
-                # Save checkpoint after node execution
-                if self._checkpoint_enabled:
-                    await self._save_checkpoint(current_node)
+        Returns:
+            Next node names in scheduling order, empty when every branch reached END
+        """
+        plan_nodes = self._plan.nodes  # type: ignore
+        next_nodes: list[str] = []
 
-                # Determine next node (now async)
-                current_node = await self._get_next_node(current_node)
+        for current_node in completed:
+            compiled = plan_nodes.get(current_node)
+            if compiled is None:
+                continue
 
-        return self.state
+            for edge in compiled.edges:
+                if edge.join_sources is not None:
+                    # Join edge - target waits until all sources completed
+                    target = edge.targets[0]
+                    done = ctx.joins.setdefault(target, set())
+                    done.add(current_node)
+                    if not done.issuperset(edge.join_sources):
+                        continue
+                    del ctx.joins[target]
+                    targets = edge.targets
+                elif edge.condition is not None:
+                    targets = await self._evaluate_condition(ctx, edge, current_node)
+                else:
+                    targets = edge.targets
 
-    async def stream(
+                for target in targets:
+                    if target != END and target not in next_nodes:
+                        next_nodes.append(target)
+
+        return next_nodes
+
+    async def _run_node(
         self,
-        apply_state: dict[str, Any] | None = None,
-        session_id: str | None = None,
-        stream_callback: Callable | None = None,
+        ctx: RunContext,
+        compiled: CompiledNode,
+        on_chunk: Callable[[NodeStreamResponse], None] | None = None,
+    ) -> tuple[dict[str, Any], Any]:
+        """
+        Run a single node without touching the run state.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+            on_chunk: Optional callback receiving the stream chunks of a stream node
+
+        Returns:
+            The node's state updates and its result content
+        """
+        if not compiled.node.stream:
+            updates = await self._execute_node(ctx, compiled)
+            return updates, updates
+
+        updates: dict[str, Any] = {}
+        content = None
+        async for chunk in self._execute_stream_node(ctx, compiled):
+            # NodeStreamType.RESULT is always send at last stream
+            if chunk.type == NodeStreamType.RESULT:
+                updates = chunk.state or {}
+                content = chunk.content
+            elif on_chunk is not None:
+                on_chunk(chunk)
+
+        return updates, content
+
+    async def _run_step_node(
+        self, ctx: RunContext, compiled: CompiledNode
+    ) -> list[tuple[str, dict[str, Any], Any]]:
+        """
+        Run a node of a step, once or once per item for a map edge target.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the node to execute
+
+        Returns:
+            (node name, updates, content) of every run of the node
+        """
+        if compiled.map is None:
+            return [(compiled.node.name, *await self._run_node(ctx, compiled))]
+        return await self._run_mapped(ctx, compiled)
+
+    async def _run_mapped(
+        self, ctx: RunContext, compiled: CompiledNode
+    ) -> list[tuple[str, dict[str, Any], Any]]:
+        """
+        Run a map edge target once per item of its state list, concurrently.
+
+        Args:
+            ctx: Run context
+            compiled: Dispatch record of the mapped node
+
+        Returns:
+            (node name, updates, content) per item in item order, or a single
+            entry without updates when there are no items
+        """
+        spec: MapSpec = compiled.map  # type: ignore
+        node_name = compiled.node.name
+        items = ctx.state.get(spec.items_key) or []
+        if not items:
+            return [(node_name, {}, None)]
+
+        limit = spec.max_concurrency or len(items)
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run_item(item: Any) -> tuple[dict[str, Any], Any]:
+            async with semaphore:
+                # Shallow copy, the other keys share the run state values
+                state = {**ctx.state, spec.item_key: item}
+                updates = await self._execute_node(ctx, compiled, state)
+                return updates, updates
+
+        outcomes = await self._gather([run_item(item) for item in items])
+        return [(node_name, updates, content) for updates, content in outcomes]
+
+    @staticmethod
+    async def _gather(coroutines: list) -> list[Any]:
+        """
+        Run coroutines concurrently and return their results in order.
+
+        When one fails the others are cancelled and the error is raised.
+
+        Args:
+            coroutines: Coroutines to run
+
+        Returns:
+            The results, in `coroutines` order
+        """
+        tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                # Let the cancelled tasks finish before raising
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise task.exception()  # type: ignore
+
+        return [task.result() for task in tasks]
+
+    async def _run_parallel(
+        self,
+        ctx: RunContext,
+        step_nodes: list[CompiledNode],
+    ) -> list[tuple[str, dict[str, Any], Any]]:
+        """
+        Run the nodes of one step concurrently.
+
+        When a node fails the other nodes of the step are cancelled and the error
+        is raised.
+
+        Args:
+            ctx: Run context
+            step_nodes: Dispatch records of the nodes of the step
+
+        Returns:
+            (node name, updates, content) of every node run, in `step_nodes` order
+        """
+        runs = await self._gather([self._run_step_node(ctx, c) for c in step_nodes])
+        return [result for node_results in runs for result in node_results]
+
+    async def _stream_parallel(
+        self,
+        ctx: RunContext,
+        step_nodes: list[CompiledNode],
+        results: list[tuple[str, dict[str, Any], Any]],
     ):
         """
-        Execute the workflow in streaming mode, starting from START node or continue from last checkpoint.
+        Run the nodes of one step concurrently, forwarding stream chunks as they arrive.
 
         Args:
-            apply_state: Optional state updates to apply. If continuing from checkpoint,
-                these are merged with the checkpoint state using reducers.
-            session_id: Session ID for checkpoint management. If provided and a checkpoint
-                exists, continues from last checkpoint. If None, always starts fresh.
-            stream_callback: Optional callback function for handling streaming chunks (content only)
+            ctx: Run context
+            step_nodes: Dispatch records of the nodes of the step
+            results: Filled with (node name, updates, content) of every node once all
+                nodes are done, in `step_nodes` order
+
+        Yields:
+            (FlowEngineStreamType.STREAM, node name, content) tuples
+        """
+        queue: asyncio.Queue[tuple[str, NodeStreamResponse] | None] = asyncio.Queue()
+
+        async def run_branch(compiled: CompiledNode):
+            node_name = compiled.node.name
+            try:
+                if compiled.map is not None:
+                    return await self._run_mapped(ctx, compiled)
+                updates, content = await self._run_node(
+                    ctx,
+                    compiled,
+                    on_chunk=lambda chunk: queue.put_nowait((node_name, chunk)),
+                )
+                return [(node_name, updates, content)]
+            finally:
+                # Sentinel, the branch is done
+                queue.put_nowait(None)
+
+        tasks = [asyncio.create_task(run_branch(c)) for c in step_nodes]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    for task in tasks:
+                        if (
+                            task.done()
+                            and not task.cancelled()
+                            and task.exception() is not None
+                        ):
+                            raise task.exception()  # type: ignore
+                    continue
+
+                node_name, chunk = item
+                yield FlowEngineStreamType.STREAM, node_name, chunk.content
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        results.extend(result for task in tasks for result in task.result())
+
+    async def _execute(
+        self,
+        ctx: RunContext,
+        next_nodes: list[str],
+        streaming: bool = False,
+    ):
+        """
+        Run the workflow from `next_nodes` until every branch reaches END.
+
+        Nodes scheduled for the same step run concurrently on the state left by the
+        previous step. Their updates are merged with the state reducers once all of
+        them are done, then a checkpoint is saved for the step.
+
+        Args:
+            ctx: Run context
+            next_nodes: Nodes of the first step
+            streaming: Yield stream chunks and node results
+
+        Yields:
+            (FlowEngineStreamType, node name, content) tuples, only when `streaming`
+        """
+        plan_nodes = self._plan.nodes  # type: ignore
+
+        while next_nodes:
+            # Workers load the state of the step from its checkpoint
+            if self._dispatcher is not None and ctx.saved_step != ctx.step:
+                await self._save_checkpoint(ctx, ctx.last_nodes, next_nodes)
+
+            # Increment step counter
+            ctx.step += 1
+
+            step_nodes: list[CompiledNode] = []
+            for node_name in next_nodes:
+                compiled = plan_nodes.get(node_name)
+                if compiled is None:
+                    raise LLMfyException(f"Node '{node_name}' not found")
+                step_nodes.append(compiled)
+
+            results: list[tuple[str, dict[str, Any], Any]] = []
+
+            try:
+                if len(step_nodes) == 1:
+                    compiled = step_nodes[0]
+                    node_name = compiled.node.name
+
+                    if streaming and compiled.node.stream:
+                        # Handle stream node
+                        updates: dict[str, Any] = {}
+                        content = None
+                        async for chunk in self._execute_stream_node(ctx, compiled):
+                            # NodeStreamType.RESULT is always send at last stream
+                            if chunk.type == NodeStreamType.RESULT:
+                                updates = chunk.state or {}
+                                content = chunk.content
+                            else:
+                                yield (
+                                    FlowEngineStreamType.STREAM,
+                                    node_name,
+                                    chunk.content,
+                                )
+                        results.append((node_name, updates, content))
+                    else:
+                        results.extend(await self._run_step_node(ctx, compiled))
+
+                elif streaming and any(c.node.stream for c in step_nodes):
+                    async for event in self._stream_parallel(ctx, step_nodes, results):
+                        yield event
+
+                else:
+                    results = await self._run_parallel(ctx, step_nodes)
+            except Exception:
+                # Let a resumed session re-run this step
+                await self._checkpoint_error(ctx, next_nodes)
+                raise
+
+            # Update state with results
+            self._merge_updates(ctx, results)
+
+            # Determine next nodes, a mapped node completes once for all its items
+            completed = list(dict.fromkeys(node_name for node_name, _, _ in results))
+            next_nodes = await self._get_next_nodes(ctx, completed)
+
+            # Save checkpoint after the step
+            await self._checkpoint_step(ctx, completed, next_nodes)
+
+            if streaming:
+                # NODE RESULT
+                for node_name, _, content in results:
+                    yield FlowEngineStreamType.RESULT, node_name, content
+
+    def build(self):
+        """
+        Build FlowEngine workflow.
 
         Returns:
-            Final state after workflow execution
+            FlowEngine: Workflow built.
+        """
+        # Validate workflow structure before execution
+        self._validate_workflow()
+
+        # Compile the graph into an adjacency index and node dispatch records
+        self._plan = ExecutionPlan.compile(self.nodes, self.edges)
+
+        # Compile the per-field converters used when resuming from a checkpoint
+        self._deserializer = StateDeserializer(self._type_hints)
+
+        # Workers read the state of a step from the checkpoint saved before it
+        if self.task_queue is not None:
+            if self.checkpointer is None:
+                raise LLMfyException("A task_queue needs a checkpointer")
+            if self.durability is not Durability.SYNC:
+                raise LLMfyException(
+                    "A task_queue needs `sync` durability, workers must see "
+                    "every checkpoint before the step that uses it"
+                )
+
+        # Cached nodes need a cache to store their results in
+        if self.node_cache is None and any(
+            node.cache is not None for node in self.nodes.values()
+        ):
+            self.node_cache = InMemoryNodeCache()
+
+        # Set is built true
+        self.is_built = True
+
+        return self
+
+    async def _start_run(
+        self,
+        apply_state: dict[str, Any] | None,
+        session_id: str | None,
+    ) -> tuple[RunContext, list[str]]:
+        """
+        Create the run context of an `invoke` / `stream` call.
+
+        Loads the last checkpoint of the session when there is one, otherwise starts
+        fresh from `apply_state`.
+
+        Args:
+            apply_state: Optional state updates to apply
+            session_id: Optional session ID for checkpoint management
+
+        Returns:
+            The run context and the nodes of the first step
         """
         # Check build
         if not self.is_built:
             raise LLMfyException("Build first. Use `your_flow.build()`")
 
         # Set thread ID
-        self._session_id = session_id or str(uuid.uuid4())
-        self._step_counter = 0
+        ctx = RunContext(session_id=session_id or str(uuid.uuid4()))
+        if self.callbacks:
+            emit(self.callbacks, "on_run_start", ctx)
+
+        try:
+            next_nodes = await self._resume_or_start(ctx, apply_state, session_id)
+        except Exception as e:
+            await self._finish_run(ctx, e)
+            raise
+        return ctx, next_nodes
+
+    async def _resume_or_start(
+        self,
+        ctx: RunContext,
+        apply_state: dict[str, Any] | None,
+        session_id: str | None,
+    ) -> list[str]:
+        """
+        Set the state of a new run from the last checkpoint of its session, or from
+        `apply_state`, and save the START checkpoint.
 
+        Args:
+            ctx: Run context to initialize
+            apply_state: Optional state updates to apply
+            session_id: Optional session ID for checkpoint management
+
+        Returns:
+            The nodes of the first step
+        """
         # Initialize state
         if apply_state is None:
             apply_state = {}
@@ -797,113 +1803,389 @@ class FlowEngine:
         # Try to load from last checkpoint if session_id is provided
         loaded_checkpoint = None
         if session_id and self.checkpointer:
+            # Checkpoints of the session still queued must be visible to the load
+            await self.flush(session_id)
+            start = time.perf_counter() if self.callbacks else 0.0
             loaded_checkpoint = await self.checkpointer.load(session_id)
+            if self.callbacks:
+                emit(
+                    self.callbacks,
+                    "on_checkpoint",
+                    ctx,
+                    "load",
+                    loaded_checkpoint,
+                    time.perf_counter() - start,
+                )
 
         if loaded_checkpoint:
-            # Continue from checkpoint - deserialize objects
-            raw_state = loaded_checkpoint.state
-            self.state = self._deserialize_state(raw_state)
-            self._step_counter = loaded_checkpoint.metadata.step
+            # Continue from checkpoint - deserialize objects. The run owns its
+            # state, checkpointers may share the loaded values with stored history
+            raw_state = deepcopy(loaded_checkpoint.state)
+            ctx.state = self._deserialize_state(raw_state)
+            ctx.step = loaded_checkpoint.metadata.step
 
             # Apply apply_state as updates to checkpoint state
             if apply_state:
-                self._update_state(apply_state)
-
-            # Find where to resume (next node after last completed node)
-            current_node = await self._get_next_node(
-                loaded_checkpoint.metadata.node_name
-            )
+                self._update_state(ctx, apply_state)
+
+            # Find where to resume
+            metadata = loaded_checkpoint.metadata
+            if metadata.next_nodes is not None:
+                next_nodes = list(metadata.next_nodes)
+                ctx.joins = {
+                    target: set(sources)
+                    for target, sources in metadata.pending_joins.items()
+                }
+            else:
+                # Older checkpoint without schedule, route from the last completed node
+                next_nodes = await self._get_next_nodes(ctx, [metadata.node_name])
 
             # If no next node (workflow was completed), start from beginning
-            if current_node is None:
-                start_edges = [e for e in self.edges if e.source == START]
-                current_node = start_edges[0].targets[0]
+            if not next_nodes:
+                ctx.joins = {}
+                next_nodes = await self._get_next_nodes(ctx, [START])
         else:
             # Start fresh - no checkpoint found or no session_id provided
-            self.state = deepcopy(apply_state)
+            # The run owns its state, reducers may change values in place
+            ctx.state = deepcopy(apply_state or {})
 
-            # Find the starting node from START edges
-            start_edges = [e for e in self.edges if e.source == START]
-            current_node = start_edges[0].targets[0]
+            # Find the starting nodes from START edges
+            next_nodes = await self._get_next_nodes(ctx, [START])
 
         # Save initial checkpoint
-        if self._checkpoint_enabled:
-            await self._save_checkpoint(START)
+        await self._checkpoint_step(ctx, [START], next_nodes)
+
+        return next_nodes
+
+    async def invoke(
+        self,
+        apply_state: dict[str, Any] | None = None,
+        session_id: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Execute the workflow starting from START node or continue from last checkpoint.
+
+        Safe to call concurrently on the same built engine, every call runs with its
+        own state.
 
-        # START
-        response = FlowEngineStreamResponse()
-        response.type = FlowEngineStreamType.START
-        response.node = START
-        response.content = None
-        response.state = self.state
-        yield response
+        Args:
+            apply_state: Optional state updates to apply. If continuing from checkpoint,
+                these are merged with the checkpoint state using reducers.
+            session_id: Session ID for checkpoint management. If provided and a checkpoint
+                exists, continues from last checkpoint. If None, always starts fresh.
+
+        Returns:
+            Final state after workflow execution
+        """
+        ctx, next_nodes = await self._start_run(apply_state, session_id)
 
         # Execute workflow
-        while current_node is not None:
-            # Increment step counter
-            self._step_counter += 1
+        error = None
+        try:
+            async for _ in self._execute(ctx, next_nodes):
+                pass
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            await self._finish_run(ctx, error)
+
+        return ctx.state
+
+    async def stream(
+        self,
+        apply_state: dict[str, Any] | None = None,
+        session_id: str | None = None,
+        stream_callback: Callable | None = None,
+        max_buffer: int | None = None,
+        coalesce_interval: float | None = None,
+        coalesce_bytes: int | None = None,
+    ):
+        """
+        Execute the workflow in streaming mode, starting from START node or continue from last checkpoint.
 
-            if current_node not in self.nodes:
-                raise LLMfyException(f"Node '{current_node}' not found")
+        Safe to call concurrently on the same built engine, every call runs with its
+        own state. Chunks of parallel stream nodes are yielded as they arrive.
 
-            node = self.nodes[current_node]
+        By default the workflow only advances while the caller reads events. Set
+        `max_buffer` to run it in a background task that stays up to that many
+        events ahead of a slow reader, then waits. Set `coalesce_interval` and / or
+        `coalesce_bytes` to merge consecutive text chunks of a node into one event,
+        which also runs the workflow in a background task.
 
-            if node.stream:
-                # Handle stream node
-                async for chunk in self._execute_stream_node(
-                    current_node,
-                    func=node.func,
+        Args:
+            apply_state: Optional state updates to apply. If continuing from checkpoint,
+                these are merged with the checkpoint state using reducers.
+            session_id: Session ID for checkpoint management. If provided and a checkpoint
+                exists, continues from last checkpoint. If None, always starts fresh.
+            stream_callback: Optional callback function for handling streaming chunks (content only)
+            max_buffer: Maximum number of events buffered ahead of the reader.
+                Defaults to 256 when coalescing.
+            coalesce_interval: Wait up to this many seconds for more text chunks of
+                the same node before yielding them as one event
+            coalesce_bytes: Yield merged text chunks once they reach this many
+                UTF-8 bytes. Without `coalesce_interval`, only chunks already
+                buffered are merged.
+
+        Yields:
+            FlowEngineStreamResponse: A new immutable event per chunk, node result
+                and START
+        """
+        if max_buffer is not None and max_buffer < 1:
+            raise LLMfyException("max_buffer must be at least 1")
+        if coalesce_interval is not None and coalesce_interval <= 0:
+            raise LLMfyException("coalesce_interval must be greater than 0")
+        if coalesce_bytes is not None and coalesce_bytes < 1:
+            raise LLMfyException("coalesce_bytes must be at least 1")
+
+        ctx, next_nodes = await self._start_run(apply_state, session_id)
+        events = self._stream_events(ctx, next_nodes)
+
+        if max_buffer is None and coalesce_interval is None and coalesce_bytes is None:
+            async with contextlib.aclosing(events):
+                async for response in events:
+                    yield response
+            return
+
+        buffered = self._buffer_stream(
+            events, max_buffer or 256, coalesce_interval, coalesce_bytes
+        )
+        async with contextlib.aclosing(buffered):
+            async for response in buffered:
+                yield response
+
+    async def _stream_events(self, ctx: RunContext, next_nodes: list[str]):
+        """
+        Run the workflow of a started run, yielding its stream events.
+
+        Args:
+            ctx: Run context
+            next_nodes: Nodes of the first step
+
+        Yields:
+            FlowEngineStreamResponse: A new immutable event per chunk, node result
+                and START
+        """
+        make = FlowEngineStreamResponse.model_construct
+        error = None
+        try:
+            # Shallow snapshot, state values are never mutated in place. Chunks of a
+            # step share the snapshot of the previous step's results.
+            state = dict(ctx.state)
+            yield make(type=FlowEngineStreamType.START, node=START, state=state)
+
+            result_step = None
+            async for event_type, node_name, content in self._execute(
+                ctx, next_nodes, streaming=True
+            ):
+                if (
+                    event_type is FlowEngineStreamType.RESULT
+                    and result_step != ctx.step
                 ):
-                    # NodeStreamType.RESULT is always send at last stream
-                    if chunk.type == NodeStreamType.RESULT:
-                        # Update state with results
-                        if chunk.state:
-                            self._update_state(chunk.state)
-
-                        # Save checkpoint
-                        if self._checkpoint_enabled:
-                            await self._save_checkpoint(current_node)
-
-                        # NODE RESULT
-                        response.type = FlowEngineStreamType.RESULT
-                        response.node = current_node
-                        response.content = chunk.content
-                        response.state = self.state
-                        yield response
+                    result_step = ctx.step
+                    state = dict(ctx.state)
+                yield make(
+                    type=event_type, node=node_name, content=content, state=state
+                )
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            await self._finish_run(ctx, error)
+
+    @staticmethod
+    async def _buffer_stream(
+        events,
+        max_buffer: int,
+        coalesce_interval: float | None,
+        coalesce_bytes: int | None,
+    ):
+        """
+        Run a stream in a background task behind a bounded buffer, optionally
+        merging consecutive text chunks of the same node.
+
+        Args:
+            events: Stream events to buffer
+            max_buffer: Maximum number of buffered events, the producer waits when full
+            coalesce_interval: Seconds to wait for more chunks to merge, None to not wait
+            coalesce_bytes: Merged size in UTF-8 bytes that ends a merge
+
+        Yields:
+            FlowEngineStreamResponse: The events, with merged chunks
+        """
+        queue: asyncio.Queue = asyncio.Queue(max_buffer)
+        done = object()
+        failure: list[Exception] = []
+
+        async def produce():
+            try:
+                async with contextlib.aclosing(events):
+                    async for response in events:
+                        await queue.put(response)
+            except Exception as e:
+                failure.append(e)
+            await queue.put(done)
+
+        def mergeable(response) -> bool:
+            return response.type == FlowEngineStreamType.STREAM and isinstance(
+                response.content, str
+            )
 
+        coalescing = coalesce_interval is not None or coalesce_bytes is not None
+        loop = asyncio.get_running_loop()
+        producer = asyncio.create_task(produce())
+        try:
+            lookahead = None
+            while True:
+                if lookahead is not None:
+                    response, lookahead = lookahead, None
+                else:
+                    response = await queue.get()
+                if response is done:
+                    break
+                if not coalescing or not mergeable(response):
+                    yield response
+                    continue
+
+                parts = [response.content]
+                size = len(response.content.encode("utf-8"))
+                deadline = (
+                    loop.time() + coalesce_interval
+                    if coalesce_interval is not None
+                    else None
+                )
+                while coalesce_bytes is None or size < coalesce_bytes:
+                    try:
+                        following = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        if deadline is None or loop.time() >= deadline:
+                            break
+                        try:
+                            following = await asyncio.wait_for(
+                                queue.get(), deadline - loop.time()
+                            )
+                        except TimeoutError:
+                            break
+                    if (
+                        following is not done
+                        and mergeable(following)
+                        and following.node == response.node
+                    ):
+                        parts.append(following.content)
+                        size += len(following.content.encode("utf-8"))
                     else:
-                        # Not NodeStreamType.RESULT
-                        # NODE STREAM
-                        response.type = FlowEngineStreamType.STREAM
-                        response.node = current_node
-                        response.content = chunk.content
-                        response.state = self.state
-                        yield response
+                        lookahead = following
+                        break
+
+                if len(parts) > 1:
+                    response = FlowEngineStreamResponse.model_construct(
+                        type=response.type,
+                        node=response.node,
+                        content="".join(parts),
+                        state=response.state,
+                    )
+                yield response
 
-                # Determine next node (now async)
-                current_node = await self._get_next_node(current_node)
+            if failure:
+                raise failure[0]
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
 
-            else:
-                # Handle non-streaming node
-                updates = await self._execute_node(current_node)
+    async def batch(
+        self,
+        inputs: list[dict[str, Any] | None],
+        session_ids: list[str | None] | None = None,
+        max_concurrency: int = 10,
+        return_exceptions: bool = False,
+    ) -> BatchResult:
+        """
+        Invoke the workflow once per input, running up to `max_concurrency` at once.
 
-                # Update state with results
-                if updates:
-                    self._update_state(updates)
+        All runs share this built engine, its checkpointer connection and thread
+        pools.
 
-                # Save checkpoint after node execution
-                if self._checkpoint_enabled:
-                    await self._save_checkpoint(current_node)
+        Args:
+            inputs: The `apply_state` of every run
+            session_ids: Session ID of every run, None runs every input as a fresh
+                session
+            max_concurrency: Maximum number of runs in flight
+            return_exceptions: Keep going when a run fails and record its exception
+                in the result. If False, the first failure cancels the remaining
+                runs and is raised.
 
-                # NODE RESULT
-                response.type = FlowEngineStreamType.RESULT
-                response.node = current_node
-                response.content = updates
-                response.state = self.state
-                yield response
+        Returns:
+            The final states in input order, with per-item latency and throughput
+        """
+        start = time.perf_counter()
+        items: list[BatchItem] = []
+        async for item in self.batch_as_completed(
+            inputs, session_ids, max_concurrency, return_exceptions
+        ):
+            items.append(item)
+        items.sort(key=lambda item: item.index)
+        return BatchResult(items=items, elapsed=time.perf_counter() - start)
+
+    async def batch_as_completed(
+        self,
+        inputs: list[dict[str, Any] | None],
+        session_ids: list[str | None] | None = None,
+        max_concurrency: int = 10,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[BatchItem]:
+        """
+        Invoke the workflow once per input and yield every run as it finishes.
 
-                # Determine next node (now async)
-                current_node = await self._get_next_node(current_node)
+        Args:
+            inputs: The `apply_state` of every run
+            session_ids: Session ID of every run, None runs every input as a fresh
+                session
+            max_concurrency: Maximum number of runs in flight
+            return_exceptions: Yield failed runs with their exception. If False, the
+                first failure cancels the remaining runs and is raised.
+
+        Yields:
+            BatchItem: The outcome of a run, `index` is its position in `inputs`
+        """
+        if max_concurrency < 1:
+            raise LLMfyException("max_concurrency must be at least 1")
+        if session_ids is not None and len(session_ids) != len(inputs):
+            raise LLMfyException("session_ids must have one entry per input")
+        if not inputs:
+            return
+
+        # Workers take the next input from a shared iterator, so at most
+        # `max_concurrency` runs exist at a time however long the batch is
+        jobs = iter(range(len(inputs)))
+        finished: asyncio.Queue[BatchItem] = asyncio.Queue()
+
+        async def worker():
+            for index in jobs:
+                session_id = session_ids[index] if session_ids is not None else None
+                started = time.perf_counter()
+                try:
+                    state = await self.invoke(inputs[index], session_id=session_id)
+                    item = BatchItem(index=index, session_id=session_id, state=state)
+                except Exception as e:
+                    item = BatchItem(index=index, session_id=session_id, error=e)
+                item.latency = time.perf_counter() - started
+                finished.put_nowait(item)
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(max_concurrency, len(inputs)))
+        ]
+        try:
+            for _ in range(len(inputs)):
+                item = await finished.get()
+                if item.error is not None and not return_exceptions:
+                    raise item.error
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
     async def get_state(self, session_id: str) -> dict[str, Any] | None:
         """
@@ -918,6 +2200,7 @@ class FlowEngine:
         if not self.checkpointer:
             raise LLMfyException("No checkpointer configured")
 
+        await self.flush(session_id)
         checkpoint = await self.checkpointer.load(session_id)
         if checkpoint:
             # Deserialize the state to reconstruct objects
@@ -942,6 +2225,7 @@ class FlowEngine:
         if not self.checkpointer:
             raise LLMfyException("No checkpointer configured")
 
+        await self.flush(session_id)
         return await self.checkpointer.list(session_id, limit)
 
     async def get_checkpoint(
@@ -962,6 +2246,7 @@ class FlowEngine:
         if not self.checkpointer:
             raise LLMfyException("No checkpointer configured")
 
+        await self.flush(session_id)
         return await self.checkpointer.load(session_id, checkpoint_id)
 
     async def delete_checkpoints(
@@ -979,6 +2264,7 @@ class FlowEngine:
         if not self.checkpointer:
             raise LLMfyException("No checkpointer configured")
 
+        await self.flush(session_id)
         await self.checkpointer.delete(session_id, checkpoint_id)
 
     async def reset_session(self, session_id: str):
@@ -992,8 +2278,35 @@ class FlowEngine:
         if not self.checkpointer:
             raise LLMfyException("No checkpointer configured")
 
+        await self.flush(session_id)
         await self.checkpointer.delete(session_id)
 
+    async def close(self):
+        """
+        Release the resources held by the engine.
+
+        Writes the checkpoints still queued in `async` durability mode and shuts
+        down the thread pools used by sync nodes and conditions and the process
+        pool of process nodes. They are created again if the engine runs after
+        being closed.
+        """
+        if self._writer is not None:
+            writer, self._writer = self._get_writer(), None
+            await writer.close()
+
+        executors = list(self._node_executors.values())
+        if self._executor is not None:
+            executors.append(self._executor)
+        self._executor = None
+        self._node_executors = {}
+
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if self._process_pool is not None:
+            process_pool, self._process_pool = self._process_pool, None
+            process_pool.shutdown(wait=True, cancel_futures=True)
+
     def details(self) -> str:
         """
         Generate a simple details text visualization of the workflow.
@@ -1033,7 +2346,12 @@ class FlowEngine:
 
         # Show regular edges
         regular_edges = [
-            e for e in self.edges if e.condition is None and e.source != START
+            e
+            for e in self.edges
+            if e.condition is None
+            and e.join_sources is None
+            and e.map is None
+            and e.source != START
         ]
         if regular_edges:
             lines.append("\nRegular Edges:")
@@ -1041,6 +2359,25 @@ class FlowEngine:
                 for target in edge.targets:
                     lines.append(f"  {edge.source} -> {target}")
 
+        # Show join edges, once per target
+        join_edges = {
+            e.targets[0]: e.join_sources for e in self.edges if e.join_sources
+        }
+        if join_edges:
+            lines.append("\nJoin Edges:")
+            for target, sources in join_edges.items():
+                lines.append(f"  [{', '.join(sources)}] -> {target}")  # type: ignore
+
+        # Show map edges
+        map_edges = [e for e in self.edges if e.map is not None]
+        if map_edges:
+            lines.append("\nMap Edges:")
+            for edge in map_edges:
+                lines.append(
+                    f"  {edge.source} -> {edge.targets[0]} "
+                    f"[each {edge.map.item_key} in {edge.map.items_key}]"  # type: ignore
+                )
+
         # Show conditional edges
         conditional_edges = [e for e in self.edges if e.condition is not None]
         if conditional_edges:
@@ -1,3 +1,3 @@
-from .node import END, START, Node, NodeType
+from .node import END, START, Node, NodeExecutor, NodeType
 
-__all__ = ["Node", "NodeType", "START", "END"]
+__all__ = ["Node", "NodeExecutor", "NodeType", "START", "END"]
@@ -1,6 +1,8 @@
 from collections.abc import Callable
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import Enum, StrEnum
+
+from llmfy.flow_engine.cache.cache_policy import CachePolicy
 
 
 class NodeType(Enum):
@@ -11,6 +13,13 @@ class NodeType(Enum):
     CONDITIONAL = "conditional"
 
 
+class NodeExecutor(StrEnum):
+    """Where a sync node function runs"""
+    # Thread pool of the engine, or the node's own (`max_workers`)
+    THREAD = "thread"
+    # Process pool shared by the engine's process nodes
+    PROCESS = "process"
+
 
 # Special node identifiers
 START = "__start__"
@@ -26,3 +35,13 @@ class Node:
     sources: list[str] = field(default_factory=list)
     targets: list[str] = field(default_factory=list)
     stream: bool = field(default=False)
+    # Size of a dedicated thread pool for a sync node (None = engine pool)
+    max_workers: int | None = field(default=None)
+    # Memoizes the node's state updates (None = always run)
+    cache: CachePolicy | None = field(default=None)
+    # Pool running a sync node function
+    executor: NodeExecutor = field(default=NodeExecutor.THREAD)
+    # State keys the node reads, it only receives these (None = whole state)
+    reads: frozenset[str] | None = field(default=None)
+    # State keys the node may update (None = any)
+    writes: frozenset[str] | None = field(default=None)
@@ -0,0 +1,3 @@
+from .execution_plan import CompiledEdge, CompiledNode, DispatchKind, ExecutionPlan
+
+__all__ = ["ExecutionPlan", "CompiledNode", "CompiledEdge", "DispatchKind"]
@@ -0,0 +1,107 @@
+import inspect
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import Enum
+
+from llmfy.flow_engine.edge.edge import Edge, MapSpec
+from llmfy.flow_engine.node.node import Node, NodeExecutor
+
+
+class DispatchKind(Enum):
+    """How a node function is called, resolved once at build time"""
+    ASYNC = "async"
+    SYNC = "sync"
+    ASYNC_GENERATOR = "async_generator"
+    SYNC_GENERATOR = "sync_generator"
+    # Sync function run in the engine's process pool
+    PROCESS = "process"
+    NONE = "none"
+
+
+@dataclass(slots=True)
+class CompiledEdge:
+    """Outgoing edge of a compiled node"""
+    targets: list[str]
+    condition: Callable | None = None
+    condition_is_async: bool = False
+    # Sources a join edge waits for, None for a regular or conditional edge
+    join_sources: frozenset[str] | None = None
+
+
+@dataclass(slots=True)
+class CompiledNode:
+    """Dispatch record of a node"""
+    node: Node
+    kind: DispatchKind
+    edges: list[CompiledEdge] = field(default_factory=list)
+    # Set when the node is the target of map edges, it then runs once per item
+    map: MapSpec | None = None
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    Graph compiled by `FlowEngine.build()`.
+
+    Holds an adjacency index from node name to outgoing edges and a dispatch
+    record per node, so a step costs the same no matter how large the graph is.
+    """
+    nodes: dict[str, CompiledNode]
+
+    @classmethod
+    def compile(cls, nodes: dict[str, Node], edges: list[Edge]) -> "ExecutionPlan":
+        """
+        Compile the nodes and edges of a validated workflow.
+
+        Args:
+            nodes: Node name to node, including START and END
+            edges: All edges of the workflow
+
+        Returns:
+            The execution plan
+        """
+        compiled = {
+            name: CompiledNode(node=node, kind=cls._dispatch_kind(node))
+            for name, node in nodes.items()
+        }
+
+        for edge in edges:
+            if edge.map is not None:
+                compiled[edge.targets[0]].map = edge.map
+
+            source = compiled.get(edge.source)
+            if source is None:
+                continue
+            source.edges.append(
+                CompiledEdge(
+                    targets=list(edge.targets),
+                    condition=edge.condition,
+                    condition_is_async=(
+                        edge.condition is not None
+                        and inspect.iscoroutinefunction(edge.condition)
+                    ),
+                    join_sources=(
+                        frozenset(edge.join_sources)
+                        if edge.join_sources is not None
+                        else None
+                    ),
+                )
+            )
+
+        return cls(nodes=compiled)
+
+    @staticmethod
+    def _dispatch_kind(node: Node) -> DispatchKind:
+        """Resolve how a node function is called."""
+        func = node.func
+        if func is None:
+            return DispatchKind.NONE
+        if inspect.isasyncgenfunction(func):
+            return DispatchKind.ASYNC_GENERATOR
+        if inspect.isgeneratorfunction(func):
+            return DispatchKind.SYNC_GENERATOR
+        if inspect.iscoroutinefunction(func):
+            return DispatchKind.ASYNC
+        if node.executor is NodeExecutor.PROCESS:
+            return DispatchKind.PROCESS
+        return DispatchKind.SYNC
@@ -0,0 +1,19 @@
+from .shared_state import (
+    SHARED_MEMORY_MIN_BYTES,
+    PackedState,
+    SharedBlock,
+    pack_state,
+    release_segments,
+    run_packed,
+    unpack_state,
+)
+
+__all__ = [
+    "SHARED_MEMORY_MIN_BYTES",
+    "PackedState",
+    "SharedBlock",
+    "pack_state",
+    "release_segments",
+    "run_packed",
+    "unpack_state",
+]
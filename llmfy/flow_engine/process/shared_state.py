@@ -0,0 +1,169 @@
+import pickle
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+# Out-of-band buffers of at least this many bytes, like the data of large numpy
+# arrays, go through shared memory instead of the process pool pipe
+SHARED_MEMORY_MIN_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class SharedBlock:
+    """Out-of-band pickle buffer stored in a shared memory segment"""
+
+    name: str
+    size: int
+
+
+@dataclass
+class PackedState:
+    """
+    A state, or node updates, pickled for another process.
+
+    Attributes:
+        data: Pickle protocol 5 stream
+        buffers: Out-of-band buffers of the stream, inline or in shared memory
+    """
+
+    data: bytes
+    buffers: list[bytearray | SharedBlock] = field(default_factory=list)
+
+
+def pack_state(
+    value: Any, min_shared_bytes: int = SHARED_MEMORY_MIN_BYTES
+) -> tuple[PackedState, list[SharedMemory]]:
+    """
+    Pickle a value with out-of-band buffers, large ones in shared memory.
+
+    Objects supporting pickle protocol 5 buffers, such as numpy arrays, are
+    copied once into shared memory instead of being pickled into the stream and
+    copied again through the pipe.
+
+    Args:
+        value: Value to pickle
+        min_shared_bytes: Size from which a buffer goes to shared memory
+
+    Returns:
+        The packed value, and the shared memory segments created for it, which
+        the creator unlinks with `release_segments` once they were read
+    """
+    buffers: list[pickle.PickleBuffer] = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+
+    blocks: list[bytearray | SharedBlock] = []
+    segments: list[SharedMemory] = []
+    try:
+        for buffer in buffers:
+            raw = buffer.raw()
+            if raw.nbytes < min_shared_bytes:
+                blocks.append(bytearray(raw))
+                continue
+            segment = SharedMemory(create=True, size=max(raw.nbytes, 1))
+            segments.append(segment)
+            segment.buf[: raw.nbytes] = raw
+            blocks.append(SharedBlock(name=segment.name, size=raw.nbytes))
+    except BaseException:
+        release_segments(segments, unlink=True)
+        raise
+    return PackedState(data=data, buffers=blocks), segments
+
+
+def unpack_state(packed: PackedState, copy: bool) -> tuple[Any, list[SharedMemory]]:
+    """
+    Unpickle a value packed by `pack_state`.
+
+    Args:
+        packed: The packed value
+        copy: Copy shared memory buffers out, so the segments can be released at
+            once. Otherwise the value reads the segments directly and must be
+            dropped before releasing them.
+
+    Returns:
+        The value, and the shared memory segments it was read from
+    """
+    segments: list[SharedMemory] = []
+    buffers: list[Any] = []
+    for block in packed.buffers:
+        if isinstance(block, SharedBlock):
+            segment = SharedMemory(name=block.name)
+            segments.append(segment)
+            view = segment.buf[: block.size]
+            buffers.append(bytearray(view) if copy else view)
+            if copy:
+                view.release()
+        else:
+            buffers.append(block)
+    return pickle.loads(packed.data, buffers=buffers), segments
+
+
+def release_segments(segments: list[SharedMemory], unlink: bool) -> None:
+    """
+    Close shared memory segments, and unlink them when this process owns them.
+
+    A segment still read by a live object stays mapped until that object is gone.
+
+    Args:
+        segments: Segments to release
+        unlink: Remove the segments, after which they can't be attached anymore
+    """
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            # Still exported, the mapping is freed with the last reference
+            pass
+        if unlink:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def run_packed(
+    func: Callable[[dict[str, Any]], Any],
+    packed: PackedState,
+    min_shared_bytes: int = SHARED_MEMORY_MIN_BYTES,
+) -> PackedState:
+    """
+    Run a node function on a packed state in a pool process.
+
+    Input arrays in shared memory are read without copying. The returned updates
+    are packed for the engine process, which unlinks their segments.
+
+    Args:
+        func: Module-level node function
+        packed: The packed state
+        min_shared_bytes: Size from which an update buffer goes to shared memory
+
+    Returns:
+        The packed updates of the node
+    """
+    state, segments = unpack_state(packed, copy=False)
+    updates = None
+    try:
+        updates = func(state)
+        result, created = pack_state(updates, min_shared_bytes)
+        # The engine process reads and unlinks them
+        release_segments(created, unlink=False)
+        return result
+    finally:
+        # Drop the arrays reading the input segments before closing them
+        state = updates = None
+        release_segments(segments, unlink=False)
+
+
+def discard_result(future: Future) -> None:
+    """Unlink the segments of a process result nobody waits for anymore."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    packed: PackedState = future.result()
+    for block in packed.buffers:
+        if isinstance(block, SharedBlock):
+            try:
+                segment = SharedMemory(name=block.name)
+            except FileNotFoundError:
+                continue
+            release_segments([segment], unlink=True)
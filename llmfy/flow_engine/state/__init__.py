@@ -1,4 +1,14 @@
 from .memory_manager import MemoryManager
+from .node_state import StrictNodeState, project_state
+from .snapshot import SnapshotBuilder
+from .state_deserializer import StateDeserializer
 from .workflow_state import WorkflowState
 
-__all__ = ["WorkflowState", "MemoryManager"]
+__all__ = [
+    "WorkflowState",
+    "MemoryManager",
+    "SnapshotBuilder",
+    "StateDeserializer",
+    "StrictNodeState",
+    "project_state",
+]
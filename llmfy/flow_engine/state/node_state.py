@@ -0,0 +1,59 @@
+from typing import Any
+
+from llmfy.exception.llmfy_exception import LLMfyException
+
+
+class StrictNodeState(dict):
+    """
+    State passed to a node with `reads=` declarations when the engine runs with
+    `strict_io=True`.
+
+    Reading a key the node did not declare raises instead of silently missing
+    from the projected state.
+    """
+
+    __slots__ = ("node_name", "reads")
+
+    def __init__(self, values: dict[str, Any], node_name: str, reads: frozenset[str]):
+        super().__init__(values)
+        self.node_name = node_name
+        self.reads = reads
+
+    def _undeclared(self, key: Any) -> LLMfyException:
+        return LLMfyException(
+            f"Node '{self.node_name}' reads '{key}' which is not in its reads="
+        )
+
+    def __missing__(self, key: Any) -> Any:
+        if key in self.reads:
+            raise KeyError(key)
+        raise self._undeclared(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key not in self.reads:
+            raise self._undeclared(key)
+        return super().get(key, default)
+
+
+def project_state(
+    state: dict[str, Any],
+    node_name: str,
+    reads: frozenset[str],
+    strict: bool = False,
+) -> dict[str, Any]:
+    """
+    Keep only the state keys a node declared it reads.
+
+    Args:
+        state: State the node would receive
+        node_name: Name of the node
+        reads: Keys the node reads
+        strict: Raise when the node reads any other key
+
+    Returns:
+        The projected state, a new dict
+    """
+    values = {key: state[key] for key in reads if key in state}
+    if strict:
+        return StrictNodeState(values, node_name, reads)
+    return values
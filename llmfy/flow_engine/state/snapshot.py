@@ -0,0 +1,134 @@
+from copy import deepcopy
+from typing import Any
+
+# Immutable values are shared as is instead of copied
+_ATOMIC_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+class SnapshotBuilder:
+    """
+    Builds copy-on-write snapshots of a run state for checkpoints.
+
+    A snapshot copies the state keys written since the previous snapshot,
+    unwritten keys share the copy taken earlier. For list and dict values,
+    elements that are the same objects as in the previous snapshot and still
+    equal to their earlier copy are shared too, so appending to a `messages`
+    list through a reducer, in place or not, only copies the new messages.
+
+    Nodes must return the keys they change, a value changed in place without
+    being returned is only picked up by the next snapshot writing its key.
+    Snapshots are never mutated once taken, so checkpointers can keep them
+    without copying.
+    """
+
+    def __init__(self):
+        # Last snapshot taken
+        self._snapshot: dict[str, Any] = {}
+        # Key -> (live elements, copied elements) of list and dict values
+        self._elements: dict[str, tuple[Any, Any]] = {}
+        # Changes of the last snapshot against the one before, see `take`
+        self.updates: dict[str, Any] = {}
+        self.appends: dict[str, list[Any]] = {}
+
+    def take(
+        self, state: dict[str, Any], keys: set[str] | None = None
+    ) -> dict[str, Any]:
+        """
+        Take a snapshot of the state.
+
+        Afterwards `updates` holds the keys replaced since the previous snapshot
+        and `appends` the items appended to list keys, both as snapshot copies.
+
+        Args:
+            state: Live state of the run
+            keys: Keys updated since the previous snapshot, only these are
+                compared. None compares every key.
+
+        Returns:
+            A snapshot isolated from later changes of the live state
+        """
+        self.updates = {}
+        self.appends = {}
+        if keys is not None and self._snapshot:
+            snapshot = dict(self._snapshot)
+            # Written keys are copied even when their value is the same object,
+            # a reducer may have changed it in place
+            for key in keys:
+                snapshot[key] = self._copy(key, state[key])
+            self._snapshot = snapshot
+            return snapshot
+
+        snapshot = {key: self._copy(key, value) for key, value in state.items()}
+        self._snapshot = snapshot
+        return snapshot
+
+    def _copy(self, key: str, value: Any) -> Any:
+        """Copy a changed value, sharing elements copied by the previous snapshot."""
+        if isinstance(value, _ATOMIC_TYPES):
+            self._elements.pop(key, None)
+            self.updates[key] = value
+            return value
+
+        if type(value) is list:
+            previous, copies = self._elements.get(key, (None, ()))
+            copied = []
+            # Length of the unchanged prefix
+            prefix = 0
+            for i, item in enumerate(value):
+                if (
+                    i < len(copies)
+                    and previous[i] is item  # type: ignore
+                    and _unchanged(copies[i], item)
+                ):
+                    copied.append(copies[i])
+                    if prefix == i:
+                        prefix += 1
+                else:
+                    copied.append(_copy_item(item))
+            self._elements[key] = (tuple(value), copied)
+
+            if previous is not None and prefix == len(previous):
+                # Previous items kept in place, only new items were appended
+                if len(copied) > prefix:
+                    self.appends[key] = copied[prefix:]
+                return list(copied)
+            self.updates[key] = list(copied)
+            return self.updates[key]
+
+        if type(value) is dict:
+            previous, copies = self._elements.get(key, ({}, {}))
+            copied = {}
+            for item_key, item in value.items():
+                if (
+                    item_key in previous
+                    and previous[item_key] is item
+                    and _unchanged(copies[item_key], item)
+                ):
+                    copied[item_key] = copies[item_key]
+                else:
+                    copied[item_key] = _copy_item(item)
+            self._elements[key] = (dict(value), copied)
+            self.updates[key] = dict(copied)
+            return self.updates[key]
+
+        self._elements.pop(key, None)
+        self.updates[key] = deepcopy(value)
+        return self.updates[key]
+
+
+def _copy_item(item: Any) -> Any:
+    """Deep copy a single element unless it is immutable."""
+    if isinstance(item, _ATOMIC_TYPES):
+        return item
+    return deepcopy(item)
+
+
+def _unchanged(copy: Any, item: Any) -> bool:
+    """Whether an element still equals the copy taken of it, by content."""
+    if isinstance(item, _ATOMIC_TYPES):
+        return True
+    try:
+        return bool(copy == item)
+    except Exception:
+        # No usable equality, e.g. arrays, copy again
+        return False
@@ -0,0 +1,247 @@
+import inspect
+import types
+from collections.abc import Callable
+from typing import Annotated, Any, Union, get_args, get_origin, is_typeddict
+
+# Converts one checkpointed value to its schema type
+Converter = Callable[[Any], Any]
+
+# Simple types a value is cast to when it has another type
+_CAST_TYPES = (int, float, str, bool)
+
+
+def _is_serialized_object(value: dict) -> bool:
+    """Check if a dict looks like a serialized object."""
+    # Common patterns for serialized objects
+    return (
+        "__type__" in value
+        or "__class__" in value
+        or "__module__" in value
+        or (len(value) > 0 and not any(k.startswith("_") for k in value.keys()))
+    )
+
+
+def _compile_builder(cls: type) -> Callable[[dict[str, Any]], Any]:
+    """
+    Compile a function creating an instance of `cls` from its attribute dict.
+
+    The constructor signature is inspected once here instead of once per object.
+
+    Args:
+        cls: The class to instantiate
+
+    Returns:
+        Function taking the object data and returning the instance
+    """
+    # Pydantic models validate their own fields, including nested models
+    model_validate = getattr(cls, "model_validate", None)
+    if callable(model_validate):
+        return model_validate
+
+    try:
+        params = list(inspect.signature(cls.__init__).parameters)[1:]  # Skip 'self'
+    except (TypeError, ValueError):
+        params = []
+
+    def build(obj_data: dict[str, Any]) -> Any:
+        # Match constructor parameters, set remaining attributes after
+        init_args = {param: obj_data[param] for param in params if param in obj_data}
+        obj = cls(**init_args)
+        for key, value in obj_data.items():
+            if key not in init_args and not key.startswith("_"):
+                setattr(obj, key, value)
+        return obj
+
+    return build
+
+
+def _object_converter(cls: type) -> Converter:
+    """Compile the converter of a custom class field."""
+    build = _compile_builder(cls)
+
+    def convert(value: Any) -> Any:
+        if value is None or isinstance(value, cls):
+            return value
+        if not isinstance(value, dict) or not (
+            "__dict__" in value or _is_serialized_object(value)
+        ):
+            return value
+
+        # Handle checkpointer serialization format with __type__, __module__, data
+        if "__type__" in value and "__module__" in value and "data" in value:
+            obj_data = value["data"]
+        # Handle format with __dict__
+        elif "__dict__" in value:
+            obj_data = value["__dict__"]
+        else:
+            obj_data = value
+
+        try:
+            return build(obj_data)
+        except Exception:
+            # Keep the dict so the workflow can continue
+            return value
+
+    return convert
+
+
+def _cast_converter(cls: type) -> Converter:
+    """Compile the converter of an int, float, str or bool field."""
+
+    def convert(value: Any) -> Any:
+        if value is None or isinstance(value, cls):
+            return value
+        try:
+            return cls(value)
+        except (TypeError, ValueError):
+            return value
+
+    return convert
+
+
+def _list_converter(convert_item: Converter) -> Converter:
+    """Compile the converter of a `list[T]` field."""
+
+    def convert(value: Any) -> Any:
+        if not isinstance(value, list):
+            return value
+
+        # Values are mostly rebuilt already, only copy the list when one is not
+        for i, item in enumerate(value):
+            converted = convert_item(item)
+            if converted is not item:
+                return [
+                    *value[:i],
+                    converted,
+                    *(convert_item(rest) for rest in value[i + 1 :]),
+                ]
+        return value
+
+    return convert
+
+
+def _dict_converter(
+    convert_key: Converter | None, convert_value: Converter | None
+) -> Converter:
+    """Compile the converter of a `dict[K, V]` field."""
+    convert_key = convert_key or (lambda key: key)
+    convert_value = convert_value or (lambda value: value)
+
+    def convert(value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+
+        converted = {}
+        changed = False
+        for key, item in value.items():
+            new_key, new_item = convert_key(key), convert_value(item)
+            changed = changed or new_key is not key or new_item is not item
+            converted[new_key] = new_item
+        # Keep the original when nothing was rebuilt
+        return converted if changed else value
+
+    return convert
+
+
+def compile_converter(expected_type: Any) -> Converter | None:
+    """
+    Compile the converter of a value of the expected type.
+
+    Args:
+        expected_type: The expected type from the state schema
+
+    Returns:
+        Function rebuilding a checkpointed value, or None when values of this
+        type are kept as they are
+    """
+    # Any is a class from Python 3.11, it can't be used with isinstance()
+    if expected_type is Any:
+        return None
+
+    origin = get_origin(expected_type)
+
+    # Handle Annotated types - the first arg is the actual type
+    if origin is Annotated:
+        return compile_converter(get_args(expected_type)[0])
+
+    # Handle List types
+    if origin is list:
+        args = get_args(expected_type)
+        convert_item = compile_converter(args[0]) if args else None
+        return _list_converter(convert_item) if convert_item else None
+
+    # Handle Dict types
+    if origin is dict:
+        args = get_args(expected_type)
+        if len(args) < 2:
+            return None
+        convert_key = compile_converter(args[0])
+        convert_value = compile_converter(args[1])
+        if convert_key is None and convert_value is None:
+            return None
+        return _dict_converter(convert_key, convert_value)
+
+    # Handle Optional types, other unions are ambiguous and kept as they are
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(expected_type) if arg is not type(None)]
+        return compile_converter(args[0]) if len(args) == 1 else None
+
+    # Other generics, Any, TypeVars and TypedDicts are kept as they are
+    if origin is not None or not isinstance(expected_type, type):
+        return None
+    if is_typeddict(expected_type):
+        return None
+
+    # Handle primitive types
+    if expected_type in _CAST_TYPES:
+        return _cast_converter(expected_type)
+
+    # Builtin containers and other values that can't be a serialized object
+    if expected_type in (list, dict, tuple, set, frozenset, bytes, type(None)):
+        return None
+
+    # Handle custom class objects
+    return _object_converter(expected_type)
+
+
+class StateDeserializer:
+    """
+    Rebuilds checkpointed state values to the types of the state schema.
+
+    A converter is compiled per schema field when the engine is built, so typing
+    origins and constructor signatures are resolved once instead of for every
+    value of every resume. Values that already have their expected type are
+    returned as they are, and lists and dicts are only copied when an element
+    had to be rebuilt.
+    """
+
+    def __init__(self, type_hints: dict[str, Any]):
+        """
+        Compile the converters of the state schema.
+
+        Args:
+            type_hints: Field name -> type of the state schema, without reducers
+        """
+        self._converters: dict[str, Converter] = {}
+        for field_name, expected_type in type_hints.items():
+            converter = compile_converter(expected_type)
+            if converter is not None:
+                self._converters[field_name] = converter
+
+    def deserialize(self, state_dict: dict[str, Any]) -> dict[str, Any]:
+        """
+        Reconstruct the values of a checkpointed state.
+
+        Args:
+            state_dict: Dictionary with potentially serialized objects
+
+        Returns:
+            Dictionary with objects reconstructed to their proper types
+        """
+        converters = self._converters
+        return {
+            field_name: converters[field_name](value)
+            if field_name in converters
+            else value
+            for field_name, value in state_dict.items()
+        }
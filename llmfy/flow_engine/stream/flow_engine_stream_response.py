@@ -1,6 +1,6 @@
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from llmfy.flow_engine.node.node import Enum
 
@@ -14,7 +14,15 @@ class FlowEngineStreamType(str, Enum):
 
 
 class FlowEngineStreamResponse(BaseModel):
-    """FlowEngineStreamResponse"""
+    """
+    FlowEngineStreamResponse
+
+    Immutable, every event yielded by `FlowEngine.stream` is a new object that can
+    be buffered safely. `state` is a snapshot of the run state, its values are
+    shared with the run and must be treated as read-only.
+    """
+    model_config = ConfigDict(frozen=True)
+
     type: str | None = Field(default=None)
     node: str | None = Field(default=None)
     content: Any | None = Field(default=None)
@@ -35,7 +35,15 @@ class WorkflowVisualizer:
         for edge in edges:
             source = edge.source
             
-            if edge.condition is None:
+            if edge.join_sources is not None:
+                # Join edges
+                for target in edge.targets:
+                    mermaid.append(f"    {source} ==>|join| {target}")
+            elif edge.map is not None:
+                # Map edges
+                for target in edge.targets:
+                    mermaid.append(f"    {source} ==>|map {edge.map.items_key}| {target}")
+            elif edge.condition is None:
                 # Simple edges
                 for target in edge.targets:
                     mermaid.append(f"    {source} --> {target}")
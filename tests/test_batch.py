@@ -0,0 +1,107 @@
+import asyncio
+from typing import TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, FlowEngine, InMemoryCheckpointer
+
+
+class State(TypedDict):
+    x: int
+    y: int
+
+
+class Tracker:
+    """Counts the runs of the node, in flight and in total."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.started = 0
+        self.cancelled = 0
+
+
+def build(tracker: Tracker, checkpointer=None, fail_at=None, delay=0.001):
+    async def node(state):
+        tracker.started += 1
+        tracker.active += 1
+        tracker.max_active = max(tracker.max_active, tracker.active)
+        try:
+            if state["x"] == fail_at:
+                raise ValueError(f"input {fail_at} failed")
+            # Later inputs finish first
+            await asyncio.sleep(delay * (5 - state["x"] % 5))
+        except asyncio.CancelledError:
+            tracker.cancelled += 1
+            raise
+        finally:
+            tracker.active -= 1
+        return {"y": state["x"] * 2}
+
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("node", node)
+    flow.add_edge(START, "node")
+    flow.add_edge("node", END)
+    return flow.build()
+
+
+def test_outputs_in_input_order_with_bounded_concurrency():
+    tracker = Tracker()
+    flow = build(tracker)
+    result = asyncio.run(flow.batch([{"x": i} for i in range(12)], max_concurrency=3))
+
+    assert [output["y"] for output in result.outputs] == [i * 2 for i in range(12)]
+    assert tracker.max_active == 3
+    stats = result.get_stats()
+    assert (stats["total"], stats["failed"]) == (12, 0)
+    assert stats["throughput"] > 0
+
+
+def test_return_exceptions_keeps_going():
+    tracker = Tracker()
+    flow = build(tracker, fail_at=7)
+    result = asyncio.run(
+        flow.batch([{"x": i} for i in range(10)], return_exceptions=True)
+    )
+
+    assert isinstance(result.outputs[7], ValueError)
+    assert len(result.errors) == 1
+    assert result.outputs[8] == {"x": 8, "y": 16}
+    assert tracker.started == 10
+
+
+def test_first_error_cancels_the_other_runs():
+    tracker = Tracker()
+    flow = build(tracker, fail_at=1, delay=1)
+    inputs = [{"x": i} for i in range(20)]
+
+    with pytest.raises(ValueError, match="input 1 failed"):
+        asyncio.run(asyncio.wait_for(flow.batch(inputs, max_concurrency=2), 5))
+    # The failed worker may take one more input before the batch stops, the
+    # runs in flight are cancelled and the rest of the inputs never start
+    assert tracker.started <= 3
+    assert tracker.cancelled == tracker.started - 1
+    assert tracker.active == 0
+
+
+def test_as_completed_with_sessions():
+    async def run():
+        flow = build(Tracker(), InMemoryCheckpointer())
+        items = [
+            item
+            async for item in flow.batch_as_completed(
+                [{"x": 1}, {"x": 4}], session_ids=["a", "b"]
+            )
+        ]
+        # Input 4 sleeps the least
+        assert [item.index for item in items] == [1, 0]
+        assert [item.session_id for item in items] == ["b", "a"]
+        assert (await flow.get_state("b"))["y"] == 8
+
+        with pytest.raises(LLMfyException):
+            await flow.batch([{"x": 1}], session_ids=[])
+        with pytest.raises(LLMfyException):
+            await flow.batch([{"x": 1}], max_concurrency=0)
+
+    asyncio.run(run())
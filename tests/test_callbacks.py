@@ -0,0 +1,131 @@
+import asyncio
+import json
+from typing import TypedDict
+
+import pytest
+
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    FlowEngineCallback,
+    InMemoryCheckpointer,
+    NodeStreamResponse,
+    NodeStreamType,
+    TraceRecorder,
+)
+
+
+class State(TypedDict):
+    n: int
+
+
+def build(callbacks, checkpointer=None, fail=False, stream=False):
+    """Node `a` loops until n reaches 3, `s` is an optional stream node before it."""
+
+    async def a(state):
+        await asyncio.sleep(0.001)
+        if fail and state["n"] == 1:
+            raise ValueError("node failed")
+        return {"n": state["n"] + 1}
+
+    async def s(state):
+        yield NodeStreamResponse(type=NodeStreamType.STREAM, content="chunk")
+        yield NodeStreamResponse(
+            type=NodeStreamType.RESULT, content="done", state={"n": state["n"] + 1}
+        )
+
+    def route(state):
+        return "a" if state["n"] < 3 else END
+
+    flow = FlowEngine(State, checkpointer=checkpointer, callbacks=callbacks)
+    flow.add_node("a", a)
+    if stream:
+        flow.add_node("s", s, stream=True)
+        flow.add_edge(START, "s")
+        flow.add_edge("s", "a")
+    else:
+        flow.add_edge(START, "a")
+    flow.add_conditional_edge("a", ["a", END], route)
+    return flow.build()
+
+
+def test_recorder_stats_and_spans():
+    recorder = TraceRecorder(measure_checkpoint_bytes=True)
+    flow = build([recorder], InMemoryCheckpointer())
+    asyncio.run(flow.invoke({"n": 0}, session_id="s1"))
+
+    stats = recorder.get_stats()
+    assert (stats["runs"], stats["failed_runs"], stats["steps"]) == (1, 0, 3)
+    assert stats["nodes"]["a"]["count"] == 3
+    assert stats["nodes"]["a"]["errors"] == 0
+    assert stats["conditions"]["a"]["count"] == 3
+    assert stats["checkpoints"]["load"]["count"] == 1
+    assert stats["checkpoints"]["save"]["count"] == 4
+    assert stats["checkpoints"]["save"]["bytes"] > 0
+
+    exported = recorder.export_spans()
+    json.dumps(exported)
+    spans = exported["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    roots = [span for span in spans if "parentSpanId" not in span]
+    assert len(roots) == 1
+    assert all(span["traceId"] == roots[0]["traceId"] for span in spans)
+    # Run, 3 node runs, 3 conditions, 1 load and 4 saves
+    assert len(spans) == 1 + 3 + 3 + 5
+
+
+def test_checkpoint_bytes_off_by_default():
+    recorder = TraceRecorder()
+    flow = build([recorder], InMemoryCheckpointer())
+    asyncio.run(flow.invoke({"n": 0}, session_id="s1"))
+
+    assert recorder.get_stats()["checkpoints"]["save"]["bytes"] == 0
+
+
+def test_recorder_counts_errors_in_stream():
+    recorder = TraceRecorder(record_spans=False)
+    flow = build([recorder], fail=True, stream=True)
+
+    async def run():
+        with pytest.raises(ValueError):
+            async for _ in flow.stream({"n": 0}):
+                pass
+
+    asyncio.run(run())
+    stats = recorder.get_stats()
+    assert stats["failed_runs"] == 1
+    assert stats["nodes"]["s"]["count"] == 1
+    assert stats["nodes"]["a"]["errors"] == 1
+    assert not recorder.spans
+
+
+def test_failing_callback_warns_and_run_continues():
+    class Failing(FlowEngineCallback):
+        def on_node_end(self, ctx, node_name, duration):
+            raise RuntimeError("boom")
+
+    flow = build([Failing()])
+    with pytest.warns(RuntimeWarning, match="Failing.on_node_end failed"):
+        assert asyncio.run(flow.invoke({"n": 0}))["n"] == 3
+
+
+def test_export_to_opentelemetry():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    recorder = TraceRecorder()
+    asyncio.run(build([recorder]).invoke({"n": 0}))
+
+    replayed = recorder.export_to_opentelemetry(provider.get_tracer("test"))
+    spans = exporter.get_finished_spans()
+    assert replayed == len(spans) == 1 + 3 + 3
+    root = next(span for span in spans if span.parent is None)
+    assert all(span.context.trace_id == root.context.trace_id for span in spans)
+    assert not recorder.spans
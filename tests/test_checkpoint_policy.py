@@ -0,0 +1,109 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import CheckpointPolicy, InMemoryCheckpointer
+
+
+class State(TypedDict):
+    log: Annotated[list[str], operator.add]
+    count: int
+
+
+def build(checkpointer, policy=None, fail_at=None):
+    """
+    `tool` counts up to 10, `agent` runs after every 5th count: 12 steps after
+    START.
+    """
+    failures = [fail_at]
+
+    async def tool(state):
+        if failures[0] == state["count"]:
+            failures[0] = None
+            raise RuntimeError("tool failed")
+        return {"log": [f"t{state['count']}"], "count": state["count"] + 1}
+
+    async def agent(state):
+        return {"log": ["a"]}
+
+    flow = FlowEngine(State, checkpointer=checkpointer, checkpoint_policy=policy)
+    flow.add_node("tool", tool)
+    flow.add_node("agent", agent)
+    flow.add_edge(START, "tool")
+    flow.add_conditional_edge(
+        "tool", ["tool", "agent"], lambda s: "tool" if s["count"] % 5 else "agent"
+    )
+    flow.add_conditional_edge(
+        "agent", ["tool", END], lambda s: "tool" if s["count"] < 10 else END
+    )
+    return flow.build()
+
+
+def saved_steps(checkpointer) -> list[int]:
+    checkpoints = asyncio.run(checkpointer.list("s", limit=100))
+    return sorted(checkpoint.metadata.step for checkpoint in checkpoints)
+
+
+def expected_state() -> dict:
+    checkpointer = InMemoryCheckpointer()
+    return asyncio.run(build(checkpointer).invoke({"log": [], "count": 0}))
+
+
+@pytest.mark.parametrize(
+    "policy, steps",
+    [
+        (None, list(range(13))),
+        (CheckpointPolicy(every_n_steps=4), [0, 4, 8, 12]),
+        (CheckpointPolicy(every_n_steps=None, after_nodes=["agent"]), [6, 12]),
+        (CheckpointPolicy(every_n_steps=None, interval=3600), [0, 12]),
+        (CheckpointPolicy(every_n_steps=None), [12]),
+    ],
+    ids=["default", "every-n", "after-nodes", "interval", "end-only"],
+)
+def test_triggers(policy, steps):
+    checkpointer = InMemoryCheckpointer()
+    flow = build(checkpointer, policy)
+    asyncio.run(flow.invoke({"log": [], "count": 0}, session_id="s"))
+
+    assert saved_steps(checkpointer) == steps
+    # The checkpoint of the last step is always saved
+    assert asyncio.run(checkpointer.load("s")).state == expected_state()
+
+
+@pytest.mark.parametrize(
+    "policy",
+    [None, CheckpointPolicy(every_n_steps=3), CheckpointPolicy(every_n_steps=None)],
+    ids=["default", "every-n", "end-only"],
+)
+def test_resume_after_error(policy):
+    checkpointer = InMemoryCheckpointer()
+    flow = build(checkpointer, policy, fail_at=7)
+    with pytest.raises(RuntimeError):
+        asyncio.run(flow.invoke({"log": [], "count": 0}, session_id="s"))
+
+    # The run resumes at the failed step, with the state before it
+    result = asyncio.run(flow.invoke(None, session_id="s"))
+    assert result == expected_state()
+
+
+def test_no_checkpoint_on_error():
+    checkpointer = InMemoryCheckpointer()
+    policy = CheckpointPolicy(every_n_steps=None, on_error=False)
+    flow = build(checkpointer, policy, fail_at=7)
+    with pytest.raises(RuntimeError):
+        asyncio.run(flow.invoke({"log": [], "count": 0}, session_id="s"))
+
+    assert saved_steps(checkpointer) == []
+
+
+def test_invalid_policy():
+    with pytest.raises(LLMfyException):
+        CheckpointPolicy(every_n_steps=0)
+    with pytest.raises(LLMfyException):
+        CheckpointPolicy(interval=-1)
+    with pytest.raises(LLMfyException):
+        build(InMemoryCheckpointer(), CheckpointPolicy(after_nodes=["unknown"]))
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import UTC, datetime
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer import InMemoryCheckpointer
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointMetadata,
+)
+from llmfy.flow_engine.checkpointer.checkpoint_writer import CheckpointWriter
+
+
+class GatedCheckpointer(InMemoryCheckpointer):
+    """Holds the writes of one session until its gate opens."""
+
+    def __init__(self, gated_session_id: str):
+        super().__init__()
+        self.gated_session_id = gated_session_id
+        self.gate = asyncio.Event()
+
+    async def save_many(self, checkpoints):
+        if any(c.metadata.session_id == self.gated_session_id for c in checkpoints):
+            await self.gate.wait()
+        await super().save_many(checkpoints)
+
+
+def make_checkpoint(session_id: str, step: int = 0) -> Checkpoint:
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"{session_id}-{step}",
+        session_id=session_id,
+        timestamp=datetime.now(UTC),
+        node_name="node",
+        step=step,
+    )
+    return Checkpoint(metadata=metadata, state={"step": step})
+
+
+def test_flush_writes_every_checkpoint():
+    async def run():
+        checkpointer = InMemoryCheckpointer()
+        writer = CheckpointWriter(checkpointer, batch_size=2)
+        for step in range(5):
+            await writer.put(make_checkpoint("s", step))
+        await writer.flush()
+
+        assert writer.queued == 0
+        assert len(await checkpointer.list("s")) == 5
+        await writer.close()
+
+    asyncio.run(run())
+
+
+def test_flush_of_a_session_skips_other_sessions():
+    async def run():
+        checkpointer = GatedCheckpointer("slow")
+        writer = CheckpointWriter(checkpointer)
+        await writer.put(make_checkpoint("fast"))
+        await writer.flush("fast")
+        await writer.put(make_checkpoint("slow"))
+
+        # Nothing of "fast" is pending, the write of "slow" is held
+        await asyncio.wait_for(writer.flush("fast"), timeout=1)
+        await writer.flush("other")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(writer.flush("slow"), timeout=0.05)
+
+        checkpointer.gate.set()
+        await asyncio.wait_for(writer.flush("slow"), timeout=1)
+        assert await checkpointer.load("slow") is not None
+        await writer.close()
+
+    asyncio.run(run())
+
+
+def test_flush_raises_write_failure():
+    class FailingCheckpointer(InMemoryCheckpointer):
+        async def save_many(self, checkpoints):
+            raise RuntimeError("down")
+
+    async def run():
+        writer = CheckpointWriter(FailingCheckpointer())
+        await writer.put(make_checkpoint("s"))
+        with pytest.raises(LLMfyException):
+            await writer.flush("s")
+        await writer.close()
+
+    asyncio.run(run())
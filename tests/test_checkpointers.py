@@ -0,0 +1,239 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import (
+    FileLogCheckpointer,
+    InMemoryCheckpointer,
+    RedisCheckpointer,
+    RetentionPolicy,
+    SQLCheckpointer,
+    TieredCheckpointer,
+)
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointDelta,
+    CheckpointMetadata,
+)
+
+BACKENDS = [
+    "memory",
+    "redis",
+    "redis-lua",
+    "sqlite",
+    "sqlite-async",
+    "filelog",
+    "tiered",
+]
+
+
+def add(old: list | None, new: list) -> list:
+    return new if old is None else old + new
+
+
+class State(TypedDict):
+    n: int
+    log: Annotated[list[int], add]
+
+
+@pytest.fixture(params=BACKENDS)
+def make_checkpointer(request, tmp_path):
+    """Factory of checkpointers of one backend, each with its own storage."""
+    backend = request.param
+    created = 0
+
+    def make(snapshot_interval: int = 3, retention: RetentionPolicy | None = None):
+        nonlocal created
+        created += 1
+        path = tmp_path / f"{backend}-{created}"
+        kwargs = {"snapshot_interval": snapshot_interval, "retention": retention}
+        if backend == "memory":
+            return InMemoryCheckpointer(**kwargs)
+        if backend.startswith("redis"):
+            fakeredis = pytest.importorskip("fakeredis")
+            checkpointer = RedisCheckpointer(
+                prefix=f"test{created}:", use_lua=backend == "redis-lua", **kwargs
+            )
+            checkpointer._client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+            return checkpointer
+        if backend == "filelog":
+            return FileLogCheckpointer(str(path), segment_size=4096, **kwargs)
+        pytest.importorskip("sqlalchemy")
+        if backend == "sqlite-async":
+            pytest.importorskip("aiosqlite")
+            return SQLCheckpointer(f"sqlite+aiosqlite:///{path}.db", **kwargs)
+        if backend == "tiered":
+            return TieredCheckpointer(
+                InMemoryCheckpointer(max_sessions=2),
+                SQLCheckpointer(f"sqlite:///{path}.db", **kwargs),
+            )
+        return SQLCheckpointer(f"sqlite:///{path}.db", **kwargs)
+
+    return make
+
+
+async def close(checkpointer) -> None:
+    close = getattr(checkpointer, "close", None)
+    if close is not None:
+        await close()
+
+
+def build(checkpointer, steps: int):
+    """Flow counting `n` up to `steps`, logging every value it passes."""
+
+    async def step(state):
+        return {"n": state["n"] + 1, "log": [state["n"]]}
+
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("step", step)
+    flow.add_edge(START, "step")
+    flow.add_conditional_edge(
+        "step", ["step", END], lambda state: "step" if state["n"] < steps else END
+    )
+    return flow.build()
+
+
+def assert_consistent(checkpoints: list[Checkpoint]) -> None:
+    for checkpoint in checkpoints:
+        assert checkpoint.state["log"] == list(range(checkpoint.state["n"]))
+
+
+def make_checkpoint(
+    session_id: str, step: int, timestamp: datetime, full: bool
+) -> Checkpoint:
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"{session_id}-{step}",
+        session_id=session_id,
+        timestamp=timestamp,
+        node_name="step",
+        step=step,
+        parent_id=f"{session_id}-{step - 1}" if step else None,
+    )
+    delta = None
+    if not full:
+        delta = CheckpointDelta(updates={"n": step}, appends={"log": [step - 1]})
+    state = {"n": step, "log": list(range(step))}
+    return Checkpoint(metadata=metadata, state=state, delta=delta)
+
+
+def test_save_load_list(make_checkpointer):
+    async def run():
+        checkpointer = make_checkpointer()
+        try:
+            await build(checkpointer, 10).invoke({"n": 0, "log": []}, session_id="s")
+
+            latest = await checkpointer.load("s")
+            assert latest.state == {"n": 10, "log": list(range(10))}
+
+            listed = await checkpointer.list("s", limit=100)
+            assert [c.state["n"] for c in listed] == list(range(10, -1, -1))
+            assert_consistent(listed)
+            assert len(await checkpointer.list("s", limit=4)) == 4
+
+            middle = listed[5]
+            loaded = await checkpointer.load("s", middle.metadata.checkpoint_id)
+            assert loaded.state == middle.state
+            assert loaded.metadata.parent_id == listed[6].metadata.checkpoint_id
+
+            assert await checkpointer.load("other") is None
+            assert await checkpointer.list("other") == []
+        finally:
+            await close(checkpointer)
+
+    asyncio.run(run())
+
+
+def test_session_continues(make_checkpointer):
+    async def run():
+        checkpointer = make_checkpointer()
+        try:
+            await build(checkpointer, 5).invoke({"n": 0, "log": []}, session_id="s")
+            result = await build(checkpointer, 8).invoke({"n": 5}, session_id="s")
+
+            assert result["log"] == list(range(8))
+            assert (await checkpointer.load("s")).state["n"] == 8
+            assert_consistent(await checkpointer.list("s", limit=100))
+        finally:
+            await close(checkpointer)
+
+    asyncio.run(run())
+
+
+def test_delete(make_checkpointer):
+    async def run():
+        checkpointer = make_checkpointer()
+        try:
+            flow = build(checkpointer, 10)
+            await flow.invoke({"n": 0, "log": []}, session_id="s")
+            await flow.invoke({"n": 0, "log": []}, session_id="t")
+            listed = await checkpointer.list("s", limit=100)
+
+            # Deltas based on the deleted checkpoints are rebuilt without them
+            for checkpoint in listed[3:7]:
+                await checkpointer.delete("s", checkpoint.metadata.checkpoint_id)
+            remaining = await checkpointer.list("s", limit=100)
+            assert [c.state for c in remaining] == [
+                c.state for c in listed[:3] + listed[7:]
+            ]
+            result = await build(checkpointer, 12).invoke(None, session_id="s")
+            assert result["log"] == list(range(12))
+
+            await checkpointer.delete("s")
+            assert await checkpointer.load("s") is None
+            assert (await checkpointer.load("t")).state["n"] == 10
+
+            await checkpointer.clear_all()
+            assert await checkpointer.load("t") is None
+        finally:
+            await close(checkpointer)
+
+    asyncio.run(run())
+
+
+def test_retention_prunes_on_save(make_checkpointer):
+    async def run():
+        checkpointer = make_checkpointer(
+            snapshot_interval=3, retention=RetentionPolicy(max_checkpoints=5)
+        )
+        try:
+            await build(checkpointer, 30).invoke({"n": 0, "log": []}, session_id="s")
+
+            listed = await checkpointer.list("s", limit=100)
+            # Whole delta chains go, up to two chains more than the limit stay
+            assert 5 <= len(listed) <= 5 + 2 * 3
+            assert listed[0].state["n"] == 30
+            assert_consistent(listed)
+        finally:
+            await close(checkpointer)
+
+    asyncio.run(run())
+
+
+def test_compact_removes_expired_sessions(make_checkpointer):
+    async def run():
+        checkpointer = make_checkpointer(
+            snapshot_interval=4, retention=RetentionPolicy(max_age=3600)
+        )
+        try:
+            old = datetime.now(UTC) - timedelta(hours=5)
+            for step in range(6):
+                checkpoint = make_checkpoint(
+                    "old", step, old + timedelta(seconds=step), full=step == 0
+                )
+                await checkpointer.save(checkpoint)
+            await build(checkpointer, 5).invoke({"n": 0, "log": []}, session_id="new")
+
+            # Saving the full snapshot at step 4 pruned the chain before it, but
+            # saving never prunes the latest checkpoint of a session
+            assert (await checkpointer.load("old")).state["n"] == 5
+
+            assert await checkpointer.compact() == 2
+            assert await checkpointer.load("old") is None
+            assert (await checkpointer.load("new")).state["n"] == 5
+        finally:
+            await close(checkpointer)
+
+    asyncio.run(run())
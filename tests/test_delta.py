@@ -0,0 +1,111 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointDelta,
+    CheckpointMetadata,
+)
+from llmfy.flow_engine.checkpointer.delta import (
+    DeltaChains,
+    StoredCheckpoint,
+    materialize,
+    rebase_dependents,
+    replay,
+)
+from llmfy.flow_engine.checkpointer.serializer import JsonSerializer
+
+
+def make_checkpoint(step: int, session_id: str = "s") -> Checkpoint:
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"c{step}",
+        session_id=session_id,
+        timestamp=datetime.now(UTC),
+        node_name="step",
+        step=step,
+        parent_id=f"c{step - 1}" if step else None,
+    )
+    delta = CheckpointDelta(updates={"n": step}, appends={"log": [step - 1]})
+    state = {"n": step, "log": list(range(step))}
+    return Checkpoint(metadata=metadata, state=state, delta=delta if step else None)
+
+
+def store(checkpoints: list[Checkpoint], snapshot_interval: int):
+    chains = DeltaChains(snapshot_interval)
+    stored = [
+        StoredCheckpoint.from_checkpoint(c, chains.next_chain(c)) for c in checkpoints
+    ]
+    return stored, {item.metadata.checkpoint_id: item for item in stored}
+
+
+def test_chains_restart_every_snapshot_interval():
+    stored, _ = store([make_checkpoint(step) for step in range(7)], 3)
+
+    assert [item.kind for item in stored] == ["full", "delta", "delta"] * 2 + ["full"]
+    assert stored[2].chain == ["c0", "c1"]
+    assert stored[4].chain == ["c3"]
+
+
+def test_checkpoint_without_parent_head_is_full():
+    chains = DeltaChains(10)
+    chains.next_chain(make_checkpoint(0))
+    checkpoint = make_checkpoint(2)
+
+    assert chains.next_chain(checkpoint) is None
+    chains.forget("s")
+    assert chains.next_chain(make_checkpoint(3)) is None
+
+
+def test_materialize():
+    checkpoints = [make_checkpoint(step) for step in range(7)]
+    stored, lookup = store(checkpoints, 4)
+
+    rebuilt = materialize(stored[::-1], lookup)
+
+    assert [c.state for c in rebuilt] == [c.state for c in checkpoints[::-1]]
+
+
+def test_materialize_missing_chain():
+    stored, lookup = store([make_checkpoint(step) for step in range(3)], 4)
+    del lookup["c0"]
+
+    with pytest.raises(LLMfyException):
+        materialize([stored[2]], lookup)
+
+
+def test_rebase_dependents():
+    stored, lookup = store([make_checkpoint(step) for step in range(5)], 10)
+
+    rewritten = rebase_dependents("c0", stored[1:], lookup)
+    for item in rewritten:
+        lookup[item.metadata.checkpoint_id] = item
+    del lookup["c0"]
+
+    assert rewritten[0].kind == "full"
+    assert lookup["c4"].chain == ["c1", "c2", "c3"]
+    assert [c.state for c in materialize([lookup["c4"]], lookup)] == [
+        {"n": 4, "log": [0, 1, 2, 3]}
+    ]
+
+
+def test_replay_leaves_base_unchanged():
+    base = {"n": 0, "log": [0]}
+    deltas = [
+        CheckpointDelta(appends={"log": [1]}),
+        CheckpointDelta(appends={"log": [2]}),
+    ]
+
+    assert replay(base, deltas) == {"n": 0, "log": [0, 1, 2]}
+    assert base == {"n": 0, "log": [0]}
+
+
+@pytest.mark.parametrize("serializer", [None, JsonSerializer()], ids=["text", "json"])
+def test_record_round_trip(serializer):
+    stored, _ = store([make_checkpoint(step) for step in range(2)], 10)
+
+    for item in stored:
+        record = item.to_record(serializer)
+        loaded = StoredCheckpoint.from_record(record, serializer)
+        assert loaded == item
@@ -0,0 +1,107 @@
+import asyncio
+from typing import TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    NodeStreamResponse,
+    NodeStreamType,
+)
+from llmfy.flow_engine.plan import DispatchKind, ExecutionPlan
+
+
+class State(TypedDict):
+    n: int
+    route: str
+
+
+def sync_node(state):
+    return {"n": state["n"] + 1}
+
+
+async def async_node(state):
+    return {}
+
+
+def sync_generator(state):
+    yield NodeStreamResponse(type=NodeStreamType.RESULT, content="", state={})
+
+
+async def async_generator(state):
+    yield NodeStreamResponse(type=NodeStreamType.RESULT, content="", state={})
+
+
+async def route(state):
+    return END
+
+
+def build():
+    flow = FlowEngine(State)
+    flow.add_node("sync", sync_node)
+    flow.add_node("async", async_node)
+    flow.add_node("sync_stream", sync_generator, stream=True)
+    flow.add_node("async_stream", async_generator, stream=True)
+    flow.add_edge(START, "sync")
+    flow.add_edge(START, "async")
+    flow.add_edge(["sync", "async"], "sync_stream")
+    flow.add_conditional_edge(
+        "sync_stream", ["async_stream", END], lambda state: state["route"]
+    )
+    flow.add_conditional_edge("async_stream", [END], route)
+    return flow
+
+
+def test_build_compiles_the_graph():
+    flow = build()
+    flow.build()
+    plan = flow._plan
+
+    assert isinstance(plan, ExecutionPlan)
+    kinds = {name: compiled.kind for name, compiled in plan.nodes.items()}
+    assert kinds == {
+        START: DispatchKind.NONE,
+        END: DispatchKind.NONE,
+        "sync": DispatchKind.SYNC,
+        "async": DispatchKind.ASYNC,
+        "sync_stream": DispatchKind.SYNC_GENERATOR,
+        "async_stream": DispatchKind.ASYNC_GENERATOR,
+    }
+
+    [start, start_async] = plan.nodes[START].edges
+    assert (start.targets, start_async.targets) == (["sync"], ["async"])
+    [join] = plan.nodes["sync"].edges
+    assert join.targets == ["sync_stream"]
+    assert join.join_sources == frozenset({"sync", "async"})
+    [condition] = plan.nodes["sync_stream"].edges
+    assert condition.targets == ["async_stream", END]
+    assert condition.condition is not None and not condition.condition_is_async
+    assert plan.nodes["async_stream"].edges[0].condition_is_async
+    assert plan.nodes[END].edges == []
+    assert asyncio.run(flow.invoke({"n": 0, "route": "async_stream"}))["n"] == 1
+
+
+def test_changing_the_graph_needs_a_new_build():
+    flow = FlowEngine(State)
+    flow.add_node("first", sync_node)
+    flow.add_edge(START, "first")
+    flow.add_edge("first", END)
+    flow.build()
+    assert asyncio.run(flow.invoke({"n": 0}))["n"] == 1
+
+    flow.add_node("second", async_node)
+    with pytest.raises(LLMfyException):
+        asyncio.run(flow.invoke({"n": 0}))
+    flow.add_edge(START, "second")
+    flow.add_edge("second", END)
+    flow.build()
+
+    assert flow._plan.nodes["second"].kind == DispatchKind.ASYNC
+    assert [edge.targets for edge in flow._plan.nodes[START].edges] == [
+        ["first"],
+        ["second"],
+    ]
+    assert asyncio.run(flow.invoke({"n": 0}))["n"] == 1
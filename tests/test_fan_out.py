@@ -0,0 +1,166 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, FlowEngine, InMemoryCheckpointer
+
+
+class State(TypedDict):
+    log: Annotated[list[str], operator.add]
+    total: int
+
+
+def logging_node(name: str):
+    async def node(state):
+        await asyncio.sleep(0)
+        return {"log": [name]}
+
+    return node
+
+
+def test_branches_run_concurrently_and_join():
+    async def run():
+        arrived = 0
+        all_arrived = asyncio.Event()
+
+        def branch(name: str):
+            async def node(state):
+                nonlocal arrived
+                arrived += 1
+                if arrived == 3:
+                    all_arrived.set()
+                # Only returns when the other branches run at the same time
+                await asyncio.wait_for(all_arrived.wait(), 1)
+                return {"log": [name]}
+
+            return node
+
+        flow = FlowEngine(State)
+        flow.add_node("root", logging_node("root"))
+        flow.add_node("join", lambda state: {"total": len(state["log"])})
+        flow.add_edge(START, "root")
+        for name in ("a", "b", "c"):
+            flow.add_node(name, branch(name))
+            flow.add_edge("root", name)
+            flow.add_edge(name, "join")
+        flow.add_edge("join", END)
+        flow.build()
+
+        result = await flow.invoke({"log": []})
+        # Updates of one step are merged in the order the branches were added
+        assert result == {"log": ["root", "a", "b", "c"], "total": 4}
+
+    asyncio.run(run())
+
+
+def build_join(checkpointer=None, a2=None):
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("a1", logging_node("a1"))
+    flow.add_node("a2", a2 or logging_node("a2"))
+    flow.add_node("b", logging_node("b"))
+    flow.add_node("join", logging_node("join"))
+    flow.add_edge(START, "a1")
+    flow.add_edge(START, "b")
+    flow.add_edge("a1", "a2")
+    flow.add_edge(["a2", "b"], "join")
+    flow.add_edge("join", END)
+    return flow.build()
+
+
+def test_join_waits_for_branches_of_unequal_length():
+    async def run():
+        checkpointer = InMemoryCheckpointer()
+        result = await build_join(checkpointer).invoke({"log": []}, session_id="s")
+
+        assert result["log"] == ["a1", "b", "a2", "join"]
+        checkpoints = list(reversed(await checkpointer.list("s", limit=10)))
+        assert [c.metadata.next_nodes for c in checkpoints] == [
+            ["a1", "b"],
+            ["a2"],
+            ["join"],
+            [],
+        ]
+        assert checkpoints[1].metadata.pending_joins == {"join": ["b"]}
+
+    asyncio.run(run())
+
+
+def test_resume_keeps_pending_join():
+    async def run():
+        fail = True
+
+        def a2(state):
+            if fail:
+                raise RuntimeError("a2 failed")
+            return {"log": ["a2"]}
+
+        flow = build_join(InMemoryCheckpointer(), a2)
+        with pytest.raises(RuntimeError):
+            await flow.invoke({"log": []}, session_id="s")
+
+        fail = False
+        result = await flow.invoke(None, session_id="s")
+        assert result["log"] == ["a1", "b", "a2", "join"]
+
+    asyncio.run(run())
+
+
+def test_conflicting_updates_without_reducer_raise():
+    flow = FlowEngine(State)
+    flow.add_node("a", lambda state: {"total": 1})
+    flow.add_node("b", lambda state: {"total": 2})
+    flow.add_edge(START, "a")
+    flow.add_edge(START, "b")
+    flow.add_edge("a", END)
+    flow.add_edge("b", END)
+    flow.build()
+
+    with pytest.raises(LLMfyException, match="total"):
+        asyncio.run(flow.invoke({"log": []}))
+
+
+def test_failing_branch_cancels_the_others():
+    async def run():
+        cancelled = False
+
+        async def slow(state):
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        async def failing(state):
+            raise ValueError("failed")
+
+        flow = FlowEngine(State)
+        flow.add_node("slow", slow)
+        flow.add_node("failing", failing)
+        flow.add_edge(START, "slow")
+        flow.add_edge(START, "failing")
+        flow.add_edge("slow", END)
+        flow.add_edge("failing", END)
+        flow.build()
+
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(flow.invoke({"log": []}), 5)
+        assert cancelled
+
+    asyncio.run(run())
+
+
+def test_condition_fans_out_to_several_nodes():
+    flow = FlowEngine(State)
+    flow.add_node("route", lambda state: {})
+    flow.add_edge(START, "route")
+    flow.add_conditional_edge("route", ["a", "b", "c"], lambda state: ["a", "c"])
+    for name in ("a", "b", "c"):
+        flow.add_node(name, logging_node(name))
+        flow.add_edge(name, END)
+    flow.build()
+
+    assert asyncio.run(flow.invoke({"log": []}))["log"] == ["a", "c"]
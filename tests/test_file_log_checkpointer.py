@@ -0,0 +1,205 @@
+import asyncio
+import os
+import threading
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.checkpointer import (
+    FileLogCheckpointer,
+    FsyncMode,
+    RetentionPolicy,
+)
+
+
+def add(old: list | None, new: list) -> list:
+    return new if old is None else old + new
+
+
+class State(TypedDict):
+    n: int
+    log: Annotated[list[int], add]
+
+
+def build(checkpointer, steps: int):
+    async def step(state):
+        return {"n": state["n"] + 1, "log": [state["n"]]}
+
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("step", step)
+    flow.add_edge(START, "step")
+    flow.add_conditional_edge(
+        "step", ["step", END], lambda state: "step" if state["n"] < steps else END
+    )
+    return flow.build()
+
+
+def last_segment(directory) -> str:
+    segments = sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+    return os.path.join(directory, segments[-1])
+
+
+@pytest.mark.parametrize("fsync", list(FsyncMode))
+def test_reopen(tmp_path, fsync):
+    async def run():
+        checkpointer = FileLogCheckpointer(
+            str(tmp_path), segment_size=2048, fsync=fsync, snapshot_interval=4
+        )
+        await build(checkpointer, 20).invoke({"n": 0, "log": []}, session_id="s")
+        assert checkpointer.get_stats()["segments"] > 1
+        await checkpointer.close()
+
+        # From the index written on close, then by scanning every segment
+        for remove_index in (False, True):
+            if remove_index:
+                os.remove(tmp_path / FileLogCheckpointer.INDEX_FILE)
+            reopened = FileLogCheckpointer(str(tmp_path))
+            listed = await reopened.list("s", limit=100)
+            assert [c.state["n"] for c in listed] == list(range(20, -1, -1))
+            assert listed[0].state["log"] == list(range(20))
+            await reopened.close()
+
+    asyncio.run(run())
+
+
+def test_torn_record_is_dropped(tmp_path):
+    async def run():
+        checkpointer = FileLogCheckpointer(str(tmp_path))
+        await build(checkpointer, 3).invoke({"n": 0, "log": []}, session_id="s")
+        await checkpointer.close()
+        # A crash in the middle of an append
+        with open(last_segment(tmp_path), "ab") as file:
+            file.write(b"P\x05\x00partial")
+        os.remove(tmp_path / FileLogCheckpointer.INDEX_FILE)
+
+        with pytest.warns(RuntimeWarning):
+            reopened = FileLogCheckpointer(str(tmp_path))
+            assert (await reopened.load("s")).state["n"] == 3
+        # Appended where the torn record started
+        await build(reopened, 5).invoke(None, session_id="s")
+        await reopened.close()
+        os.remove(tmp_path / FileLogCheckpointer.INDEX_FILE)
+
+        again = FileLogCheckpointer(str(tmp_path))
+        assert (await again.load("s")).state["log"] == list(range(5))
+        await again.close()
+
+    asyncio.run(run())
+
+
+def test_corrupted_record_fails_crc(tmp_path):
+    async def run():
+        checkpointer = FileLogCheckpointer(str(tmp_path), snapshot_interval=1)
+        await build(checkpointer, 3).invoke({"n": 0, "log": []}, session_id="s")
+        await checkpointer.close()
+        path = last_segment(tmp_path)
+        with open(path, "r+b") as file:
+            file.seek(os.path.getsize(path) - 2)
+            file.write(b"\xff")
+        os.remove(tmp_path / FileLogCheckpointer.INDEX_FILE)
+
+        with pytest.warns(RuntimeWarning):
+            reopened = FileLogCheckpointer(str(tmp_path))
+            assert (await reopened.load("s")).state["n"] == 2
+        await reopened.close()
+
+    asyncio.run(run())
+
+
+def test_compaction(tmp_path):
+    async def run():
+        checkpointer = FileLogCheckpointer(
+            str(tmp_path),
+            segment_size=4096,
+            snapshot_interval=3,
+            retention=RetentionPolicy(max_checkpoints=5),
+        )
+        for session in range(3):
+            await build(checkpointer, 40).invoke(
+                {"n": 0, "log": []}, session_id=f"s{session}"
+            )
+        before = checkpointer.get_stats()
+        assert before["garbage_ratio"] > 0.5
+
+        await checkpointer.compact()
+
+        after = checkpointer.get_stats()
+        assert after["total_bytes"] < before["total_bytes"] / 2
+        for session in range(3):
+            listed = await checkpointer.list(f"s{session}", limit=100)
+            assert 5 <= len(listed) <= 5 + 2 * 3
+            assert listed[0].state["log"] == list(range(40))
+        await checkpointer.close()
+
+        reopened = FileLogCheckpointer(str(tmp_path))
+        assert (await reopened.load("s2")).state["n"] == 40
+        assert reopened.get_stats()["total_checkpoints"] == after["total_checkpoints"]
+        await reopened.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"segment_size": 0}, {"compact_threshold": 0}, {"sync_interval": 0}]
+)
+def test_invalid_settings(tmp_path, kwargs):
+    with pytest.raises(LLMfyException):
+        FileLogCheckpointer(str(tmp_path), **kwargs)
+
+
+def test_failed_rewrite_leaves_no_files(tmp_path):
+    async def run():
+        checkpointer = FileLogCheckpointer(str(tmp_path), segment_size=2048)
+        await build(checkpointer, 20).invoke({"n": 0, "log": []}, session_id="s")
+        await checkpointer.close()
+        live = sorted(
+            (entry.segment, entry.frame_offset, checkpoint_id, entry)
+            for checkpoint_id, entry in checkpointer._entries.items()
+        )
+        segments = sorted({item[0] for item in live})
+        assert len(segments) > 1
+
+        # More records than fit in the segments they would replace
+        assert checkpointer._rewrite(segments[:1], live) is None
+        # A source segment that can't be read
+        missing = (99, 0, "missing", live[-1][3])
+        with pytest.raises(FileNotFoundError):
+            checkpointer._rewrite(segments, live + [missing])
+
+        assert not [name for name in os.listdir(tmp_path) if ".compact" in name]
+
+    asyncio.run(run())
+
+
+def test_compaction_syncs_off_the_event_loop(tmp_path, monkeypatch):
+    async def run():
+        checkpointer = FileLogCheckpointer(
+            str(tmp_path),
+            segment_size=4096,
+            snapshot_interval=3,
+            retention=RetentionPolicy(max_checkpoints=5),
+        )
+        await build(checkpointer, 40).invoke({"n": 0, "log": []}, session_id="s")
+
+        loop_thread = threading.get_ident()
+        loop_fsyncs = 0
+        fsync = os.fsync
+
+        def counting_fsync(fd):
+            nonlocal loop_fsyncs
+            if threading.get_ident() == loop_thread:
+                loop_fsyncs += 1
+            fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", counting_fsync)
+        await checkpointer._compact_segments()
+        monkeypatch.undo()
+
+        assert checkpointer.get_stats()["garbage_ratio"] == 0
+        assert loop_fsyncs == 0
+        assert (await checkpointer.load("s")).state["n"] == 40
+        await checkpointer.close()
+
+    asyncio.run(run())
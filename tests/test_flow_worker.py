@@ -0,0 +1,70 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    FlowWorker,
+    InMemoryCheckpointer,
+    InMemoryTaskQueue,
+)
+
+
+class State(TypedDict):
+    items: list[int]
+    item: int
+    seen: list[int]
+    out: Annotated[list, operator.add]
+
+
+def build(checkpointer, queue=None, task_timeout=None):
+    def split(state):
+        return {"items": [1, 2, 3], "seen": []}
+
+    def visit(state):
+        # Changes the state it was given in place
+        state["seen"].append(state["item"])
+        return {"out": [list(state["seen"])]}
+
+    flow = FlowEngine(
+        State, checkpointer=checkpointer, task_queue=queue, task_timeout=task_timeout
+    )
+    flow.add_node("split", split)
+    flow.add_node("visit", visit)
+    flow.add_edge(START, "split")
+    flow.add_map_edge("split", "visit", "items", "item")
+    flow.add_edge("visit", END)
+    return flow.build()
+
+
+def test_map_items_get_their_own_state():
+    async def run():
+        checkpointer = InMemoryCheckpointer()
+        queue = InMemoryTaskQueue()
+        worker = FlowWorker(build(checkpointer), queue)
+        running = asyncio.create_task(worker.run())
+
+        result = await build(checkpointer, queue).invoke({"items": [], "out": []})
+
+        worker.stop()
+        await running
+        assert result["out"] == [[1], [2], [3]]
+        assert worker.tasks_run == 4
+
+    asyncio.run(run())
+
+
+def test_lost_task_times_out():
+    async def run():
+        # No worker takes the task, like one that stopped while running it
+        flow = build(InMemoryCheckpointer(), InMemoryTaskQueue(), task_timeout=0.1)
+
+        with pytest.raises(LLMfyException, match="no result"):
+            await flow.invoke({"items": [], "out": []})
+
+    asyncio.run(run())
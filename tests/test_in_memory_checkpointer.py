@@ -0,0 +1,59 @@
+import asyncio
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.flow_engine import END, START, FlowEngine, InMemoryCheckpointer
+
+
+def extend(old: list | None, new: list) -> list:
+    """Reducer appending in place."""
+    old = old if old is not None else []
+    old.extend(new)
+    return old
+
+
+class State(TypedDict):
+    messages: Annotated[list, extend]
+
+
+def build(checkpointer):
+    async def reply(state):
+        return {"messages": ["reply"]}
+
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("reply", reply)
+    flow.add_edge(START, "reply")
+    flow.add_edge("reply", END)
+    return flow.build()
+
+
+def test_loaded_state_is_not_copied():
+    async def run():
+        checkpointer = InMemoryCheckpointer(snapshot_interval=1)
+        await build(checkpointer).invoke({"messages": ["hi"]}, session_id="s")
+
+        first = await checkpointer.load("s")
+        second = await checkpointer.load("s")
+        assert first.state == {"messages": ["hi", "reply"]}
+        assert first.state["messages"] is second.state["messages"]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("snapshot_interval", [1, 2])
+def test_resumed_run_keeps_history(snapshot_interval):
+    async def run():
+        checkpointer = InMemoryCheckpointer(snapshot_interval=snapshot_interval)
+        flow = build(checkpointer)
+        await flow.invoke({"messages": ["hi"]}, session_id="s")
+        before = [list(c.state["messages"]) for c in await checkpointer.list("s")]
+
+        # The resumed run extends the loaded list in place
+        await flow.invoke({"messages": ["again"]}, session_id="s")
+        after = [c.state["messages"] for c in await checkpointer.list("s", limit=20)]
+
+        assert after[-len(before) :] == before
+        assert after[0] == ["hi", "reply", "again", "reply"]
+
+    asyncio.run(run())
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, FlowEngine, InMemoryCheckpointer
+
+
+def add(old, new):
+    return (old or []) + new
+
+
+class State(TypedDict):
+    text: str
+    chunks: list[str]
+    chunk: str
+    summaries: Annotated[list[str], add]
+    final: str
+
+
+class Tracker:
+    """Counts the item runs in flight."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+
+def build(tracker=None, max_concurrency=None, checkpointer=None):
+    tracker = tracker or Tracker()
+
+    async def split(state):
+        return {"chunks": state["text"].split()}
+
+    async def summarize(state):
+        tracker.active += 1
+        tracker.max_active = max(tracker.max_active, tracker.active)
+        # Longer chunks finish later, so items finish out of order
+        await asyncio.sleep(0.001 * (5 - len(state["chunk"])))
+        tracker.active -= 1
+        return {"summaries": [state["chunk"].upper()]}
+
+    def join(state):
+        return {"final": "|".join(state["summaries"])}
+
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("split", split)
+    flow.add_node("summarize", summarize)
+    flow.add_node("join", join)
+    flow.add_edge(START, "split")
+    flow.add_map_edge(
+        "split",
+        "summarize",
+        items_key="chunks",
+        item_key="chunk",
+        max_concurrency=max_concurrency,
+    )
+    flow.add_edge("summarize", "join")
+    flow.add_edge("join", END)
+    return flow.build()
+
+
+def test_updates_merge_in_item_order():
+    tracker = Tracker()
+    flow = build(tracker, max_concurrency=2, checkpointer=InMemoryCheckpointer())
+    state = asyncio.run(
+        flow.invoke({"text": "a bb ccc dddd", "summaries": []}, session_id="s1")
+    )
+
+    assert state["final"] == "A|BB|CCC|DDDD"
+    assert tracker.max_active == 2
+    assert "Map Edges" in flow.details()
+
+
+def test_items_run_at_once_without_limit():
+    tracker = Tracker()
+    flow = build(tracker)
+    asyncio.run(flow.invoke({"text": "a bb ccc dddd", "summaries": []}))
+
+    assert tracker.max_active == 4
+
+
+def test_empty_list_continues():
+    flow = build()
+    state = asyncio.run(flow.invoke({"text": "", "summaries": []}))
+
+    assert state["final"] == ""
+
+
+def test_stream():
+    flow = build()
+
+    async def run():
+        return [event async for event in flow.stream({"text": "x y", "summaries": []})]
+
+    events = asyncio.run(run())
+    assert events[-1].state["final"] == "X|Y"
+
+
+def test_key_without_reducer_rejected():
+    class Plain(TypedDict):
+        items: list[int]
+        item: int
+        out: int
+
+    flow = FlowEngine(Plain)
+    flow.add_node("node", lambda state: {"out": state["item"]})
+    flow.add_map_edge(START, "node", "items", "item")
+    flow.add_edge("node", END)
+    flow.build()
+
+    with pytest.raises(LLMfyException, match="once per item"):
+        asyncio.run(flow.invoke({"items": [1, 2]}))
+
+
+def test_mixed_edges_into_target_rejected():
+    flow = FlowEngine(State)
+    flow.add_node("split", lambda state: {})
+    flow.add_node("node", lambda state: {})
+    flow.add_edge(START, "split")
+    flow.add_map_edge("split", "node", "chunks", "chunk")
+    flow.add_edge(START, "node")
+    flow.add_edge("node", END)
+
+    with pytest.raises(LLMfyException, match="map edge"):
+        flow.build()
+
+    with pytest.raises(LLMfyException):
+        flow.add_map_edge("split", "node", "chunks", "chunk", max_concurrency=0)
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+from datetime import UTC, datetime
+from enum import Enum
+from typing import TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import (
+    END,
+    START,
+    CachePolicy,
+    FlowEngine,
+    InMemoryNodeCache,
+    RedisNodeCache,
+)
+
+
+class State(TypedDict):
+    query: str
+    other: int
+    out: str
+
+
+def build(cache=None, policy=None):
+    calls = []
+
+    def rewrite(state):
+        calls.append(state["query"])
+        return {"out": state["query"].upper()}
+
+    flow = FlowEngine(State, node_cache=cache)
+    flow.add_node("rewrite", rewrite, cache=policy or CachePolicy(keys=["query"]))
+    flow.add_edge(START, "rewrite")
+    flow.add_edge("rewrite", END)
+    return flow.build(), calls
+
+
+class Color(Enum):
+    RED = "red"
+
+
+class Query:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def test_hit_and_miss():
+    async def run():
+        flow, calls = build()
+        first = await flow.invoke({"query": "a", "other": 1})
+        # Keys the policy doesn't name don't change the cache key
+        second = await flow.invoke({"query": "a", "other": 2})
+        third = await flow.invoke({"query": "b", "other": 2})
+
+        assert calls == ["a", "b"]
+        assert (first["out"], second["out"], third["out"]) == ("A", "A", "B")
+        assert isinstance(flow.node_cache, InMemoryNodeCache)
+        stats = flow.node_cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert stats["nodes"]["rewrite"] == {"hits": 1, "misses": 2}
+
+    asyncio.run(run())
+
+
+def test_eviction_and_expiry():
+    async def run():
+        cache = InMemoryNodeCache(max_size=2)
+        await cache.set("a", {"x": 1})
+        await cache.set("b", {"x": 2})
+        await cache.get("a")
+        await cache.set("c", {"x": 3})
+        # The least recently used result is evicted
+        assert (await cache.get("b"))[0] is False
+        assert (await cache.get("a"))[0] is True
+
+        await cache.set("t", {"x": 1}, ttl=0.01)
+        await asyncio.sleep(0.02)
+        assert (await cache.get("t"))[0] is False
+
+    asyncio.run(run())
+
+
+def test_redis_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisNodeCache(ttl=10)
+    cache._client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def run():
+        flow, calls = build(cache)
+        await flow.invoke({"query": "a", "other": 1})
+        result = await flow.invoke({"query": "a", "other": 1})
+        await cache.clear()
+        await flow.invoke({"query": "a", "other": 1})
+        await cache.close()
+
+        assert result["out"] == "A"
+        assert calls == ["a", "a"]
+
+    asyncio.run(run())
+
+
+def test_failing_cache_runs_the_node():
+    class FailingCache(InMemoryNodeCache):
+        async def get(self, key):
+            raise RuntimeError("cache down")
+
+    flow, calls = build(FailingCache())
+    with pytest.warns(RuntimeWarning, match="cache down"):
+        result = asyncio.run(flow.invoke({"query": "a", "other": 1}))
+
+    assert result["out"] == "A"
+    assert calls == ["a"]
+
+
+def test_stream_node_cannot_be_cached():
+    flow = FlowEngine(State)
+    with pytest.raises(LLMfyException):
+        flow.add_node("stream", lambda state: None, stream=True, cache=CachePolicy())
+
+
+def test_in_memory_cache_copies_updates():
+    async def run():
+        cache = InMemoryNodeCache()
+        updates = {"docs": ["a"]}
+        await cache.set("k", updates)
+        updates["docs"].append("changed")
+
+        hit, cached = await cache.get("k")
+        assert hit
+        assert cached == {"docs": ["a"]}
+        cached["docs"].append("changed")
+        assert (await cache.get("k"))[1] == {"docs": ["a"]}
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"b": 1, "a": [1, 2]},
+        {"x", "y", "z"},
+        Color.RED,
+        datetime(2026, 1, 1, tzinfo=UTC),
+        Query("hello"),
+    ],
+    ids=["dict", "set", "enum", "datetime", "object"],
+)
+def test_key_is_stable(value):
+    policy = CachePolicy(keys=["q"])
+
+    key = policy.make_key("node", {"q": value})
+    assert key.startswith("node:")
+    assert key == policy.make_key("node", {"q": value})
+    assert key != policy.make_key("other", {"q": value})
+
+
+def test_key_of_equal_objects_matches():
+    policy = CachePolicy(keys=["q"])
+
+    assert policy.make_key("n", {"q": Query("a")}) == policy.make_key(
+        "n", {"q": Query("a")}
+    )
+    assert policy.make_key("n", {"q": Query("a")}) != policy.make_key(
+        "n", {"q": Query("b")}
+    )
+
+
+@pytest.mark.parametrize(
+    "value",
+    [object(), threading.Lock(), Query, lambda: None],
+    ids=["object", "lock", "class", "function"],
+)
+def test_unstable_key_raises(value):
+    policy = CachePolicy(keys=["q"])
+
+    with pytest.raises(LLMfyException, match="key_func"):
+        policy.make_key("node", {"q": value})
+
+    keyed = CachePolicy(key_func=lambda state: "fixed")
+    assert keyed.make_key("node", {"q": value}).startswith("node:")
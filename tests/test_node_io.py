@@ -0,0 +1,129 @@
+import asyncio
+import pickle
+from typing import Annotated, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, CachePolicy, FlowEngine, InMemoryCheckpointer
+from llmfy.flow_engine.state.node_state import StrictNodeState, project_state
+
+
+def add(old, new):
+    return (old or []) + new
+
+
+class State(TypedDict):
+    a: int
+    b: int
+    c: int
+    log: Annotated[list[str], add]
+
+
+INPUT = {"a": 1, "b": 0, "c": 0, "log": []}
+
+
+def build(seen, strict_io=False, checkpointer=None, misuse=None):
+    """Chain first -> second, `misuse` makes a node read or write an undeclared key."""
+
+    def first(state):
+        seen["first"] = dict(state)
+        if misuse == "read":
+            state.get("c")
+        return {"b": state["a"] + 1, "log": ["first"]}
+
+    def second(state):
+        seen["second"] = dict(state)
+        updates = {"c": state["b"] * 2}
+        if misuse == "write":
+            updates["a"] = 0
+        return updates
+
+    flow = FlowEngine(State, checkpointer=checkpointer, strict_io=strict_io)
+    flow.add_node("first", first, reads=["a"], writes=["b", "log"])
+    flow.add_node("second", second, reads=["b"], writes=["c"])
+    flow.add_edge(START, "first")
+    flow.add_edge("first", "second")
+    flow.add_edge("second", END)
+    return flow.build()
+
+
+def test_nodes_receive_their_reads():
+    seen = {}
+    checkpointer = InMemoryCheckpointer()
+    flow = build(seen, checkpointer=checkpointer)
+    state = asyncio.run(flow.invoke(dict(INPUT), session_id="s1"))
+
+    assert state == {"a": 1, "b": 2, "c": 4, "log": ["first"]}
+    assert seen == {"first": {"a": 1}, "second": {"b": 2}}
+
+    # Checkpoints still hold the full state
+    async def load_all():
+        checkpoints = await checkpointer.list("s1")
+        return [
+            await checkpointer.load("s1", checkpoint.metadata.checkpoint_id)
+            for checkpoint in checkpoints
+        ]
+
+    for checkpoint in asyncio.run(load_all()):
+        assert set(checkpoint.state) == {"a", "b", "c", "log"}
+    assert asyncio.run(checkpointer.load("s1")).state == state
+
+
+def test_strict_io_rejects_undeclared_read():
+    flow = build({}, strict_io=True, misuse="read")
+
+    with pytest.raises(LLMfyException, match="reads 'c'"):
+        asyncio.run(flow.invoke(dict(INPUT)))
+
+
+def test_strict_io_rejects_undeclared_write():
+    flow = build({}, strict_io=True, misuse="write")
+    with pytest.raises(LLMfyException, match="writes="):
+        asyncio.run(flow.invoke(dict(INPUT)))
+
+    # Without strict_io the update is applied
+    flow = build({}, misuse="write")
+    assert asyncio.run(flow.invoke(dict(INPUT)))["a"] == 0
+
+
+def test_strict_state_pickles():
+    state = project_state({"a": 1, "b": 2}, "node", frozenset({"a", "x"}), strict=True)
+    restored = pickle.loads(pickle.dumps(state, protocol=5))
+
+    assert isinstance(restored, StrictNodeState)
+    assert restored == {"a": 1}
+    # Declared but missing keys raise KeyError, undeclared ones LLMfyException
+    with pytest.raises(KeyError):
+        restored["x"]
+    with pytest.raises(LLMfyException):
+        restored["b"]
+
+
+def single_node(**kwargs):
+    flow = FlowEngine(State)
+    flow.add_node("node", lambda state: {}, **kwargs)
+    flow.add_edge(START, "node")
+    flow.add_edge("node", END)
+    return flow
+
+
+def fan_out(writes):
+    flow = FlowEngine(State)
+    for name in ("x", "y"):
+        flow.add_node(name, lambda state: {}, writes=writes)
+        flow.add_edge(START, name)
+        flow.add_edge(name, END)
+    return flow
+
+
+def test_build_validates_declarations():
+    with pytest.raises(LLMfyException, match="zz"):
+        single_node(reads=["zz"]).build()
+    with pytest.raises(LLMfyException, match="must declare b"):
+        single_node(reads=["a"], cache=CachePolicy(keys=["b"])).build()
+    with pytest.raises(LLMfyException, match="write a without"):
+        fan_out(["a", "log"]).build()
+
+    # Parallel writes to a key with a reducer are merged
+    fan_out(["log"]).build()
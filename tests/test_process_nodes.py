@@ -0,0 +1,124 @@
+import asyncio
+import os
+from typing import Any, TypedDict
+
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import END, START, FlowEngine
+from llmfy.flow_engine.process import pack_state, release_segments, unpack_state
+
+np = pytest.importorskip("numpy")
+
+
+class State(TypedDict):
+    array: Any
+    total: float
+    pid: int
+    doubled: Any
+
+
+# Process nodes are module level, so the worker processes can import them
+def total(state):
+    array = state["array"]
+    return {"total": float(array.sum()), "pid": os.getpid(), "doubled": array * 2}
+
+
+def write_in_place(state):
+    state["array"][0] = 99
+    return {"total": float(state["array"][0])}
+
+
+def fail(state):
+    raise ValueError("process node failed")
+
+
+def build(func):
+    flow = FlowEngine(State, max_processes=2)
+    flow.add_node("node", func, executor="process")
+    flow.add_edge(START, "node")
+    flow.add_edge("node", END)
+    return flow.build()
+
+
+def shared_segments():
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return set(os.listdir("/dev/shm"))
+
+
+def test_process_node_runs_in_worker():
+    before = shared_segments()
+    array = np.arange(1_000_000, dtype=np.float64)
+
+    async def run():
+        flow = build(total)
+        try:
+            state = await flow.invoke({"array": array})
+            small = await flow.invoke({"array": np.arange(10.0)})
+        finally:
+            await flow.close()
+        return state, small
+
+    state, small = asyncio.run(run())
+    assert state["pid"] != os.getpid()
+    assert state["total"] == array.sum()
+    assert np.array_equal(state["doubled"], array * 2)
+    assert state["doubled"].flags.writeable
+    assert small["total"] == 45
+    # Shared memory blocks are released after every run
+    assert shared_segments() <= before
+
+
+def test_node_writes_to_its_own_copy():
+    array = np.zeros(1_000_000)
+
+    async def run():
+        flow = build(write_in_place)
+        try:
+            return await flow.invoke({"array": array})
+        finally:
+            await flow.close()
+
+    state = asyncio.run(run())
+    assert state["total"] == 99
+    assert array[0] == 0
+
+
+def test_error_is_raised_in_caller():
+    async def run():
+        flow = build(fail)
+        try:
+            await flow.invoke({"array": np.arange(10.0)})
+        finally:
+            await flow.close()
+
+    with pytest.raises(ValueError, match="process node failed"):
+        asyncio.run(run())
+
+
+def test_invalid_process_nodes_rejected():
+    async def async_node(state):
+        return {}
+
+    flow = FlowEngine(State)
+    with pytest.raises(LLMfyException, match="module-level"):
+        flow.add_node("lambda", lambda state: {}, executor="process")
+    with pytest.raises(LLMfyException, match="sync"):
+        flow.add_node("async", async_node, executor="process")
+    with pytest.raises(LLMfyException, match="Unknown executor"):
+        flow.add_node("gpu", total, executor="gpu")
+    with pytest.raises(LLMfyException):
+        flow.add_node("stream", total, executor="process", stream=True)
+
+
+def test_pack_state_round_trip():
+    array = np.ones((2048, 256))
+    packed, segments = pack_state({"array": array, "items": [1, 2]})
+    assert segments
+
+    state, attached = unpack_state(packed, copy=True)
+    release_segments(attached, unlink=False)
+    release_segments(segments, unlink=True)
+    assert np.array_equal(state["array"], array)
+    assert state["items"] == [1, 2]
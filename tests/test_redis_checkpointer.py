@@ -0,0 +1,95 @@
+import asyncio
+import time
+from datetime import UTC, datetime
+
+import pytest
+
+from llmfy.flow_engine.checkpointer import RedisCheckpointer
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointDelta,
+    CheckpointMetadata,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_checkpointer(**kwargs) -> RedisCheckpointer:
+    checkpointer = RedisCheckpointer(**kwargs)
+    checkpointer._client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return checkpointer
+
+
+def make_checkpoint(
+    step: int, state: dict, delta: CheckpointDelta | None = None
+) -> Checkpoint:
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"c{step}",
+        session_id="s",
+        timestamp=datetime.now(UTC),
+        node_name="node",
+        step=step,
+        parent_id=f"c{step - 1}" if step else None,
+    )
+    return Checkpoint(metadata=metadata, state=state, delta=delta)
+
+
+@pytest.mark.parametrize("use_lua", [False, True])
+def test_ttl_renews_chain_of_saved_delta(use_lua):
+    async def run():
+        checkpointer = make_checkpointer(ttl=1, use_lua=use_lua)
+        await checkpointer.save(make_checkpoint(0, {"n": 0, "log": []}))
+        time.sleep(0.6)
+        delta = CheckpointDelta(updates={"n": 1}, appends={"log": [0]})
+        await checkpointer.save(make_checkpoint(1, {"n": 1, "log": [0]}, delta))
+        # The full snapshot was saved more than its TTL ago
+        time.sleep(0.6)
+
+        checkpoint = await checkpointer.load("s")
+        assert checkpoint is not None
+        assert checkpoint.state == {"n": 1, "log": [0]}
+        assert [c.metadata.checkpoint_id for c in await checkpointer.list("s")] == [
+            "c1",
+            "c0",
+        ]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("use_lua", [False, True])
+def test_save_is_one_round_trip(use_lua, monkeypatch):
+    from redis.asyncio.client import Pipeline, Redis
+
+    round_trips = 0
+    execute_command = Redis.execute_command
+    execute = Pipeline.execute
+
+    async def count_command(self, *args, **kwargs):
+        nonlocal round_trips
+        if not isinstance(self, Pipeline):
+            round_trips += 1
+        return await execute_command(self, *args, **kwargs)
+
+    async def count_pipeline(self, *args, **kwargs):
+        nonlocal round_trips
+        round_trips += 1
+        return await execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(Redis, "execute_command", count_command)
+    monkeypatch.setattr(Pipeline, "execute", count_pipeline)
+
+    async def run():
+        checkpointer = make_checkpointer(use_lua=use_lua)
+        # The first save also loads the script
+        await checkpointer.save(make_checkpoint(0, {"n": 0, "log": []}))
+        for step in range(1, 4):
+            round_trips_before = round_trips
+            delta = CheckpointDelta(updates={"n": step}, appends={"log": [step - 1]})
+            state = {"n": step, "log": list(range(step))}
+            await checkpointer.save(make_checkpoint(step, state, delta))
+            assert round_trips - round_trips_before == 1
+
+        checkpoint = await checkpointer.load("s")
+        assert checkpoint.state == {"n": 3, "log": [0, 1, 2]}
+
+    asyncio.run(run())
@@ -0,0 +1,36 @@
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine.checkpointer import RetentionPolicy
+
+IDS = ["a", "b", "c", "d", "e"]
+TIMESTAMPS = [1, 2, 3, 4, 5]
+
+
+def test_max_checkpoints():
+    policy = RetentionPolicy(max_checkpoints=2)
+
+    assert policy.prunable(IDS, TIMESTAMPS, {}) == ["a", "b", "c"]
+    assert policy.prunable(IDS[:2], TIMESTAMPS[:2], {}) == []
+
+
+def test_kept_deltas_keep_their_chain():
+    policy = RetentionPolicy(max_checkpoints=2)
+
+    assert policy.prunable(IDS, TIMESTAMPS, {"d": "c", "e": "c"}) == ["a", "b"]
+    assert policy.prunable(IDS, TIMESTAMPS, {"d": "b", "e": "b"}) == ["a"]
+
+
+def test_max_age():
+    policy = RetentionPolicy(max_age=10)
+
+    assert policy.prunable(IDS, TIMESTAMPS, {}, now=13.5) == ["a", "b", "c"]
+    # The latest checkpoint is only pruned by compaction
+    assert policy.prunable(IDS, TIMESTAMPS, {}, now=100) == ["a", "b", "c", "d"]
+    assert policy.prunable(IDS, TIMESTAMPS, {}, keep_latest=False, now=100) == IDS
+
+
+@pytest.mark.parametrize("kwargs", [{"max_checkpoints": 0}, {"max_age": 0}])
+def test_invalid_policy(kwargs):
+    with pytest.raises(LLMfyException):
+        RetentionPolicy(**kwargs)
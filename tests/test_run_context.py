@@ -0,0 +1,78 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine, InMemoryCheckpointer
+
+
+class State(TypedDict):
+    counter: int
+    log: Annotated[list[str], operator.add]
+
+
+def build(checkpointer=None):
+    async def increment(state):
+        # Every other session runs while this one waits
+        await asyncio.sleep(0.001)
+        return {"counter": state["counter"] + 1, "log": [f"inc{state['counter']}"]}
+
+    async def scale(state):
+        await asyncio.sleep(0.001)
+        return {"counter": state["counter"] * 10, "log": ["scale"]}
+
+    flow = FlowEngine(State, checkpointer=checkpointer)
+    flow.add_node("increment", increment)
+    flow.add_node("scale", scale)
+    flow.add_edge(START, "increment")
+    flow.add_edge("increment", "scale")
+    flow.add_edge("scale", END)
+    return flow.build()
+
+
+def test_concurrent_runs_keep_their_own_state():
+    async def run():
+        flow = build()
+        results = await asyncio.gather(
+            *[flow.invoke({"counter": i, "log": []}) for i in range(50)]
+        )
+        for i, result in enumerate(results):
+            assert result == {"counter": (i + 1) * 10, "log": [f"inc{i}", "scale"]}
+
+    asyncio.run(run())
+
+
+def test_concurrent_sessions_resume_their_own_checkpoints():
+    async def run():
+        flow = build(InMemoryCheckpointer())
+        sessions = [f"s{i}" for i in range(20)]
+        await asyncio.gather(
+            *[
+                flow.invoke({"counter": i, "log": []}, session_id=session_id)
+                for i, session_id in enumerate(sessions)
+            ]
+        )
+        # The second runs start from the checkpoints of the first ones
+        results = await asyncio.gather(
+            *[flow.invoke(None, session_id=session_id) for session_id in sessions]
+        )
+
+        for i, result in enumerate(results):
+            first = (i + 1) * 10
+            assert result["counter"] == (first + 1) * 10
+            assert result["log"] == [f"inc{i}", "scale", f"inc{first}", "scale"]
+            checkpoint = await flow.get_checkpoint(sessions[i])
+            assert checkpoint.metadata.session_id == sessions[i]
+
+    asyncio.run(run())
+
+
+def test_built_engine_keeps_no_run_state():
+    async def run():
+        flow = build()
+        before = dict(vars(flow))
+        await flow.invoke({"counter": 1, "log": []})
+
+        assert not hasattr(flow, "state")
+        assert vars(flow).keys() == before.keys()
+
+    asyncio.run(run())
@@ -0,0 +1,74 @@
+import pytest
+
+from llmfy.exception.llmfy_exception import LLMfyException
+from llmfy.flow_engine import JsonSerializer, MsgpackSerializer, PickleSerializer
+from llmfy.flow_engine.checkpointer.serializer import (
+    MSGPACK_AVAILABLE,
+    ZSTD_AVAILABLE,
+    loads_payload,
+)
+
+SERIALIZERS = [
+    JsonSerializer(),
+    JsonSerializer(compression="zlib", compression_threshold=0),
+    PickleSerializer(),
+    PickleSerializer(compression="zlib", compression_threshold=0),
+]
+if MSGPACK_AVAILABLE:
+    SERIALIZERS.append(MsgpackSerializer())
+if ZSTD_AVAILABLE:
+    SERIALIZERS.append(PickleSerializer(compression="zstd", compression_threshold=0))
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_round_trip(serializer):
+    data = {"messages": ["hi " * 100], "n": 3}
+    payload = serializer.dumps(data)
+
+    assert payload[0] == 1
+    assert payload[1] == serializer.format_id
+    assert serializer.loads(payload) == data
+
+
+def test_compression_threshold():
+    serializer = JsonSerializer(compression="zlib", compression_threshold=100)
+
+    assert serializer.dumps({"a": 1})[2] == 0
+    big = serializer.dumps({"a": "x" * 5000})
+    assert big[2] == 1
+    assert len(big) < 200
+
+
+def test_json_text_is_read_by_every_serializer():
+    assert loads_payload('{"a": 1}') == {"a": 1}
+    for serializer in SERIALIZERS:
+        assert serializer.loads(b'{"a": 1}') == {"a": 1}
+
+
+@pytest.mark.parametrize(
+    "serializer", [None, JsonSerializer(compression="zlib")], ids=["none", "json"]
+)
+def test_pickle_rejected_unless_configured(serializer):
+    pickled = PickleSerializer().dumps({"a": 1})
+
+    with pytest.raises(LLMfyException):
+        loads_payload(pickled, serializer)
+    assert loads_payload(pickled, PickleSerializer(protocol=4)) == {"a": 1}
+
+
+def test_switching_serializers():
+    writers = [JsonSerializer(compression="zlib", compression_threshold=0)]
+    if MSGPACK_AVAILABLE:
+        writers.append(MsgpackSerializer())
+    for writer in writers:
+        payload = writer.dumps({"a": 1})
+        assert loads_payload(payload) == {"a": 1}
+        for serializer in SERIALIZERS:
+            assert serializer.loads(payload) == {"a": 1}
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(LLMfyException):
+        loads_payload(b"\x01\x09\x00")
+    with pytest.raises(LLMfyException):
+        loads_payload(b"\x09\x01\x00")
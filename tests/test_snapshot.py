@@ -0,0 +1,83 @@
+import asyncio
+from typing import Annotated, TypedDict
+
+from llmfy.flow_engine import END, START, FlowEngine, InMemoryCheckpointer
+from llmfy.flow_engine.state import SnapshotBuilder
+
+
+def extend(old: list | None, new: list) -> list:
+    """Reducer appending in place."""
+    old = old if old is not None else []
+    old.extend(new)
+    return old
+
+
+class State(TypedDict):
+    messages: Annotated[list, extend]
+    meta: dict
+
+
+def test_unchanged_elements_are_shared():
+    builder = SnapshotBuilder()
+    messages = [{"n": 0}, {"n": 1}]
+    state = {"messages": messages, "meta": {"tags": [1]}}
+
+    first = builder.take(state)
+    assert first["messages"] == messages
+    assert first["messages"][0] is not messages[0]
+
+    state["messages"] = [*messages, {"n": 2}]
+    second = builder.take(state, {"messages"})
+    assert second["messages"][0] is first["messages"][0]
+    assert second["messages"][2] is not state["messages"][2]
+    assert second["meta"] is first["meta"]
+    assert builder.appends == {"messages": [{"n": 2}]}
+
+
+def test_in_place_reducer_is_snapshotted():
+    builder = SnapshotBuilder()
+    state = {"messages": [{"n": 0}], "meta": {}}
+    first = builder.take(state)
+
+    # Same list object, extended and with an element changed in place
+    state["messages"].append({"n": 1})
+    state["messages"][0]["n"] = "changed"
+    second = builder.take(state, {"messages"})
+
+    assert first["messages"] == [{"n": 0}]
+    assert second["messages"] == [{"n": "changed"}, {"n": 1}]
+    assert second["messages"][0] is not first["messages"][0]
+
+
+def test_checkpoints_keep_their_state():
+    async def run():
+        checkpointer = InMemoryCheckpointer(snapshot_interval=2)
+
+        async def first(state):
+            return {"messages": ["a"]}
+
+        async def second(state):
+            state["meta"]["seen"].append("b")
+            return {"messages": ["b"], "meta": state["meta"]}
+
+        flow = FlowEngine(State, checkpointer=checkpointer)
+        flow.add_node("first", first)
+        flow.add_node("second", second)
+        flow.add_edge(START, "first")
+        flow.add_edge("first", "second")
+        flow.add_edge("second", END)
+        flow.build()
+
+        initial = {"messages": ["0"], "meta": {"seen": []}}
+        await flow.invoke(initial, session_id="s")
+
+        assert initial == {"messages": ["0"], "meta": {"seen": []}}
+        states = [c.state for c in await checkpointer.list("s")][::-1]
+        assert [s["messages"] for s in states] == [["0"], ["0", "a"], ["0", "a", "b"]]
+        assert [s["meta"] for s in states] == [
+            {"seen": []},
+            {"seen": []},
+            {"seen": ["b"]},
+        ]
+
+    asyncio.run(run())
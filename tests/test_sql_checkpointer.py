@@ -0,0 +1,104 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from llmfy.flow_engine.checkpointer import SQLCheckpointer
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointDelta,
+    CheckpointMetadata,
+)
+
+pytest.importorskip("sqlalchemy")
+
+START_TIME = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+@pytest.fixture(params=["sync", "async"])
+def url(request, tmp_path):
+    if request.param == "async":
+        pytest.importorskip("aiosqlite")
+        return f"sqlite+aiosqlite:///{tmp_path}/checkpoints.db"
+    return f"sqlite:///{tmp_path}/checkpoints.db"
+
+
+def make_checkpoint(session_id: str, step: int, full: bool = False) -> Checkpoint:
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"{session_id}-{step}",
+        session_id=session_id,
+        timestamp=START_TIME + timedelta(seconds=step),
+        node_name="step",
+        step=step,
+        parent_id=f"{session_id}-{step - 1}" if step else None,
+    )
+    delta = None
+    if step and not full:
+        delta = CheckpointDelta(updates={"n": step}, appends={"log": [step - 1]})
+    state = {"n": step, "log": list(range(step))}
+    return Checkpoint(metadata=metadata, state=state, delta=delta)
+
+
+@pytest.mark.parametrize("head_table", [False, True])
+def test_save_many_sessions(url, head_table):
+    async def run():
+        checkpointer = SQLCheckpointer(url, snapshot_interval=3, head_table=head_table)
+        try:
+            # Sessions interleaved in one batch keep their own delta chains
+            await checkpointer.save_many(
+                [make_checkpoint(s, step) for step in range(7) for s in ("a", "b")]
+            )
+
+            for session_id in ("a", "b"):
+                latest = await checkpointer.load(session_id)
+                assert latest.metadata.checkpoint_id == f"{session_id}-6"
+                listed = await checkpointer.list(session_id, limit=100)
+                assert [c.state for c in listed] == [
+                    {"n": step, "log": list(range(step))} for step in range(6, -1, -1)
+                ]
+
+            await checkpointer.save_many([])
+            assert (await checkpointer.load("a")).state["n"] == 6
+        finally:
+            await checkpointer.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("head_table", [False, True])
+def test_latest_checkpoint(url, head_table):
+    async def run():
+        checkpointer = SQLCheckpointer(url, head_table=head_table)
+        try:
+            for step in range(4):
+                await checkpointer.save(make_checkpoint("s", step, full=True))
+            # An older checkpoint saved late doesn't become the latest
+            older = make_checkpoint("s", 10, full=True)
+            older.metadata.checkpoint_id = "late"
+            older.metadata.timestamp = START_TIME - timedelta(seconds=1)
+            await checkpointer.save(older)
+            assert (await checkpointer.load("s")).metadata.checkpoint_id == "s-3"
+
+            # Deleting the latest falls back to the one before it
+            await checkpointer.delete("s", "s-3")
+            assert (await checkpointer.load("s")).metadata.checkpoint_id == "s-2"
+
+            await checkpointer.save(make_checkpoint("s", 5, full=True))
+            assert (await checkpointer.load("s")).metadata.checkpoint_id == "s-5"
+        finally:
+            await checkpointer.close()
+
+    asyncio.run(run())
+
+
+def test_pool_settings(tmp_path):
+    checkpointer = SQLCheckpointer(
+        f"sqlite:///{tmp_path}/checkpoints.db",
+        pool_size=2,
+        max_overflow=3,
+        pool_recycle=60,
+    )
+    assert checkpointer.engine.pool.size() == 2
+    assert checkpointer.engine.pool._recycle == 60
+    # Every connection of the pool can be busy on a thread
+    assert checkpointer.max_workers == 5
@@ -0,0 +1,102 @@
+from typing import Annotated, Any, TypedDict
+
+from pydantic import BaseModel
+
+from llmfy.flow_engine.state import StateDeserializer
+
+
+class Message(BaseModel):
+    role: str
+    content: str
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Config(TypedDict):
+    name: str
+
+
+def append(old, new):
+    return (old or []) + new
+
+
+def test_pydantic_models_are_rebuilt():
+    deserializer = StateDeserializer(
+        {"messages": list[Message], "last": Message | None}
+    )
+    state = deserializer.deserialize(
+        {
+            "messages": [{"role": "user", "content": "hi"}],
+            "last": {"role": "ai", "content": "hello"},
+        }
+    )
+
+    assert state["messages"] == [Message(role="user", content="hi")]
+    assert state["last"] == Message(role="ai", content="hello")
+
+
+def test_serialized_objects_are_rebuilt():
+    deserializer = StateDeserializer(
+        {"points": dict[str, Point], "origin": Point | None}
+    )
+    state = deserializer.deserialize(
+        {
+            "points": {"a": {"__dict__": {"x": 1, "y": 2}}},
+            "origin": {
+                "__type__": "Point",
+                "__module__": __name__,
+                "data": {"x": 0, "y": 0},
+            },
+        }
+    )
+
+    assert (state["points"]["a"].x, state["points"]["a"].y) == (1, 2)
+    assert isinstance(state["origin"], Point)
+
+
+def test_rebuilt_values_pass_through():
+    deserializer = StateDeserializer({"messages": list[Message], "count": int})
+    messages = [Message(role="user", content="hi")]
+    state = deserializer.deserialize({"messages": messages, "count": 3})
+
+    # Nothing to rebuild, the list is not copied
+    assert state["messages"] is messages
+    assert state["count"] == 3
+
+
+def test_primitives_are_cast():
+    deserializer = StateDeserializer({"count": int, "ratio": float, "name": str})
+    state = deserializer.deserialize({"count": "3", "ratio": 1, "name": None})
+
+    assert state == {"count": 3, "ratio": 1.0, "name": None}
+
+
+def test_untyped_fields_are_kept():
+    deserializer = StateDeserializer(
+        {
+            "anything": Any,
+            "config": Config,
+            "items": Annotated[list, append],
+            "pair": int | str,
+        }
+    )
+    value = {
+        "anything": {"role": "user", "content": "hi"},
+        "config": {"name": "x"},
+        "items": [{"a": 1}],
+        "pair": "1",
+        "unknown": 1,
+    }
+
+    assert deserializer.deserialize(value) == value
+
+
+def test_invalid_object_is_kept_as_dict():
+    deserializer = StateDeserializer({"last": Message})
+    state = deserializer.deserialize({"last": {"role": "user"}})
+
+    assert state["last"] == {"role": "user"}
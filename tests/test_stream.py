@@ -0,0 +1,137 @@
+import asyncio
+from typing import TypedDict
+
+import pytest
+from pydantic import ValidationError
+
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    FlowEngineStreamType,
+    InMemoryCheckpointer,
+    NodeStreamResponse,
+    NodeStreamType,
+)
+
+
+class State(TypedDict):
+    text: str
+
+
+class Producer:
+    """Stream node yielding `chunks` text chunks, counting the produced ones."""
+
+    def __init__(self, chunks: int, delay: float = 0.0, fail: bool = False):
+        self.chunks = chunks
+        self.delay = delay
+        self.fail = fail
+        self.produced = 0
+
+    async def __call__(self, state):
+        text = ""
+        for i in range(self.chunks):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.produced += 1
+            text += f"t{i} "
+            yield NodeStreamResponse(type=NodeStreamType.STREAM, content=f"t{i} ")
+        if self.fail:
+            raise ValueError("stream failed")
+        yield NodeStreamResponse(
+            type=NodeStreamType.RESULT, content=text, state={"text": text}
+        )
+
+
+def build(producer: Producer, checkpointer=None):
+    async def node(state):
+        async for response in producer(state):
+            yield response
+
+    flow = FlowEngine(
+        State,
+        checkpointer=checkpointer,
+        durability="exit-only" if checkpointer else "sync",
+    )
+    flow.add_node("node", node, stream=True)
+    flow.add_edge(START, "node")
+    flow.add_edge("node", END)
+    return flow.build()
+
+
+async def collect(flow, **kwargs):
+    return [event async for event in flow.stream({"text": ""}, **kwargs)]
+
+
+def test_events_are_new_and_frozen():
+    events = asyncio.run(collect(build(Producer(5))))
+
+    # START, 5 chunks and the result
+    assert len({id(event) for event in events}) == len(events) == 7
+    with pytest.raises(ValidationError):
+        events[0].type = FlowEngineStreamType.RESULT
+    assert events[0].state == {"text": ""}
+    assert events[-1].state["text"] == "t0 t1 t2 t3 t4 "
+
+
+def test_coalesce_merges_chunks_up_to_bytes():
+    flow = build(Producer(50, delay=0.0005))
+    events = asyncio.run(collect(flow, coalesce_interval=0.01, coalesce_bytes=40))
+
+    chunks = [event for event in events if event.type == FlowEngineStreamType.STREAM]
+    assert "".join(event.content for event in chunks) == "".join(
+        f"t{i} " for i in range(50)
+    )
+    assert len(chunks) < 50
+    # A merge ends with the chunk reaching the byte size
+    assert all(len(event.content) < 40 + len("t49 ") for event in chunks)
+
+
+def test_buffer_runs_ahead_of_reader():
+    producer = Producer(20)
+    flow = build(producer)
+
+    async def run():
+        events = flow.stream({"text": ""}, max_buffer=100)
+        await anext(events)
+        await asyncio.sleep(0.05)
+        produced = producer.produced
+        rest = [event async for event in events]
+        return produced, rest
+
+    produced, rest = asyncio.run(run())
+    assert produced == 20
+    assert rest[-1].type == FlowEngineStreamType.RESULT
+
+
+def test_buffer_is_bounded():
+    producer = Producer(50)
+    flow = build(producer)
+
+    async def run():
+        events = flow.stream({"text": ""}, max_buffer=5)
+        await anext(events)
+        await asyncio.sleep(0.05)
+        await events.aclose()
+
+    asyncio.run(run())
+    assert producer.produced < 10
+
+
+def test_buffered_error_is_raised():
+    with pytest.raises(ValueError, match="stream failed"):
+        asyncio.run(collect(build(Producer(3, fail=True)), max_buffer=4))
+
+
+def test_early_close_finishes_run():
+    checkpointer = InMemoryCheckpointer()
+    flow = build(Producer(5), checkpointer)
+
+    async def run():
+        events = flow.stream({"text": ""}, session_id="s1")
+        await anext(events)
+        await events.aclose()
+        return await checkpointer.list("s1")
+
+    # exit-only durability still saves the final checkpoint
+    assert len(asyncio.run(run())) == 1
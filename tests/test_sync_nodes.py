@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import threading
+import time
+from typing import TypedDict
+
+from llmfy.flow_engine import (
+    END,
+    START,
+    FlowEngine,
+    NodeStreamResponse,
+    NodeStreamType,
+)
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class State(TypedDict):
+    thread: str
+    n: int
+
+
+def test_sync_node_does_not_block_the_event_loop():
+    async def run():
+        def blocking(state):
+            time.sleep(0.2)
+            return {"thread": threading.current_thread().name}
+
+        flow = FlowEngine(State, max_workers=2)
+        flow.add_node("blocking", blocking)
+        flow.add_edge(START, "blocking")
+        flow.add_edge("blocking", END)
+        flow.build()
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        result = await flow.invoke({"n": 0})
+        ticker.cancel()
+        await flow.close()
+
+        assert result["thread"].startswith("llmfy-flow")
+        assert ticks >= 5
+
+    asyncio.run(run())
+
+
+def test_pools_and_context_of_sync_functions():
+    seen = {}
+
+    def node(state):
+        seen["node"] = threading.current_thread().name
+        seen["request_id"] = request_id.get()
+        return {"n": 1}
+
+    def condition(state):
+        seen["condition"] = threading.current_thread().name
+        return "generate"
+
+    def generate(state):
+        seen["generate"] = threading.current_thread().name
+        yield NodeStreamResponse(type=NodeStreamType.STREAM, content="a")
+        yield NodeStreamResponse(
+            type=NodeStreamType.RESULT, content="ab", state={"thread": "done"}
+        )
+
+    flow = FlowEngine(State)
+    flow.add_node("node", node, max_workers=2)
+    flow.add_node("generate", generate, stream=True)
+    flow.add_edge(START, "node")
+    flow.add_conditional_edge("node", ["generate"], condition)
+    flow.add_edge("generate", END)
+    flow.build()
+
+    async def run():
+        request_id.set("r1")
+        contents = [event.content async for event in flow.stream({"n": 0})]
+        await flow.close()
+        return contents
+
+    assert asyncio.run(run()) == [None, {"n": 1}, "a", "ab"]
+    # A node with max_workers gets its own pool, the others share the engine's
+    assert seen["node"].startswith("llmfy-flow-node_")
+    assert seen["condition"].startswith("llmfy-flow_")
+    assert seen["generate"].startswith("llmfy-flow_")
+    # Context variables of the caller are visible in the threads
+    assert seen["request_id"] == "r1"
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import UTC, datetime
+
+import pytest
+
+from llmfy.flow_engine.checkpointer import (
+    InMemoryCheckpointer,
+    TieredCheckpointer,
+    WriteMode,
+)
+from llmfy.flow_engine.checkpointer.base_checkpointer import (
+    Checkpoint,
+    CheckpointMetadata,
+)
+
+
+def make_checkpoint(session_id: str, step: int) -> Checkpoint:
+    metadata = CheckpointMetadata(
+        checkpoint_id=f"{session_id}-{step}",
+        session_id=session_id,
+        timestamp=datetime.now(UTC),
+        node_name="node",
+        step=step,
+        parent_id=f"{session_id}-{step - 1}" if step else None,
+    )
+    return Checkpoint(metadata=metadata, state={"messages": list(range(step + 1))})
+
+
+@pytest.mark.parametrize("write_mode", list(WriteMode))
+def test_save_load_list(write_mode):
+    async def run():
+        cold = InMemoryCheckpointer()
+        async with TieredCheckpointer(
+            InMemoryCheckpointer(), cold, write_mode=write_mode
+        ) as checkpointer:
+            for step in range(3):
+                await checkpointer.save(make_checkpoint("s", step))
+
+            assert (await checkpointer.load("s")).state["messages"] == [0, 1, 2]
+            listed = await checkpointer.list("s")
+            assert [c.metadata.step for c in listed] == [2, 1, 0]
+            assert checkpointer.get_stats()["hits"] == 1
+            assert checkpointer.get_stats()["pending_writes"] == 0
+            assert len(await cold.list("s")) == 3
+
+    asyncio.run(run())
+
+
+def test_miss_is_cached_from_cold_tier():
+    async def run():
+        cold = InMemoryCheckpointer()
+        await cold.save(make_checkpoint("s", 0))
+        checkpointer = TieredCheckpointer(InMemoryCheckpointer(), cold)
+
+        loaded = await checkpointer.load("s")
+        loaded.state["messages"].append("changed")
+
+        assert (await checkpointer.load("s")).state["messages"] == [0]
+        stats = checkpointer.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    asyncio.run(run())
+
+
+def test_reads_wait_for_their_session_only():
+    class SlowCold(InMemoryCheckpointer):
+        def __init__(self):
+            super().__init__()
+            self.release = asyncio.Event()
+
+        async def save_many(self, checkpoints):
+            if any(c.metadata.session_id == "slow" for c in checkpoints):
+                await self.release.wait()
+            await super().save_many(checkpoints)
+
+    async def run():
+        cold = SlowCold()
+        checkpointer = TieredCheckpointer(
+            InMemoryCheckpointer(), cold, write_mode=WriteMode.BACK
+        )
+        await checkpointer.save(make_checkpoint("fast", 0))
+        await checkpointer.flush("fast")
+        await checkpointer.save(make_checkpoint("slow", 0))
+
+        # The write of the other session is still blocked
+        listed = await asyncio.wait_for(checkpointer.list("fast"), 1)
+        assert [c.metadata.checkpoint_id for c in listed] == ["fast-0"]
+        await asyncio.wait_for(checkpointer.delete("fast"), 1)
+        assert await checkpointer.load("fast") is None
+
+        cold.release.set()
+        assert len(await checkpointer.list("slow")) == 1
+        await checkpointer.close()
+
+    asyncio.run(run())